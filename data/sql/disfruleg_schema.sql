@@ -57,6 +57,7 @@ CREATE TABLE factura (
     fecha_factura DATE NOT NULL,
     id_cliente INT NOT NULL,
     folio_numero INT NOT NULL UNIQUE,
+    fecha_registro TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Orden del costeo del mismo día
     FOREIGN KEY (id_cliente) REFERENCES cliente(id_cliente),
     INDEX idx_folio (folio_numero)
 );
@@ -91,6 +92,7 @@ CREATE TABLE compra (
     id_producto INT NOT NULL,
     cantidad_compra DECIMAL(10,2) NOT NULL,
     precio_unitario_compra DECIMAL(10,2) NOT NULL,
+    fecha_registro TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Orden del costeo del mismo día
     FOREIGN KEY (id_producto) REFERENCES producto(id_producto)
 );
 
@@ -136,7 +138,26 @@ CREATE TABLE log_accesos (
     exito BOOLEAN,
     fecha_intento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     detalle VARCHAR(255),
-    FOREIGN KEY (id_usuario) REFERENCES usuarios_sistema(id_usuario) ON DELETE SET NULL
+    FOREIGN KEY (id_usuario) REFERENCES usuarios_sistema(id_usuario) ON DELETE SET NULL,
+    INDEX idx_log_fecha (fecha_intento)  -- Retención por mes (ver migración 008)
+);
+
+-- Tabla PAGO (un registro por pago de una deuda, ver migración 010)
+CREATE TABLE pago (
+    id_pago INT AUTO_INCREMENT PRIMARY KEY,
+    id_deuda INT NOT NULL,
+    id_cliente INT NOT NULL,
+    monto DECIMAL(10,2) NOT NULL CHECK (monto > 0),
+    metodo_pago VARCHAR(50),
+    referencia_pago VARCHAR(100),
+    id_usuario INT NULL,
+    fecha_pago DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (id_deuda) REFERENCES deuda(id_deuda) ON DELETE CASCADE,
+    FOREIGN KEY (id_cliente) REFERENCES cliente(id_cliente),
+    FOREIGN KEY (id_usuario) REFERENCES usuarios_sistema(id_usuario) ON DELETE SET NULL,
+    INDEX idx_pago_deuda (id_deuda),
+    INDEX idx_pago_cliente_fecha (id_cliente, fecha_pago),  -- Historial de un cliente
+    INDEX idx_pago_fecha (fecha_pago)                       -- Historial general por página
 );
 
 -- Tabla FACTURA_METADATA
@@ -147,6 +168,89 @@ CREATE TABLE factura_metadata (
     FOREIGN KEY (id_factura) REFERENCES factura(id_factura) ON DELETE CASCADE
 );
 
+-- Tabla VENTAS_DIARIAS (resumen por día × producto × grupo, ver migración 002)
+CREATE TABLE ventas_diarias (
+    fecha DATE NOT NULL,
+    id_producto INT NOT NULL,
+    id_grupo INT NOT NULL,
+    cantidad_vendida DECIMAL(14,2) NOT NULL DEFAULT 0,
+    ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+    ingresos_registrados DECIMAL(14,2) NOT NULL DEFAULT 0,
+    lineas INT NOT NULL DEFAULT 0,
+    facturas INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_producto, id_grupo),
+    INDEX idx_ventas_diarias_producto (id_producto),
+    INDEX idx_ventas_diarias_grupo (id_grupo, fecha)
+);
+
+-- Tabla SALDO_CLIENTE (saldos de deuda por cliente, ver migración 009)
+CREATE TABLE saldo_cliente (
+    id_cliente INT PRIMARY KEY,
+    saldo_pendiente DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_deuda_pendiente DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_deuda_pagada DECIMAL(14,2) NOT NULL DEFAULT 0,
+    deudas_pendientes INT NOT NULL DEFAULT 0,
+    deudas_pagadas INT NOT NULL DEFAULT 0,
+    ultima_deuda_generada DATE NULL,
+    ultimo_pago DATE NULL,
+    -- Lista de clientes con saldo (rango) y estadísticas (solo índice)
+    INDEX idx_saldo_cliente_pendiente (saldo_pendiente, total_deuda_pendiente, total_deuda_pagada,
+                                       deudas_pendientes, deudas_pagadas),
+    FOREIGN KEY (id_cliente) REFERENCES cliente(id_cliente) ON DELETE CASCADE
+);
+
+-- Tabla COSTO_VENTA (costo de lo vendido por línea de factura, ver migración 011)
+CREATE TABLE costo_venta (
+    id_detalle INT PRIMARY KEY,
+    id_factura INT NOT NULL,
+    id_producto INT NOT NULL,
+    fecha DATE NOT NULL,
+    cantidad DECIMAL(10,2) NOT NULL,
+    costo DECIMAL(14,2) NOT NULL,
+    cantidad_sin_costo DECIMAL(10,2) NOT NULL DEFAULT 0,  -- Vendida sin existencia: costeada al último precio de compra
+    FOREIGN KEY (id_detalle) REFERENCES detalle_factura(id_detalle) ON DELETE CASCADE,
+    INDEX idx_costo_venta_producto (id_producto, fecha, costo, cantidad_sin_costo),  -- Por producto y período
+    INDEX idx_costo_venta_fecha (fecha, costo),                                     -- Por período
+    INDEX idx_costo_venta_factura (id_factura, costo)                               -- Por cliente
+);
+
+-- Tabla COSTO_LOTE (lo que queda de cada compra sin vender)
+CREATE TABLE costo_lote (
+    id_compra INT PRIMARY KEY,
+    id_producto INT NOT NULL,
+    fecha_compra DATE NOT NULL,
+    cantidad DECIMAL(10,2) NOT NULL,
+    costo DECIMAL(14,4) NOT NULL,  -- Costo total de lo que queda
+    INDEX idx_costo_lote_producto (id_producto, fecha_compra, id_compra)
+);
+
+-- Tabla COSTO_COMPRA (compras ya aplicadas al costeo, ver migración 012)
+CREATE TABLE costo_compra (
+    id_compra INT PRIMARY KEY,
+    id_producto INT NOT NULL,
+    FOREIGN KEY (id_compra) REFERENCES compra(id_compra) ON DELETE CASCADE,
+    INDEX idx_costo_compra_producto (id_producto)
+);
+
+-- Tabla COSTO_PRODUCTO (avance del costeo por producto)
+CREATE TABLE costo_producto (
+    id_producto INT PRIMARY KEY,
+    ultima_venta DATE NULL,                     -- Fecha de la última venta costeada
+    ultima_venta_registro TIMESTAMP NULL,       -- Y su momento de registro
+    ultimo_costo_unitario DECIMAL(10,2) NULL,   -- Precio de la última compra
+    recalcular BOOLEAN NOT NULL DEFAULT FALSE,  -- Una compra se editó o se borró
+    FOREIGN KEY (id_producto) REFERENCES producto(id_producto) ON DELETE CASCADE
+);
+
+-- Tabla COSTO_CONTROL (método y último registro costeado)
+CREATE TABLE costo_control (
+    id INT PRIMARY KEY DEFAULT 1,
+    metodo ENUM('fifo', 'promedio') NOT NULL DEFAULT 'fifo',
+    ultimo_id_detalle INT NOT NULL DEFAULT 0,
+    ultimo_id_compra INT NOT NULL DEFAULT 0,
+    fecha_actualizacion TIMESTAMP NULL
+);
+
 -- Tabla para secuencia de folios
 CREATE TABLE folio_sequence (
     id INT PRIMARY KEY DEFAULT 1,
@@ -164,13 +268,15 @@ CREATE TABLE ordenes_guardadas (
     estado ENUM('guardada', 'registrada') DEFAULT 'guardada',
     activo BOOLEAN DEFAULT TRUE,
     fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    fecha_modificacion TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     FOREIGN KEY (id_cliente) REFERENCES cliente(id_cliente),
     FOREIGN KEY (usuario_creador) REFERENCES usuarios_sistema(username),
     INDEX idx_folio (folio_numero),
     INDEX idx_estado (estado),
     INDEX idx_usuario (usuario_creador),
-    INDEX idx_activo (activo)
+    INDEX idx_activo (activo),
+    INDEX idx_orden_modificacion (fecha_modificacion),  -- Consulta de cambios (ver migración 005)
+    INDEX idx_orden_historial (estado, activo, fecha_modificacion, folio_numero)  -- Paginación (ver migración 006)
 );
 
 -- Índices
@@ -178,5 +284,27 @@ CREATE INDEX idx_username ON usuarios_sistema(username);
 CREATE INDEX idx_activo ON usuarios_sistema(activo);
 CREATE INDEX idx_detalle_seccion ON detalle_factura(id_seccion);
 
+-- Índices de reportes y búsquedas (ver migración 004)
+CREATE INDEX idx_factura_fecha ON factura(fecha_factura, id_cliente);
+CREATE INDEX idx_factura_cliente_fecha ON factura(id_cliente, fecha_factura);
+CREATE INDEX idx_detalle_producto ON detalle_factura(id_producto, id_factura, cantidad_factura);
+CREATE INDEX idx_compra_fecha ON compra(fecha_compra, id_producto, cantidad_compra, precio_unitario_compra);
+CREATE INDEX idx_compra_producto ON compra(id_producto, fecha_compra, cantidad_compra, precio_unitario_compra);
+CREATE INDEX idx_deuda_cliente_pagado ON deuda(id_cliente, pagado, monto, monto_pagado);
+CREATE INDEX idx_deuda_pagado_fecha ON deuda(pagado, fecha_pago);
+CREATE INDEX idx_cliente_grupo_nombre ON cliente(id_grupo, nombre_cliente);
+
+-- Índices de paginación de historiales (ver migración 006)
+CREATE INDEX idx_compra_fecha_id ON compra(fecha_compra, id_compra);
+
+-- Índices de búsqueda de clientes y usuarios (ver migración 007)
+CREATE INDEX idx_cliente_nombre ON cliente(nombre_cliente);
+CREATE INDEX idx_cliente_telefono ON cliente(telefono);
+CREATE INDEX idx_cliente_correo ON cliente(correo);
+CREATE INDEX idx_usuario_nombre_completo ON usuarios_sistema(nombre_completo);
+
 -- Inicializar secuencia de folios
-INSERT INTO folio_sequence (id, next_val) VALUES (1, 1);
\ No newline at end of file
+INSERT INTO folio_sequence (id, next_val) VALUES (1, 1);
+
+-- Costeo por FIFO hasta que se elija otro método (scripts/actualizar_costos.py)
+INSERT INTO costo_control (id, metodo) VALUES (1, 'fifo');
\ No newline at end of file
@@ -1,29 +1,10 @@
 USE disfruleg;
 
--- Trigger para registrar deuda automáticamente al crear factura
-DELIMITER //
-CREATE TRIGGER after_detalle_insert_update_deuda
-AFTER INSERT ON detalle_factura
-FOR EACH ROW
-BEGIN
-    -- Actualizar o crear la deuda cada vez que se agrega un detalle
-    INSERT INTO deuda (id_cliente, id_factura, monto, fecha_generada, monto_pagado, pagado, descripcion)
-    SELECT 
-        f.id_cliente,
-        f.id_factura,
-        SUM(df.cantidad_factura * df.precio_unitario_venta),
-        CURDATE(),
-        0.00,
-        FALSE,
-        CONCAT('Deuda por factura #', f.id_factura)
-    FROM factura f
-    JOIN detalle_factura df ON f.id_factura = df.id_factura
-    WHERE f.id_factura = NEW.id_factura
-    GROUP BY f.id_cliente, f.id_factura
-    ON DUPLICATE KEY UPDATE
-        monto = VALUES(monto);
-END //
-DELIMITER ;
+-- La deuda de cada factura ya no se genera con un trigger por línea de
+-- detalle_factura (recalculaba el total completo en cada INSERT, O(n²)).
+-- crear_factura_completa la genera una sola vez al final de la transacción
+-- (ver _finalizar_factura en src/modules/receipts/components/database.py).
+-- Para bases existentes: data/sql/migraciones/001_deuda_por_factura.sql
 
 -- Trigger para evitar modificación de órdenes registradas
 DELIMITER //
@@ -36,8 +17,9 @@ BEGIN
         SET MESSAGE_TEXT = 'No se puede modificar una orden ya registrada';
     END IF;
     
-    -- Actualizar automáticamente la fecha de modificación
-    SET NEW.fecha_modificacion = CURRENT_TIMESTAMP;
+    -- Actualizar automáticamente la fecha de modificación (marca de la
+    -- consulta de cambios de la ventana de órdenes, ver migración 005)
+    SET NEW.fecha_modificacion = CURRENT_TIMESTAMP(6);
 END //
 DELIMITER ;
 
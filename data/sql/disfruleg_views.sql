@@ -86,27 +86,27 @@ JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente;
 -- Vista para historial de pagos
 CREATE OR REPLACE VIEW vista_historial_pagos AS
 SELECT
-    d.id_deuda,
-    c.id_cliente,
+    p.id_pago,
+    p.id_deuda,
+    p.id_cliente,
     c.nombre_cliente,
     f.id_factura,
     f.folio_numero,
     d.monto AS monto_total,
-    d.monto_pagado,
-    d.fecha_pago,
-    d.metodo_pago,
-    d.referencia_pago,
+    p.monto AS monto_pagado,
+    p.fecha_pago,
+    p.metodo_pago,
+    p.referencia_pago,
     u.username AS registrado_por,
-    d.descripcion,
     g.clave_grupo,
     tc.nombre_tipo AS tipo_cliente
-FROM deuda d
-JOIN cliente c ON d.id_cliente = c.id_cliente
+FROM pago p
+JOIN deuda d ON p.id_deuda = d.id_deuda
+JOIN cliente c ON p.id_cliente = c.id_cliente
 JOIN factura f ON d.id_factura = f.id_factura
 JOIN grupo g ON c.id_grupo = g.id_grupo
 JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
-LEFT JOIN usuarios_sistema u ON d.descripcion LIKE CONCAT('%Operador:%', u.username, '%')
-WHERE d.pagado = TRUE;
+LEFT JOIN usuarios_sistema u ON p.id_usuario = u.id_usuario;
 
 -- Vista para ganancias por cliente 
 CREATE OR REPLACE VIEW vista_ganancias_por_cliente AS
@@ -171,7 +171,48 @@ LEFT JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detall
 LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
 GROUP BY g.id_grupo, g.clave_grupo, tc.nombre_tipo, tc.descuento;
 
+-- Ventas por producto y grupo, agregadas antes de unirlas con las compras.
+-- Los ingresos usan la misma fórmula que vista_detalle_factura_con_descuento;
+-- las líneas sin precio para el grupo cuentan en cantidad pero no en ingresos.
+CREATE OR REPLACE VIEW vista_ventas_por_producto_grupo AS
+SELECT 
+    df.id_producto,
+    cl.id_grupo,
+    SUM(df.cantidad_factura) AS cantidad_vendida,
+    SUM(ROUND(df.cantidad_factura * pg.precio_base * (1 - tc.descuento/100), 2)) AS ingresos_totales,
+    COUNT(*) AS lineas
+FROM detalle_factura df
+JOIN factura f ON df.id_factura = f.id_factura
+JOIN cliente cl ON f.id_cliente = cl.id_cliente
+JOIN grupo g ON cl.id_grupo = g.id_grupo
+LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+LEFT JOIN precio_por_grupo pg ON df.id_producto = pg.id_producto AND cl.id_grupo = pg.id_grupo
+GROUP BY df.id_producto, cl.id_grupo;
+
+-- Compras por producto
+CREATE OR REPLACE VIEW vista_compras_por_producto AS
+SELECT 
+    id_producto,
+    SUM(cantidad_compra) AS cantidad_comprada,
+    SUM(cantidad_compra * precio_unitario_compra) AS costos_totales
+FROM compra
+GROUP BY id_producto;
+
+-- Costo de lo vendido por producto y grupo (tabla costo_venta, ver migración 011)
+CREATE OR REPLACE VIEW vista_costo_ventas_por_producto_grupo AS
+SELECT 
+    cv.id_producto,
+    cl.id_grupo,
+    SUM(cv.costo) AS costo_ventas,
+    SUM(cv.cantidad_sin_costo) AS cantidad_sin_costo
+FROM costo_venta cv
+JOIN factura f ON cv.id_factura = f.id_factura
+JOIN cliente cl ON f.id_cliente = cl.id_cliente
+GROUP BY cv.id_producto, cl.id_grupo;
+
 -- Vista para ganancias por producto y grupo
+-- (cantidad_comprada y costos_totales son las compras del producto, que no son
+-- por grupo; la ganancia usa el costo de lo vendido a cada grupo)
 CREATE OR REPLACE VIEW vista_ganancias_por_producto_grupo AS
 SELECT 
     p.id_producto,
@@ -179,49 +220,61 @@ SELECT
     g.id_grupo,
     g.clave_grupo,
     tc.nombre_tipo AS tipo_cliente,
-    SUM(df.cantidad_factura) AS cantidad_vendida,
-    SUM(vd.subtotal_con_descuento) AS ingresos_totales,
-    ROUND(SUM(vd.subtotal_con_descuento) / NULLIF(SUM(df.cantidad_factura), 0), 2) AS precio_promedio,
-    COALESCE(SUM(c.cantidad_compra), 0) AS cantidad_comprada,
-    COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0) AS costos_totales,
-    SUM(vd.subtotal_con_descuento) - COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0) AS ganancia_total,
+    v.cantidad_vendida,
+    v.ingresos_totales,
+    ROUND(v.ingresos_totales / NULLIF(v.cantidad_vendida, 0), 2) AS precio_promedio,
+    COALESCE(c.cantidad_comprada, 0) AS cantidad_comprada,
+    COALESCE(c.costos_totales, 0) AS costos_totales,
+    COALESCE(cv.costo_ventas, 0) AS costo_ventas,
+    COALESCE(cv.cantidad_sin_costo, 0) AS cantidad_sin_costo,
+    v.ingresos_totales - COALESCE(cv.costo_ventas, 0) AS ganancia_total,
     CASE 
-        WHEN COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0) = 0 THEN 0
-        ELSE ROUND(((SUM(vd.subtotal_con_descuento) - 
-                    COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0)) / 
-                    COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0)) * 100, 2)
+        WHEN COALESCE(v.ingresos_totales, 0) = 0 THEN 0
+        ELSE ROUND(((v.ingresos_totales - COALESCE(cv.costo_ventas, 0)) / v.ingresos_totales) * 100, 2)
     END AS margen_ganancia_porcentaje
 FROM producto p
-LEFT JOIN detalle_factura df ON p.id_producto = df.id_producto
-LEFT JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-LEFT JOIN factura f ON df.id_factura = f.id_factura
-LEFT JOIN cliente cl ON f.id_cliente = cl.id_cliente
-LEFT JOIN grupo g ON cl.id_grupo = g.id_grupo
+LEFT JOIN vista_ventas_por_producto_grupo v ON p.id_producto = v.id_producto
+LEFT JOIN grupo g ON v.id_grupo = g.id_grupo
 LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
-LEFT JOIN compra c ON p.id_producto = c.id_producto
-GROUP BY p.id_producto, p.nombre_producto, g.id_grupo, g.clave_grupo, tc.nombre_tipo;
+LEFT JOIN vista_compras_por_producto c ON p.id_producto = c.id_producto
+LEFT JOIN vista_costo_ventas_por_producto_grupo cv ON v.id_producto = cv.id_producto AND v.id_grupo = cv.id_grupo;
 
 -- Vista para ganancias por producto (completa con stock)
+-- Ganancia bruta: ingresos menos el costo de lo vendido; el margen es sobre los ingresos
 CREATE OR REPLACE VIEW vista_ganancias_por_producto AS
 SELECT 
     p.id_producto,
     p.nombre_producto,
     p.unidad_producto,
-    SUM(df.cantidad_factura) AS cantidad_vendida,
-    SUM(vd.subtotal_con_descuento) AS ingresos_totales,
-    COALESCE(SUM(c.cantidad_compra), 0) AS cantidad_comprada,
-    COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0) AS costos_totales,
-    SUM(vd.subtotal_con_descuento) - COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0) AS ganancia_total,
+    v.cantidad_vendida,
+    v.ingresos_totales,
+    COALESCE(c.cantidad_comprada, 0) AS cantidad_comprada,
+    COALESCE(c.costos_totales, 0) AS costos_totales,
+    COALESCE(cv.costo_ventas, 0) AS costo_ventas,
+    COALESCE(cv.cantidad_sin_costo, 0) AS cantidad_sin_costo,
+    v.ingresos_totales - COALESCE(cv.costo_ventas, 0) AS ganancia_total,
     CASE 
-        WHEN COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0) = 0 THEN 0
-        ELSE ROUND(((SUM(vd.subtotal_con_descuento) - 
-                    COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0)) / 
-                    COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0)) * 100, 2)
+        WHEN COALESCE(v.ingresos_totales, 0) = 0 THEN 0
+        ELSE ROUND(((v.ingresos_totales - COALESCE(cv.costo_ventas, 0)) / v.ingresos_totales) * 100, 2)
     END AS margen_ganancia_porcentaje,
     p.stock,
-    ROUND(p.stock / NULLIF(AVG(df.cantidad_factura), 0), 1) AS meses_inventario
+    ROUND(p.stock / NULLIF(v.cantidad_vendida / v.lineas, 0), 1) AS meses_inventario
 FROM producto p
-LEFT JOIN detalle_factura df ON p.id_producto = df.id_producto
-LEFT JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-LEFT JOIN compra c ON p.id_producto = c.id_producto
-GROUP BY p.id_producto, p.nombre_producto, p.unidad_producto, p.stock;
\ No newline at end of file
+LEFT JOIN (
+    SELECT 
+        id_producto,
+        SUM(cantidad_vendida) AS cantidad_vendida,
+        SUM(ingresos_totales) AS ingresos_totales,
+        SUM(lineas) AS lineas
+    FROM vista_ventas_por_producto_grupo
+    GROUP BY id_producto
+) v ON p.id_producto = v.id_producto
+LEFT JOIN vista_compras_por_producto c ON p.id_producto = c.id_producto
+LEFT JOIN (
+    SELECT 
+        id_producto,
+        SUM(costo) AS costo_ventas,
+        SUM(cantidad_sin_costo) AS cantidad_sin_costo
+    FROM costo_venta
+    GROUP BY id_producto
+) cv ON p.id_producto = cv.id_producto;
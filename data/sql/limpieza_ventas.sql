@@ -42,6 +42,10 @@ SELECT 'Secciones de factura eliminadas' AS status;
 TRUNCATE TABLE factura_metadata;
 SELECT 'Metadata de facturas eliminada' AS status;
 
+-- Limpiar pagos
+TRUNCATE TABLE pago;
+SELECT 'Pagos eliminados' AS status;
+
 -- Limpiar deudas
 TRUNCATE TABLE deuda;
 SELECT 'Deudas eliminadas' AS status;
@@ -50,6 +54,22 @@ SELECT 'Deudas eliminadas' AS status;
 TRUNCATE TABLE factura;
 SELECT 'Facturas eliminadas' AS status;
 
+-- Limpiar resumen diario de ventas
+TRUNCATE TABLE ventas_diarias;
+SELECT 'Resumen diario de ventas eliminado' AS status;
+
+-- Limpiar saldos por cliente
+TRUNCATE TABLE saldo_cliente;
+SELECT 'Saldos por cliente eliminados' AS status;
+
+-- Limpiar costo de lo vendido (se vuelve a costear desde las compras)
+TRUNCATE TABLE costo_venta;
+TRUNCATE TABLE costo_lote;
+TRUNCATE TABLE costo_compra;
+TRUNCATE TABLE costo_producto;
+UPDATE costo_control SET ultimo_id_detalle = 0, ultimo_id_compra = 0, fecha_actualizacion = NULL;
+SELECT 'Costo de lo vendido eliminado' AS status;
+
 -- Limpiar logs de acceso (opcional - descomenta si quieres limpiarlos)
 -- TRUNCATE TABLE log_accesos;
 -- SELECT 'Logs de acceso eliminados' AS status;
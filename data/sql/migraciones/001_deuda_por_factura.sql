@@ -0,0 +1,37 @@
+-- =====================================================
+-- MIGRACIÓN 001: Deuda generada una vez por factura
+-- Base de datos: disfruleg
+--
+-- El trigger after_detalle_insert_update_deuda recalculaba
+-- SUM(cantidad_factura * precio_unitario_venta) sobre toda la factura
+-- con cada línea insertada: una venta de 200 líneas hacía ~20,000
+-- lecturas de filas dentro de la transacción.
+--
+-- A partir de esta migración, crear_factura_completa inserta la deuda
+-- una sola vez después de todas las líneas (_finalizar_factura).
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- 1. ELIMINAR EL TRIGGER POR LÍNEA
+DROP TRIGGER IF EXISTS after_detalle_insert_update_deuda;
+
+-- 2. CONCILIAR FACTURAS SIN DEUDA
+-- (por si alguna venta quedó registrada entre el cambio de código y la migración)
+INSERT INTO deuda (id_cliente, id_factura, monto, fecha_generada, monto_pagado, pagado, descripcion)
+SELECT
+    f.id_cliente,
+    f.id_factura,
+    SUM(df.cantidad_factura * df.precio_unitario_venta),
+    f.fecha_factura,
+    0.00,
+    FALSE,
+    CONCAT('Deuda por factura #', f.id_factura)
+FROM factura f
+JOIN detalle_factura df ON f.id_factura = df.id_factura
+LEFT JOIN deuda d ON d.id_factura = f.id_factura
+WHERE d.id_deuda IS NULL
+GROUP BY f.id_cliente, f.id_factura, f.fecha_factura
+HAVING SUM(df.cantidad_factura * df.precio_unitario_venta) > 0;
@@ -0,0 +1,55 @@
+-- =====================================================
+-- MIGRACIÓN 002: Resumen diario de ventas
+-- Base de datos: disfruleg
+--
+-- El análisis de ganancias recorría detalle_factura → factura → cliente →
+-- grupo → tipo_cliente → producto → precio_por_grupo (a través de
+-- vista_detalle_factura_con_descuento) con cada consulta, así que su costo
+-- crecía con todo el historial de ventas.
+--
+-- ventas_diarias guarda una fila por día × producto × grupo de cliente.
+-- crear_factura_completa la actualiza en la misma transacción de la venta
+-- (_acumular_ventas_diarias) y se puede recalcular con:
+--     python scripts/reconstruir_ventas_diarias.py [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- 1. TABLA DE RESUMEN
+CREATE TABLE IF NOT EXISTS ventas_diarias (
+    fecha DATE NOT NULL,
+    id_producto INT NOT NULL,
+    id_grupo INT NOT NULL,
+    cantidad_vendida DECIMAL(14,2) NOT NULL DEFAULT 0,
+    ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,              -- Con precio del grupo y descuento del tipo de cliente
+    ingresos_registrados DECIMAL(14,2) NOT NULL DEFAULT 0,  -- Con el precio unitario registrado en la factura
+    lineas INT NOT NULL DEFAULT 0,
+    facturas INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_producto, id_grupo),
+    INDEX idx_ventas_diarias_producto (id_producto),
+    INDEX idx_ventas_diarias_grupo (id_grupo, fecha)
+);
+
+-- 2. CARGA INICIAL CON TODO EL HISTORIAL
+DELETE FROM ventas_diarias;
+
+INSERT INTO ventas_diarias
+    (fecha, id_producto, id_grupo, cantidad_vendida, ingresos, ingresos_registrados, lineas, facturas)
+SELECT
+    f.fecha_factura,
+    df.id_producto,
+    c.id_grupo,
+    SUM(df.cantidad_factura),
+    COALESCE(SUM(ROUND(df.cantidad_factura * pg.precio_base * (1 - tc.descuento/100), 2)), 0),
+    SUM(df.cantidad_factura * df.precio_unitario_venta),
+    COUNT(*),
+    COUNT(DISTINCT df.id_factura)
+FROM detalle_factura df
+JOIN factura f ON df.id_factura = f.id_factura
+JOIN cliente c ON f.id_cliente = c.id_cliente
+JOIN grupo g ON c.id_grupo = g.id_grupo
+LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+LEFT JOIN precio_por_grupo pg ON df.id_producto = pg.id_producto AND c.id_grupo = pg.id_grupo
+GROUP BY f.fecha_factura, df.id_producto, c.id_grupo;
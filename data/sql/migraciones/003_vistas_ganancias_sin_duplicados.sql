@@ -0,0 +1,97 @@
+-- =====================================================
+-- MIGRACIÓN 003: Vistas de ganancias sin duplicar ventas × compras
+-- Base de datos: disfruleg
+--
+-- vista_ganancias_por_producto y vista_ganancias_por_producto_grupo unían
+-- detalle_factura y compra por id_producto en la misma consulta: cada línea
+-- de venta se repetía por cada compra del producto (y viceversa), así que
+-- las filas crecían como ventas × compras y los SUM salían inflados.
+--
+-- Ahora ventas y compras se agregan por separado (vista_ventas_por_producto_grupo
+-- y vista_compras_por_producto) y después se unen con producto.
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- Ventas por producto y grupo, agregadas antes de unirlas con las compras.
+-- Los ingresos usan la misma fórmula que vista_detalle_factura_con_descuento;
+-- las líneas sin precio para el grupo cuentan en cantidad pero no en ingresos.
+CREATE OR REPLACE VIEW vista_ventas_por_producto_grupo AS
+SELECT 
+    df.id_producto,
+    cl.id_grupo,
+    SUM(df.cantidad_factura) AS cantidad_vendida,
+    SUM(ROUND(df.cantidad_factura * pg.precio_base * (1 - tc.descuento/100), 2)) AS ingresos_totales,
+    COUNT(*) AS lineas
+FROM detalle_factura df
+JOIN factura f ON df.id_factura = f.id_factura
+JOIN cliente cl ON f.id_cliente = cl.id_cliente
+JOIN grupo g ON cl.id_grupo = g.id_grupo
+LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+LEFT JOIN precio_por_grupo pg ON df.id_producto = pg.id_producto AND cl.id_grupo = pg.id_grupo
+GROUP BY df.id_producto, cl.id_grupo;
+
+-- Compras por producto
+CREATE OR REPLACE VIEW vista_compras_por_producto AS
+SELECT 
+    id_producto,
+    SUM(cantidad_compra) AS cantidad_comprada,
+    SUM(cantidad_compra * precio_unitario_compra) AS costos_totales
+FROM compra
+GROUP BY id_producto;
+
+-- Vista para ganancias por producto y grupo
+-- (las compras no son por grupo: cada fila lleva el costo total del producto)
+CREATE OR REPLACE VIEW vista_ganancias_por_producto_grupo AS
+SELECT 
+    p.id_producto,
+    p.nombre_producto,
+    g.id_grupo,
+    g.clave_grupo,
+    tc.nombre_tipo AS tipo_cliente,
+    v.cantidad_vendida,
+    v.ingresos_totales,
+    ROUND(v.ingresos_totales / NULLIF(v.cantidad_vendida, 0), 2) AS precio_promedio,
+    COALESCE(c.cantidad_comprada, 0) AS cantidad_comprada,
+    COALESCE(c.costos_totales, 0) AS costos_totales,
+    v.ingresos_totales - COALESCE(c.costos_totales, 0) AS ganancia_total,
+    CASE 
+        WHEN COALESCE(c.costos_totales, 0) = 0 THEN 0
+        ELSE ROUND(((v.ingresos_totales - c.costos_totales) / c.costos_totales) * 100, 2)
+    END AS margen_ganancia_porcentaje
+FROM producto p
+LEFT JOIN vista_ventas_por_producto_grupo v ON p.id_producto = v.id_producto
+LEFT JOIN grupo g ON v.id_grupo = g.id_grupo
+LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+LEFT JOIN vista_compras_por_producto c ON p.id_producto = c.id_producto;
+
+-- Vista para ganancias por producto (completa con stock)
+CREATE OR REPLACE VIEW vista_ganancias_por_producto AS
+SELECT 
+    p.id_producto,
+    p.nombre_producto,
+    p.unidad_producto,
+    v.cantidad_vendida,
+    v.ingresos_totales,
+    COALESCE(c.cantidad_comprada, 0) AS cantidad_comprada,
+    COALESCE(c.costos_totales, 0) AS costos_totales,
+    v.ingresos_totales - COALESCE(c.costos_totales, 0) AS ganancia_total,
+    CASE 
+        WHEN COALESCE(c.costos_totales, 0) = 0 THEN 0
+        ELSE ROUND(((v.ingresos_totales - c.costos_totales) / c.costos_totales) * 100, 2)
+    END AS margen_ganancia_porcentaje,
+    p.stock,
+    ROUND(p.stock / NULLIF(v.cantidad_vendida / v.lineas, 0), 1) AS meses_inventario
+FROM producto p
+LEFT JOIN (
+    SELECT 
+        id_producto,
+        SUM(cantidad_vendida) AS cantidad_vendida,
+        SUM(ingresos_totales) AS ingresos_totales,
+        SUM(lineas) AS lineas
+    FROM vista_ventas_por_producto_grupo
+    GROUP BY id_producto
+) v ON p.id_producto = v.id_producto
+LEFT JOIN vista_compras_por_producto c ON p.id_producto = c.id_producto;
@@ -0,0 +1,54 @@
+-- =====================================================
+-- MIGRACIÓN 004: Índices para reportes y búsquedas
+-- Base de datos: disfruleg
+--
+-- Las fechas de factura y compra, el estado de la deuda y la columna de
+-- grupo del cliente no tenían índice propio; las llaves foráneas solo
+-- tenían el índice de una columna que InnoDB crea de forma implícita.
+-- Los índices siguen la forma de las consultas de los módulos:
+--
+--   idx_factura_fecha          rangos por fecha (export_to_pdf, gráficas
+--                              temporales, reconstruir_ventas_diarias) y
+--                              unión con cliente sin leer la fila
+--   idx_factura_cliente_fecha  facturas de un cliente, en orden de fecha
+--   idx_detalle_producto       ventas por producto (vista_ventas_por_producto_grupo)
+--                              con id_factura y cantidad en el índice
+--   idx_compra_fecha           compras por rango de fechas (periodos.py, export_to_pdf)
+--   idx_compra_producto        costos por producto (vista_compras_por_producto)
+--   idx_deuda_cliente_pagado   saldos por cliente (vista_estado_cuenta_cliente,
+--                              vista_deudas_detalladas)
+--   idx_deuda_pagado_fecha     historial de pagos (vista_historial_pagos)
+--   idx_cliente_grupo_nombre   obtener_clientes_por_grupo sin ordenar en memoria
+--
+-- Los índices cubren las columnas que cada consulta lee, así que MySQL
+-- no necesita ir a la fila. Revisar planes con:
+--     python scripts/auditoria_explain.py
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- crear_indice_si_falta lo define data/sql/migraciones/procedimientos.sql
+-- (scripts/aplicar_migraciones.py lo crea antes de aplicar)
+
+-- 1. FACTURA
+CALL crear_indice_si_falta('factura', 'idx_factura_fecha', 'fecha_factura, id_cliente');
+CALL crear_indice_si_falta('factura', 'idx_factura_cliente_fecha', 'id_cliente, fecha_factura');
+
+-- 2. DETALLE_FACTURA
+CALL crear_indice_si_falta('detalle_factura', 'idx_detalle_producto', 'id_producto, id_factura, cantidad_factura');
+
+-- 3. COMPRA
+CALL crear_indice_si_falta('compra', 'idx_compra_fecha', 'fecha_compra, id_producto, cantidad_compra, precio_unitario_compra');
+CALL crear_indice_si_falta('compra', 'idx_compra_producto', 'id_producto, fecha_compra, cantidad_compra, precio_unitario_compra');
+
+-- 4. DEUDA
+CALL crear_indice_si_falta('deuda', 'idx_deuda_cliente_pagado', 'id_cliente, pagado, monto, monto_pagado');
+CALL crear_indice_si_falta('deuda', 'idx_deuda_pagado_fecha', 'pagado, fecha_pago');
+
+-- 5. CLIENTE
+CALL crear_indice_si_falta('cliente', 'idx_cliente_grupo_nombre', 'id_grupo, nombre_cliente');
+
+-- 6. ESTADÍSTICAS
+ANALYZE TABLE factura, detalle_factura, compra, deuda, cliente;
@@ -0,0 +1,46 @@
+-- =====================================================
+-- MIGRACIÓN 005: Seguimiento de cambios en órdenes guardadas
+-- Base de datos: disfruleg
+--
+-- La ventana de órdenes recargaba las órdenes activas y el historial
+-- completos cada 30 segundos y con cada <FocusIn>, en cada caja abierta.
+-- Ahora pide solo las órdenes con fecha_modificacion posterior a la última
+-- que vio (OrdenManager.obtener_cambios) y las combina con lo que ya tiene.
+--
+--   fecha_modificacion pasa a TIMESTAMP(6): con resolución de segundos,
+--   varias escrituras en el mismo segundo compartían la marca; el trigger
+--   before_orden_update se recrea para que también la fije con microsegundos
+--   idx_orden_modificacion  rango por fecha_modificacion para la consulta
+--                           de cambios, sin recorrer la tabla
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- 1. MARCA DE TIEMPO CON MICROSEGUNDOS
+ALTER TABLE ordenes_guardadas
+    MODIFY fecha_modificacion TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+-- 2. TRIGGER DE MODIFICACIÓN CON MICROSEGUNDOS
+DROP TRIGGER IF EXISTS before_orden_update;
+
+DELIMITER //
+CREATE TRIGGER before_orden_update
+BEFORE UPDATE ON ordenes_guardadas
+FOR EACH ROW
+BEGIN
+    IF OLD.estado = 'registrada' AND NEW.estado != OLD.estado THEN
+        SIGNAL SQLSTATE '45000' 
+        SET MESSAGE_TEXT = 'No se puede modificar una orden ya registrada';
+    END IF;
+    
+    -- Actualizar automáticamente la fecha de modificación
+    SET NEW.fecha_modificacion = CURRENT_TIMESTAMP(6);
+END //
+DELIMITER ;
+
+-- 3. ÍNDICE PARA LA CONSULTA DE CAMBIOS
+-- crear_indice_si_falta lo define data/sql/migraciones/procedimientos.sql
+-- (scripts/aplicar_migraciones.py lo crea antes de aplicar)
+CALL crear_indice_si_falta('ordenes_guardadas', 'idx_orden_modificacion', 'fecha_modificacion');
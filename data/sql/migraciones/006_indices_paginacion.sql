@@ -0,0 +1,27 @@
+-- =====================================================
+-- MIGRACIÓN 006: Índices para paginación por llave de los historiales
+-- Base de datos: disfruleg
+--
+-- El historial de órdenes, el historial de pagos y la lista de compras se
+-- leen por páginas (src/database/paginacion.py): cada página continúa desde
+-- la última fila de la anterior con ORDER BY fecha DESC, id DESC LIMIT n.
+-- Para que cada página lea solo sus filas, el índice debe tener la fecha y
+-- el desempate en ese orden:
+--
+--   idx_compra_fecha_id    lista de compras (ComprasApp.obtener_pagina_compras);
+--                          idx_compra_fecha tiene id_producto antes del id
+--   idx_orden_historial    historial de órdenes registradas
+--                          (OrdenManager.obtener_historial_pagina)
+--
+-- El historial de pagos usa idx_deuda_pagado_fecha de la migración 004:
+-- InnoDB agrega la llave primaria (id_deuda) al final de cada índice.
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- crear_indice_si_falta lo define data/sql/migraciones/procedimientos.sql
+-- (scripts/aplicar_migraciones.py lo crea antes de aplicar)
+CALL crear_indice_si_falta('compra', 'idx_compra_fecha_id', 'fecha_compra, id_compra');
+CALL crear_indice_si_falta('ordenes_guardadas', 'idx_orden_historial', 'estado, activo, fecha_modificacion, folio_numero');
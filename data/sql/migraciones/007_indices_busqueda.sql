@@ -0,0 +1,30 @@
+-- =====================================================
+-- MIGRACIÓN 007: Índices para la búsqueda de clientes y usuarios
+-- Base de datos: disfruleg
+--
+-- Las ventanas de clientes y usuarios filtran en memoria mientras la lista
+-- es pequeña (src/ui/buscador_registros.py). Con más registros buscan en
+-- SQL por el inicio de cada campo (LIKE 'texto%'), que MySQL resuelve con
+-- un rango sobre el índice de la columna; las condiciones unidas con OR se
+-- combinan con index_merge. La intercalación utf8mb4_unicode_ci ya ignora
+-- mayúsculas y acentos, así que no hace falta LOWER() (que anulaba el índice).
+--
+--   idx_cliente_nombre           ClientManagerApp.search_clients_sql
+--   idx_cliente_telefono
+--   idx_cliente_correo
+--   idx_usuario_nombre_completo  UserManagerApp.search_users_sql
+--
+-- La búsqueda por grupo usa idx_cliente_grupo_nombre (migración 004) y la
+-- de username su índice UNIQUE.
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- crear_indice_si_falta lo define data/sql/migraciones/procedimientos.sql
+-- (scripts/aplicar_migraciones.py lo crea antes de aplicar)
+CALL crear_indice_si_falta('cliente', 'idx_cliente_nombre', 'nombre_cliente');
+CALL crear_indice_si_falta('cliente', 'idx_cliente_telefono', 'telefono');
+CALL crear_indice_si_falta('cliente', 'idx_cliente_correo', 'correo');
+CALL crear_indice_si_falta('usuarios_sistema', 'idx_usuario_nombre_completo', 'nombre_completo');
@@ -0,0 +1,20 @@
+-- =====================================================
+-- MIGRACIÓN 008: Índice por fecha en log_accesos
+-- Base de datos: disfruleg
+--
+-- log_accesos solo crece: cada intento de login agrega una fila
+-- (src/auth/registro_accesos.py las escribe por lotes). Nada en el login la
+-- lee; los bloqueos se calculan con usuarios_sistema. La retención
+-- (scripts/retencion_log_accesos.py) archiva y borra los meses viejos por
+-- rango de fecha_intento, que sin índice recorría la tabla completa.
+--
+--   idx_log_fecha  Rango por mes para archivar y borrar
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- crear_indice_si_falta lo define data/sql/migraciones/procedimientos.sql
+-- (scripts/aplicar_migraciones.py lo crea antes de aplicar)
+CALL crear_indice_si_falta('log_accesos', 'idx_log_fecha', 'fecha_intento');
@@ -0,0 +1,55 @@
+-- =====================================================
+-- MIGRACIÓN 009: Saldos de deuda por cliente
+-- Base de datos: disfruleg
+--
+-- La lista de clientes con deuda y las estadísticas de la ventana de deudas
+-- leían vista_estado_cuenta_cliente, que agrupa todos los clientes contra
+-- todas las deudas en cada consulta; las estadísticas la agregaban otra vez.
+--
+-- saldo_cliente guarda una fila por cliente con los mismos totales.
+-- _finalizar_factura y DebtManager.registrar_pago recalculan la fila del
+-- cliente en la misma transacción (src/modules/deudas/saldos_clientes.py).
+-- Se compara contra deuda y se corrige con:
+--     python scripts/verificar_saldos_clientes.py [--corregir]
+--
+--   idx_saldo_cliente_pendiente  clientes con saldo > 0 (rango) y
+--                                estadísticas (sin leer la tabla)
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- 1. TABLA DE SALDOS
+CREATE TABLE IF NOT EXISTS saldo_cliente (
+    id_cliente INT PRIMARY KEY,
+    saldo_pendiente DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_deuda_pendiente DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_deuda_pagada DECIMAL(14,2) NOT NULL DEFAULT 0,
+    deudas_pendientes INT NOT NULL DEFAULT 0,
+    deudas_pagadas INT NOT NULL DEFAULT 0,
+    ultima_deuda_generada DATE NULL,
+    ultimo_pago DATE NULL,
+    -- Lista de clientes con saldo (rango) y estadísticas (solo índice)
+    INDEX idx_saldo_cliente_pendiente (saldo_pendiente, total_deuda_pendiente, total_deuda_pagada,
+                                       deudas_pendientes, deudas_pagadas),
+    FOREIGN KEY (id_cliente) REFERENCES cliente(id_cliente) ON DELETE CASCADE
+);
+
+-- 2. CARGA INICIAL DESDE DEUDA (mismas fórmulas que vista_estado_cuenta_cliente)
+DELETE FROM saldo_cliente;
+
+INSERT INTO saldo_cliente
+    (id_cliente, saldo_pendiente, total_deuda_pendiente, total_deuda_pagada,
+     deudas_pendientes, deudas_pagadas, ultima_deuda_generada, ultimo_pago)
+SELECT
+    d.id_cliente,
+    SUM(CASE WHEN d.pagado = FALSE THEN d.monto - d.monto_pagado ELSE 0 END),
+    SUM(CASE WHEN d.pagado = FALSE THEN d.monto ELSE 0 END),
+    SUM(CASE WHEN d.pagado = TRUE THEN d.monto ELSE 0 END),
+    COUNT(CASE WHEN d.pagado = FALSE THEN d.id_deuda END),
+    COUNT(CASE WHEN d.pagado = TRUE THEN d.id_deuda END),
+    MAX(CASE WHEN d.pagado = FALSE THEN d.fecha_generada END),
+    MAX(CASE WHEN d.pagado = TRUE THEN d.fecha_pago END)
+FROM deuda d
+GROUP BY d.id_cliente;
@@ -0,0 +1,131 @@
+-- =====================================================
+-- MIGRACIÓN 010: Registro de pagos (tabla pago)
+-- Base de datos: disfruleg
+--
+-- registrar_pago agregaba una línea de texto a deuda.descripcion
+-- (VARCHAR(255)) por cada pago, y vista_historial_pagos buscaba al operador
+-- con descripcion LIKE CONCAT('%Operador:%', username, '%'): cada fila de
+-- deuda contra cada usuario, comparando texto.
+--
+-- pago guarda una fila por pago (monto, método, referencia, id del
+-- operador y fecha con hora). DebtManager.registrar_pagos la escribe en la
+-- misma transacción del abono, y vista_historial_pagos se une por llaves:
+--
+--   idx_pago_deuda          pagos de una deuda
+--   idx_pago_cliente_fecha  historial de un cliente, del más reciente
+--   idx_pago_fecha          historial general por página (fecha, id_pago)
+--
+-- La carga inicial lee las líneas "Pago registrado: ..." de las
+-- descripciones existentes. Lo pagado que no aparece en ellas (líneas
+-- cortadas en 255 caracteres, pagos hechos a mano) se registra como un pago
+-- por la diferencia, con el método y la fecha de la deuda, para que la suma
+-- de pago cuadre con deuda.monto_pagado. Ambos pasos omiten lo ya cargado,
+-- así que repetir la migración no duplica pagos.
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- 1. TABLA DE PAGOS
+CREATE TABLE IF NOT EXISTS pago (
+    id_pago INT AUTO_INCREMENT PRIMARY KEY,
+    id_deuda INT NOT NULL,
+    id_cliente INT NOT NULL,
+    monto DECIMAL(10,2) NOT NULL CHECK (monto > 0),
+    metodo_pago VARCHAR(50),
+    referencia_pago VARCHAR(100),
+    id_usuario INT NULL,
+    fecha_pago DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (id_deuda) REFERENCES deuda(id_deuda) ON DELETE CASCADE,
+    FOREIGN KEY (id_cliente) REFERENCES cliente(id_cliente),
+    FOREIGN KEY (id_usuario) REFERENCES usuarios_sistema(id_usuario) ON DELETE SET NULL,
+    INDEX idx_pago_deuda (id_deuda),
+    INDEX idx_pago_cliente_fecha (id_cliente, fecha_pago),  -- Historial de un cliente
+    INDEX idx_pago_fecha (fecha_pago)                       -- Historial general por página
+);
+
+-- 2. PAGOS DESCRITOS EN deuda.descripcion
+-- Una línea por pago: "Pago registrado: <monto> via <método>[ - Ref: <ref>][ - Operador: <usuario>] - Fecha: <AAAA-MM-DD HH:MM:SS>"
+INSERT INTO pago (id_deuda, id_cliente, monto, metodo_pago, referencia_pago, id_usuario, fecha_pago)
+SELECT
+    campos.id_deuda,
+    campos.id_cliente,
+    CAST(campos.monto AS DECIMAL(10,2)),
+    LEFT(NULLIF(campos.metodo, ''), 50),
+    LEFT(NULLIF(campos.referencia, ''), 100),
+    u.id_usuario,
+    COALESCE(campos.fecha, campos.fecha_deuda)
+FROM (
+    SELECT
+        lineas.id_deuda,
+        lineas.id_cliente,
+        lineas.fecha_deuda,
+        SUBSTRING_INDEX(SUBSTRING_INDEX(lineas.linea, 'Pago registrado: ', -1), ' via ', 1) AS monto,
+        SUBSTRING_INDEX(SUBSTRING_INDEX(lineas.linea, ' via ', -1), ' - ', 1) AS metodo,
+        IF(LOCATE(' - Ref: ', lineas.linea) > 0,
+           SUBSTRING_INDEX(SUBSTRING_INDEX(lineas.linea, ' - Ref: ', -1), ' - ', 1), NULL) AS referencia,
+        IF(LOCATE(' - Operador: ', lineas.linea) > 0,
+           SUBSTRING_INDEX(SUBSTRING_INDEX(lineas.linea, ' - Operador: ', -1), ' - ', 1), NULL) AS operador,
+        IF(SUBSTRING_INDEX(lineas.linea, ' - Fecha: ', -1)
+               REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}$',
+           STR_TO_DATE(SUBSTRING_INDEX(lineas.linea, ' - Fecha: ', -1), '%Y-%m-%d %H:%i:%s'), NULL) AS fecha
+    FROM (
+        SELECT
+            d.id_deuda,
+            d.id_cliente,
+            COALESCE(d.fecha_pago, d.fecha_generada) AS fecha_deuda,
+            SUBSTRING_INDEX(SUBSTRING_INDEX(d.descripcion, '\n', n.n), '\n', -1) AS linea
+        FROM deuda d
+        -- 255 caracteres alcanzan para pocas líneas; 12 sobra
+        JOIN (SELECT 1 AS n UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4 UNION ALL SELECT 5 UNION ALL SELECT 6 UNION ALL SELECT 7 UNION ALL SELECT 8 UNION ALL SELECT 9 UNION ALL SELECT 10 UNION ALL SELECT 11 UNION ALL SELECT 12) n
+            ON n.n <= 1 + LENGTH(d.descripcion) - LENGTH(REPLACE(d.descripcion, '\n', ''))
+        WHERE d.descripcion LIKE '%Pago registrado: %'
+    ) lineas
+    WHERE lineas.linea LIKE 'Pago registrado: % via %'
+) campos
+LEFT JOIN usuarios_sistema u ON u.username = campos.operador
+WHERE campos.monto REGEXP '^[0-9]+([.][0-9]+)?$'
+  AND CAST(campos.monto AS DECIMAL(10,2)) > 0
+  AND NOT EXISTS (SELECT 1 FROM pago p WHERE p.id_deuda = campos.id_deuda);
+
+-- 3. LO PAGADO SIN LÍNEA EN LA DESCRIPCIÓN: un pago por la diferencia
+INSERT INTO pago (id_deuda, id_cliente, monto, metodo_pago, referencia_pago, id_usuario, fecha_pago)
+SELECT
+    d.id_deuda,
+    d.id_cliente,
+    d.monto_pagado - COALESCE(registrado.total, 0),
+    d.metodo_pago,
+    d.referencia_pago,
+    NULL,
+    COALESCE(d.fecha_pago, d.fecha_generada)
+FROM deuda d
+LEFT JOIN (
+    SELECT id_deuda, SUM(monto) AS total FROM pago GROUP BY id_deuda
+) registrado ON registrado.id_deuda = d.id_deuda
+WHERE d.monto_pagado > COALESCE(registrado.total, 0);
+
+-- 4. HISTORIAL DE PAGOS UNIDO POR LLAVES
+CREATE OR REPLACE VIEW vista_historial_pagos AS
+SELECT
+    p.id_pago,
+    p.id_deuda,
+    p.id_cliente,
+    c.nombre_cliente,
+    f.id_factura,
+    f.folio_numero,
+    d.monto AS monto_total,
+    p.monto AS monto_pagado,
+    p.fecha_pago,
+    p.metodo_pago,
+    p.referencia_pago,
+    u.username AS registrado_por,
+    g.clave_grupo,
+    tc.nombre_tipo AS tipo_cliente
+FROM pago p
+JOIN deuda d ON p.id_deuda = d.id_deuda
+JOIN cliente c ON p.id_cliente = c.id_cliente
+JOIN factura f ON d.id_factura = f.id_factura
+JOIN grupo g ON c.id_grupo = g.id_grupo
+JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+LEFT JOIN usuarios_sistema u ON p.id_usuario = u.id_usuario;
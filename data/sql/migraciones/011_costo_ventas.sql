@@ -0,0 +1,158 @@
+-- =====================================================
+-- MIGRACIÓN 011: Costo de lo vendido (FIFO o promedio ponderado)
+-- Base de datos: disfruleg
+--
+-- vista_ganancias_por_producto restaba todas las compras del historial a
+-- todas las ventas: la existencia sin vender contaba como pérdida y el margen
+-- cambiaba con cada surtido.
+--
+-- costo_venta guarda el costo de cada línea de factura según las compras que
+-- salieron con ella (src/modules/analytics/costo_ventas.py). costo_lote y
+-- costo_producto guardan lo que queda de cada compra, y costo_control el
+-- método y hasta qué compra y línea se costeó, así que cada actualización
+-- lee solo lo registrado desde la anterior. El análisis de ganancias la
+-- ejecuta al cargar; la primera vez costea todo el historial.
+--
+--   idx_costo_venta_producto  ganancia por producto y período
+--   idx_costo_venta_fecha     ganancia por período
+--   idx_costo_venta_factura   ganancia por cliente
+--
+-- Las vistas de ganancias conservan las compras (costos_totales) y agregan
+-- costo_ventas; ganancia_total y el margen (ahora sobre ingresos) usan el
+-- costo de lo vendido.
+--
+-- Carga inicial o cambio de método:
+--     python scripts/actualizar_costos.py [--metodo fifo|promedio] [--reconstruir]
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- 1. TABLAS DE COSTEO
+-- Tabla COSTO_VENTA (costo de lo vendido por línea de factura, ver migración 011)
+CREATE TABLE IF NOT EXISTS costo_venta (
+    id_detalle INT PRIMARY KEY,
+    id_factura INT NOT NULL,
+    id_producto INT NOT NULL,
+    fecha DATE NOT NULL,
+    cantidad DECIMAL(10,2) NOT NULL,
+    costo DECIMAL(14,2) NOT NULL,
+    cantidad_sin_costo DECIMAL(10,2) NOT NULL DEFAULT 0,  -- Vendida sin existencia: costeada al último precio de compra
+    FOREIGN KEY (id_detalle) REFERENCES detalle_factura(id_detalle) ON DELETE CASCADE,
+    INDEX idx_costo_venta_producto (id_producto, fecha, costo, cantidad_sin_costo),  -- Por producto y período
+    INDEX idx_costo_venta_fecha (fecha, costo),                                     -- Por período
+    INDEX idx_costo_venta_factura (id_factura, costo)                               -- Por cliente
+);
+
+-- Tabla COSTO_LOTE (lo que queda de cada compra sin vender)
+CREATE TABLE IF NOT EXISTS costo_lote (
+    id_compra INT PRIMARY KEY,
+    id_producto INT NOT NULL,
+    fecha_compra DATE NOT NULL,
+    cantidad DECIMAL(10,2) NOT NULL,
+    costo DECIMAL(14,4) NOT NULL,  -- Costo total de lo que queda
+    INDEX idx_costo_lote_producto (id_producto, fecha_compra, id_compra)
+);
+
+-- Tabla COSTO_PRODUCTO (avance del costeo por producto)
+CREATE TABLE IF NOT EXISTS costo_producto (
+    id_producto INT PRIMARY KEY,
+    ultima_venta DATE NULL,                     -- Fecha de la última venta costeada
+    ultimo_costo_unitario DECIMAL(10,2) NULL,   -- Precio de la última compra
+    recalcular BOOLEAN NOT NULL DEFAULT FALSE,  -- Una compra se editó o se borró
+    FOREIGN KEY (id_producto) REFERENCES producto(id_producto) ON DELETE CASCADE
+);
+
+-- Tabla COSTO_CONTROL (método y último registro costeado)
+CREATE TABLE IF NOT EXISTS costo_control (
+    id INT PRIMARY KEY DEFAULT 1,
+    metodo ENUM('fifo', 'promedio') NOT NULL DEFAULT 'fifo',
+    ultimo_id_detalle INT NOT NULL DEFAULT 0,
+    ultimo_id_compra INT NOT NULL DEFAULT 0,
+    fecha_actualizacion TIMESTAMP NULL
+);
+
+INSERT IGNORE INTO costo_control (id, metodo) VALUES (1, 'fifo');
+
+-- 2. VISTAS DE GANANCIAS CON EL COSTO DE LO VENDIDO
+-- Costo de lo vendido por producto y grupo (tabla costo_venta, ver migración 011)
+CREATE OR REPLACE VIEW vista_costo_ventas_por_producto_grupo AS
+SELECT 
+    cv.id_producto,
+    cl.id_grupo,
+    SUM(cv.costo) AS costo_ventas,
+    SUM(cv.cantidad_sin_costo) AS cantidad_sin_costo
+FROM costo_venta cv
+JOIN factura f ON cv.id_factura = f.id_factura
+JOIN cliente cl ON f.id_cliente = cl.id_cliente
+GROUP BY cv.id_producto, cl.id_grupo;
+
+-- Vista para ganancias por producto y grupo
+-- (cantidad_comprada y costos_totales son las compras del producto, que no son
+-- por grupo; la ganancia usa el costo de lo vendido a cada grupo)
+CREATE OR REPLACE VIEW vista_ganancias_por_producto_grupo AS
+SELECT 
+    p.id_producto,
+    p.nombre_producto,
+    g.id_grupo,
+    g.clave_grupo,
+    tc.nombre_tipo AS tipo_cliente,
+    v.cantidad_vendida,
+    v.ingresos_totales,
+    ROUND(v.ingresos_totales / NULLIF(v.cantidad_vendida, 0), 2) AS precio_promedio,
+    COALESCE(c.cantidad_comprada, 0) AS cantidad_comprada,
+    COALESCE(c.costos_totales, 0) AS costos_totales,
+    COALESCE(cv.costo_ventas, 0) AS costo_ventas,
+    COALESCE(cv.cantidad_sin_costo, 0) AS cantidad_sin_costo,
+    v.ingresos_totales - COALESCE(cv.costo_ventas, 0) AS ganancia_total,
+    CASE 
+        WHEN COALESCE(v.ingresos_totales, 0) = 0 THEN 0
+        ELSE ROUND(((v.ingresos_totales - COALESCE(cv.costo_ventas, 0)) / v.ingresos_totales) * 100, 2)
+    END AS margen_ganancia_porcentaje
+FROM producto p
+LEFT JOIN vista_ventas_por_producto_grupo v ON p.id_producto = v.id_producto
+LEFT JOIN grupo g ON v.id_grupo = g.id_grupo
+LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+LEFT JOIN vista_compras_por_producto c ON p.id_producto = c.id_producto
+LEFT JOIN vista_costo_ventas_por_producto_grupo cv ON v.id_producto = cv.id_producto AND v.id_grupo = cv.id_grupo;
+
+-- Vista para ganancias por producto (completa con stock)
+-- Ganancia bruta: ingresos menos el costo de lo vendido; el margen es sobre los ingresos
+CREATE OR REPLACE VIEW vista_ganancias_por_producto AS
+SELECT 
+    p.id_producto,
+    p.nombre_producto,
+    p.unidad_producto,
+    v.cantidad_vendida,
+    v.ingresos_totales,
+    COALESCE(c.cantidad_comprada, 0) AS cantidad_comprada,
+    COALESCE(c.costos_totales, 0) AS costos_totales,
+    COALESCE(cv.costo_ventas, 0) AS costo_ventas,
+    COALESCE(cv.cantidad_sin_costo, 0) AS cantidad_sin_costo,
+    v.ingresos_totales - COALESCE(cv.costo_ventas, 0) AS ganancia_total,
+    CASE 
+        WHEN COALESCE(v.ingresos_totales, 0) = 0 THEN 0
+        ELSE ROUND(((v.ingresos_totales - COALESCE(cv.costo_ventas, 0)) / v.ingresos_totales) * 100, 2)
+    END AS margen_ganancia_porcentaje,
+    p.stock,
+    ROUND(p.stock / NULLIF(v.cantidad_vendida / v.lineas, 0), 1) AS meses_inventario
+FROM producto p
+LEFT JOIN (
+    SELECT 
+        id_producto,
+        SUM(cantidad_vendida) AS cantidad_vendida,
+        SUM(ingresos_totales) AS ingresos_totales,
+        SUM(lineas) AS lineas
+    FROM vista_ventas_por_producto_grupo
+    GROUP BY id_producto
+) v ON p.id_producto = v.id_producto
+LEFT JOIN vista_compras_por_producto c ON p.id_producto = c.id_producto
+LEFT JOIN (
+    SELECT 
+        id_producto,
+        SUM(costo) AS costo_ventas,
+        SUM(cantidad_sin_costo) AS cantidad_sin_costo
+    FROM costo_venta
+    GROUP BY id_producto
+) cv ON p.id_producto = cv.id_producto;
@@ -0,0 +1,27 @@
+-- =====================================================
+-- MIGRACIÓN 012: Compras ya aplicadas al costo de lo vendido
+-- Base de datos: disfruleg
+--
+-- actualizar_costos (src/modules/analytics/costo_ventas.py) leía solo las
+-- compras con id mayor a costo_control.ultimo_id_compra. Una compra
+-- confirmada después de otra con id mayor quedaba fuera para siempre.
+-- Ahora vuelve a revisar las últimas MARGEN_IDS compras, como ya hacía con
+-- las líneas de factura, y descarta las ya aplicadas con costo_compra.
+--
+-- Los productos ya costeados se marcan para recalcular: la siguiente
+-- actualización llena costo_compra y recoge cualquier compra perdida.
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- Tabla COSTO_COMPRA (compras ya aplicadas al costeo, ver migración 012)
+CREATE TABLE IF NOT EXISTS costo_compra (
+    id_compra INT PRIMARY KEY,
+    id_producto INT NOT NULL,
+    FOREIGN KEY (id_compra) REFERENCES compra(id_compra) ON DELETE CASCADE,
+    INDEX idx_costo_compra_producto (id_producto)
+);
+
+UPDATE costo_producto SET recalcular = TRUE;
@@ -0,0 +1,25 @@
+-- =====================================================
+-- MIGRACIÓN 013: Orden de registro para el costeo del mismo día
+-- Base de datos: disfruleg
+--
+-- compra y factura solo guardan la fecha. actualizar_costos
+-- (src/modules/analytics/costo_ventas.py) aplicaba las compras de un día
+-- antes que sus ventas, así que una compra con la misma fecha que la última
+-- venta costeada obligaba a recalcular el producto desde su primera compra:
+-- cada resurtido del día repetía todo el historial.
+--
+-- fecha_registro ordena los eventos del mismo día por el momento en que se
+-- capturaron: una compra registrada después de la última venta costeada se
+-- aplica encima del estado guardado. Las filas existentes quedan con la hora
+-- de esta migración y conservan el orden anterior (compras antes que ventas).
+--
+-- Aplicar con: python scripts/aplicar_migraciones.py
+-- =====================================================
+
+USE disfruleg;
+
+-- agregar_columna_si_falta lo define data/sql/migraciones/procedimientos.sql
+-- (scripts/aplicar_migraciones.py lo crea antes de aplicar)
+CALL agregar_columna_si_falta('compra', 'fecha_registro', 'TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP');
+CALL agregar_columna_si_falta('factura', 'fecha_registro', 'TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP');
+CALL agregar_columna_si_falta('costo_producto', 'ultima_venta_registro', 'TIMESTAMP NULL AFTER ultima_venta');
@@ -0,0 +1,45 @@
+-- =====================================================
+-- Procedimientos auxiliares de las migraciones
+-- Base de datos: disfruleg
+--
+-- scripts/aplicar_migraciones.py los crea antes de aplicar las migraciones
+-- pendientes y los borra al terminar. No lleva número de versión, así que
+-- no se registra en migraciones_aplicadas.
+-- =====================================================
+
+-- MySQL no tiene CREATE INDEX IF NOT EXISTS; con este procedimiento las
+-- migraciones se pueden volver a ejecutar sin error
+DROP PROCEDURE IF EXISTS crear_indice_si_falta;
+
+DELIMITER //
+CREATE PROCEDURE crear_indice_si_falta(IN tabla VARCHAR(64), IN indice VARCHAR(64), IN columnas VARCHAR(255))
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tabla AND INDEX_NAME = indice
+    ) THEN
+        SET @crear_indice = CONCAT('CREATE INDEX ', indice, ' ON ', tabla, ' (', columnas, ')');
+        PREPARE sentencia FROM @crear_indice;
+        EXECUTE sentencia;
+        DEALLOCATE PREPARE sentencia;
+    END IF;
+END //
+DELIMITER ;
+
+-- Tampoco tiene ADD COLUMN IF NOT EXISTS
+DROP PROCEDURE IF EXISTS agregar_columna_si_falta;
+
+DELIMITER //
+CREATE PROCEDURE agregar_columna_si_falta(IN tabla VARCHAR(64), IN columna VARCHAR(64), IN definicion VARCHAR(255))
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tabla AND COLUMN_NAME = columna
+    ) THEN
+        SET @agregar_columna = CONCAT('ALTER TABLE ', tabla, ' ADD COLUMN ', columna, ' ', definicion);
+        PREPARE sentencia FROM @agregar_columna;
+        EXECUTE sentencia;
+        DEALLOCATE PREPARE sentencia;
+    END IF;
+END //
+DELIMITER ;
@@ -14,7 +14,17 @@ from tkinter import messagebox
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
-def launch_receipts_module(user_data=None):
+def _create_window(master=None):
+    """Own Tk root for a standalone process, or a Toplevel when hosted"""
+    return tk.Tk() if master is None else tk.Toplevel(master)
+
+def _run_window(root, master=None):
+    """Run the event loop only when the module owns the process"""
+    if master is None:
+        root.mainloop()
+    return root
+
+def launch_receipts_module(user_data=None, master=None):
     """Launch the receipts module with VentanaOrdenes as the main hub"""
     try:
         # Change to project root directory
@@ -41,7 +51,7 @@ def launch_receipts_module(user_data=None):
             """Callback to create a new order - opens ReciboAppMejorado without folio"""
             try:
                 # Create new editor window as Toplevel (allows multiple editors)
-                editor_root = tk.Toplevel()
+                editor_root = tk.Toplevel(master)
                 editor_root.title("Disfruleg - Nueva Orden")
                 editor_root.geometry("1100x750")
                 
@@ -79,7 +89,7 @@ def launch_receipts_module(user_data=None):
             """Callback to edit existing order - opens ReciboAppMejorado with specific folio"""
             try:
                 # Create editor window for specific order
-                editor_root = tk.Toplevel()
+                editor_root = tk.Toplevel(master)
                 editor_root.title(f"Disfruleg - Editando Orden {folio:06d}")
                 editor_root.geometry("1100x750")
                 
@@ -114,19 +124,24 @@ def launch_receipts_module(user_data=None):
                 print(f"Error editing order {folio}: {e}")
         
         # Create root window first to avoid tkinter initialization issues
-        root = tk.Tk()
-        root.withdraw()  # Hide the root window since VentanaOrdenes will be the main interface
+        if master is None:
+            root = tk.Tk()
+            root.withdraw()  # Hide the root window since VentanaOrdenes will be the main interface
+        else:
+            root = master
         
-        # Launch VentanaOrdenes as the main hub
+        # Launch VentanaOrdenes as the main hub (Toplevel when hosted)
         ventana_ordenes = abrir_ventana_ordenes(
-            parent=None,  # Main window, not child
+            parent=master,
             user_data=user_data,
             on_nueva_orden=callback_nueva_orden,
             on_editar_orden=callback_editar_orden
         )
         
         # Start the main event loop
-        ventana_ordenes.show()
+        if master is None:
+            ventana_ordenes.show()
+        return ventana_ordenes.root
         
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo cargar el módulo de recibos: {str(e)}")
@@ -135,13 +150,13 @@ def launch_receipts_module(user_data=None):
         traceback.print_exc()
 
 
-def launch_pricing_module(user_data=None):
+def launch_pricing_module(user_data=None, master=None):
     """Launch the price editor module"""
     try:
         os.chdir(project_root)
         from src.modules.pricing.price_editor import PriceEditorApp
         
-        root = tk.Tk()
+        root = _create_window(master)
         
         if user_data is None:
             user_data = {
@@ -151,19 +166,20 @@ def launch_pricing_module(user_data=None):
             }
         
         app = PriceEditorApp(root, user_data)
-        root.mainloop()
+        root.protocol("WM_DELETE_WINDOW", app.on_closing)
+        return _run_window(root, master)
         
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo cargar el editor de precios: {str(e)}")
         print(f"Error launching pricing module: {e}")
 
-def launch_inventory_module(user_data=None):
+def launch_inventory_module(user_data=None, master=None):
     """Launch the inventory/purchases module"""
     try:
         os.chdir(project_root)
         from src.modules.inventory.registro_compras import ComprasApp
         
-        root = tk.Tk()
+        root = _create_window(master)
         
         if user_data is None:
             user_data = {
@@ -173,19 +189,20 @@ def launch_inventory_module(user_data=None):
             }
         
         app = ComprasApp(root, user_data)
-        root.mainloop()
+        root.protocol("WM_DELETE_WINDOW", app.on_closing)
+        return _run_window(root, master)
         
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo cargar el registro de compras: {str(e)}")
         print(f"Error launching inventory module: {e}")
 
-def launch_analytics_module(user_data=None):
+def launch_analytics_module(user_data=None, master=None):
     """Launch the analytics module"""
     try:
         os.chdir(project_root)
         from src.modules.analytics.analizador_ganancias import AnalisisGananciasApp
         
-        root = tk.Tk()
+        root = _create_window(master)
         
         if user_data is None:
             user_data = {
@@ -195,19 +212,20 @@ def launch_analytics_module(user_data=None):
             }
         
         app = AnalisisGananciasApp(root, user_data)
-        root.mainloop()
+        root.protocol("WM_DELETE_WINDOW", app.on_closing)
+        return _run_window(root, master)
         
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo cargar el analizador de ganancias: {str(e)}")
         print(f"Error launching analytics module: {e}")
 
-def launch_clients_module(user_data=None):
+def launch_clients_module(user_data=None, master=None):
     """Launch the client management module"""
     try:
         os.chdir(project_root)
         from src.modules.clients.client_manager import ClientManagerApp
         
-        root = tk.Tk()
+        root = _create_window(master)
         
         if user_data is None:
             user_data = {
@@ -217,19 +235,20 @@ def launch_clients_module(user_data=None):
             }
         
         app = ClientManagerApp(root)
-        root.mainloop()
+        root.protocol("WM_DELETE_WINDOW", app.on_closing)
+        return _run_window(root, master)
         
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo cargar el administrador de clientes: {str(e)}")
         print(f"Error launching clients module: {e}")
 
-def launch_users_module(user_data=None):
+def launch_users_module(user_data=None, master=None):
     """Launch the user management module"""
     try:
         os.chdir(project_root)
         from src.modules.users.user_manager import UserManagerApp
         
-        root = tk.Tk()
+        root = _create_window(master)
         
         if user_data is None:
             user_data = {
@@ -239,7 +258,7 @@ def launch_users_module(user_data=None):
             }
         
         app = UserManagerApp(root, user_data)
-        root.mainloop()
+        return _run_window(root, master)
         
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo cargar el administrador de usuarios: {str(e)}")
@@ -247,7 +266,7 @@ def launch_users_module(user_data=None):
         import traceback
         traceback.print_exc()
 
-def launch_debts_module(user_data=None):
+def launch_debts_module(user_data=None, master=None):
     """Launch the debt management module"""
     try:
         os.chdir(project_root)
@@ -260,7 +279,7 @@ def launch_debts_module(user_data=None):
                 'username': 'test'
             }
         
-        launch_debt_window(user_data)
+        return launch_debt_window(user_data, master=master)
         
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo cargar el módulo de deudas: {str(e)}")
@@ -268,6 +287,63 @@ def launch_debts_module(user_data=None):
         import traceback
         traceback.print_exc()
 
+# Module key -> launcher; each opens its own Tk root, or a Toplevel of master
+MODULE_LAUNCHERS = {
+    "receipts": launch_receipts_module,
+    "pricing": launch_pricing_module,
+    "inventory": launch_inventory_module,
+    "analytics": launch_analytics_module,
+    "clients": launch_clients_module,
+    "users": launch_users_module,
+    "debts": launch_debts_module,
+}
+
+# Heavy imports done once by the host before its first launch
+MODULE_IMPORTS = {
+    "receipts": "src.modules.receipts.receipt_generator_refactored",
+    "pricing": "src.modules.pricing.price_editor",
+    "inventory": "src.modules.inventory.registro_compras",
+    "analytics": "src.modules.analytics.analizador_ganancias",
+    "clients": "src.modules.clients.client_manager",
+    "users": "src.modules.users.user_manager",
+    "debts": "src.modules.deudas.debt_window",
+}
+
+def open_module(module_key, user_data=None, master=None):
+    """
+    Open a module by key.
+
+    Without master the module creates its own Tk root and runs the event
+    loop (one process per module). With master it opens as a Toplevel in the
+    running interpreter and returns the window, or None if it failed.
+
+    Hosted windows share the process' connection pool, so each one reserves
+    its own share of connections until it is destroyed. When no share is
+    left this raises PoolError instead of letting the window wait for a
+    connection and fail half-built.
+    """
+    if master is None:
+        return MODULE_LAUNCHERS[module_key](user_data, master=master)
+
+    from src.database.pool import reservar_conexiones
+    liberar = reservar_conexiones()
+    try:
+        window = MODULE_LAUNCHERS[module_key](user_data, master=master)
+    except Exception:
+        liberar()
+        raise
+    if window is None:
+        liberar()
+        return None
+
+    def on_destroy(event):
+        # <Destroy> also fires for every child widget
+        if event.widget is window:
+            liberar()
+
+    window.bind("<Destroy>", on_destroy, add="+")
+    return window
+
 def main():
     """Main entry point when script is run directly"""
     if len(sys.argv) < 2:
@@ -275,11 +351,17 @@ def main():
         print("Available modules: receipts, pricing, inventory, analytics, clients, users, debts")
         sys.exit(1)
     
+    if sys.argv[1] == "--host":
+        # Long-lived warm host (MODULE_LAUNCH_MODE = "host")
+        from src.ui.anfitrion_modulos import servir
+        servir(open_module, precargar=MODULE_IMPORTS.values())
+        return
+    
     module_name = sys.argv[1].lower()
     
     # Get user data from command line if provided (as JSON string)
     user_data = None
-    if len(sys.argv) > 2:
+    if len(sys.argv) > 2 and not sys.argv[2].startswith("--"):
         import json
         try:
             user_data = json.loads(sys.argv[2])
@@ -287,24 +369,22 @@ def main():
             print("Warning: Invalid user data JSON, using default")
     
     # Launch the appropriate module
-    if module_name == "receipts":
-        launch_receipts_module(user_data)
-    elif module_name == "pricing":
-        launch_pricing_module(user_data)
-    elif module_name == "inventory":
-        launch_inventory_module(user_data)
-    elif module_name == "analytics":
-        launch_analytics_module(user_data)
-    elif module_name == "clients":
-        launch_clients_module(user_data)
-    elif module_name == "users":
-        launch_users_module(user_data)
-    elif module_name == "debts":
-        launch_debts_module(user_data)
-    else:
+    if module_name not in MODULE_LAUNCHERS:
         print(f"Unknown module: {module_name}")
-        print("Available modules: receipts, pricing, inventory, analytics, clients, users, debts")
+        print(f"Available modules: {', '.join(MODULE_LAUNCHERS)}")
         sys.exit(1)
+    
+    if "--measure" in sys.argv:
+        # Used by scripts/benchmark_arranque_modulos.py: draw the window and exit
+        root = tk.Tk()
+        root.withdraw()
+        window = open_module(module_name, user_data, master=root)
+        if window is not None:
+            window.update_idletasks()
+        root.destroy()
+        return
+    
+    open_module(module_name, user_data)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Costea las líneas de factura pendientes en costo_venta (FIFO o promedio).
+
+El análisis de ganancias ya actualiza los costos al abrirse; este comando
+sirve para cambiar de método, reconstruir todo tras una carga masiva o
+dejar los costos al día desde una tarea programada.
+
+Uso:
+    python scripts/actualizar_costos.py                     # solo lo nuevo
+    python scripts/actualizar_costos.py --metodo promedio   # cambia el método y recalcula
+    python scripts/actualizar_costos.py --reconstruir
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mysql.connector import Error
+from src.database.pool import prestar_conexion
+from src.modules.analytics.costo_ventas import METODOS, actualizar_costos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualizar el costo de lo vendido")
+    parser.add_argument('--metodo', choices=METODOS,
+                        help="Método de costeo; si cambia se recalculan todos los productos")
+    parser.add_argument('--reconstruir', action='store_true',
+                        help="Recalcular todos los productos desde su primera compra")
+    args = parser.parse_args()
+
+    print("🧮 Actualizando costo de lo vendido...")
+    inicio = time.perf_counter()
+    try:
+        with prestar_conexion() as conn:
+            resultado = actualizar_costos(conn, metodo=args.metodo, reconstruir=args.reconstruir)
+    except Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
+    segundos = time.perf_counter() - inicio
+
+    print(f"✅ {resultado['lineas']:,} líneas costeadas en {resultado['productos']:,} productos "
+          f"({resultado['recalculados']:,} recalculados desde el inicio) en {segundos:.1f} s")
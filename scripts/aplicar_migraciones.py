@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Aplica las migraciones SQL versionadas de data/sql/migraciones/
+
+Cada archivo NNN_nombre.sql se aplica una sola vez, en orden, y queda
+registrado en la tabla migraciones_aplicadas. Los procedimientos que
+comparten (procedimientos.sql) se crean antes y se borran al terminar.
+
+Uso:
+    python scripts/aplicar_migraciones.py            # aplica las pendientes
+    python scripts/aplicar_migraciones.py --listar   # solo muestra el estado
+"""
+
+import os
+import re
+import sys
+import argparse
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mysql.connector import Error
+from src.database.pool import prestar_conexion
+
+MIGRACIONES_DIR = os.path.join(project_root, 'data', 'sql', 'migraciones')
+PROCEDIMIENTOS = os.path.join(MIGRACIONES_DIR, 'procedimientos.sql')
+
+
+def listar_archivos():
+    """Lista (version, nombre, ruta) de las migraciones disponibles, en orden"""
+    migraciones = []
+    for archivo in sorted(os.listdir(MIGRACIONES_DIR)):
+        match = re.match(r'^(\d+)_(.+)\.sql$', archivo)
+        if match:
+            migraciones.append((int(match.group(1)), match.group(2),
+                                os.path.join(MIGRACIONES_DIR, archivo)))
+    return migraciones
+
+
+def separar_sentencias(sql):
+    """
+    Separa un script en sentencias individuales respetando DELIMITER,
+    para poder crear triggers y procedimientos desde el conector.
+    """
+    sentencias = []
+    delimitador = ';'
+    actual = []
+
+    for linea in sql.splitlines():
+        limpia = linea.strip()
+        if not actual and (not limpia or limpia.startswith('--')):
+            continue
+        if limpia.upper().startswith('DELIMITER'):
+            delimitador = limpia.split()[1]
+            continue
+
+        actual.append(linea)
+        if limpia.endswith(delimitador):
+            sentencia = '\n'.join(actual).rstrip()
+            sentencia = sentencia[:-len(delimitador)].strip()
+            if sentencia:
+                sentencias.append(sentencia)
+            actual = []
+
+    resto = '\n'.join(actual).strip()
+    if resto:
+        sentencias.append(resto)
+    return sentencias
+
+
+def ejecutar_sentencias(cursor, sentencias):
+    for sentencia in sentencias:
+        # La base la define la configuración de conexión (DB_NAME)
+        if sentencia.upper().startswith('USE '):
+            continue
+        cursor.execute(sentencia)
+        if cursor.with_rows:
+            cursor.fetchall()
+
+
+def crear_procedimientos(cursor):
+    """
+    Crea los procedimientos auxiliares de procedimientos.sql.
+    Retorna sus nombres, para borrarlos al terminar.
+    """
+    with open(PROCEDIMIENTOS, encoding='utf-8') as f:
+        sentencias = separar_sentencias(f.read())
+    ejecutar_sentencias(cursor, sentencias)
+    return [match.group(1) for sentencia in sentencias
+            for match in [re.match(r'CREATE PROCEDURE (\w+)', sentencia, re.IGNORECASE)] if match]
+
+
+def asegurar_tabla_control(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS migraciones_aplicadas (
+            version INT PRIMARY KEY,
+            nombre VARCHAR(150) NOT NULL,
+            fecha_aplicacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def obtener_aplicadas(cursor):
+    cursor.execute("SELECT version FROM migraciones_aplicadas")
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def aplicar_migraciones(solo_listar=False):
+    """Aplica las migraciones pendientes. Retorna True si no hubo errores"""
+    with prestar_conexion() as conn:
+        cursor = conn.cursor()
+        procedimientos = []
+        try:
+            asegurar_tabla_control(cursor)
+            aplicadas = obtener_aplicadas(cursor)
+            if not solo_listar and any(version not in aplicadas for version, _, _ in listar_archivos()):
+                procedimientos = crear_procedimientos(cursor)
+
+            for version, nombre, ruta in listar_archivos():
+                if version in aplicadas:
+                    print(f"  ✓ {version:03d} {nombre} (aplicada)")
+                    continue
+                if solo_listar:
+                    print(f"  · {version:03d} {nombre} (pendiente)")
+                    continue
+
+                print(f"🔄 Aplicando {version:03d} {nombre}...")
+                with open(ruta, encoding='utf-8') as f:
+                    sentencias = separar_sentencias(f.read())
+
+                # Las sentencias DDL de MySQL hacen commit implícito, por eso
+                # cada migración debe poder reejecutarse (IF EXISTS / IF NOT EXISTS)
+                ejecutar_sentencias(cursor, sentencias)
+
+                cursor.execute(
+                    "INSERT INTO migraciones_aplicadas (version, nombre) VALUES (%s, %s)",
+                    (version, nombre)
+                )
+                conn.commit()
+                print(f"✅ {version:03d} {nombre} aplicada")
+
+            return True
+
+        except Error as e:
+            print(f"❌ Error aplicando migraciones: {e}")
+            conn.rollback()
+            return False
+        finally:
+            try:
+                for procedimiento in procedimientos:
+                    cursor.execute(f"DROP PROCEDURE IF EXISTS {procedimiento}")
+            except Error as e:
+                print(f"⚠️  No se pudieron borrar los procedimientos auxiliares: {e}")
+            cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplicar migraciones SQL de DISFRULEG")
+    parser.add_argument('--listar', action='store_true', help="Solo mostrar el estado de las migraciones")
+    args = parser.parse_args()
+
+    exito = aplicar_migraciones(solo_listar=args.listar)
+    sys.exit(0 if exito else 1)
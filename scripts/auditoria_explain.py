@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Auditoría de planes de ejecución (EXPLAIN) de las consultas de la aplicación.
+
+Ejecuta EXPLAIN sobre el catálogo de consultas de los módulos (reportes,
+deudas, compras, ventas) con valores reales de la base y marca los
+recorridos completos de tabla o de índice, los ordenamientos en memoria y
+las tablas temporales. Con --capturadas también audita los SELECT que la
+aplicación ejecutó recientemente, tomados de performance_schema.
+
+Sale con código 1 si alguna consulta recorre una tabla completa sin que
+el catálogo lo espere, para poder usarlo después de cada migración.
+
+Uso:
+    python scripts/auditoria_explain.py
+    python scripts/auditoria_explain.py --medir 5 --umbral 500
+    python scripts/auditoria_explain.py --capturadas
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import date, timedelta
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mysql.connector import Error
+from src.modules.analytics.analizador_ganancias import GANANCIAS_POR_PRODUCTO_SQL, consulta_ganancias_por_producto
+from src.modules.analytics.costo_ventas import MARGEN_IDS, COMPRAS_SIN_COSTEAR_SQL, VENTAS_SIN_COSTEAR_SQL
+from src.modules.analytics.columnas_ventas import VENTAS_EN_COLUMNAS_SQL, COMPRAS_EN_COLUMNAS_SQL
+from src.modules.receipts.components.database import SELECT_VENTAS_DIARIAS
+
+# Tablas con menos filas estimadas que esto no se reportan (catálogos pequeños)
+UMBRAL_FILAS = 1000
+
+# (nombre, origen, consulta, parámetros, recorre_todo)
+# Los parámetros son claves de valores_muestra(). recorre_todo marca las
+# consultas que por diseño leen toda una tabla (agregados globales); sus
+# recorridos se informan pero no cuentan como falla. Las consultas que los
+# módulos guardan en constantes se importan, no se copian.
+CONSULTAS = [
+    ("Ventas del día", "analizador_ganancias.export_to_pdf", """
+        SELECT vd.nombre_producto, vd.cantidad_factura, vd.subtotal_con_descuento, c.nombre_cliente
+        FROM vista_detalle_factura_con_descuento vd
+        JOIN factura f ON vd.id_factura = f.id_factura
+        JOIN cliente c ON f.id_cliente = c.id_cliente
+        WHERE f.fecha_factura = %s
+        ORDER BY f.id_factura
+    """, ('hoy',), False),
+    ("Compras del día", "analizador_ganancias.export_to_pdf", """
+        SELECT p.nombre_producto, c.cantidad_compra, c.precio_unitario_compra
+        FROM compra c
+        JOIN producto p ON c.id_producto = p.id_producto
+        WHERE c.fecha_compra = %s
+        ORDER BY c.id_compra
+    """, ('hoy',), False),
+    ("Líneas sin costear", "costo_ventas.actualizar_costos", VENTAS_SIN_COSTEAR_SQL, ('id_detalle',), False),
+    ("Compras sin costear", "costo_ventas.actualizar_costos", COMPRAS_SIN_COSTEAR_SQL, ('id_compra',), False),
+    ("Ventas en columnas", "columnas_ventas.VentasEnColumnas.cargar", VENTAS_EN_COLUMNAS_SQL, (), True),
+    ("Compras en columnas", "columnas_ventas.VentasEnColumnas.cargar", COMPRAS_EN_COLUMNAS_SQL, (), True),
+    ("Reconstruir ventas_diarias", "database.reconstruir_ventas_diarias",
+     SELECT_VENTAS_DIARIAS.format(filtro="f.fecha_factura >= %s AND f.fecha_factura <= %s"),
+     ('desde', 'hasta'), False),
+    ("ventas_diarias de un producto", "database.recalcular_ventas_diarias_producto",
+     SELECT_VENTAS_DIARIAS.format(filtro="df.id_producto = %s AND c.id_grupo = %s"),
+     ('id_producto', 'id_grupo'), False),
+    ("Clientes por grupo", "database.obtener_clientes_por_grupo", """
+        SELECT id_cliente, nombre_cliente FROM cliente WHERE id_grupo = %s ORDER BY nombre_cliente
+    """, ('id_grupo',), False),
+    ("Facturas del cliente", "client_manager.delete_client", """
+        SELECT COUNT(*) AS count FROM factura WHERE id_cliente = %s
+    """, ('id_cliente',), False),
+    ("Deudas del cliente", "debt_manager.obtener_deudas_cliente", """
+        SELECT * FROM vista_deudas_detalladas WHERE id_cliente = %s ORDER BY fecha_generada DESC
+    """, ('id_cliente',), False),
+    ("Historial de pagos", "debt_manager.obtener_historial_pagos", """
+        SELECT id_pago, id_deuda, monto_pagado, fecha_pago FROM vista_historial_pagos
+        WHERE fecha_pago >= %s AND fecha_pago < %s + INTERVAL 1 DAY
+        ORDER BY fecha_pago DESC, id_pago DESC
+    """, ('desde', 'hasta'), False),
+    ("Clientes con saldo", "debt_manager.obtener_clientes_con_deudas", """
+        SELECT s.id_cliente, c.nombre_cliente, s.saldo_pendiente
+        FROM saldo_cliente s
+        JOIN cliente c ON s.id_cliente = c.id_cliente
+        WHERE s.saldo_pendiente > 0
+        ORDER BY s.saldo_pendiente DESC
+    """, (), False),
+    ("Estadísticas de deudas", "debt_manager.obtener_estadisticas_deudas", """
+        SELECT COUNT(CASE WHEN saldo_pendiente > 0 THEN 1 END), SUM(saldo_pendiente),
+               SUM(deudas_pendientes), SUM(deudas_pagadas)
+        FROM saldo_cliente
+    """, (), True),
+    ("Cambios de órdenes", "orden_manager.obtener_cambios", """
+        SELECT og.folio_numero, og.estado, og.activo, og.fecha_modificacion, c.nombre_cliente
+        FROM ordenes_guardadas og
+        JOIN cliente c ON og.id_cliente = c.id_cliente
+        WHERE og.fecha_modificacion >= %s
+        ORDER BY og.fecha_modificacion
+        LIMIT 500
+    """, ('hoy',), False),
+    ("Ganancias por producto del período", "analizador_ganancias.load_analysis",
+     # Solo se toma el SQL; los valores salen de valores_muestra()
+     consulta_ganancias_por_producto(date.min, date.max)[0], ('desde', 'hasta') * 3, False),
+    ("Ganancias por producto", "analizador_ganancias.load_analysis", GANANCIAS_POR_PRODUCTO_SQL, (), True),
+    ("Búsqueda de clientes", "client_manager.search_clients_sql", """
+        SELECT c.id_cliente, c.nombre_cliente, g.clave_grupo
+        FROM cliente c
+        JOIN grupo g ON c.id_grupo = g.id_grupo
+        WHERE c.nombre_cliente LIKE %s OR c.telefono LIKE %s OR c.correo LIKE %s
+        ORDER BY c.nombre_cliente
+        LIMIT 5000
+    """, ('prefijo', 'prefijo', 'prefijo'), False),
+    ("Búsqueda de usuarios", "user_manager.search_users_sql", """
+        SELECT id_usuario, username, nombre_completo FROM usuarios_sistema
+        WHERE username LIKE %s OR nombre_completo LIKE %s
+        ORDER BY username
+        LIMIT 5000
+    """, ('prefijo', 'prefijo'), False),
+    ("Página de compras", "registro_compras.obtener_pagina_compras", """
+        SELECT c.id_compra, c.fecha_compra, p.nombre_producto, c.cantidad_compra
+        FROM compra c
+        JOIN producto p ON c.id_producto = p.id_producto
+        WHERE (c.fecha_compra < %s OR (c.fecha_compra = %s AND c.id_compra < %s))
+        ORDER BY c.fecha_compra DESC, c.id_compra DESC
+        LIMIT 101
+    """, ('hoy', 'hoy', 'id_maximo'), False),
+    ("Página de historial de pagos", "debt_manager.obtener_pagina_historial_pagos", """
+        SELECT id_pago, nombre_cliente, monto_pagado, fecha_pago FROM vista_historial_pagos
+        WHERE (fecha_pago < %s OR (fecha_pago = %s AND id_pago < %s))
+        ORDER BY fecha_pago DESC, id_pago DESC
+        LIMIT 101
+    """, ('hoy', 'hoy', 'id_maximo'), False),
+    ("Página de historial de órdenes", "orden_manager.obtener_historial_pagina", """
+        SELECT og.folio_numero, og.fecha_modificacion, c.nombre_cliente
+        FROM ordenes_guardadas og
+        JOIN cliente c ON og.id_cliente = c.id_cliente
+        WHERE og.estado = 'registrada' AND og.activo = TRUE
+          AND (og.fecha_modificacion < %s OR (og.fecha_modificacion = %s AND og.folio_numero < %s))
+        ORDER BY og.fecha_modificacion DESC, og.folio_numero DESC
+        LIMIT 101
+    """, ('hoy', 'hoy', 'id_maximo'), False),
+]
+
+
+def valores_muestra(cursor):
+    """Valores reales para los parámetros del catálogo"""
+    cursor.execute("SELECT MIN(id_cliente) AS id_cliente FROM cliente")
+    id_cliente = cursor.fetchone()['id_cliente']
+    cursor.execute("SELECT MIN(id_grupo) AS id_grupo FROM grupo")
+    id_grupo = cursor.fetchone()['id_grupo']
+    cursor.execute("SELECT MIN(id_producto) AS id_producto FROM producto")
+    id_producto = cursor.fetchone()['id_producto']
+    cursor.execute("SELECT COALESCE(MAX(id_detalle), 0) AS id_detalle FROM detalle_factura")
+    id_detalle = cursor.fetchone()['id_detalle']
+    cursor.execute("SELECT COALESCE(MAX(id_compra), 0) AS id_compra FROM compra")
+    id_compra = cursor.fetchone()['id_compra']
+    hoy = date.today()
+    return {
+        'hoy': hoy,
+        'desde': hoy - timedelta(days=365),
+        'hasta': hoy + timedelta(days=1),
+        'id_cliente': id_cliente,
+        'id_grupo': id_grupo,
+        'id_producto': id_producto,
+        # Ventana de líneas y compras que revisa cada actualización de costos
+        'id_detalle': max(id_detalle - MARGEN_IDS, 0),
+        'id_compra': max(id_compra - MARGEN_IDS, 0),
+        # Llave de página que no descarta filas (INT máximo)
+        'id_maximo': 2147483647,
+        # Patrón de las búsquedas por prefijo
+        'prefijo': 'ma%',
+    }
+
+
+def ejecutar(cursor, consulta, parametros):
+    # Sin parámetros no se interpolan los % de DATE_FORMAT
+    cursor.execute(consulta, parametros or None)
+    return cursor.fetchall()
+
+
+def explicar(cursor, consulta, parametros):
+    return ejecutar(cursor, "EXPLAIN " + consulta.strip(), parametros)
+
+
+def analizar_plan(plan, umbral=UMBRAL_FILAS):
+    """
+    Revisa las filas de un EXPLAIN tradicional.
+    Retorna una lista de hallazgos (texto); vacía si el plan usa índices.
+    """
+    hallazgos = []
+    for paso in plan:
+        tabla = paso.get('table') or ''
+        filas = int(paso.get('rows') or 0)
+        extra = paso.get('Extra') or ''
+        # Tablas derivadas y vistas materializadas ya se revisan en su propio paso
+        if tabla.startswith('<') or filas < umbral:
+            continue
+
+        if paso.get('type') == 'ALL':
+            hallazgos.append(f"recorrido completo de {tabla} (~{filas:,} filas)")
+        elif paso.get('type') == 'index':
+            hallazgos.append(f"recorrido completo del índice {paso.get('key')} de {tabla} (~{filas:,} filas)")
+        if 'Using filesort' in extra:
+            hallazgos.append(f"ordenamiento en memoria sobre {tabla}")
+        if 'Using temporary' in extra:
+            hallazgos.append(f"tabla temporal sobre {tabla}")
+    return hallazgos
+
+
+def medir_consulta(cursor, consulta, parametros, repeticiones):
+    """Mediana en milisegundos de ejecutar la consulta y leer sus filas"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        ejecutar(cursor, consulta, parametros)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def consultas_capturadas(cursor, limite=200):
+    """SELECT recientes de la base actual registrados en performance_schema"""
+    cursor.execute("""
+        SELECT DISTINCT SQL_TEXT AS consulta
+        FROM performance_schema.events_statements_history_long
+        WHERE CURRENT_SCHEMA = DATABASE()
+        AND SQL_TEXT LIKE 'SELECT%%'
+        AND SQL_TEXT NOT LIKE '%%performance_schema%%'
+        LIMIT %s
+    """, (limite,))
+    # performance_schema recorta los textos largos con '...'
+    return [fila['consulta'] for fila in cursor.fetchall()
+            if fila['consulta'] and not fila['consulta'].endswith('...')]
+
+
+def auditar(cursor, umbral=UMBRAL_FILAS, repeticiones=0, capturadas=False):
+    """
+    Audita el catálogo (y opcionalmente lo capturado).
+    Retorna el número de consultas con recorridos completos inesperados.
+    """
+    valores = valores_muestra(cursor)
+    pendientes = [
+        (nombre, origen, consulta, tuple(valores[clave] for clave in claves), recorre_todo)
+        for nombre, origen, consulta, claves, recorre_todo in CONSULTAS
+    ]
+    if capturadas:
+        pendientes += [(f"Capturada #{i}", "performance_schema", consulta, (), False)
+                       for i, consulta in enumerate(consultas_capturadas(cursor), 1)]
+
+    fallas = 0
+    for nombre, origen, consulta, parametros, recorre_todo in pendientes:
+        try:
+            hallazgos = analizar_plan(explicar(cursor, consulta, parametros), umbral)
+        except Error as e:
+            print(f"⚠️  {nombre} ({origen}): no se pudo explicar: {e}")
+            continue
+
+        tiempo = ""
+        if repeticiones:
+            tiempo = f" - {medir_consulta(cursor, consulta, parametros, repeticiones):.1f} ms"
+
+        if not hallazgos:
+            print(f"✅ {nombre} ({origen}){tiempo}")
+            continue
+
+        if recorre_todo:
+            print(f"ℹ️  {nombre} ({origen}){tiempo} - agregado global")
+        else:
+            fallas += 1
+            print(f"❌ {nombre} ({origen}){tiempo}")
+        if origen == "performance_schema":
+            print(f"      {' '.join(consulta.split())[:150]}")
+        for hallazgo in hallazgos:
+            print(f"      - {hallazgo}")
+
+    return fallas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auditoría EXPLAIN de las consultas de DISFRULEG")
+    parser.add_argument('--umbral', type=int, default=UMBRAL_FILAS,
+                        help="Filas estimadas a partir de las cuales se reporta un recorrido")
+    parser.add_argument('--medir', type=int, default=0, metavar='N',
+                        help="Ejecutar cada consulta N veces y mostrar la mediana")
+    parser.add_argument('--capturadas', action='store_true',
+                        help="Auditar también los SELECT registrados en performance_schema")
+    args = parser.parse_args()
+
+    from src.database.pool import prestar_conexion
+    with prestar_conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            fallas = auditar(cursor, args.umbral, args.medir, args.capturadas)
+        finally:
+            cursor.close()
+
+    print(f"\n{'✅ Sin recorridos completos inesperados' if not fallas else f'❌ {fallas} consulta(s) con recorridos completos'}")
+    sys.exit(1 if fallas else 0)
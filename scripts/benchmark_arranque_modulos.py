@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tiempo desde que se pide un módulo hasta que su ventana está dibujada, en
+los tres modos de MODULE_LAUNCH_MODE (src/config.py):
+
+  - subprocess: un intérprete nuevo por apertura (launch_module.py --measure);
+    incluye el arranque de Python, las importaciones y la verificación de BD
+  - host: solicitud al proceso anfitrión ya caliente (src/ui/anfitrion_modulos.py);
+    se informa aparte cuánto tarda el anfitrión en arrancar
+  - in_process: Toplevel en este mismo intérprete; la primera apertura paga
+    las importaciones, las siguientes no
+
+Necesita pantalla y la base de datos (las ventanas consultan al abrirse).
+En un servidor sin X usar:
+    xvfb-run python scripts/benchmark_arranque_modulos.py
+
+Uso:
+    python scripts/benchmark_arranque_modulos.py
+    python scripts/benchmark_arranque_modulos.py --modulos pricing clients --repeticiones 5
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tkinter as tk
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.ui.anfitrion_modulos import AnfitrionModulos
+
+LAUNCHER = os.path.join(project_root, "launch_module.py")
+USUARIO = {'nombre_completo': 'Benchmark', 'rol': 'admin', 'username': 'benchmark'}
+MODOS = ("subprocess", "host", "in_process")
+
+
+def medir_subprocess(modulo, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, LAUNCHER, modulo, "--measure"], cwd=project_root,
+                       stdout=subprocess.DEVNULL, check=False)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def iniciar_anfitrion(limite=120):
+    """Arranca el anfitrión y espera a que se conecte; retorna (anfitrión, segundos)"""
+    anfitrion = AnfitrionModulos([sys.executable, LAUNCHER, "--host"], cwd=project_root)
+    inicio = time.perf_counter()
+    anfitrion.iniciar()
+    while not anfitrion.conectado:
+        if not anfitrion.vivo or time.perf_counter() - inicio > limite:
+            print("❌ El anfitrión no arrancó")
+            sys.exit(1)
+        time.sleep(0.01)
+    return anfitrion, time.perf_counter() - inicio
+
+
+def medir_host(anfitrion, modulo, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        anfitrion.abrir(modulo, USUARIO, medir=True, responder=True)
+        respuesta = anfitrion.recibir(espera=120)
+        if not respuesta or not respuesta['abierto']:
+            print(f"❌ El anfitrión no pudo abrir {modulo}")
+            return tiempos
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def medir_in_process(root, modulo, repeticiones):
+    import launch_module
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        ventana = launch_module.open_module(modulo, USUARIO, master=root)
+        if ventana is None:
+            print(f"❌ No se pudo abrir {modulo}")
+            return tiempos
+        ventana.update_idletasks()
+        tiempos.append(time.perf_counter() - inicio)
+        ventana.destroy()
+    return tiempos
+
+
+def ejecutar_benchmark(args):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"❌ No hay pantalla para Tk ({e}); ejecutar con xvfb-run")
+        sys.exit(1)
+    root.withdraw()
+
+    anfitrion = None
+    if "host" in args.modos:
+        anfitrion, arranque = iniciar_anfitrion()
+        print(f"Anfitrión listo en {arranque:.2f} s (se paga una vez, durante el login)\n")
+
+    print(f"Apertura de módulos, {args.repeticiones} repeticiones (segundos)\n")
+    print(f"{'Módulo':<12} {'Modo':<12} {'Primera':>9} {'Mediana':>9} {'Mínimo':>9}")
+    for modulo in args.modulos:
+        for modo in args.modos:
+            if modo == "subprocess":
+                tiempos = medir_subprocess(modulo, args.repeticiones)
+            elif modo == "host":
+                tiempos = medir_host(anfitrion, modulo, args.repeticiones)
+            else:
+                tiempos = medir_in_process(root, modulo, args.repeticiones)
+            if tiempos:
+                print(f"{modulo:<12} {modo:<12} {tiempos[0]:>9.2f} "
+                      f"{statistics.median(tiempos):>9.2f} {min(tiempos):>9.2f}")
+        print()
+
+    if anfitrion is not None:
+        anfitrion.cerrar()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de módulos por modo de lanzamiento")
+    parser.add_argument('--modulos', nargs='+', default=["pricing", "clients", "analytics"])
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS))
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    ejecutar_benchmark(args)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice de búsqueda de productos contra la búsqueda con LIKE.
+
+Genera un catálogo sintético (50,000 productos por defecto) y mide cada
+consulta con el índice en memoria y con un recorrido lineal equivalente a
+LIKE '%texto%'. Con --sql también mide el LIKE real contra la tabla producto
+de la base configurada.
+
+Uso:
+    python scripts/benchmark_busqueda.py
+    python scripts/benchmark_busqueda.py --productos 100000 --sql
+    python scripts/benchmark_busqueda.py --limite 50
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(project_root)
+sys.path.insert(0, project_root)
+
+from src.utils.indice_busqueda import IndiceBusqueda, normalizar_texto
+
+BASES = ["Plátano", "Manzana", "Jitomate", "Cebolla", "Limón", "Aguacate", "Papa", "Zanahoria",
+         "Chile", "Mango", "Piña", "Naranja", "Pepino", "Calabacita", "Lechuga", "Brócoli",
+         "Fresa", "Uva", "Sandía", "Melón", "Guayaba", "Papaya", "Toronja", "Champiñón"]
+VARIEDADES = ["roja", "verde", "amarilla", "blanca", "morada", "criolla", "orgánica", "chica",
+              "mediana", "grande", "extra", "primera", "segunda", "Tabasco", "Hass", "Ataulfo",
+              "serrano", "jalapeño", "poblano", "saladet", "bola", "cambray", "italiana", "dominico"]
+PRESENTACIONES = ["caja", "bulto", "kilo", "pieza", "manojo", "arpilla", "charola", "reja"]
+
+CONSULTAS = ["platano", "PLÁTANO tabasco", "manz roj", "jitomte", "zana", "limon", "aguacate hass",
+             "champinon", "chile jal", "brocoli", "p", "sandia", "organica caja"]
+
+
+def generar_catalogo(cantidad, semilla=7):
+    azar = random.Random(semilla)
+    return [
+        (i, f"{azar.choice(BASES)} {azar.choice(VARIEDADES)} {azar.choice(PRESENTACIONES)} {azar.randint(1, 999)}")
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), max(tiempos)
+
+
+def buscar_lineal(nombres_normalizados, texto):
+    """Equivalente en memoria de nombre_producto LIKE '%texto%'"""
+    patron = normalizar_texto(texto)
+    return [id_doc for id_doc, nombre in nombres_normalizados if patron in nombre]
+
+
+def buscar_sql(cursor, texto):
+    cursor.execute(
+        "SELECT id_producto FROM producto WHERE nombre_producto LIKE %s ORDER BY nombre_producto",
+        (f"%{texto}%",)
+    )
+    return cursor.fetchall()
+
+
+def ejecutar_benchmark(productos, repeticiones, limite, usar_sql):
+    catalogo = generar_catalogo(productos)
+
+    inicio = time.perf_counter()
+    indice = IndiceBusqueda(catalogo)
+    construccion = (time.perf_counter() - inicio) * 1000
+    nombres_normalizados = [(id_doc, normalizar_texto(nombre)) for id_doc, nombre in catalogo]
+
+    print(f"📊 Catálogo sintético: {productos:,} productos - índice construido en {construccion:.0f} ms")
+    print(f"{'Consulta':<20} {'Índice ms':>10} {'máx':>8} {'Result.':>8} {'LIKE ms':>10} {'Result.':>8}")
+
+    medianas = []
+    for consulta in CONSULTAS:
+        indice_ms, indice_max = medir(lambda: indice.buscar(consulta, limite=limite), repeticiones)
+        lineal_ms, _ = medir(lambda: buscar_lineal(nombres_normalizados, consulta), repeticiones)
+        medianas.append(indice_ms)
+        print(f"{consulta:<20} {indice_ms:>10.2f} {indice_max:>8.2f} "
+              f"{len(indice.buscar(consulta, limite=limite)):>8} "
+              f"{lineal_ms:>10.2f} {len(buscar_lineal(nombres_normalizados, consulta)):>8}")
+
+    print(f"\nMediana general del índice: {statistics.median(medianas):.2f} ms "
+          f"(peor consulta: {max(medianas):.2f} ms)")
+
+    if usar_sql:
+        from src.database.pool import prestar_conexion
+        with prestar_conexion() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT COUNT(*) FROM producto")
+                print(f"\n📊 LIKE en la base ({cursor.fetchone()[0]:,} productos en la tabla producto)")
+                for consulta in CONSULTAS:
+                    sql_ms, sql_max = medir(lambda: buscar_sql(cursor, consulta), repeticiones)
+                    print(f"{consulta:<20} {sql_ms:>10.2f} {sql_max:>8.2f}")
+            finally:
+                cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del índice de búsqueda de productos")
+    parser.add_argument('--productos', type=int, default=50_000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    # Catálogo, editor de precios y registro de compras buscan sin límite
+    parser.add_argument('--limite', type=int, default=None,
+                        help="Máximo de resultados por búsqueda (por defecto sin límite, como los módulos)")
+    parser.add_argument('--sql', action='store_true', help="Medir también el LIKE contra la base configurada")
+    args = parser.parse_args()
+
+    ejecutar_benchmark(args.productos, args.repeticiones, args.limite, args.sql)
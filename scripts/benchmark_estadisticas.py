@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark de las sumas de las estadísticas avanzadas sobre 1,000,000 de
+líneas de factura generadas (por defecto).
+
+Compara las columnas de VentasEnColumnas (src/modules/analytics/
+columnas_ventas.py) con lo que hacía la ventana al recibir filas del cursor:
+diccionarios con Decimal convertidos a float uno por uno y sumados en
+bucles. Mide la carga, la memoria y cada agregación de las gráficas
+(producto, cliente, grupo, período). Usa NumPy si está instalado; con
+--sin-numpy mide el recorrido en Python de las mismas columnas.
+
+Uso:
+    python scripts/benchmark_estadisticas.py
+    python scripts/benchmark_estadisticas.py --lineas 200000 --sin-numpy
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.modules.analytics import columnas_ventas
+from src.modules.analytics.columnas_ventas import VentasEnColumnas
+from src.modules.analytics.periodos import etiqueta_periodo
+
+INICIO = date(2022, 1, 1)
+DIAS = 3 * 365
+
+
+def generar_filas(lineas, productos, clientes, azar):
+    """Filas como las entrega el cursor: (fecha, producto, cliente, factura, cantidad, ingresos, costo)"""
+    filas = []
+    factura, restantes = 0, 0
+    for _ in range(lineas):
+        if restantes == 0:
+            factura += 1
+            restantes = azar.randint(1, 12)
+            fecha = INICIO + timedelta(days=azar.randrange(DIAS))
+            cliente = azar.randint(1, clientes)
+        restantes -= 1
+        cantidad = Decimal(azar.randint(1, 40))
+        ingresos = cantidad * Decimal(azar.randint(500, 9000)) / 100
+        filas.append((fecha, azar.randint(1, productos), cliente, factura, cantidad,
+                      ingresos, (ingresos * Decimal("0.7")).quantize(Decimal("0.01"))))
+    return filas
+
+
+def cargar_columnas(filas, productos, clientes, grupos):
+    datos = VentasEnColumnas()
+    for id_grupo in range(1, grupos + 1):
+        datos.agregar_grupo(id_grupo, f"G{id_grupo}")
+    for id_producto in range(1, productos + 1):
+        datos.agregar_producto(id_producto, f"Producto {id_producto}")
+    for id_cliente in range(1, clientes + 1):
+        datos.agregar_cliente(id_cliente, f"Cliente {id_cliente}", id_cliente % grupos + 1)
+    for fila in filas:
+        datos.agregar_venta(*fila)
+    return datos
+
+
+def cargar_diccionarios(filas):
+    """Lo que devolvía un cursor dictionary=True"""
+    columnas = ('fecha', 'id_producto', 'id_cliente', 'id_factura', 'cantidad', 'ingresos', 'costo')
+    return [dict(zip(columnas, fila)) for fila in filas]
+
+
+def sumar_filas(filas, clave):
+    """Agregación de antes: float(Decimal) por fila y un dict de totales"""
+    totales = defaultdict(float)
+    for fila in filas:
+        totales[clave(fila)] += float(fila['ingresos'] or 0) - float(fila['costo'] or 0)
+    return totales
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def bytes_columnas(datos):
+    return sum(len(columna) * columna.itemsize for columna in vars(datos).values()
+               if hasattr(columna, 'itemsize'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las columnas de ventas")
+    parser.add_argument('--lineas', type=int, default=1_000_000)
+    parser.add_argument('--productos', type=int, default=300)
+    parser.add_argument('--clientes', type=int, default=2000)
+    parser.add_argument('--grupos', type=int, default=6)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--muestra', type=int, default=100_000,
+                        help="Filas con las que se estima la memoria de los diccionarios")
+    parser.add_argument('--sin-numpy', action='store_true', help="Medir el recorrido en Python")
+    parser.add_argument('--semilla', type=int, default=7)
+    args = parser.parse_args()
+
+    if args.sin_numpy:
+        columnas_ventas.np = None
+    motor = "NumPy" if columnas_ventas.np is not None else "Python (sin NumPy)"
+
+    azar = random.Random(args.semilla)
+    print(f"Generando {args.lineas:,} líneas ({args.productos} productos, {args.clientes:,} clientes)...")
+    filas = generar_filas(args.lineas, args.productos, args.clientes, azar)
+
+    inicio = time.perf_counter()
+    datos = cargar_columnas(filas, args.productos, args.clientes, args.grupos)
+    carga_columnas = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    diccionarios = cargar_diccionarios(filas)
+    carga_diccionarios = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    muestra = cargar_diccionarios(filas[:args.muestra])
+    memoria_diccionarios = tracemalloc.get_traced_memory()[0] * args.lineas / max(len(muestra), 1)
+    tracemalloc.stop()
+    del muestra
+
+    grupo_cliente = {i: i % args.grupos + 1 for i in range(1, args.clientes + 1)}
+    hoy = INICIO + timedelta(days=DIAS)
+    meses = datos.periodos_con_ventas("Mes", hoy - timedelta(days=365), 12)
+    semanas = datos.periodos_con_ventas("Semana", hoy - timedelta(weeks=12), 5)
+    trimestres = datos.periodos_con_ventas("Trimestre", date(hoy.year - 2, 1, 1), 5)
+
+    escenarios = [
+        ("Por producto", lambda: datos.por_producto(),
+         lambda: sumar_filas(diccionarios, lambda f: f['id_producto'])),
+        ("Por cliente", lambda: datos.por_cliente(),
+         lambda: sumar_filas(diccionarios, lambda f: f['id_cliente'])),
+        ("Por grupo", lambda: datos.por_grupo(),
+         lambda: sumar_filas(diccionarios, lambda f: grupo_cliente[f['id_cliente']])),
+        ("Por mes (12)", lambda: datos.por_periodo("Mes", meses),
+         lambda: sumar_filas(diccionarios, lambda f: etiqueta_periodo("Mes", f['fecha']))),
+        ("Semana × producto (5)", lambda: datos.por_periodo_y_producto("Semana", semanas),
+         lambda: sumar_filas(diccionarios, lambda f: (etiqueta_periodo("Semana", f['fecha']), f['id_producto']))),
+        ("Trimestre × grupo (5)", lambda: datos.por_periodo_y_grupo("Trimestre", trimestres),
+         lambda: sumar_filas(diccionarios, lambda f: (etiqueta_periodo("Trimestre", f['fecha']),
+                                                      grupo_cliente[f['id_cliente']]))),
+    ]
+
+    print(f"\nMotor de columnas: {motor}")
+    print(f"{'':24} {'diccionarios':>14} {'columnas':>12} {'mejora':>8}")
+    print(f"{'Carga':24} {carga_diccionarios:>12.2f} s {carga_columnas:>10.2f} s")
+    print(f"{'Memoria':24} {memoria_diccionarios / 2**20:>11,.0f} MB {bytes_columnas(datos) / 2**20:>9,.0f} MB "
+          f"{memoria_diccionarios / max(bytes_columnas(datos), 1):>7.1f}x")
+
+    total_antes = total_despues = 0.0
+    for nombre, columnas, antes in escenarios:
+        despues = medir(columnas, args.repeticiones)
+        previo = medir(antes, 1)
+        total_antes += previo
+        total_despues += despues
+        print(f"{nombre:24} {previo * 1000:>11,.0f} ms {despues * 1000:>9,.0f} ms {previo / despues:>7.1f}x")
+    print(f"{'Todas las gráficas':24} {total_antes * 1000:>11,.0f} ms {total_despues * 1000:>9,.0f} ms "
+          f"{total_antes / total_despues:>7.1f}x")
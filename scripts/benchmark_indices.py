@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Tiempos de las consultas de reportes antes y después de la migración 004.
+
+Crea una base de pruebas aparte (disfruleg_benchmark por defecto) con el
+esquema y las vistas pero sin los índices de la migración 004, la llena con
+datos sintéticos (200,000 facturas con 1,000,000 de líneas, 100,000 compras
+y una deuda por factura), mide el catálogo de auditoria_explain.py, aplica
+la migración y vuelve a medir. La base de pruebas se elimina al terminar,
+salvo con --conservar. Nunca toca la base configurada en DB_NAME.
+
+Uso:
+    python scripts/benchmark_indices.py
+    python scripts/benchmark_indices.py --facturas 50000 --repeticiones 3 --conservar
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from datetime import date, timedelta
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import mysql.connector
+from src.database.cloud_config import get_db_config
+from aplicar_migraciones import separar_sentencias
+from auditoria_explain import CONSULTAS, valores_muestra, explicar, analizar_plan, medir_consulta
+
+SQL_DIR = os.path.join(project_root, 'data', 'sql')
+MIGRACION_INDICES = os.path.join(SQL_DIR, 'migraciones', '004_indices_reportes.sql')
+LOTE = 10_000
+
+
+def leer_sentencias(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return [s for s in separar_sentencias(f.read())
+                if not s.upper().startswith(('USE ', 'CREATE DATABASE'))]
+
+
+def indices_de_migracion():
+    with open(MIGRACION_INDICES, encoding='utf-8') as f:
+        return re.findall(r"CALL crear_indice_si_falta\('\w+', '(\w+)'", f.read())
+
+
+def ejecutar_sentencias(cursor, sentencias):
+    for sentencia in sentencias:
+        cursor.execute(sentencia)
+        if cursor.with_rows:
+            cursor.fetchall()
+
+
+def crear_base(cursor, base):
+    """Esquema y vistas actuales sin los índices que agrega la migración 004"""
+    cursor.execute(f"DROP DATABASE IF EXISTS `{base}`")
+    cursor.execute(f"CREATE DATABASE `{base}`")
+    cursor.execute(f"USE `{base}`")
+
+    nuevos = indices_de_migracion()
+    esquema = [s for s in leer_sentencias(os.path.join(SQL_DIR, 'disfruleg_schema.sql'))
+               if not any(f"INDEX {indice} " in s for indice in nuevos)]
+    ejecutar_sentencias(cursor, esquema)
+    ejecutar_sentencias(cursor, leer_sentencias(os.path.join(SQL_DIR, 'disfruleg_views.sql')))
+
+
+def insertar(conn, cursor, tabla, columnas, filas):
+    consulta = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})"
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) == LOTE:
+            cursor.executemany(consulta, lote)
+            conn.commit()
+            lote = []
+    if lote:
+        cursor.executemany(consulta, lote)
+        conn.commit()
+
+
+def sembrar(conn, cursor, facturas, lineas_por_factura, compras, productos, clientes, semilla=5):
+    azar = random.Random(semilla)
+    hoy = date.today()
+    dias = 3 * 365
+
+    insertar(conn, cursor, "tipo_cliente", ("id_tipo_cliente", "nombre_tipo", "descuento"),
+             [(1, "Mayoreo", 10), (2, "Menudeo", 0)])
+    insertar(conn, cursor, "grupo", ("id_grupo", "clave_grupo", "id_tipo_cliente"),
+             [(g, f"G{g}", 1 + g % 2) for g in range(1, 11)])
+    insertar(conn, cursor, "cliente", ("id_cliente", "nombre_cliente", "id_grupo"),
+             ((c, f"Cliente {c:05d}", azar.randint(1, 10)) for c in range(1, clientes + 1)))
+    insertar(conn, cursor, "producto", ("id_producto", "nombre_producto", "unidad_producto", "stock"),
+             ((p, f"Producto {p:05d}", "kg", azar.randint(0, 1000)) for p in range(1, productos + 1)))
+    insertar(conn, cursor, "precio_por_grupo", ("id_grupo", "id_producto", "precio_base"),
+             ((g, p, round(azar.uniform(5, 80), 2)) for g in range(1, 11) for p in range(1, productos + 1)))
+
+    fechas = [hoy - timedelta(days=azar.randrange(dias)) for _ in range(facturas)]
+    fechas.sort()
+    clientes_factura = [azar.randint(1, clientes) for _ in range(facturas)]
+    insertar(conn, cursor, "factura", ("id_factura", "fecha_factura", "id_cliente", "folio_numero"),
+             ((f, fechas[f - 1], clientes_factura[f - 1], f) for f in range(1, facturas + 1)))
+    insertar(conn, cursor, "detalle_factura",
+             ("id_factura", "id_producto", "cantidad_factura", "precio_unitario_venta"),
+             ((f, azar.randint(1, productos), azar.randint(1, 30), round(azar.uniform(5, 80), 2))
+              for f in range(1, facturas + 1) for _ in range(lineas_por_factura)))
+    insertar(conn, cursor, "compra",
+             ("fecha_compra", "id_producto", "cantidad_compra", "precio_unitario_compra"),
+             ((hoy - timedelta(days=azar.randrange(dias)), azar.randint(1, productos),
+               azar.randint(1, 200), round(azar.uniform(2, 60), 2)) for _ in range(compras)))
+
+    def deuda(f):
+        monto = round(azar.uniform(100, 5000), 2)
+        pagado = azar.random() < 0.7
+        fecha_pago = fechas[f - 1] + timedelta(days=azar.randint(0, 30)) if pagado else None
+        return (clientes_factura[f - 1], f, monto, monto if pagado else 0, fechas[f - 1], pagado, fecha_pago)
+
+    insertar(conn, cursor, "deuda",
+             ("id_cliente", "id_factura", "monto", "monto_pagado", "fecha_generada", "pagado", "fecha_pago"),
+             (deuda(f) for f in range(1, facturas + 1)))
+    cursor.execute("ANALYZE TABLE factura, detalle_factura, compra, deuda, cliente")
+    cursor.fetchall()
+
+
+def medir_catalogo(cursor, repeticiones):
+    """{nombre: (mediana ms, hallazgos del EXPLAIN)}"""
+    valores = valores_muestra(cursor)
+    resultados = {}
+    for nombre, _, consulta, claves, _ in CONSULTAS:
+        parametros = tuple(valores[clave] for clave in claves)
+        hallazgos = analizar_plan(explicar(cursor, consulta, parametros))
+        resultados[nombre] = (medir_consulta(cursor, consulta, parametros, repeticiones), hallazgos)
+    return resultados
+
+
+def ejecutar_benchmark(args):
+    config = get_db_config()
+    base_real = config.pop('database', None)
+    if args.base == base_real:
+        print(f"❌ La base de pruebas no puede ser la configurada en DB_NAME ({base_real})")
+        sys.exit(1)
+
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+    consultas = conn.cursor(dictionary=True)
+    try:
+        print(f"🔄 Creando base de pruebas {args.base} sin los índices de la migración 004...")
+        crear_base(cursor, args.base)
+
+        lineas = args.facturas * args.lineas_por_factura
+        print(f"🔄 Sembrando {args.facturas:,} facturas, {lineas:,} líneas y {args.compras:,} compras...")
+        inicio = time.perf_counter()
+        sembrar(conn, cursor, args.facturas, args.lineas_por_factura, args.compras,
+                args.productos, args.clientes)
+        print(f"   listo en {time.perf_counter() - inicio:.0f} s")
+
+        antes = medir_catalogo(consultas, args.repeticiones)
+
+        print("🔄 Aplicando migración 004...")
+        inicio = time.perf_counter()
+        ejecutar_sentencias(cursor, leer_sentencias(MIGRACION_INDICES))
+        conn.commit()
+        print(f"   listo en {time.perf_counter() - inicio:.0f} s")
+
+        despues = medir_catalogo(consultas, args.repeticiones)
+
+        print(f"\n{'Consulta':<28} {'Antes ms':>10} {'Después ms':>11} {'Mejora':>8}  Recorridos (antes → después)")
+        for nombre, (ms_antes, hallazgos_antes) in antes.items():
+            ms_despues, hallazgos_despues = despues[nombre]
+            print(f"{nombre:<28} {ms_antes:>10.1f} {ms_despues:>11.1f} "
+                  f"{ms_antes / max(ms_despues, 0.001):>7.1f}x  "
+                  f"{len(hallazgos_antes)} → {len(hallazgos_despues)}")
+    finally:
+        if not args.conservar:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{args.base}`")
+        consultas.close()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la migración de índices 004")
+    parser.add_argument('--base', default='disfruleg_benchmark', help="Base de pruebas (se recrea)")
+    parser.add_argument('--facturas', type=int, default=200_000)
+    parser.add_argument('--lineas-por-factura', type=int, default=5)
+    parser.add_argument('--compras', type=int, default=100_000)
+    parser.add_argument('--productos', type=int, default=2_000)
+    parser.add_argument('--clientes', type=int, default=2_000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--conservar', action='store_true', help="No eliminar la base de pruebas al terminar")
+    args = parser.parse_args()
+
+    ejecutar_benchmark(args)
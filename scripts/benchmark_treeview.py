@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Refresco de un Treeview de 10,000 filas: borrar todo y volver a insertar
+contra la actualización incremental de FilasTreeview (src/ui/filas_treeview.py).
+
+Escenarios, sobre una lista ya mostrada:
+  - refresco sin cambios (auto-refresh, "Actualizar")
+  - refresco con 1% de filas modificadas
+  - 1% de filas nuevas y 1% eliminadas
+  - una tecla en el buscador (la lista se reduce a ~10%) y borrar el filtro
+
+Cada medición incluye update_idletasks() para contar también el redibujo.
+Necesita pantalla; en un servidor sin X usar:
+    xvfb-run python scripts/benchmark_treeview.py
+
+Uso:
+    python scripts/benchmark_treeview.py
+    python scripts/benchmark_treeview.py --filas 20000 --repeticiones 5
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import tkinter as tk
+from tkinter import ttk
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.ui.filas_treeview import FilasTreeview
+
+COLUMNAS = ("id", "nombre", "telefono", "correo", "grupo", "tipo", "descuento")
+
+
+def generar_filas(cantidad, azar):
+    return [{
+        'id': i,
+        'nombre': f"Cliente {i:05d}",
+        'telefono': f"55{azar.randrange(10**8):08d}",
+        'correo': f"cliente{i}@ejemplo.com",
+        'grupo': f"G{azar.randint(1, 10)}",
+        'tipo': azar.choice(("Mayoreo", "Menudeo")),
+        'descuento': azar.choice((0, 5, 10)),
+    } for i in range(cantidad)]
+
+
+def valores(fila):
+    return tuple(fila[columna] for columna in COLUMNAS)
+
+
+def escenarios(base, azar):
+    """(nombre, filas antes, filas después)"""
+    cambiadas = [dict(f) for f in base]
+    for fila in azar.sample(cambiadas, len(base) // 100):
+        fila['telefono'] = "5500000000"
+
+    altas_bajas = [f for f in base if azar.random() > 0.01]
+    siguiente = len(base)
+    for _ in range(len(base) // 100):
+        altas_bajas.insert(azar.randrange(len(altas_bajas)),
+                           dict(base[0], id=siguiente, nombre=f"Cliente {siguiente:05d}"))
+        siguiente += 1
+
+    filtradas = [f for f in base if f['grupo'] == "G3"]
+    return [
+        ("Sin cambios", base, base),
+        ("1% modificadas", base, cambiadas),
+        ("1% altas y 1% bajas", base, altas_bajas),
+        ("Tecla en el buscador", base, filtradas),
+        ("Borrar el filtro", filtradas, base),
+    ]
+
+
+def redibujar_todo(tree, filas):
+    """Lo que hacían las ventanas: borrar todo e insertar la lista completa"""
+    for item in tree.get_children():
+        tree.delete(item)
+    for fila in filas:
+        tree.insert("", "end", values=valores(fila))
+
+
+def medir(root, preparar, accion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        preparar()
+        root.update_idletasks()
+        inicio = time.perf_counter()
+        accion()
+        root.update_idletasks()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def ejecutar_benchmark(args):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"❌ No hay pantalla para Tk ({e}); ejecutar con xvfb-run")
+        sys.exit(1)
+    root.geometry("900x600")
+
+    tree_completo = ttk.Treeview(root, columns=COLUMNAS, show="headings")
+    tree_incremental = ttk.Treeview(root, columns=COLUMNAS, show="headings")
+    for tree in (tree_completo, tree_incremental):
+        for columna in COLUMNAS:
+            tree.heading(columna, text=columna)
+        tree.pack(fill="both", expand=True)
+    enlace = FilasTreeview(tree_incremental, clave=lambda f: f['id'], valores=valores)
+
+    azar = random.Random(11)
+    base = generar_filas(args.filas, azar)
+
+    print(f"Treeview con {args.filas:,} filas, mediana de {args.repeticiones} repeticiones\n")
+    print(f"{'Escenario':<24} {'Todo ms':>9} {'Incremental ms':>15} {'Mejora':>8}  Cambios")
+    for nombre, antes, despues in escenarios(base, azar):
+        ms_completo = medir(root, lambda: redibujar_todo(tree_completo, antes),
+                            lambda: redibujar_todo(tree_completo, despues), args.repeticiones)
+
+        cambios = {}
+        ms_incremental = medir(root, lambda: enlace.actualizar(antes),
+                               lambda: cambios.update(enlace.actualizar(despues)), args.repeticiones)
+
+        resumen = ", ".join(f"{v} {k}" for k, v in cambios.items() if v) or "ninguno"
+        print(f"{nombre:<24} {ms_completo:>9.1f} {ms_incremental:>15.1f} "
+              f"{ms_completo / max(ms_incremental, 0.001):>7.1f}x  {resumen}")
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la actualización incremental de Treeviews")
+    parser.add_argument('--filas', type=int, default=10_000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    ejecutar_benchmark(args)
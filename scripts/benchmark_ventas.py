@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia de registro de ventas según el número de líneas.
+
+Ejecuta la misma secuencia que crear_factura_completa (factura, líneas,
+stock y deuda) dentro de una transacción que se revierte al final, por
+lo que no deja datos en la base. Indica si el trigger antiguo
+after_detalle_insert_update_deuda sigue instalado, para comparar los
+tiempos antes y después de aplicar la migración 001.
+
+Compara la escritura en lote (un INSERT multi-fila y un UPDATE ... CASE)
+con la escritura anterior de un INSERT y un UPDATE por línea.
+
+Uso:
+    python scripts/benchmark_ventas.py
+    python scripts/benchmark_ventas.py --lineas 10 100 500 --repeticiones 5
+    python scripts/benchmark_ventas.py --modos lotes
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import date
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.database.pool import prestar_conexion
+from src.modules.receipts.components import database
+
+# Folio ficticio muy alto: la transacción se revierte, nunca se guarda
+FOLIO_BENCHMARK = 2_000_000_000
+
+
+def trigger_antiguo_instalado(cursor):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE()
+        AND TRIGGER_NAME = 'after_detalle_insert_update_deuda'
+    """)
+    return cursor.fetchone()[0] > 0
+
+
+def preparar_carrito(cursor, lineas):
+    """Arma un carrito de prueba con productos reales (repetidos si hace falta)"""
+    cursor.execute("""
+        SELECT c.id_cliente, p.id_producto, p.nombre_producto, ppg.precio_base
+        FROM cliente c
+        JOIN precio_por_grupo ppg ON ppg.id_grupo = c.id_grupo
+        JOIN producto p ON p.id_producto = ppg.id_producto
+        WHERE c.id_cliente = (SELECT MIN(id_cliente) FROM cliente)
+        ORDER BY p.id_producto
+    """)
+    filas = cursor.fetchall()
+    if not filas:
+        raise RuntimeError("Se necesita al menos un cliente con precios asignados")
+
+    id_cliente = filas[0][0]
+    carrito = []
+    for i in range(lineas):
+        _, id_producto, nombre, precio = filas[i % len(filas)]
+        carrito.append([id_producto, nombre, float(precio), 1.0, float(precio)])
+    return id_cliente, carrito
+
+
+def insertar_factura_por_linea(cursor, id_cliente, carrito, fecha_venta, folio_numero):
+    """Escritura anterior a los lotes: un INSERT y un UPDATE por cada línea"""
+    cursor.execute(
+        "INSERT INTO factura (fecha_factura, id_cliente, folio_numero) VALUES (%s, %s, %s)",
+        (fecha_venta, id_cliente, folio_numero)
+    )
+    id_factura = cursor.lastrowid
+    for item in carrito:
+        cursor.execute("""
+            INSERT INTO detalle_factura (id_factura, id_producto, cantidad_factura, precio_unitario_venta)
+            VALUES (%s, %s, %s, %s)
+        """, (id_factura, int(item[0]), float(item[3]), float(item[2])))
+        cursor.execute("UPDATE producto SET stock = stock - %s WHERE id_producto = %s",
+                       (float(item[3]), int(item[0])))
+    return id_factura
+
+
+MODOS = {
+    'lotes': database._insertar_factura,
+    'por_linea': insertar_factura_por_linea,
+}
+
+
+def medir_venta(conn, cursor, id_cliente, carrito, insertar):
+    """Registra la venta completa y la revierte. Retorna milisegundos"""
+    inicio = time.perf_counter()
+    conn.start_transaction()
+    try:
+        id_factura = insertar(
+            cursor, id_cliente, carrito, date.today(), FOLIO_BENCHMARK
+        )
+        database._finalizar_factura(cursor, id_factura, id_cliente)
+        return (time.perf_counter() - inicio) * 1000
+    finally:
+        conn.rollback()
+
+
+def ejecutar_benchmark(lineas_list, repeticiones, modos):
+    with prestar_conexion() as conn:
+        cursor = conn.cursor()
+        try:
+            deuda = "trigger por línea (antes de migración 001)" if trigger_antiguo_instalado(cursor) \
+                else "deuda al finalizar la factura"
+            print(f"📊 Registro de ventas - {deuda}")
+            print(f"{'Modo':>10} {'Líneas':>8} {'Mediana ms':>12} {'Mín ms':>10} {'ms/línea':>10}")
+
+            for lineas in lineas_list:
+                id_cliente, carrito = preparar_carrito(cursor, lineas)
+                for modo in modos:
+                    tiempos = [medir_venta(conn, cursor, id_cliente, carrito, MODOS[modo])
+                               for _ in range(repeticiones)]
+                    mediana = statistics.median(tiempos)
+                    print(f"{modo:>10} {lineas:>8} {mediana:>12.1f} {min(tiempos):>10.1f} "
+                          f"{mediana / lineas:>10.2f}")
+        finally:
+            cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de registro de ventas")
+    parser.add_argument('--lineas', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--modos', nargs='+', choices=sorted(MODOS), default=['por_linea', 'lotes'])
+    args = parser.parse_args()
+
+    ejecutar_benchmark(args.lineas, args.repeticiones, args.modos)
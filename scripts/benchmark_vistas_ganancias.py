@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark de las vistas de ganancias sobre un conjunto de datos generado.
+
+Carga en SQLite 1,000,000 de líneas de factura y 100,000 compras (por
+defecto), crea las vistas de data/sql/disfruleg_views.sql y mide las
+consultas de ganancias. Con --anterior también mide la definición previa, que
+unía detalle_factura y compra directamente (ventas × compras filas por
+producto), y reporta cuánto inflaba los totales.
+
+Uso:
+    python scripts/benchmark_vistas_ganancias.py
+    python scripts/benchmark_vistas_ganancias.py --lineas 200000 --compras 20000 --anterior
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import sqlite3
+import argparse
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+VISTAS_SQL = os.path.join(project_root, 'data', 'sql', 'disfruleg_views.sql')
+
+VISTAS = [
+    'vista_ventas_por_producto_grupo',
+    'vista_compras_por_producto',
+    'vista_ganancias_por_producto_grupo',
+    'vista_ganancias_por_producto',
+]
+
+ESQUEMA = """
+    CREATE TABLE tipo_cliente (id_tipo_cliente INTEGER PRIMARY KEY, nombre_tipo TEXT, descuento REAL);
+    CREATE TABLE grupo (id_grupo INTEGER PRIMARY KEY, clave_grupo TEXT, id_tipo_cliente INTEGER);
+    CREATE TABLE cliente (id_cliente INTEGER PRIMARY KEY, id_grupo INTEGER);
+    CREATE TABLE producto (id_producto INTEGER PRIMARY KEY, nombre_producto TEXT,
+                           unidad_producto TEXT, stock REAL);
+    CREATE TABLE precio_por_grupo (id_grupo INTEGER, id_producto INTEGER, precio_base REAL,
+                                   PRIMARY KEY (id_grupo, id_producto));
+    CREATE TABLE factura (id_factura INTEGER PRIMARY KEY, id_cliente INTEGER);
+    CREATE TABLE detalle_factura (id_detalle INTEGER PRIMARY KEY, id_factura INTEGER,
+                                  id_producto INTEGER, cantidad_factura REAL,
+                                  precio_unitario_venta REAL);
+    CREATE TABLE compra (id_compra INTEGER PRIMARY KEY, id_producto INTEGER,
+                         cantidad_compra REAL, precio_unitario_compra REAL);
+"""
+
+# Mismos índices que crea disfruleg_schema.sql para las llaves foráneas
+INDICES = """
+    CREATE INDEX idx_detalle_producto ON detalle_factura (id_producto);
+    CREATE INDEX idx_detalle_factura ON detalle_factura (id_factura);
+    CREATE INDEX idx_compra_producto ON compra (id_producto);
+"""
+
+# Definición previa: une cada línea de venta con cada compra del producto
+VISTAS_ANTERIORES = {
+    'vista_detalle_factura_con_descuento': """
+        CREATE VIEW vista_detalle_factura_con_descuento AS
+        SELECT df.id_detalle, df.id_producto, df.cantidad_factura,
+               ROUND(df.cantidad_factura * pg.precio_base * (1 - tc.descuento/100), 2) AS subtotal_con_descuento
+        FROM detalle_factura df
+        JOIN factura f ON df.id_factura = f.id_factura
+        JOIN cliente c ON f.id_cliente = c.id_cliente
+        JOIN grupo g ON c.id_grupo = g.id_grupo
+        JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+        JOIN precio_por_grupo pg ON df.id_producto = pg.id_producto AND c.id_grupo = pg.id_grupo
+    """,
+    'vista_ganancias_anterior': """
+        CREATE VIEW vista_ganancias_anterior AS
+        SELECT
+            p.id_producto,
+            SUM(df.cantidad_factura) AS cantidad_vendida,
+            SUM(vd.subtotal_con_descuento) AS ingresos_totales,
+            COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0) AS costos_totales
+        FROM producto p
+        LEFT JOIN detalle_factura df ON p.id_producto = df.id_producto
+        LEFT JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
+        LEFT JOIN compra c ON p.id_producto = c.id_producto
+        GROUP BY p.id_producto, p.nombre_producto, p.unidad_producto, p.stock
+    """,
+}
+
+CONSULTA_TOTALES = """
+    SELECT SUM(cantidad_vendida), SUM(ingresos_totales), SUM(costos_totales)
+    FROM {vista}
+"""
+
+
+def extraer_vista(sql, nombre):
+    match = re.search(rf"CREATE OR REPLACE VIEW {nombre} AS(.*?);", sql, re.DOTALL)
+    return f"CREATE VIEW {nombre} AS{match.group(1)}"
+
+
+def generar_base(lineas, compras, productos, clientes, semilla=3):
+    azar = random.Random(semilla)
+    db = sqlite3.connect(':memory:')
+    db.executescript(ESQUEMA)
+
+    db.executemany("INSERT INTO tipo_cliente VALUES (?, ?, ?)",
+                   [(1, 'Mayoreo', 20.0), (2, 'Menudeo', 0.0)])
+    db.executemany("INSERT INTO grupo VALUES (?, ?, ?)",
+                   [(g, f'G{g}', 1 + g % 2) for g in range(1, 11)])
+    db.executemany("INSERT INTO cliente VALUES (?, ?)",
+                   ((c, azar.randint(1, 10)) for c in range(1, clientes + 1)))
+    db.executemany("INSERT INTO producto VALUES (?, ?, 'kg', ?)",
+                   ((p, f'Producto {p}', float(azar.randint(0, 1000))) for p in range(1, productos + 1)))
+    db.executemany("INSERT INTO precio_por_grupo VALUES (?, ?, ?)",
+                   ((g, p, round(azar.uniform(5, 80), 2))
+                    for g in range(1, 11) for p in range(1, productos + 1)))
+
+    facturas = max(1, lineas // 10)
+    db.executemany("INSERT INTO factura VALUES (?, ?)",
+                   ((f, azar.randint(1, clientes)) for f in range(1, facturas + 1)))
+    db.executemany("INSERT INTO detalle_factura VALUES (?, ?, ?, ?, 0)",
+                   ((i, azar.randint(1, facturas), azar.randint(1, productos), float(azar.randint(1, 30)))
+                    for i in range(1, lineas + 1)))
+    db.executemany("INSERT INTO compra VALUES (?, ?, ?, ?)",
+                   ((i, azar.randint(1, productos), float(azar.randint(1, 200)), round(azar.uniform(2, 60), 2))
+                    for i in range(1, compras + 1)))
+    db.executescript(INDICES)
+    db.commit()
+    return db
+
+
+def medir(db, consulta):
+    inicio = time.perf_counter()
+    resultado = db.execute(consulta).fetchall()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def ejecutar_benchmark(lineas, compras, productos, clientes, anterior):
+    print(f"🔄 Generando {lineas:,} líneas de factura y {compras:,} compras "
+          f"({productos:,} productos)...")
+    inicio = time.perf_counter()
+    db = generar_base(lineas, compras, productos, clientes)
+    print(f"   listo en {time.perf_counter() - inicio:.1f} s")
+
+    with open(VISTAS_SQL, encoding='utf-8') as f:
+        sql = f.read()
+    for vista in VISTAS:
+        db.execute(extraer_vista(sql, vista))
+
+    print(f"\n{'Consulta':<45} {'ms':>10} {'Filas':>10}")
+    for vista in ('vista_ganancias_por_producto', 'vista_ganancias_por_producto_grupo'):
+        ms, filas = medir(db, f"SELECT * FROM {vista}")
+        print(f"{vista:<45} {ms:>10.0f} {len(filas):>10,}")
+
+    ms, [totales] = medir(db, CONSULTA_TOTALES.format(vista='vista_ganancias_por_producto'))
+    print(f"{'totales (vista actual)':<45} {ms:>10.0f}")
+
+    if not anterior:
+        return
+
+    for definicion in VISTAS_ANTERIORES.values():
+        db.execute(definicion)
+    filas_unidas = db.execute("""
+        SELECT SUM(MAX(v.lineas, 1) * MAX(c.compras, 1))
+        FROM (SELECT id_producto, COUNT(*) AS lineas FROM detalle_factura GROUP BY id_producto) v
+        JOIN (SELECT id_producto, COUNT(*) AS compras FROM compra GROUP BY id_producto) c
+             USING (id_producto)
+    """).fetchone()[0]
+    print(f"\n⏳ Definición anterior: une {filas_unidas:,} filas antes de agrupar...")
+    ms_anterior, [totales_anteriores] = medir(db, CONSULTA_TOTALES.format(vista='vista_ganancias_anterior'))
+    print(f"{'totales (vista anterior)':<45} {ms_anterior:>10.0f}")
+    print(f"\nMejora: {ms_anterior / max(ms, 0.001):.1f}x")
+
+    print(f"\n{'Total':<12} {'Actual':>18} {'Anterior':>18} {'Inflación':>10}")
+    for nombre, actual, previo in zip(('Cantidad', 'Ingresos', 'Costos'), totales, totales_anteriores):
+        print(f"{nombre:<12} {actual:>18,.2f} {previo:>18,.2f} {previo / actual:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las vistas de ganancias")
+    parser.add_argument('--lineas', type=int, default=1_000_000, help="Líneas de detalle_factura")
+    parser.add_argument('--compras', type=int, default=100_000)
+    parser.add_argument('--productos', type=int, default=2_000)
+    parser.add_argument('--clientes', type=int, default=500)
+    parser.add_argument('--anterior', action='store_true',
+                        help="Medir también la definición anterior (lenta: ventas × compras por producto)")
+    args = parser.parse_args()
+
+    ejecutar_benchmark(args.lineas, args.compras, args.productos, args.clientes, args.anterior)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Perfil de importación del arranque, con `python -X importtime`.
+
+Mide lo que se importa desde main.py hasta poder mostrar la ventana de
+login (main, la aplicación principal y src.auth.login_window) y lista los
+módulos que más tardan, con su tiempo acumulado. Las bibliotecas pesadas
+(PESADOS) deben cargarse al primer uso, no en este camino; si aparecen se
+marcan. test_tiempo_arranque.py falla si el camino del login las importa o
+si pasa de PRESUPUESTO_LOGIN_S.
+
+Uso:
+    python scripts/perfil_importacion.py
+    python scripts/perfil_importacion.py --top 40
+    python scripts/perfil_importacion.py --codigo "import launch_module; import src.modules.analytics.analizador_ganancias"
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# Importaciones que hace main.py antes de mostrar el login
+CODIGO_LOGIN = "import main; import src.auth.login_window"
+
+# Segundos máximos (mejor de 3) para llegar a la ventana de login
+PRESUPUESTO_LOGIN_S = 1.0
+
+# Paquetes que se cargan al primer uso y no deben estar en el arranque
+PESADOS = ("mysql", "bcrypt", "matplotlib", "numpy", "reportlab", "openpyxl")
+
+
+def parsear_importtime(texto: str) -> List[Dict]:
+    """
+    Entradas de la salida de -X importtime, en el orden en que terminaron:
+    {'modulo', 'propio_us', 'acumulado_us', 'nivel'} (nivel 0 = importación directa)
+    """
+    entradas = []
+    for linea in texto.splitlines():
+        if not linea.startswith("import time:"):
+            continue
+        partes = linea[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # Encabezado "self [us] | cumulative | imported package"
+        nombre = partes[2].rstrip()
+        sangria = len(nombre) - len(nombre.lstrip())
+        entradas.append({
+            'modulo': nombre.strip(),
+            'propio_us': int(partes[0]),
+            'acumulado_us': int(partes[1]),
+            'nivel': (sangria - 1) // 2,
+        })
+    return entradas
+
+
+def medir_importacion(codigo: str = CODIGO_LOGIN, python: str = sys.executable) -> Tuple[float, List[Dict]]:
+    """Corre codigo en un intérprete nuevo; retorna (segundos de pared, entradas de importtime)"""
+    inicio = time.perf_counter()
+    resultado = subprocess.run([python, "-X", "importtime", "-c", codigo], cwd=project_root,
+                               capture_output=True, text=True)
+    segundos = time.perf_counter() - inicio
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falló la importación:\n{resultado.stderr[-2000:]}")
+    return segundos, parsear_importtime(resultado.stderr)
+
+
+def pesados_importados(entradas: List[Dict], pesados=PESADOS) -> List[str]:
+    """Paquetes de pesados que aparecen en las entradas"""
+    raices = {entrada['modulo'].split(".")[0] for entrada in entradas}
+    return [paquete for paquete in pesados if paquete in raices]
+
+
+def mejor_de(repeticiones: int, codigo: str = CODIGO_LOGIN) -> Tuple[float, List[Dict]]:
+    """La medición más rápida de varias, para que el ruido no cuente"""
+    mejor: Optional[Tuple[float, List[Dict]]] = None
+    for _ in range(repeticiones):
+        medicion = medir_importacion(codigo)
+        if mejor is None or medicion[0] < mejor[0]:
+            mejor = medicion
+    return mejor
+
+
+def imprimir_reporte(segundos: float, entradas: List[Dict], top: int):
+    total_us = sum(e['acumulado_us'] for e in entradas if e['nivel'] == 0)
+    print(f"Tiempo de pared: {segundos * 1000:.0f} ms "
+          f"(presupuesto del login: {PRESUPUESTO_LOGIN_S * 1000:.0f} ms)")
+    print(f"Importaciones: {len(entradas)} módulos, {total_us / 1000:.0f} ms acumulados\n")
+
+    print(f"{'Acumulado ms':>13} {'Propio ms':>10}  Módulo")
+    for entrada in sorted(entradas, key=lambda e: e['acumulado_us'], reverse=True)[:top]:
+        print(f"{entrada['acumulado_us'] / 1000:>13.1f} {entrada['propio_us'] / 1000:>10.1f}  "
+              f"{'  ' * entrada['nivel']}{entrada['modulo']}")
+
+    pesados = pesados_importados(entradas)
+    if pesados:
+        print(f"\n⚠️  Bibliotecas pesadas en el arranque: {', '.join(pesados)}")
+    else:
+        print(f"\n✅ Ninguna biblioteca pesada en el arranque ({', '.join(PESADOS)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfil de importación del arranque (-X importtime)")
+    parser.add_argument('--codigo', default=CODIGO_LOGIN, help="Código a medir en un intérprete nuevo")
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    segundos, entradas = mejor_de(args.repeticiones, args.codigo)
+    imprimir_reporte(segundos, entradas, args.top)
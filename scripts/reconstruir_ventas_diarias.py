@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Recalcula el resumen ventas_diarias a partir de detalle_factura.
+
+Las ventas nuevas se suman al resumen al registrarse; este comando sirve
+para la carga inicial, para corregir el resumen tras editar facturas a mano
+o para reflejar cambios de precios o de grupo de clientes en un periodo.
+
+Uso:
+    python scripts/reconstruir_ventas_diarias.py                      # todo el historial
+    python scripts/reconstruir_ventas_diarias.py --desde 2024-01-01 --hasta 2024-12-31
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.modules.receipts.components.database import reconstruir_ventas_diarias
+
+
+def fecha(valor):
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruir el resumen diario de ventas")
+    parser.add_argument('--desde', type=fecha, help="Fecha inicial (AAAA-MM-DD)")
+    parser.add_argument('--hasta', type=fecha, help="Fecha final (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    periodo = f"{args.desde or 'inicio'} a {args.hasta or 'hoy'}"
+    print(f"🔄 Reconstruyendo ventas_diarias ({periodo})...")
+    inicio = time.perf_counter()
+    filas = reconstruir_ventas_diarias(args.desde, args.hasta)
+    if filas is None:
+        print("❌ No se pudo reconstruir el resumen")
+        sys.exit(1)
+    print(f"✅ {filas:,} filas de resumen generadas en {time.perf_counter() - inicio:.1f} s")
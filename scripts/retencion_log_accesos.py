@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Retención de log_accesos: archiva y borra los meses viejos.
+
+Cada mes completo anterior al corte (--meses atrás) se copia a
+data/archivo/log_accesos/log_accesos_AAAA-MM.csv.gz y después se borra de la
+tabla en tandas de --lote filas, con un commit por tanda para no retener
+bloqueos largos sobre la tabla que el login sigue llenando. El rango por
+fecha usa idx_log_fecha (migración 008).
+
+Se puede repetir sin duplicar: el archivo recuerda el último id_log copiado,
+solo se agregan filas posteriores y solo se borran filas ya archivadas. El
+archivo se reescribe completo en un temporal y se reemplaza, así que una
+interrupción no lo deja a medias.
+
+Uso:
+    python scripts/retencion_log_accesos.py                 # muestra lo que haría
+    python scripts/retencion_log_accesos.py --ejecutar      # archiva y borra
+    python scripts/retencion_log_accesos.py --meses 12 --ejecutar
+"""
+
+import os
+import sys
+import csv
+import gzip
+import shutil
+import argparse
+from contextlib import closing
+from datetime import date, datetime
+from typing import Iterable, List, Sequence, Tuple
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+ARCHIVO_DIR = os.path.join(project_root, 'data', 'archivo', 'log_accesos')
+
+COLUMNAS = ("id_log", "id_usuario", "username_intento", "ip_address", "exito", "fecha_intento", "detalle")
+
+
+def inicio_de_mes(anio: int, mes: int) -> datetime:
+    """Primer instante del mes; mes puede pasar de 12 o bajar de 1"""
+    anio += (mes - 1) // 12
+    mes = (mes - 1) % 12 + 1
+    return datetime(anio, mes, 1)
+
+
+def fecha_de_corte(meses: int, hoy: date = None) -> datetime:
+    """Inicio del mes que queda dentro de la retención; lo anterior se archiva"""
+    hoy = hoy or date.today()
+    return inicio_de_mes(hoy.year, hoy.month - meses)
+
+
+def meses_entre(desde: datetime, corte: datetime) -> List[Tuple[datetime, datetime]]:
+    """Rangos [inicio, fin) de cada mes desde el de 'desde' hasta antes de corte"""
+    rangos = []
+    inicio = inicio_de_mes(desde.year, desde.month)
+    while inicio < corte:
+        fin = inicio_de_mes(inicio.year, inicio.month + 1)
+        rangos.append((inicio, fin))
+        inicio = fin
+    return rangos
+
+
+def ruta_archivo(directorio: str, inicio: datetime) -> str:
+    return os.path.join(directorio, f"log_accesos_{inicio:%Y-%m}.csv.gz")
+
+
+def ultimo_id_archivado(ruta: str) -> int:
+    """Mayor id_log ya copiado al archivo (0 si no existe)"""
+    if not os.path.exists(ruta):
+        return 0
+    ultimo = 0
+    with gzip.open(ruta, 'rt', newline='', encoding='utf-8') as archivo:
+        for fila in csv.DictReader(archivo):
+            ultimo = max(ultimo, int(fila['id_log']))
+    return ultimo
+
+
+def anexar_filas(ruta: str, filas: Iterable[Sequence]) -> int:
+    """
+    Agrega filas (en el orden de COLUMNAS) al archivo como un miembro gzip
+    nuevo. Se escribe en un temporal que reemplaza al archivo al terminar.
+
+    Returns:
+        int: Filas agregadas
+    """
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = ruta + ".tmp"
+    existe = os.path.exists(ruta)
+    escritas = 0
+    with open(temporal, 'wb') as destino:
+        if existe:
+            with open(ruta, 'rb') as anterior:
+                shutil.copyfileobj(anterior, destino)
+        with gzip.open(destino, 'wt', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo)
+            if not existe:
+                escritor.writerow(COLUMNAS)
+            for fila in filas:
+                escritor.writerow(fila)
+                escritas += 1
+        destino.flush()
+        os.fsync(destino.fileno())
+    os.replace(temporal, ruta)
+    return escritas
+
+
+def contar_mes(conn, inicio: datetime, fin: datetime) -> int:
+    with closing(conn.cursor()) as cursor:
+        cursor.execute("SELECT COUNT(*) FROM log_accesos WHERE fecha_intento >= %s AND fecha_intento < %s",
+                       (inicio, fin))
+        return cursor.fetchone()[0]
+
+
+def leer_mes(conn, inicio: datetime, fin: datetime, despues_de: int, lote: int):
+    """Filas del mes con id_log > despues_de, por tandas en orden de id"""
+    ultimo = despues_de
+    while True:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(COLUMNAS)} FROM log_accesos
+                WHERE fecha_intento >= %s AND fecha_intento < %s AND id_log > %s
+                ORDER BY id_log LIMIT %s
+            """, (inicio, fin, ultimo, lote))
+            filas = cursor.fetchall()
+        yield from filas
+        if len(filas) < lote:
+            return
+        ultimo = filas[-1][0]
+
+
+def borrar_mes(conn, inicio: datetime, fin: datetime, hasta_id: int, lote: int) -> int:
+    """Borra las filas archivadas del mes en tandas de lote, con commit por tanda"""
+    borradas = 0
+    while True:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("""
+                DELETE FROM log_accesos
+                WHERE fecha_intento >= %s AND fecha_intento < %s AND id_log <= %s
+                LIMIT %s
+            """, (inicio, fin, hasta_id, lote))
+            afectadas = cursor.rowcount
+        conn.commit()
+        borradas += afectadas
+        if afectadas < lote:
+            return borradas
+
+
+def archivar_mes(conn, directorio: str, inicio: datetime, fin: datetime, lote: int) -> Tuple[int, int]:
+    """
+    Archiva las filas nuevas del mes y borra las ya archivadas.
+
+    Returns:
+        tuple: (filas archivadas, filas borradas)
+    """
+    ruta = ruta_archivo(directorio, inicio)
+    anterior = ultimo_id_archivado(ruta)
+    maximo = [anterior]
+
+    def filas():
+        for fila in leer_mes(conn, inicio, fin, anterior, lote):
+            maximo[0] = max(maximo[0], fila[0])
+            yield fila
+
+    archivadas = anexar_filas(ruta, filas()) if contar_mes(conn, inicio, fin) else 0
+    borradas = borrar_mes(conn, inicio, fin, maximo[0], lote) if maximo[0] else 0
+    return archivadas, borradas
+
+
+def meses_pendientes(conn, corte: datetime) -> List[Tuple[datetime, datetime]]:
+    with closing(conn.cursor()) as cursor:
+        cursor.execute("SELECT MIN(fecha_intento) FROM log_accesos WHERE fecha_intento < %s", (corte,))
+        primero = cursor.fetchone()[0]
+    return meses_entre(primero, corte) if primero else []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivar y borrar meses viejos de log_accesos")
+    parser.add_argument('--meses', type=int, default=6, help="Meses completos que se conservan en la tabla")
+    parser.add_argument('--lote', type=int, default=5000, help="Filas por tanda de lectura y borrado")
+    parser.add_argument('--directorio', default=ARCHIVO_DIR, help="Carpeta de los archivos .csv.gz")
+    parser.add_argument('--ejecutar', action='store_true', help="Archivar y borrar (sin esto solo se muestra)")
+    args = parser.parse_args()
+
+    from mysql.connector import Error
+    from src.database.pool import prestar_conexion
+
+    corte = fecha_de_corte(args.meses)
+    print(f"🗂️  log_accesos: se conservan los registros desde {corte:%Y-%m-%d}")
+    try:
+        with prestar_conexion() as conn:
+            meses = meses_pendientes(conn, corte)
+            if not meses:
+                print("✅ No hay meses por archivar")
+                sys.exit(0)
+            for inicio, fin in meses:
+                if not args.ejecutar:
+                    print(f"   {inicio:%Y-%m}: {contar_mes(conn, inicio, fin):,} filas")
+                    continue
+                archivadas, borradas = archivar_mes(conn, args.directorio, inicio, fin, args.lote)
+                print(f"   {inicio:%Y-%m}: {archivadas:,} archivadas, {borradas:,} borradas "
+                      f"→ {ruta_archivo(args.directorio, inicio)}")
+    except Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
+
+    if not args.ejecutar:
+        print("\nUse --ejecutar para archivarlos y borrarlos")
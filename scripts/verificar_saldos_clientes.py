@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compara la tabla saldo_cliente con los saldos calculados desde deuda.
+
+saldo_cliente se mantiene al crear facturas y registrar pagos; este comando
+detecta diferencias por cambios hechos a mano en deuda (o ventas registradas
+sin el módulo de saldos) y, con --corregir, recalcula esos clientes.
+
+Uso:
+    python scripts/verificar_saldos_clientes.py              # solo reporta
+    python scripts/verificar_saldos_clientes.py --corregir
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Agregar el directorio del proyecto al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from mysql.connector import Error
+from src.database.pool import prestar_conexion
+from src.modules.deudas.saldos_clientes import COLUMNAS, verificar_saldos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificar saldo_cliente contra deuda")
+    parser.add_argument('--corregir', action='store_true', help="Recalcular los clientes con diferencias")
+    parser.add_argument('--mostrar', type=int, default=20, help="Diferencias a listar")
+    args = parser.parse_args()
+
+    print("🔎 Verificando saldo_cliente contra deuda...")
+    inicio = time.perf_counter()
+    try:
+        with prestar_conexion() as conn:
+            diferencias = verificar_saldos(conn, corregir=args.corregir)
+    except Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
+    segundos = time.perf_counter() - inicio
+
+    if not diferencias:
+        print(f"✅ Saldos consistentes ({segundos:.1f} s)")
+        sys.exit(0)
+
+    print(f"⚠️  {len(diferencias):,} clientes con diferencias ({segundos:.1f} s)")
+    for diferencia in diferencias[:args.mostrar]:
+        esperado, guardado = diferencia['esperado'], diferencia['guardado']
+        columnas = [c for c in COLUMNAS[1:] if esperado[c] != guardado[c]]
+        detalle = ", ".join(f"{c}: {guardado[c]} → {esperado[c]}" for c in columnas)
+        print(f"   Cliente {diferencia['id_cliente']}: {detalle}")
+
+    if args.corregir:
+        print(f"✅ {len(diferencias):,} clientes recalculados")
+    else:
+        print("\nUse --corregir para recalcularlos")
+        sys.exit(1)
@@ -3,9 +3,23 @@ import mysql.connector
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import hashlib
+import hmac
+import os
+import threading
+import time
 
 # Importar configuración de Cloud SQL
 from src.database.cloud_config import get_db_config
+from src.database.pool import obtener_pool
+from src.auth.registro_accesos import obtener_registro_accesos
+
+# Segundos que se recuerda una verificación de contraseña exitosa
+VERIFICACION_TTL = 600
+
+# password_hash -> (HMAC de la contraseña, vence); la clave no sale del proceso
+_CLAVE_VERIFICACION = os.urandom(32)
+_verificaciones: Dict[str, tuple] = {}
+_verificaciones_lock = threading.Lock()
 
 class AuthManager:
     def __init__(self, db_host=None, db_name=None):
@@ -13,13 +27,15 @@ class AuthManager:
         self.db_config = get_db_config()
         self.max_intentos = 3
         self.bloqueo_minutos = 15
+        self.access_log = obtener_registro_accesos()
         
     def _get_admin_connection(self):
-        """Obtener conexión administrativa para validar usuarios"""
+        """
+        Obtener conexión administrativa para validar usuarios.
+        Se presta del pool compartido; usarla con 'with' para devolverla.
+        """
         try:
-            # Usar configuración desde .env (Cloud SQL o local)
-            conn = mysql.connector.connect(**self.db_config)
-            return conn
+            return obtener_pool().obtener()
         except mysql.connector.Error as e:
             raise Exception(f"Error de conexión administrativa: {e}")
     
@@ -30,170 +46,118 @@ class AuthManager:
         return hashed.decode('utf-8')
     
     def _verify_password(self, password: str, hashed: str) -> bool:
-        """Verificar contraseña contra hash"""
+        """
+        Verificar contraseña contra hash.
+        Las verificaciones exitosas se recuerdan VERIFICACION_TTL segundos
+        (como HMAC con una clave del proceso, nunca la contraseña), así que
+        reautenticar a un administrador no repite los 12 rounds de bcrypt.
+        Cambiar la contraseña cambia el hash y descarta lo recordado.
+        """
+        marca = hmac.new(_CLAVE_VERIFICACION, password.encode('utf-8'), hashlib.sha256).digest()
+        ahora = time.monotonic()
+        with _verificaciones_lock:
+            recordada = _verificaciones.get(hashed)
+            if recordada and recordada[1] > ahora and hmac.compare_digest(recordada[0], marca):
+                return True
         try:
-            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+            valida = bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
         except Exception:
             return False
+        if valida:
+            with _verificaciones_lock:
+                _verificaciones[hashed] = (marca, ahora + VERIFICACION_TTL)
+        return valida
     
     def _log_access_attempt(self, username: str, success: bool, detail: str = ""):
-        """Registrar intento de acceso"""
-        try:
-            conn = self._get_admin_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO log_accesos (username_intento, exito, detalle)
-                VALUES (%s, %s, %s)
-            """, (username, success, detail))
-            
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Error logging access attempt: {e}")
-    
-    def _check_user_blocked(self, username: str) -> tuple[bool, Optional[datetime]]:
-        """Verificar si usuario está bloqueado"""
-        try:
-            conn = self._get_admin_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT bloqueado_hasta, intentos_fallidos 
-                FROM usuarios_sistema 
-                WHERE username = %s
-            """, (username,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if not result:
-                return False, None
-                
-            if result['bloqueado_hasta'] and result['bloqueado_hasta'] > datetime.now():
-                return True, result['bloqueado_hasta']
-                
-            return False, None
-            
-        except Exception as e:
-            print(f"Error checking user blocked status: {e}")
-            return False, None
+        """Registrar intento de acceso (se escribe por lotes en segundo plano)"""
+        self.access_log.registrar(username, success, detail)
     
-    def _increment_failed_attempts(self, username: str):
-        """Incrementar intentos fallidos y bloquear si es necesario"""
-        try:
-            conn = self._get_admin_connection()
-            cursor = conn.cursor()
-            
-            # Incrementar intentos fallidos
-            cursor.execute("""
-                UPDATE usuarios_sistema 
-                SET intentos_fallidos = intentos_fallidos + 1
-                WHERE username = %s
-            """, (username,))
-            
-            # Verificar si debe bloquearse
-            cursor.execute("""
-                SELECT intentos_fallidos 
-                FROM usuarios_sistema 
-                WHERE username = %s
-            """, (username,))
-            
-            result = cursor.fetchone()
-            if result and result[0] >= self.max_intentos:
-                # Bloquear usuario
-                bloqueo_hasta = datetime.now() + timedelta(minutes=self.bloqueo_minutos)
-                cursor.execute("""
-                    UPDATE usuarios_sistema 
-                    SET bloqueado_hasta = %s, intentos_fallidos = 0
-                    WHERE username = %s
-                """, (bloqueo_hasta, username))
-            
-            conn.commit()
-            conn.close()
-            
-        except Exception as e:
-            print(f"Error incrementing failed attempts: {e}")
+    def _increment_failed_attempts(self, cursor, username: str):
+        """
+        Incrementar intentos fallidos y bloquear al llegar a max_intentos, en
+        un solo UPDATE atómico. MySQL asigna de izquierda a derecha:
+        bloqueado_hasta se calcula con el conteo anterior al incremento.
+        """
+        cursor.execute("""
+            UPDATE usuarios_sistema 
+            SET bloqueado_hasta = IF(intentos_fallidos + 1 >= %s,
+                                     NOW() + INTERVAL %s MINUTE, bloqueado_hasta),
+                intentos_fallidos = IF(intentos_fallidos + 1 >= %s, 0, intentos_fallidos + 1)
+            WHERE username = %s
+        """, (self.max_intentos, self.bloqueo_minutos, self.max_intentos, username))
     
-    def _reset_failed_attempts(self, username: str):
+    def _reset_failed_attempts(self, cursor, username: str):
         """Resetear intentos fallidos tras login exitoso"""
-        try:
-            conn = self._get_admin_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE usuarios_sistema 
-                SET intentos_fallidos = 0, bloqueado_hasta = NULL, ultimo_acceso = NOW()
-                WHERE username = %s
-            """, (username,))
-            
-            conn.commit()
-            conn.close()
-            
-        except Exception as e:
-            print(f"Error resetting failed attempts: {e}")
+        cursor.execute("""
+            UPDATE usuarios_sistema 
+            SET intentos_fallidos = 0, bloqueado_hasta = NULL, ultimo_acceso = NOW()
+            WHERE username = %s
+        """, (username,))
     
     def authenticate(self, username: str, password: str) -> Dict[str, Any]:
         """
-        Autenticar usuario
+        Autenticar usuario con una sola conexión: una consulta trae el
+        usuario y su bloqueo, bcrypt verifica en el hilo que llama (el de
+        autenticación del login) y un UPDATE registra el resultado.
         
         Returns:
             Dict con 'success', 'message', 'user_data' (si exitoso)
         """
         try:
-            # Verificar si usuario está bloqueado
-            is_blocked, blocked_until = self._check_user_blocked(username)
-            if is_blocked:
-                remaining_time = blocked_until - datetime.now()
-                minutes = int(remaining_time.total_seconds() / 60)
-                message = f"Usuario bloqueado. Tiempo restante: {minutes} minutos"
+            with self._get_admin_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
                 
-                self._log_access_attempt(username, False, "Usuario bloqueado")
-                return {
-                    'success': False,
-                    'message': message,
-                    'blocked': True,
-                    'blocked_until': blocked_until
-                }
-            
-            # Obtener datos del usuario
-            conn = self._get_admin_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT id_usuario, username, password_hash, nombre_completo, rol, activo
-                FROM usuarios_sistema 
-                WHERE username = %s
-            """, (username,))
-            
-            user = cursor.fetchone()
-            conn.close()
-            
-            if not user:
-                self._log_access_attempt(username, False, "Usuario no existe")
-                return {
-                    'success': False,
-                    'message': "Usuario o contraseña incorrectos"
-                }
-            
-            if not user['activo']:
-                self._log_access_attempt(username, False, "Usuario inactivo")
-                return {
-                    'success': False,
-                    'message': "Usuario inactivo. Contacte al administrador."
-                }
-            
-            # Verificar contraseña
-            if not self._verify_password(password, user['password_hash']):
-                self._increment_failed_attempts(username)
-                self._log_access_attempt(username, False, "Contraseña incorrecta")
-                return {
-                    'success': False,
-                    'message': "Usuario o contraseña incorrectos"
-                }
+                # El bloqueo se evalúa con el reloj del servidor, el mismo que lo fijó
+                cursor.execute("""
+                    SELECT id_usuario, username, password_hash, nombre_completo, rol, activo,
+                           GREATEST(TIMESTAMPDIFF(SECOND, NOW(), bloqueado_hasta), 0) AS segundos_bloqueo
+                    FROM usuarios_sistema 
+                    WHERE username = %s
+                """, (username,))
+                
+                user = cursor.fetchone()
+                
+                if user and user['segundos_bloqueo']:
+                    blocked_until = datetime.now() + timedelta(seconds=int(user['segundos_bloqueo']))
+                    minutes = int(user['segundos_bloqueo']) // 60
+                    message = f"Usuario bloqueado. Tiempo restante: {minutes} minutos"
+                    
+                    self._log_access_attempt(username, False, "Usuario bloqueado")
+                    return {
+                        'success': False,
+                        'message': message,
+                        'blocked': True,
+                        'blocked_until': blocked_until
+                    }
+                
+                if not user:
+                    self._log_access_attempt(username, False, "Usuario no existe")
+                    return {
+                        'success': False,
+                        'message': "Usuario o contraseña incorrectos"
+                    }
+                
+                if not user['activo']:
+                    self._log_access_attempt(username, False, "Usuario inactivo")
+                    return {
+                        'success': False,
+                        'message': "Usuario inactivo. Contacte al administrador."
+                    }
+                
+                # Verificar contraseña
+                if not self._verify_password(password, user['password_hash']):
+                    self._increment_failed_attempts(cursor, username)
+                    conn.commit()
+                    self._log_access_attempt(username, False, "Contraseña incorrecta")
+                    return {
+                        'success': False,
+                        'message': "Usuario o contraseña incorrectos"
+                    }
+                
+                # Login exitoso
+                self._reset_failed_attempts(cursor, username)
+                conn.commit()
             
-            # Login exitoso
-            self._reset_failed_attempts(username)
             self._log_access_attempt(username, True, "Login exitoso")
             
             # Remover información sensible
@@ -230,8 +194,8 @@ class AuthManager:
             
             # Usar las credenciales de Cloud SQL para todos los usuarios
             # Los usuarios de la aplicación se autentican contra la tabla usuarios_sistema
-            # pero las conexiones a MySQL usan las credenciales de Cloud SQL
-            conn = mysql.connector.connect(**self.db_config)
+            # pero las conexiones a MySQL se prestan del pool compartido
+            conn = obtener_pool().obtener()
             
             return conn
             
@@ -260,17 +224,16 @@ class AuthManager:
             new_hash = self._hash_password(new_password)
             
             # Actualizar en base de datos
-            conn = self._get_admin_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE usuarios_sistema 
-                SET password_hash = %s
-                WHERE username = %s
-            """, (new_hash, username))
-            
-            conn.commit()
-            conn.close()
+            with self._get_admin_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    UPDATE usuarios_sistema 
+                    SET password_hash = %s
+                    WHERE username = %s
+                """, (new_hash, username))
+                
+                conn.commit()
             
             self._log_access_attempt(username, True, "Contraseña cambiada")
             
@@ -288,17 +251,16 @@ class AuthManager:
     def get_user_info(self, username: str) -> Optional[Dict[str, Any]]:
         """Obtener información del usuario"""
         try:
-            conn = self._get_admin_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT id_usuario, username, nombre_completo, rol, activo, ultimo_acceso
-                FROM usuarios_sistema 
-                WHERE username = %s
-            """, (username,))
-            
-            user = cursor.fetchone()
-            conn.close()
+            with self._get_admin_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                
+                cursor.execute("""
+                    SELECT id_usuario, username, nombre_completo, rol, activo, ultimo_acceso
+                    FROM usuarios_sistema 
+                    WHERE username = %s
+                """, (username,))
+                
+                user = cursor.fetchone()
             
             return user
             
@@ -309,17 +271,16 @@ class AuthManager:
     def get_user_info_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Obtener información del usuario por ID"""
         try:
-            conn = self._get_admin_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT id_usuario, username, nombre_completo, rol, activo, ultimo_acceso
-                FROM usuarios_sistema 
-                WHERE id_usuario = %s
-            """, (user_id,))
-            
-            user = cursor.fetchone()
-            conn.close()
+            with self._get_admin_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                
+                cursor.execute("""
+                    SELECT id_usuario, username, nombre_completo, rol, activo, ultimo_acceso
+                    FROM usuarios_sistema 
+                    WHERE id_usuario = %s
+                """, (user_id,))
+                
+                user = cursor.fetchone()
             
             return user
             
@@ -350,28 +311,26 @@ class AuthManager:
                 }
             
             # Verificar si el usuario ya existe
-            conn = self._get_admin_connection()
-            cursor = conn.cursor()
+            with self._get_admin_connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute("SELECT username FROM usuarios_sistema WHERE username = %s", (username,))
-            if cursor.fetchone():
-                conn.close()
-                return {
-                    'success': False,
-                    'message': f'El usuario "{username}" ya existe'
-                }
+                cursor.execute("SELECT username FROM usuarios_sistema WHERE username = %s", (username,))
+                if cursor.fetchone():
+                    return {
+                        'success': False,
+                        'message': f'El usuario "{username}" ya existe'
+                    }
             
-            # Generar hash de contraseña
-            password_hash = self._hash_password(password)
+                # Generar hash de contraseña
+                password_hash = self._hash_password(password)
             
-            # Insertar nuevo usuario
-            cursor.execute("""
-                INSERT INTO usuarios_sistema (username, password_hash, nombre_completo, rol, activo)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (username, password_hash, nombre_completo, rol, True))
+                # Insertar nuevo usuario
+                cursor.execute("""
+                    INSERT INTO usuarios_sistema (username, password_hash, nombre_completo, rol, activo)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (username, password_hash, nombre_completo, rol, True))
             
-            conn.commit()
-            conn.close()
+                conn.commit()
             
             self._log_access_attempt(username, True, f"Usuario creado por administrador")
             
@@ -402,42 +361,39 @@ class AuthManager:
                     'message': 'Rol inválido'
                 }
             
-            conn = self._get_admin_connection()
-            cursor = conn.cursor()
+            with self._get_admin_connection() as conn:
+                cursor = conn.cursor()
             
-            # Verificar que el usuario existe
-            cursor.execute("SELECT id_usuario FROM usuarios_sistema WHERE username = %s", (username,))
-            if not cursor.fetchone():
-                conn.close()
-                return {
-                    'success': False,
-                    'message': f'El usuario "{username}" no existe'
-                }
-            
-            # Actualizar usuario
-            if new_password:
-                if len(new_password) < 8:
-                    conn.close()
+                # Verificar que el usuario existe
+                cursor.execute("SELECT id_usuario FROM usuarios_sistema WHERE username = %s", (username,))
+                if not cursor.fetchone():
                     return {
                         'success': False,
-                        'message': 'La nueva contraseña debe tener al menos 8 caracteres'
+                        'message': f'El usuario "{username}" no existe'
                     }
-                
-                password_hash = self._hash_password(new_password)
-                cursor.execute("""
-                    UPDATE usuarios_sistema 
-                    SET nombre_completo = %s, rol = %s, activo = %s, password_hash = %s
-                    WHERE username = %s
-                """, (nombre_completo, rol, activo, password_hash, username))
-            else:
-                cursor.execute("""
-                    UPDATE usuarios_sistema 
-                    SET nombre_completo = %s, rol = %s, activo = %s
-                    WHERE username = %s
-                """, (nombre_completo, rol, activo, username))
             
-            conn.commit()
-            conn.close()
+                # Actualizar usuario
+                if new_password:
+                    if len(new_password) < 8:
+                        return {
+                            'success': False,
+                            'message': 'La nueva contraseña debe tener al menos 8 caracteres'
+                        }
+                
+                    password_hash = self._hash_password(new_password)
+                    cursor.execute("""
+                        UPDATE usuarios_sistema 
+                        SET nombre_completo = %s, rol = %s, activo = %s, password_hash = %s
+                        WHERE username = %s
+                    """, (nombre_completo, rol, activo, password_hash, username))
+                else:
+                    cursor.execute("""
+                        UPDATE usuarios_sistema 
+                        SET nombre_completo = %s, rol = %s, activo = %s
+                        WHERE username = %s
+                    """, (nombre_completo, rol, activo, username))
+            
+                conn.commit()
             
             action_detail = "Usuario actualizado por administrador"
             if new_password:
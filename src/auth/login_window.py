@@ -20,15 +20,22 @@ try:
 except ImportError:
     print("Warning: PIL/Pillow not available, using basic interface")
 
-# Import db_manager and session_manager with fallback
-try:
-    from src.database.db_manager import db_manager
-    from src.auth.session_manager import session_manager
-    from src.database.conexion import db_available
-    DB_AVAILABLE = db_available
-except ImportError:
-    print("Warning: DB components not available")
-    DB_AVAILABLE = False
+from src.auth.session_manager import session_manager
+
+
+def obtener_db_manager():
+    """
+    db_manager si la base de datos responde, o None para el modo de prueba.
+    Se llama desde el hilo de autenticación: mysql.connector, bcrypt y la
+    verificación de la base ya no retrasan la aparición de la ventana.
+    """
+    try:
+        from src.database.db_manager import db_manager
+        from src.database.conexion import is_db_available
+    except ImportError:
+        print("Warning: DB components not available")
+        return None
+    return db_manager if is_db_available() else None
 
 class LoginWindow:
     def __init__(self, on_success_callback=None):
@@ -36,6 +43,7 @@ class LoginWindow:
         self.on_success_callback = on_success_callback
         self.login_successful = False
         self.user_data = None
+        self.db_mode = False
         
         # Variables
         self.username_var = tk.StringVar()
@@ -296,7 +304,9 @@ class LoginWindow:
     def authenticate_user(self, username, password):
         """Autenticar usuario (ejecutado en hilo separado)"""
         try:
-            if DB_AVAILABLE:
+            db_manager = obtener_db_manager()
+            self.db_mode = db_manager is not None
+            if self.db_mode:
                 # Intentar autenticación real
                 result = db_manager.authenticate_and_connect(username, password)
             else:
@@ -335,7 +345,7 @@ class LoginWindow:
             self.user_data = result['user_data']
             
             # Iniciar sesión en session manager si está disponible
-            if DB_AVAILABLE:
+            if self.db_mode:
                 session_manager.start_session(self.user_data)
             
             # Guardar credenciales si está marcado
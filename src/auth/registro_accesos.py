@@ -0,0 +1,163 @@
+"""
+DISFRULEG - Registro de accesos con escritura diferida
+Cada intento de login hacía su propio INSERT en log_accesos con una
+conexión aparte. Ahora los eventos se guardan en una cola en memoria y un
+hilo los escribe por lotes en un INSERT de varias filas, cada INTERVALO_S
+segundos, en cuanto se juntan LOTE eventos, o al terminar el proceso.
+
+La cola tiene límite: si la base no responde y se llena, los eventos nuevos
+se descartan y se cuentan en lugar de crecer sin fin. Un lote que falla se
+reintenta en el siguiente ciclo mientras quepa en la cola.
+
+Como el evento se escribe unos segundos después, la fecha se calcula en el
+servidor restando la edad del evento a NOW(), para no mezclar el reloj y la
+zona horaria del equipo con los de MySQL.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from contextlib import closing
+from typing import Dict, List, Tuple
+
+from src.database.pool import prestar_conexion
+
+# Eventos retenidos como máximo mientras la base no los recibe
+CAPACIDAD = 10000
+
+# Eventos por INSERT
+LOTE = 200
+
+# Segundos máximos que un evento espera en memoria
+INTERVALO_S = 2.0
+
+# Segundos que se espera al último lote al cerrar el proceso
+ESPERA_CIERRE_S = 5.0
+
+Evento = Tuple[str, bool, str, float]  # (username, exito, detalle, instante monotónico)
+
+
+class RegistroAccesos:
+    """
+    Cola de eventos de log_accesos con escritura por lotes en un hilo.
+
+    Args:
+        capacidad: Eventos retenidos como máximo
+        lote: Eventos por INSERT
+        intervalo: Segundos máximos entre escrituras
+    """
+
+    def __init__(self, capacidad: int = CAPACIDAD, lote: int = LOTE, intervalo: float = INTERVALO_S):
+        self.capacidad = capacidad
+        self.lote = lote
+        self.intervalo = intervalo
+        self._pendientes: deque = deque()
+        self._cond = threading.Condition()
+        self._hilo = None
+        self._cerrado = False
+        self._metricas = {'registrados': 0, 'escritos': 0, 'descartados': 0,
+                          'lotes': 0, 'errores': 0}
+
+    # ==================== REGISTRO ====================
+
+    def registrar(self, username: str, exito: bool, detalle: str = ""):
+        """Encola un intento de acceso; no espera a la base"""
+        with self._cond:
+            self._metricas['registrados'] += 1
+            if self._cerrado or len(self._pendientes) >= self.capacidad:
+                self._metricas['descartados'] += 1
+                return
+            self._pendientes.append((username, bool(exito), (detalle or "")[:255], time.monotonic()))
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._ciclo, daemon=True, name="log-accesos")
+                self._hilo.start()
+            if len(self._pendientes) >= self.lote:
+                self._cond.notify()
+
+    def metricas(self) -> Dict[str, int]:
+        """Contadores de eventos y el tamaño actual de la cola"""
+        with self._cond:
+            return dict(self._metricas, pendientes=len(self._pendientes))
+
+    # ==================== ESCRITURA ====================
+
+    def vaciar(self) -> bool:
+        """Escribe ya todo lo pendiente; False si algún lote falló"""
+        while True:
+            with self._cond:
+                if not self._pendientes:
+                    return True
+                eventos = [self._pendientes.popleft() for _ in range(min(self.lote, len(self._pendientes)))]
+            if not self._escribir(eventos):
+                return False
+
+    def cerrar(self, espera: float = ESPERA_CIERRE_S):
+        """Deja de aceptar eventos y escribe los pendientes (al salir del proceso)"""
+        with self._cond:
+            self._cerrado = True
+            self._cond.notify()
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(espera)
+
+    def _ciclo(self):
+        while True:
+            with self._cond:
+                if not self._cerrado and len(self._pendientes) < self.lote:
+                    self._cond.wait(self.intervalo)
+                cerrado = self._cerrado
+            escrito = self.vaciar()
+            if cerrado:
+                return
+            if not escrito:
+                time.sleep(self.intervalo)  # La base no responde: no insistir en seguida
+
+    def _escribir(self, eventos: List[Evento]) -> bool:
+        try:
+            self._escribir_lote(eventos)
+        except Exception as e:  # Error de MySQL o PoolError: se reintenta
+            with self._cond:
+                self._metricas['errores'] += 1
+                # Devolver el lote al frente de la cola mientras quepa
+                cupo = max(0, self.capacidad - len(self._pendientes))
+                self._pendientes.extendleft(reversed(eventos[:cupo]))
+                self._metricas['descartados'] += len(eventos) - min(cupo, len(eventos))
+            print(f"Error logging access attempts: {e}")
+            return False
+        with self._cond:
+            self._metricas['escritos'] += len(eventos)
+            self._metricas['lotes'] += 1
+        return True
+
+    def _escribir_lote(self, eventos: List[Evento]):
+        """Un INSERT de varias filas; la fecha es NOW() menos la edad del evento"""
+        ahora = time.monotonic()
+        valores = ", ".join(["(%s, %s, %s, NOW() - INTERVAL %s MICROSECOND)"] * len(eventos))
+        parametros = []
+        for username, exito, detalle, instante in eventos:
+            parametros += [username, exito, detalle, int((ahora - instante) * 1_000_000)]
+        with prestar_conexion() as conn, closing(conn.cursor()) as cursor:
+            cursor.execute("INSERT INTO log_accesos (username_intento, exito, detalle, fecha_intento) "
+                           f"VALUES {valores}", parametros)
+            conn.commit()
+
+
+# Instancia compartida por el proceso
+_registro = None
+_registro_lock = threading.Lock()
+
+def obtener_registro_accesos() -> RegistroAccesos:
+    """
+    Retorna el registro de accesos compartido del proceso. Los pendientes
+    se escriben al terminar el proceso.
+
+    Returns:
+        RegistroAccesos: Instancia compartida
+    """
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            _registro = RegistroAccesos()
+            atexit.register(_registro.cerrar)
+        return _registro
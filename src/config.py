@@ -10,6 +10,13 @@ USE_SESSION_MANAGER = True
 USE_CANVAS_SCROLL = True
 USE_HOVER_EFFECTS = True
 
+# How modules are opened from the main menu:
+#   "subprocess" - a new Python process per launch (cold start every time)
+#   "in_process" - a Toplevel in the main application's interpreter
+#                  (closes with the main window)
+#   "host"       - a Toplevel in a long-lived warm host process
+MODULE_LAUNCH_MODE = "subprocess"
+
 # Application Constants
 APP_TITLE = "DISFRULEG - Sistema de Gestión"
 WINDOW_WIDTH = 900
@@ -39,6 +46,7 @@ def get_app_config():
         'use_session_manager': USE_SESSION_MANAGER,
         'use_canvas_scroll': USE_CANVAS_SCROLL,
         'use_hover_effects': USE_HOVER_EFFECTS,
+        'module_launch_mode': MODULE_LAUNCH_MODE,
         'window_width': WINDOW_WIDTH,
         'window_height': WINDOW_HEIGHT,
         'window_bg': WINDOW_BG_COLOR,
@@ -0,0 +1,225 @@
+"""
+DISFRULEG - Caché local de tablas de referencia
+Grupos, tipos de cliente y productos cambian poco, pero cada ventana los
+volvía a consultar al abrirse, y cada módulo corre en su propio proceso
+(launch_module.py), así que nada se compartía entre ellos.
+
+Las tablas se guardan en un archivo SQLite del proyecto junto con su firma
+(número de filas y checksum de las columnas guardadas). Al primer uso en
+cada proceso, una sola consulta trae la firma actual de todas las tablas y
+solo se vuelven a leer las que cambiaron; los demás procesos arrancan con
+los datos del archivo. Sin conexión se usa lo que haya en el archivo.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from mysql.connector import Error
+
+from .pool import prestar_conexion
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Archivo compartido por los procesos de los módulos
+RUTA_CACHE = os.path.join(_PROJECT_ROOT, 'data', 'cache', 'referencia.sqlite3')
+
+# Segundos entre verificaciones de las firmas mientras el proceso sigue abierto
+VERIFICAR_CADA = 30
+
+# Tablas guardadas: columnas (también forman la firma), orden de las filas y
+# columnas DECIMAL, que en el archivo se guardan como texto
+TABLAS = {
+    'grupo': {
+        'columnas': ('id_grupo', 'clave_grupo', 'descripcion', 'id_tipo_cliente'),
+        'orden': 'clave_grupo',
+        'decimales': (),
+    },
+    'tipo_cliente': {
+        'columnas': ('id_tipo_cliente', 'nombre_tipo', 'descuento'),
+        'orden': 'nombre_tipo',
+        'decimales': ('descuento',),
+    },
+    'producto': {
+        # Sin stock: cambia con cada venta y ninguna ventana lo toma de aquí
+        'columnas': ('id_producto', 'nombre_producto', 'unidad_producto', 'es_especial'),
+        'orden': 'nombre_producto',
+        'decimales': (),
+    },
+}
+
+
+class CacheReferencia:
+    """
+    Copia local, verificada por firma, de las tablas de TABLAS.
+
+    Args:
+        ruta: Archivo SQLite de la caché (None para no usar disco)
+        verificar_cada: Segundos entre verificaciones dentro del proceso
+    """
+
+    def __init__(self, ruta: Optional[str] = RUTA_CACHE, verificar_cada: float = VERIFICAR_CADA):
+        self.ruta = ruta
+        self.verificar_cada = verificar_cada
+        self._tablas: Dict[str, Dict[str, Any]] = {}  # tabla -> {'firma', 'filas'}
+        self._verificado: Optional[float] = None
+        self._lock = threading.Lock()
+
+    # ==================== CONSULTAS ====================
+
+    def filas(self, tabla: str) -> List[Dict[str, Any]]:
+        """
+        Filas de una tabla de referencia, en el orden de TABLAS[tabla]['orden'].
+        Retorna copias: modificarlas no altera la caché.
+        """
+        if tabla not in TABLAS:
+            raise KeyError(f"Tabla de referencia desconocida: {tabla}")
+        with self._lock:
+            ahora = time.monotonic()
+            if self._verificado is None or ahora - self._verificado >= self.verificar_cada:
+                self._verificar()
+                self._verificado = ahora
+            entrada = self._tablas.get(tabla)
+        return [dict(fila) for fila in entrada['filas']] if entrada else []
+
+    def invalidar(self):
+        """Verifica las firmas en el próximo uso (después de escribir en estas tablas)"""
+        with self._lock:
+            self._verificado = None
+
+    # ==================== VERIFICACIÓN ====================
+
+    def _verificar(self):
+        if not self._tablas:
+            self._tablas = self._leer_archivo()
+
+        firmas = self._consultar_firmas()
+        if firmas is None:
+            return  # Sin conexión: seguir con lo que haya
+
+        cambiadas = [tabla for tabla in TABLAS
+                     if tabla not in self._tablas or self._tablas[tabla]['firma'] != firmas.get(tabla)]
+        if not cambiadas:
+            return
+
+        # La firma se tomó antes que las filas: si algo cambia entre ambas
+        # consultas, la firma guardada queda vieja y la siguiente verificación recarga
+        filas = self._cargar_tablas(cambiadas)
+        if filas is None:
+            return
+        for tabla in cambiadas:
+            self._tablas[tabla] = {'firma': firmas.get(tabla), 'filas': filas[tabla]}
+        self._escribir_archivo(cambiadas)
+
+    def _consultar_firmas(self) -> Optional[Dict[str, list]]:
+        """Firma [filas, checksum] de cada tabla, en una sola consulta"""
+        partes = [
+            f"SELECT '{tabla}', COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', {', '.join(definicion['columnas'])}))) FROM {tabla}"
+            for tabla, definicion in TABLAS.items()
+        ]
+        try:
+            with prestar_conexion() as conn, closing(conn.cursor()) as cursor:
+                cursor.execute(" UNION ALL ".join(partes))
+                return {tabla: [int(cuenta), int(checksum or 0)] for tabla, cuenta, checksum in cursor.fetchall()}
+        except Error as e:
+            print(f"Error al verificar tablas de referencia: {e}")
+            return None
+
+    def _cargar_tablas(self, tablas: List[str]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Lee de MySQL las tablas indicadas con una sola conexión"""
+        try:
+            with prestar_conexion() as conn, closing(conn.cursor(dictionary=True)) as cursor:
+                resultado = {}
+                for tabla in tablas:
+                    definicion = TABLAS[tabla]
+                    cursor.execute(f"SELECT {', '.join(definicion['columnas'])} FROM {tabla} "
+                                   f"ORDER BY {definicion['orden']}")
+                    resultado[tabla] = cursor.fetchall()
+                return resultado
+        except Error as e:
+            print(f"Error al cargar tablas de referencia: {e}")
+            return None
+
+    # ==================== ARCHIVO ====================
+
+    def _conectar_archivo(self):
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        conn = sqlite3.connect(self.ruta, timeout=5)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tabla_referencia (
+                tabla TEXT PRIMARY KEY,
+                firma TEXT NOT NULL,
+                filas TEXT NOT NULL,
+                cargada TEXT NOT NULL
+            )
+        """)
+        return conn
+
+    def _leer_archivo(self) -> Dict[str, Dict[str, Any]]:
+        if self.ruta is None or not os.path.exists(self.ruta):
+            return {}
+        try:
+            with closing(self._conectar_archivo()) as conn:
+                guardadas = conn.execute("SELECT tabla, firma, filas FROM tabla_referencia").fetchall()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error al leer la caché de referencia: {e}")
+            if isinstance(e, sqlite3.DatabaseError) and not isinstance(e, sqlite3.OperationalError):
+                # No es un archivo SQLite válido (no un bloqueo): se reemplaza al guardar
+                try:
+                    os.remove(self.ruta)
+                except OSError:
+                    pass
+            return {}
+
+        tablas = {}
+        for tabla, firma, filas in guardadas:
+            if tabla not in TABLAS:
+                continue
+            try:
+                filas = json.loads(filas)
+                for columna in TABLAS[tabla]['decimales']:
+                    for fila in filas:
+                        if fila[columna] is not None:
+                            fila[columna] = Decimal(fila[columna])
+                tablas[tabla] = {'firma': json.loads(firma), 'filas': filas}
+            except (ValueError, KeyError, ArithmeticError):
+                continue  # Entrada dañada: se vuelve a cargar de MySQL
+        return tablas
+
+    def _escribir_archivo(self, tablas: List[str]):
+        if self.ruta is None:
+            return
+        cargada = time.strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with closing(self._conectar_archivo()) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO tabla_referencia (tabla, firma, filas, cargada) VALUES (?, ?, ?, ?)",
+                    [(tabla, json.dumps(self._tablas[tabla]['firma']),
+                      json.dumps(self._tablas[tabla]['filas'], default=str), cargada)
+                     for tabla in tablas])
+        except (sqlite3.Error, OSError) as e:
+            # Sin archivo la caché sigue funcionando en memoria
+            print(f"Error al guardar la caché de referencia: {e}")
+
+
+# Instancia compartida por las ventanas del proceso
+_cache = None
+_cache_lock = threading.Lock()
+
+def obtener_cache_referencia() -> CacheReferencia:
+    """
+    Retorna la caché de tablas de referencia compartida del proceso.
+
+    Returns:
+        CacheReferencia: Instancia compartida
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheReferencia()
+        return _cache
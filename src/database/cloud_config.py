@@ -22,4 +22,22 @@ def get_db_config():
 
 def is_cloud_sql():
     """Verificar si estamos usando Cloud SQL"""
-    return os.getenv('DB_HOST') != 'localhost' and os.getenv('DB_HOST') is not None
\ No newline at end of file
+    return os.getenv('DB_HOST') != 'localhost' and os.getenv('DB_HOST') is not None
+
+# Configuración del pool de conexiones compartido
+POOL_CONFIG = {
+    'tamano': int(os.getenv('DB_POOL_SIZE', 5)),
+    'espera_maxima': float(os.getenv('DB_POOL_WAIT_TIMEOUT', 30)),
+    'inactividad_maxima': float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+    'verificar_tras': float(os.getenv('DB_POOL_PING_AFTER', 5)),
+    'tamano_maximo': int(os.getenv('DB_POOL_MAX_SIZE', 40)),
+}
+
+# Conexiones que se suman al pool por cada ventana de módulo abierta en el
+# mismo proceso: la que guarda la ventana, los hilos de su EjecutorConsultas
+# y una para consultas de apoyo
+CONEXIONES_POR_VENTANA = int(os.getenv('DB_POOL_PER_WINDOW', 4))
+
+def get_pool_config():
+    """Obtener configuración del pool de conexiones"""
+    return POOL_CONFIG.copy()
@@ -1,41 +1,41 @@
-import mysql.connector
 from mysql.connector import Error
-from .cloud_config import get_db_config, is_cloud_sql
+from .pool import obtener_pool
 
-# Variable global para estado de disponibilidad
-db_available = False
+# Variable global para estado de disponibilidad (None: aún no verificada)
+db_available = None
 
 def verify_db_availability():
     global db_available
     try:
         conn = conectar()
-        if conn and conn.is_connected():
-            db_available = True
+        db_available = bool(conn and conn.is_connected())
+        if conn:
             conn.close()
         return db_available
     except:
+        db_available = False
         return False
 
+def is_db_available():
+    """
+    Disponibilidad de la base de datos, verificada en el primer uso.
+    Importar este módulo ya no abre una conexión: la verificación cuesta
+    un handshake (o un timeout sin red) y no debe retrasar el arranque.
+    """
+    if db_available is None:
+        verify_db_availability()
+    return db_available
+
 def conectar():
+    """
+    Obtiene una conexión del pool compartido del proceso.
+    Llamar a close() sobre ella la devuelve al pool en lugar de cerrarla.
+    """
     try:
-        config = get_db_config()
-        
-        print(f"Conectando a: {'Cloud SQL' if is_cloud_sql() else 'Local'}")
-        print(f"Host: {config['host']}")
-        
-        conn = mysql.connector.connect(**config)
-        
-        if conn.is_connected():
-            print("✓ Conexión exitosa a la base de datos")
-        
-        return conn
-        
+        return obtener_pool().obtener()
     except Error as e:
         print(f"Error de conexión: {e}")
         return None
     except Exception as e:
         print(f"Error inesperado: {e}")
         return None
-
-# Verificar disponibilidad al importar
-verify_db_availability()
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+DISFRULEG - Consultas en segundo plano para ventanas Tk
+Ejecuta el acceso a datos en un pool de hilos y entrega los resultados en
+el hilo de Tk, para que la interfaz no se congele mientras espera a la base.
+
+Tk no es seguro entre hilos: los hilos de trabajo solo dejan el resultado
+en una cola y el hilo principal la revisa con widget.after() mientras haya
+solicitudes pendientes. Cada hilo toma su propia conexión del pool.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Callable, Optional
+
+from .pool import prestar_conexion
+
+
+def consultar_filas(consulta: str, parametros=None, uno: bool = False):
+    """
+    Ejecuta un SELECT con una conexión prestada del pool y retorna las filas
+    como diccionarios (o solo la primera si uno=True). Pensada para correr
+    en un hilo de trabajo.
+    """
+    with prestar_conexion() as conn, closing(conn.cursor(dictionary=True)) as cursor:
+        cursor.execute(consulta, parametros)
+        return cursor.fetchone() if uno else cursor.fetchall()
+
+
+def cursor_de_espera(widget, cursor: str = "watch") -> Callable[[bool], None]:
+    """Indicador de carga que cambia el cursor del widget mientras hay consultas"""
+    def indicar(ocupado: bool):
+        try:
+            widget.config(cursor=cursor if ocupado else "")
+        except Exception:
+            pass  # La ventana ya se cerró
+    return indicar
+
+
+class Solicitud:
+    """Una ejecución encolada; cancelar() descarta su resultado"""
+
+    def __init__(self, ejecutor: 'EjecutorConsultas', clave: Optional[str]):
+        self.clave = clave
+        self.cancelada = False
+        self._ejecutor = ejecutor
+        self._futuro = None
+        self._finalizada = False
+
+    @property
+    def terminada(self) -> bool:
+        """True cuando ya se entregó, falló o se canceló"""
+        return self._finalizada
+
+    def cancelar(self):
+        """Descarta el resultado; debe llamarse desde el hilo de Tk"""
+        self._ejecutor._cancelar_solicitud(self)
+
+
+class EjecutorConsultas:
+    """
+    Pool de hilos para consultas de una ventana.
+
+    Args:
+        widget: Widget de Tk cuyo after() se usa para entregar resultados
+        max_hilos: Consultas simultáneas como máximo
+        indicador: Función llamada con True al empezar a cargar y con False
+            al terminar la última solicitud pendiente (p. ej. cursor_de_espera)
+        intervalo_ms: Cada cuánto se revisa la cola mientras hay pendientes
+
+    Todos los métodos deben llamarse desde el hilo de Tk. Las solicitudes
+    con la misma clave se reemplazan: al encolar una nueva, la anterior se
+    cancela y su resultado nunca llega (útil al teclear rápido o al pulsar
+    "Actualizar" varias veces).
+    """
+
+    def __init__(self, widget, max_hilos: int = 2,
+                 indicador: Optional[Callable[[bool], None]] = None,
+                 intervalo_ms: int = 20):
+        self.widget = widget
+        self.indicador = indicador
+        self.intervalo_ms = intervalo_ms
+        self._hilos = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="consultas")
+        self._resultados = queue.Queue()
+        self._por_clave = {}
+        self._pendientes = 0
+        self._revisando = False
+        self._cerrado = False
+
+    # ==================== ENCOLAR ====================
+
+    def ejecutar(self, funcion: Callable, *args,
+                 al_terminar: Optional[Callable[[Any], None]] = None,
+                 al_fallar: Optional[Callable[[Exception], None]] = None,
+                 clave: Optional[str] = None, **kwargs) -> Solicitud:
+        """
+        Ejecuta funcion(*args, **kwargs) en un hilo de trabajo.
+        al_terminar(resultado) o al_fallar(excepción) se llaman en el hilo de Tk.
+        """
+        if self._cerrado:
+            raise RuntimeError("El ejecutor de consultas ya fue cerrado")
+
+        if clave is not None and clave in self._por_clave:
+            self._cancelar_solicitud(self._por_clave[clave])
+
+        solicitud = Solicitud(self, clave)
+        if clave is not None:
+            self._por_clave[clave] = solicitud
+
+        def trabajo():
+            if solicitud.cancelada:
+                self._resultados.put((solicitud, None, None, None))
+                return
+            try:
+                resultado = funcion(*args, **kwargs)
+            except Exception as e:
+                self._resultados.put((solicitud, al_fallar, e, False))
+            else:
+                self._resultados.put((solicitud, al_terminar, resultado, True))
+
+        self._pendientes += 1
+        if self._pendientes == 1:
+            self._indicar(True)
+        solicitud._futuro = self._hilos.submit(trabajo)
+        self._programar_revision()
+        return solicitud
+
+    def consultar(self, consulta: str, parametros=None, uno: bool = False, **opciones) -> Solicitud:
+        """Atajo de ejecutar(consultar_filas, ...) para un SELECT"""
+        return self.ejecutar(consultar_filas, consulta, parametros, uno, **opciones)
+
+    # ==================== CANCELACIÓN ====================
+
+    def cancelar(self, clave: Optional[str] = None):
+        """Cancela la solicitud con esa clave, o todas si no se indica"""
+        if clave is None:
+            for solicitud in list(self._por_clave.values()):
+                self._cancelar_solicitud(solicitud)
+        elif clave in self._por_clave:
+            self._cancelar_solicitud(self._por_clave[clave])
+
+    def _cancelar_solicitud(self, solicitud: Solicitud):
+        solicitud.cancelada = True
+        if solicitud._futuro is not None:
+            solicitud._futuro.cancel()
+        if self._por_clave.get(solicitud.clave) is solicitud:
+            del self._por_clave[solicitud.clave]
+        # Si ya empezó a ejecutarse, su resultado llega a la cola y se descarta ahí
+        if solicitud._futuro is not None and solicitud._futuro.cancelled():
+            self._finalizar(solicitud)
+
+    @property
+    def ocupado(self) -> bool:
+        return self._pendientes > 0
+
+    def cerrar(self):
+        """Cancela lo pendiente y libera los hilos (al cerrar la ventana)"""
+        self.cancelar()
+        self._cerrado = True
+        self._hilos.shutdown(wait=False, cancel_futures=True)
+        if self._pendientes:
+            self._pendientes = 0
+            self._indicar(False)
+
+    # ==================== ENTREGA EN EL HILO DE TK ====================
+
+    def _programar_revision(self):
+        if self._revisando or self._cerrado:
+            return
+        self._revisando = True
+        try:
+            self.widget.after(self.intervalo_ms, self._revisar_resultados)
+        except Exception:
+            # La ventana ya no existe; nadie recibirá resultados
+            self._revisando = False
+            self._cerrado = True
+
+    def _revisar_resultados(self):
+        self._revisando = False
+        while True:
+            try:
+                solicitud, callback, valor, exito = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+
+            self._finalizar(solicitud)
+            if solicitud.cancelada or self._cerrado:
+                continue
+            if self._por_clave.get(solicitud.clave) is solicitud:
+                del self._por_clave[solicitud.clave]
+
+            if callback is not None:
+                callback(valor)
+            elif exito is False:
+                print(f"Error en consulta en segundo plano: {valor}")
+
+        if self._pendientes:
+            self._programar_revision()
+
+    def _finalizar(self, solicitud: Solicitud):
+        """Descuenta la solicitud de las pendientes una sola vez"""
+        if solicitud._finalizada:
+            return
+        solicitud._finalizada = True
+        if self._cerrado:
+            return  # cerrar() ya descontó las pendientes
+        self._pendientes -= 1
+        if self._pendientes == 0:
+            self._indicar(False)
+
+    def _indicar(self, ocupado: bool):
+        if self.indicador is not None:
+            try:
+                self.indicador(ocupado)
+            except Exception as e:
+                print(f"Error en indicador de carga: {e}")
@@ -1,7 +1,7 @@
 import mysql.connector
 from typing import Optional
 from src.auth.auth_manager import AuthManager
-from .cloud_config import get_db_config
+from .pool import obtener_pool
 
 class DatabaseManager:
     """
@@ -26,8 +26,8 @@ class DatabaseManager:
             auth_result = self.auth_manager.authenticate(username, password)
             
             if auth_result['success']:
-                # Crear conexión para el usuario autenticado
-                self.current_connection = self.auth_manager.create_user_connection(username, password)
+                # Conexión para el usuario ya autenticado (sin volver a autenticar)
+                self.current_connection = obtener_pool().obtener()
                 self.current_user = auth_result['user_data']
                 
                 return {
@@ -123,9 +123,8 @@ def conectar():
     if db_manager.is_authenticated():
         return db_manager.get_connection()
     else:
-        # Para compatibilidad temporal, usar configuración desde .env
-        config = get_db_config()
-        return mysql.connector.connect(**config)
+        # Para compatibilidad temporal, prestar una conexión del pool compartido
+        return obtener_pool().obtener()
 
 def get_authenticated_connection():
     """
@@ -0,0 +1,66 @@
+"""
+DISFRULEG - Paginación por llave (keyset)
+Las listas de historial se leen por páginas ordenadas de la más reciente a
+la más antigua. Cada página continúa desde la última fila de la anterior
+(WHERE columna < último valor) en lugar de usar OFFSET, así que pedir la
+página 1,000 cuesta lo mismo que la primera: MySQL entra al índice en ese
+punto y lee solo las filas de la página.
+
+Una página es (filas, siguiente): siguiente es la llave con que se pide la
+página que sigue, o None cuando ya no hay más filas.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Filas por página de los historiales
+TAMANO_PAGINA = 100
+
+Llave = Tuple[Any, Any]
+Pagina = Tuple[List[Dict[str, Any]], Optional[Llave]]
+
+
+def condicion_despues(columna: str, desempate: str, despues: Optional[Llave],
+                      nulos: bool = False) -> Tuple[str, list]:
+    """
+    Condición SQL para las filas que siguen a la llave 'despues' en un
+    ORDER BY columna DESC, desempate DESC.
+
+    Args:
+        columna: Columna de orden (p. ej. 'd.fecha_pago')
+        desempate: Columna única que desempata (p. ej. 'd.id_deuda')
+        despues: (valor de columna, valor de desempate) de la última fila
+            mostrada, o None para la primera página
+        nulos: Si la columna admite NULL. En MySQL los NULL van al final de
+            un orden descendente, así que siguen a cualquier valor
+
+    Returns:
+        (sql, parámetros); sql es "" en la primera página. Se escribe sin
+        comparar tuplas, para que MySQL use un rango sobre el índice.
+    """
+    if despues is None:
+        return "", []
+
+    valor, ultimo = despues
+    if valor is None:
+        return f"({columna} IS NULL AND {desempate} < %s)", [ultimo]
+
+    sql = f"({columna} < %s OR ({columna} = %s AND {desempate} < %s)"
+    if nulos:
+        sql += f" OR {columna} IS NULL"
+    return sql + ")", [valor, valor, ultimo]
+
+
+def cortar_pagina(filas: List[Dict[str, Any]], tamano: int,
+                  claves: Sequence[str]) -> Pagina:
+    """
+    Recibe hasta tamano + 1 filas (la consulta pide una de más para saber si
+    hay otra página) y retorna (página, llave de la siguiente o None).
+
+    Args:
+        claves: Nombres de la columna de orden y del desempate en las filas
+    """
+    if len(filas) <= tamano:
+        return filas, None
+    filas = filas[:tamano]
+    ultima = filas[-1]
+    return filas, (ultima[claves[0]], ultima[claves[1]])
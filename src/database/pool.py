@@ -0,0 +1,379 @@
+"""
+DISFRULEG - Connection Pool Module
+Pool de conexiones compartido por todo el proceso. Evita abrir un
+handshake nuevo contra Cloud SQL en cada consulta: los módulos piden
+prestada una conexión y la devuelven al terminar.
+"""
+
+import os
+import atexit
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+from .cloud_config import CONEXIONES_POR_VENTANA, get_db_config, get_pool_config, is_cloud_sql
+from src.config import debug_print
+
+
+class ConexionPrestada:
+    """
+    Envoltura de una conexión del pool.
+
+    Se comporta como la conexión de mysql.connector que envuelve, salvo
+    que close() la devuelve al pool en lugar de cerrarla. Así el código
+    existente que hace conn = conectar() ... conn.close() no cambia.
+    """
+
+    def __init__(self, pool: 'PoolConexiones', conn):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_conn', conn)
+
+    def __getattr__(self, nombre):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise PoolError("La conexión ya fue devuelta al pool")
+        return getattr(conn, nombre)
+
+    def __setattr__(self, nombre, valor):
+        # Permite p. ej. conn.autocommit = False sobre la conexión real
+        setattr(self._conn, nombre, valor)
+
+    def is_connected(self) -> bool:
+        """False si la conexión ya fue devuelta o si el servidor no responde"""
+        return self._conn is not None and self._conn.is_connected()
+
+    def close(self):
+        """Devuelve la conexión al pool"""
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, '_conn', None)
+            self._pool._devolver(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        # Una conexión olvidada sin close() no debe ocupar un lugar del pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones MySQL con tamaño máximo, verificación al prestar,
+    desalojo de conexiones inactivas y métricas de uso.
+
+    Args:
+        db_config: Parámetros para mysql.connector.connect
+        tamano: Máximo de conexiones abiertas a la vez
+        espera_maxima: Segundos a esperar por una conexión libre antes de fallar
+        inactividad_maxima: Segundos que una conexión libre puede quedar sin uso
+        verificar_tras: Segundos sin uso a partir de los cuales se hace ping al prestarla
+        fabrica: Función que abre una conexión nueva (por defecto mysql.connector.connect)
+        tamano_maximo: Tope del tamaño al ampliarlo con reservar() (None: sin tope)
+    """
+
+    def __init__(self, db_config: Optional[Dict] = None, tamano: int = 5,
+                 espera_maxima: float = 30, inactividad_maxima: float = 300,
+                 verificar_tras: float = 5, fabrica: Optional[Callable] = None,
+                 tamano_maximo: Optional[int] = None):
+        if tamano < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+
+        self.db_config = db_config if db_config is not None else get_db_config()
+        self.tamano = tamano
+        self.espera_maxima = espera_maxima
+        self.inactividad_maxima = inactividad_maxima
+        self.verificar_tras = verificar_tras
+        self.tamano_maximo = tamano_maximo
+        self._fabrica = fabrica or (lambda: mysql.connector.connect(**self.db_config))
+        self._autocommit_inicial = bool(self.db_config.get('autocommit', False))
+
+        self._cond = threading.Condition()
+        self._libres = deque()  # (conexión, instante de devolución)
+        self._abiertas = 0
+        self._en_uso = 0
+        self._pid = os.getpid()
+
+        self._metricas = {
+            'creadas': 0,
+            'reutilizadas': 0,
+            'prestamos': 0,
+            'devoluciones': 0,
+            'descartadas': 0,
+            'desalojadas': 0,
+            'esperas': 0,
+            'agotamientos': 0,
+            'pico_en_uso': 0,
+            'tiempo_espera_total': 0.0,
+        }
+
+    # ==================== PRÉSTAMO Y DEVOLUCIÓN ====================
+
+    def obtener(self, espera_maxima: Optional[float] = None) -> ConexionPrestada:
+        """
+        Presta una conexión del pool, abriendo una nueva si hace falta.
+
+        Raises:
+            PoolError: Si no se libera ninguna conexión dentro del tiempo de espera
+            mysql.connector.Error: Si no se puede abrir una conexión nueva
+        """
+        espera = self.espera_maxima if espera_maxima is None else espera_maxima
+        inicio = time.monotonic()
+        limite = inicio + espera
+        conn = None
+        ultimo_uso = None
+        desalojadas = []
+
+        with self._cond:
+            while True:
+                desalojadas.extend(self._extraer_inactivas())
+                if self._libres:
+                    conn, ultimo_uso = self._libres.pop()
+                    break
+                if self._abiertas < self.tamano:
+                    self._abiertas += 1
+                    break
+
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._metricas['agotamientos'] += 1
+                    raise PoolError(
+                        f"Pool de conexiones agotado ({self.tamano} en uso) "
+                        f"tras esperar {espera:.1f}s"
+                    )
+                self._metricas['esperas'] += 1
+                self._cond.wait(restante)
+
+            self._en_uso += 1
+            self._metricas['prestamos'] += 1
+            self._metricas['pico_en_uso'] = max(self._metricas['pico_en_uso'], self._en_uso)
+            self._metricas['tiempo_espera_total'] += time.monotonic() - inicio
+
+        self._cerrar_fisicas(desalojadas)
+
+        # Verificar salud solo si la conexión estuvo quieta el tiempo suficiente
+        if conn is not None and time.monotonic() - ultimo_uso >= self.verificar_tras:
+            if not self._esta_sana(conn):
+                debug_print("Pool: conexión inactiva sin respuesta, se reemplaza")
+                self._cerrar_fisicas([conn])
+                with self._cond:
+                    self._metricas['descartadas'] += 1
+                conn = None
+
+        if conn is None:
+            try:
+                conn = self._abrir_fisica()
+            except Exception:
+                with self._cond:
+                    self._abiertas -= 1
+                    self._en_uso -= 1
+                    self._cond.notify()
+                raise
+        else:
+            with self._cond:
+                self._metricas['reutilizadas'] += 1
+
+        return ConexionPrestada(self, conn)
+
+    @contextmanager
+    def conexion(self, espera_maxima: Optional[float] = None):
+        """Presta una conexión durante el bloque with y la devuelve al salir"""
+        conn = self.obtener(espera_maxima)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def reservar(self, cantidad: int) -> Callable[[], None]:
+        """
+        Amplía el pool en cantidad conexiones mientras las necesite un
+        usuario de larga vida (una ventana que comparte el proceso) y
+        retorna la función que las libera.
+
+        Raises:
+            PoolError: Si el pool pasaría de tamano_maximo
+        """
+        with self._cond:
+            if self.tamano_maximo is not None and self.tamano + cantidad > self.tamano_maximo:
+                self._metricas['agotamientos'] += 1
+                raise PoolError(
+                    f"Sin conexiones para otra ventana ({self.tamano} de {self.tamano_maximo} "
+                    f"reservadas); cierre alguna o aumente DB_POOL_MAX_SIZE"
+                )
+            self.tamano += cantidad
+            self._cond.notify_all()
+
+        liberada = threading.Event()
+
+        def liberar():
+            with self._cond:
+                if liberada.is_set():
+                    return
+                liberada.set()
+                self.tamano -= cantidad
+                # Las libres que sobran se cierran; las prestadas, al devolverse
+                sobrantes = []
+                while self._abiertas > self.tamano and self._libres:
+                    sobrantes.append(self._libres.popleft()[0])
+                    self._abiertas -= 1
+                    self._metricas['descartadas'] += 1
+            self._cerrar_fisicas(sobrantes)
+
+        return liberar
+
+    def _devolver(self, conn):
+        """Limpia el estado de sesión y deja la conexión disponible de nuevo"""
+        sana = True
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+            # Cerrar cualquier transacción (también las implícitas de un SELECT
+            # con autocommit desactivado) para no servir snapshots viejos
+            if conn.in_transaction:
+                conn.rollback()
+            if conn.autocommit != self._autocommit_inicial:
+                conn.autocommit = self._autocommit_inicial
+        except Exception as e:
+            debug_print(f"Pool: conexión descartada al devolverla: {e}")
+            sana = False
+
+        with self._cond:
+            self._en_uso -= 1
+            self._metricas['devoluciones'] += 1
+            # Tras liberar una reserva puede haber más abiertas que el tamaño
+            conservar = sana and os.getpid() == self._pid and self._abiertas <= self.tamano
+            if conservar:
+                self._libres.append((conn, time.monotonic()))
+            else:
+                self._abiertas -= 1
+                self._metricas['descartadas'] += 1
+            self._cond.notify()
+
+        if not conservar:
+            self._cerrar_fisicas([conn])
+
+    # ==================== MANTENIMIENTO ====================
+
+    def _abrir_fisica(self):
+        """Abre una conexión física nueva"""
+        debug_print(f"Pool: abriendo conexión a {'Cloud SQL' if is_cloud_sql() else 'Local'} "
+                    f"({self.db_config.get('host')})")
+        conn = self._fabrica()
+        with self._cond:
+            self._metricas['creadas'] += 1
+        return conn
+
+    def _esta_sana(self, conn) -> bool:
+        try:
+            return conn.is_connected()
+        except Exception:
+            return False
+
+    def _extraer_inactivas(self):
+        """Saca del pool las conexiones libres que superaron la inactividad máxima.
+        Debe llamarse con el candado tomado; el cierre físico se hace fuera."""
+        ahora = time.monotonic()
+        extraidas = []
+        # Las más antiguas están a la izquierda (se presta por la derecha)
+        while self._libres and ahora - self._libres[0][1] > self.inactividad_maxima:
+            conn, _ = self._libres.popleft()
+            extraidas.append(conn)
+            self._abiertas -= 1
+            self._metricas['desalojadas'] += 1
+        return extraidas
+
+    def _cerrar_fisicas(self, conexiones):
+        for conn in conexiones:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def desalojar_inactivas(self) -> int:
+        """Cierra las conexiones libres que superaron la inactividad máxima"""
+        with self._cond:
+            extraidas = self._extraer_inactivas()
+        self._cerrar_fisicas(extraidas)
+        return len(extraidas)
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres (las prestadas se cierran al devolverse)"""
+        with self._cond:
+            libres = [conn for conn, _ in self._libres]
+            self._libres.clear()
+            self._abiertas -= len(libres)
+            # Lo que se devuelva después ya no vuelve al pool
+            self._pid = None
+        self._cerrar_fisicas(libres)
+
+    def metricas(self) -> Dict:
+        """Instantánea de las métricas del pool"""
+        with self._cond:
+            datos = dict(self._metricas)
+            datos.update({
+                'tamano': self.tamano,
+                'abiertas': self._abiertas,
+                'en_uso': self._en_uso,
+                'libres': len(self._libres),
+            })
+        return datos
+
+
+# ==================== POOL GLOBAL DEL PROCESO ====================
+
+_pool_instance = None
+_pool_lock = threading.Lock()
+
+def obtener_pool() -> PoolConexiones:
+    """
+    Obtiene el pool compartido del proceso, creándolo la primera vez
+    a partir de get_db_config() y get_pool_config().
+    """
+    global _pool_instance
+    with _pool_lock:
+        # Un proceso hijo (fork) no puede reutilizar los sockets del padre
+        if _pool_instance is None or _pool_instance._pid != os.getpid():
+            _pool_instance = PoolConexiones(get_db_config(), **get_pool_config())
+        return _pool_instance
+
+@contextmanager
+def prestar_conexion(espera_maxima: Optional[float] = None):
+    """
+    Presta una conexión del pool compartido durante el bloque with.
+
+    Uso:
+        with prestar_conexion() as conn:
+            cursor = conn.cursor()
+            ...
+    """
+    with obtener_pool().conexion(espera_maxima) as conn:
+        yield conn
+
+def reservar_conexiones(cantidad: int = CONEXIONES_POR_VENTANA) -> Callable[[], None]:
+    """
+    Reserva en el pool compartido las conexiones de una ventana que se abre
+    dentro del proceso (modos "in_process" y "host"). Retorna la función
+    que las libera al cerrarla.
+
+    Raises:
+        PoolError: Si ya no caben más ventanas (DB_POOL_MAX_SIZE)
+    """
+    return obtener_pool().reservar(cantidad)
+
+def cerrar_pool():
+    """Cierra las conexiones libres del pool compartido"""
+    if _pool_instance is not None:
+        _pool_instance.cerrar()
+
+atexit.register(cerrar_pool)
@@ -236,7 +236,7 @@ class MainApplication:
     
     def launch_module(self, module_key):
         """Launch a module"""
-        return self.module_launcher.launch_module(module_key, self.user_data)
+        return self.module_launcher.launch_module(module_key, self.user_data, master=self.root)
     
     def handle_session_event(self, event_type, user_data):
         """Handle session events"""
@@ -279,6 +279,9 @@ class MainApplication:
         """Close application"""
         debug_print("Closing application...")
         
+        if self.module_launcher:
+            self.module_launcher.shutdown()
+        
         try:
             if self.root:
                 self.root.quit()
@@ -1,22 +1,105 @@
 import os
+import time
 import tkinter as tk
 from tkinter import messagebox, ttk
 import mysql.connector
 from src.database.conexion import conectar
-from decimal import Decimal
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.ticker import FuncFormatter
+from src.database.consultas_async import EjecutorConsultas, cursor_de_espera
+from src.database.pool import prestar_conexion
+from src.modules.analytics.costo_ventas import actualizar_costos
+from src.modules.analytics.columnas_ventas import cargar_ventas_en_columnas
+from src.modules.analytics.periodos import PERIODOS_ANALISIS, rango_analisis
+from contextlib import closing
 from collections import defaultdict
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from datetime import datetime, timedelta
-import numpy as np
+from datetime import date, datetime, timedelta
+# matplotlib, numpy y reportlab se importan al abrir las estadísticas o
+# exportar el PDF: la ventana principal no los necesita
+
+# Ganancias por producto desde el resumen ventas_diarias (ver migración 002).
+# Ventas, compras y costo de lo vendido se agregan por separado antes de
+# unirlos. La ganancia bruta resta a los ingresos el costo de lo vendido
+# (costo_venta, migración 011), no todas las compras: la existencia sin
+# vender ya no cuenta como pérdida. El margen es sobre los ingresos.
+_GANANCIAS_POR_PRODUCTO = """
+    SELECT
+        p.id_producto,
+        p.nombre_producto,
+        p.unidad_producto,
+        p.stock,
+        v.cantidad_vendida,
+        v.ingresos_totales,
+        COALESCE(c.cantidad_comprada, 0) AS cantidad_comprada,
+        COALESCE(c.costos_totales, 0) AS costos_totales,
+        COALESCE(cv.costo_ventas, 0) AS costo_ventas,
+        COALESCE(cv.cantidad_sin_costo, 0) AS cantidad_sin_costo,
+        v.ingresos_totales - COALESCE(cv.costo_ventas, 0) AS ganancia_total,
+        CASE
+            WHEN COALESCE(v.ingresos_totales, 0) = 0 THEN 0
+            ELSE ROUND(((v.ingresos_totales - COALESCE(cv.costo_ventas, 0)) / v.ingresos_totales) * 100, 2)
+        END AS margen_ganancia_porcentaje
+    FROM producto p
+    LEFT JOIN (
+        SELECT id_producto,
+               SUM(cantidad_vendida) AS cantidad_vendida,
+               SUM(ingresos) AS ingresos_totales
+        FROM ventas_diarias
+        WHERE {filtro_ventas}
+        GROUP BY id_producto
+    ) v ON p.id_producto = v.id_producto
+    LEFT JOIN (
+        SELECT id_producto,
+               SUM(cantidad_compra) AS cantidad_comprada,
+               SUM(cantidad_compra * precio_unitario_compra) AS costos_totales
+        FROM compra
+        WHERE {filtro_compras}
+        GROUP BY id_producto
+    ) c ON p.id_producto = c.id_producto
+    LEFT JOIN (
+        SELECT id_producto,
+               SUM(costo) AS costo_ventas,
+               SUM(cantidad_sin_costo) AS cantidad_sin_costo
+        FROM costo_venta
+        WHERE {filtro_costos}
+        GROUP BY id_producto
+    ) cv ON p.id_producto = cv.id_producto
+"""
+
+GANANCIAS_POR_PRODUCTO_SQL = _GANANCIAS_POR_PRODUCTO.format(
+    filtro_ventas="TRUE", filtro_compras="TRUE", filtro_costos="TRUE")
+
+
+def consulta_ganancias_por_producto(desde=None, hasta=None):
+    """
+    Retorna (sql, parámetros) de las ganancias por producto con ventas,
+    compras y costo de lo vendido en [desde, hasta); sin fechas, todo el
+    historial (GANANCIAS_POR_PRODUCTO_SQL).
+    """
+    if desde is None:
+        return GANANCIAS_POR_PRODUCTO_SQL, ()
+    filtros = {clave: f"{columna} >= %s AND {columna} < %s"
+               for clave, columna in (('filtro_ventas', 'fecha'), ('filtro_compras', 'fecha_compra'),
+                                      ('filtro_costos', 'fecha'))}
+    return _GANANCIAS_POR_PRODUCTO.format(**filtros), (desde, hasta) * 3
+
+
+# Segundos durante los que cambiar de período no vuelve a poner al día
+# costo_venta (actualizar_costos bloquea costo_control y costo_producto)
+INTERVALO_ACTUALIZAR_COSTOS = 300
+
+
+def cargar_ganancias_por_producto(consulta, parametros=(), poner_costos_al_dia=True):
+    """
+    Ejecuta la consulta de ganancias; antes pone al día costo_venta (solo lo
+    registrado desde la última vez, ver costo_ventas.actualizar_costos) si
+    poner_costos_al_dia. Corre en el hilo de trabajo con su propia conexión
+    del pool.
+    """
+    with prestar_conexion() as conn:
+        if poner_costos_al_dia:
+            actualizar_costos(conn)
+        with closing(conn.cursor(dictionary=True)) as cursor:
+            cursor.execute(consulta, parametros)
+            return cursor.fetchall()
 
 class AnalisisGananciasApp:
     def __init__(self, root, user_data):
@@ -37,7 +120,11 @@ class AnalisisGananciasApp:
             return
         
         self.all_products = []
+        # Momento (time.monotonic) de la última puesta al día de costo_venta
+        self.costos_al_dia = None
         self.create_interface()
+        self.consultas = EjecutorConsultas(self.root, indicador=cursor_de_espera(self.root))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.load_analysis()
         
     def create_interface(self):
@@ -52,7 +139,7 @@ class AnalisisGananciasApp:
         button_frame = tk.Frame(self.root)
         button_frame.pack(fill="x", pady=5, padx=10)
         
-        tk.Button(button_frame, text="Actualizar Análisis", command=self.load_analysis, 
+        tk.Button(button_frame, text="Actualizar Análisis", command=lambda: self.load_analysis(forzar_costos=True), 
                   bg="#4CAF50", fg="white", padx=10, pady=3).pack(side="left", padx=5)
         
         tk.Button(button_frame, text="Exportar PDF", command=self.export_to_pdf, 
@@ -61,6 +148,13 @@ class AnalisisGananciasApp:
         tk.Button(button_frame, text="Estadísticas Avanzadas", command=self.show_advanced_stats,
                   bg="#9C27B0", fg="white", padx=10, pady=3).pack(side="left", padx=5)
 
+        self.periodo_var = tk.StringVar(value=PERIODOS_ANALISIS[0])
+        periodo_combo = ttk.Combobox(button_frame, textvariable=self.periodo_var, values=PERIODOS_ANALISIS,
+                                     state="readonly", width=18)
+        periodo_combo.pack(side="right", padx=5)
+        periodo_combo.bind("<<ComboboxSelected>>", lambda event: self.load_analysis())
+        tk.Label(button_frame, text="Período:").pack(side="right")
+
         # Create main container with two sections
         main_container = tk.Frame(self.root)
         main_container.pack(fill="both", expand=True, padx=10, pady=10)
@@ -94,9 +188,9 @@ class AnalisisGananciasApp:
         
         # Create summary cards
         self.create_summary_card(summary_grid, "Ventas Totales", self.total_ventas_var, "#4CAF50", 0, 0)
-        self.create_summary_card(summary_grid, "Costos Totales", self.total_costos_var, "#f44336", 0, 1)
-        self.create_summary_card(summary_grid, "Ganancia Total", self.ganancia_total_var, "#2196F3", 0, 2)
-        self.create_summary_card(summary_grid, "Margen Promedio", self.margen_promedio_var, "#FF5722", 0, 3)
+        self.create_summary_card(summary_grid, "Costo de lo Vendido", self.total_costos_var, "#f44336", 0, 1)
+        self.create_summary_card(summary_grid, "Ganancia Bruta", self.ganancia_total_var, "#2196F3", 0, 2)
+        self.create_summary_card(summary_grid, "Margen Bruto", self.margen_promedio_var, "#FF5722", 0, 3)
     
     def create_summary_card(self, parent, title, text_var, color, row, col):
         card = tk.Frame(parent, bg=color, relief=tk.RAISED, bd=2)
@@ -167,9 +261,9 @@ class AnalisisGananciasApp:
             "ingresos": ("Ingresos", 90),
             "comprado": ("Cant. Comprada", 90),
             "precio_compra": ("Precio Compra", 90),
-            "costos": ("Costos", 90),
-            "ganancia": ("Ganancia", 90),
-            "margen": ("Margen %", 80),
+            "costos": ("Costo Vendido", 90),
+            "ganancia": ("Ganancia Bruta", 90),
+            "margen": ("Margen Bruto %", 90),
             "stock": ("Stock Est.", 80)
         }
         
@@ -183,37 +277,65 @@ class AnalisisGananciasApp:
         v_scrollbar.config(command=self.tree.yview)
         h_scrollbar.config(command=self.tree.xview)
     
-    def load_analysis(self):
-        """Load profitability analysis using the new database structure with views"""
+    def load_analysis(self, forzar_costos=False):
+        """
+        Load profitability analysis in the background (see show_analysis).
+        Invoice lines are costed when the window opens, on "Actualizar
+        Análisis" or after INTERVALO_ACTUALIZAR_COSTOS; a period change alone
+        only re-runs the query.
+        """
+        self.status_var.set("Cargando análisis...")
+        ahora = time.monotonic()
+        poner_costos_al_dia = (forzar_costos or self.costos_al_dia is None
+                               or ahora - self.costos_al_dia >= INTERVALO_ACTUALIZAR_COSTOS)
+        # Read from the ventas_diarias summary instead of the per-line views
+        ganancias, parametros = consulta_ganancias_por_producto(*rango_analisis(self.periodo_var.get()))
+        consulta = f"""
+            SELECT 
+                vgp.id_producto,
+                vgp.nombre_producto,
+                vgp.unidad_producto as unidad,
+                vgp.stock,
+                COALESCE(vgp.cantidad_vendida, 0) as cantidad_vendida,
+                CASE 
+                    WHEN COALESCE(vgp.cantidad_vendida, 0) > 0 
+                    THEN ROUND(vgp.ingresos_totales / vgp.cantidad_vendida, 2)
+                    ELSE 0
+                END as precio_promedio_venta,
+                COALESCE(vgp.ingresos_totales, 0) as ingresos_totales,
+                COALESCE(vgp.cantidad_comprada, 0) as cantidad_comprada,
+                CASE 
+                    WHEN COALESCE(vgp.cantidad_comprada, 0) > 0 
+                    THEN ROUND(vgp.costos_totales / vgp.cantidad_comprada, 2)
+                    ELSE 0
+                END as precio_promedio_compra,
+                COALESCE(vgp.costos_totales, 0) as costos_totales,
+                vgp.costo_ventas,
+                vgp.cantidad_sin_costo,
+                COALESCE(vgp.ganancia_total, 0) as ganancia_total,
+                COALESCE(vgp.margen_ganancia_porcentaje, 0) as margen_ganancia_porcentaje
+            FROM ({ganancias}) vgp
+            ORDER BY vgp.ganancia_total DESC
+        """
+
+        def al_terminar(products):
+            # Only a finished load counts: one cancelled by a newer period
+            # change never brought the costs up to date
+            if poner_costos_al_dia:
+                self.costos_al_dia = ahora
+            self.show_analysis(products)
+
+        self.consultas.ejecutar(cargar_ganancias_por_producto, consulta, parametros, poner_costos_al_dia,
+                                clave="analisis", al_terminar=al_terminar,
+                                al_fallar=self.show_analysis_error)
+
+    def show_analysis_error(self, e):
+        messagebox.showerror("Error", f"Error al cargar análisis: {str(e)}")
+        print(f"Error: {e}")
+
+    def show_analysis(self, products):
+        """Fill the summary and detail table with the loaded products"""
         try:
-            # Use the new vista_ganancias_por_producto view for analysis
-            self.cursor.execute("""
-                SELECT 
-                    vgp.id_producto,
-                    vgp.nombre_producto,
-                    vgp.unidad_producto as unidad,
-                    vgp.stock,
-                    COALESCE(vgp.cantidad_vendida, 0) as cantidad_vendida,
-                    CASE 
-                        WHEN COALESCE(vgp.cantidad_vendida, 0) > 0 
-                        THEN ROUND(vgp.ingresos_totales / vgp.cantidad_vendida, 2)
-                        ELSE 0
-                    END as precio_promedio_venta,
-                    COALESCE(vgp.ingresos_totales, 0) as ingresos_totales,
-                    COALESCE(vgp.cantidad_comprada, 0) as cantidad_comprada,
-                    CASE 
-                        WHEN COALESCE(vgp.cantidad_comprada, 0) > 0 
-                        THEN ROUND(vgp.costos_totales / vgp.cantidad_comprada, 2)
-                        ELSE 0
-                    END as precio_promedio_compra,
-                    COALESCE(vgp.costos_totales, 0) as costos_totales,
-                    COALESCE(vgp.ganancia_total, 0) as ganancia_total,
-                    COALESCE(vgp.margen_ganancia_porcentaje, 0) as margen_ganancia_porcentaje
-                FROM vista_ganancias_por_producto vgp
-                ORDER BY vgp.ganancia_total DESC
-            """)
-            
-            products = self.cursor.fetchall()
             self.all_products = products
             
             # Clear existing data
@@ -222,14 +344,12 @@ class AnalisisGananciasApp:
             
             # Calculate totals for summary
             total_ventas = sum(float(p['ingresos_totales'] or 0) for p in products)
-            total_costos = sum(float(p['costos_totales'] or 0) for p in products)
+            total_costos = sum(float(p['costo_ventas'] or 0) for p in products)
             ganancia_total = total_ventas - total_costos
             
-            # Calculate average margin
-            productos_con_margen = [p for p in products 
-                                   if p['margen_ganancia_porcentaje'] and float(p['margen_ganancia_porcentaje']) != 0]
-            margen_promedio = (sum(float(p['margen_ganancia_porcentaje']) for p in productos_con_margen) / 
-                              len(productos_con_margen)) if productos_con_margen else 0
+            # Gross margin over all revenue (not an average of product margins)
+            margen_promedio = ganancia_total / total_ventas * 100 if total_ventas else 0
+            sin_compra = sum(1 for p in products if float(p['cantidad_sin_costo'] or 0) > 0)
             
             # Update summary with formatted numbers
             self.total_ventas_var.set(f"${total_ventas:,.2f}")
@@ -257,7 +377,7 @@ class AnalisisGananciasApp:
                     f"${float(product['ingresos_totales'] or 0):,.2f}",
                     f"{float(product['cantidad_comprada'] or 0):,.2f}",
                     f"${float(product['precio_promedio_compra'] or 0):,.2f}",
-                    f"${float(product['costos_totales'] or 0):,.2f}",
+                    f"${float(product['costo_ventas'] or 0):,.2f}",
                     f"${ganancia:,.2f}",
                     f"{float(product['margen_ganancia_porcentaje'] or 0):,.1f}%",
                     f"{float(product['stock'] or 0):,.2f}"
@@ -268,7 +388,11 @@ class AnalisisGananciasApp:
             self.tree.tag_configure('negative', background='#FFEBEE')
             self.tree.tag_configure('neutral', background='#F5F5F5')
             
-            self.status_var.set(f"Análisis actualizado - {len(products)} productos analizados")
+            estado = f"Análisis actualizado - {len(products)} productos analizados"
+            if sin_compra:
+                # Sold beyond the recorded purchases: costed at the last purchase price
+                estado += f" | {sin_compra} con ventas sin compra registrada (costo al último precio)"
+            self.status_var.set(estado)
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar análisis: {str(e)}")
@@ -302,7 +426,7 @@ class AnalisisGananciasApp:
                     f"${float(product['ingresos_totales'] or 0):,.2f}",
                     f"{float(product['cantidad_comprada'] or 0):,.2f}",
                     f"${float(product['precio_promedio_compra'] or 0):,.2f}",
-                    f"${float(product['costos_totales'] or 0):,.2f}",
+                    f"${float(product['costo_ventas'] or 0):,.2f}",
                     f"${ganancia:,.2f}",
                     f"{float(product['margen_ganancia_porcentaje'] or 0):,.1f}%",
                     f"{float(product['stock'] or 0):,.2f}"
@@ -343,7 +467,7 @@ class AnalisisGananciasApp:
                     f"${float(product['ingresos_totales'] or 0):,.2f}",
                     f"{float(product['cantidad_comprada'] or 0):,.2f}",
                     f"${float(product['precio_promedio_compra'] or 0):,.2f}",
-                    f"${float(product['costos_totales'] or 0):,.2f}",
+                    f"${float(product['costo_ventas'] or 0):,.2f}",
                     f"${ganancia:,.2f}",
                     f"{float(product['margen_ganancia_porcentaje'] or 0):,.1f}%",
                     f"{float(product['stock'] or 0):,.2f}"
@@ -351,12 +475,14 @@ class AnalisisGananciasApp:
 
     def show_advanced_stats(self):
         """Muestra estadísticas avanzadas con visualizaciones interactivas mejoradas."""
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.ticker import FuncFormatter
         
         class StatsWindow:
-            def __init__(self, parent, db_cursor, db_connection):
+            def __init__(self, parent):
                 self.parent = parent
-                self.cursor = db_cursor
-                self.conn = db_connection
                 self.window = tk.Toplevel(parent)
                 self.window.title("Estadísticas Avanzadas - Disfruleg")
                 self.window.geometry("1300x900")
@@ -365,6 +491,10 @@ class AnalisisGananciasApp:
                 # Variables para navegación histórica
                 self.current_period_index = 0
                 self.available_periods = []
+                # Ventas y compras en columnas: se leen una vez y todas las
+                # gráficas (y sus cambios de período o cliente) salen de ahí
+                self.datos = None
+                self.consultas = EjecutorConsultas(self.window, indicador=cursor_de_espera(self.window))
                 
                 # Configuración de estilo
                 self.style = ttk.Style()
@@ -373,26 +503,6 @@ class AnalisisGananciasApp:
                 self.setup_ui()
                 self.load_data()
 
-            def ensure_decimal(self, value):
-                """Asegura que el valor sea Decimal, convirtiéndolo si es necesario."""
-                if value is None:
-                    return Decimal('0.0')
-                if isinstance(value, Decimal):
-                    return value
-                try:
-                    return Decimal(str(value))
-                except:
-                    return Decimal('0.0')
-                
-            def convert_decimal(self, value):
-                """Convierte valores Decimal de MySQL a float para matplotlib."""
-                if value is None:
-                    return 0.0
-                try:
-                    return float(self.ensure_decimal(value))
-                except:
-                    return 0.0
-                
             def setup_ui(self):
                 """Configura la interfaz de usuario principal."""
                 self.notebook = ttk.Notebook(self.window)
@@ -431,18 +541,47 @@ class AnalisisGananciasApp:
                     "current_figure": None
                 }
                 
-            def load_data(self):
-                """Carga los datos y genera visualizaciones."""
+            def load_data(self, al_terminar=None):
+                """Carga ventas y compras en columnas en segundo plano y luego grafica."""
                 self.status_var.set("Cargando datos...")
-                self.window.update_idletasks()
-                
-                try:
-                    # Cargar datos en segundo plano para no bloquear la UI
-                    self.window.after(100, self.generate_all_charts)
-                except Exception as e:
-                    messagebox.showerror("Error", f"Error al cargar datos: {str(e)}")
-                    self.window.destroy()
-                    
+                self.consultas.ejecutar(cargar_ventas_en_columnas, clave="estadisticas",
+                                        al_terminar=lambda datos: self.on_data_loaded(datos, al_terminar),
+                                        al_fallar=self.on_load_error)
+
+            def on_load_error(self, e):
+                self.status_var.set(f"Error: {str(e)}")
+                messagebox.showerror("Error", f"Error al cargar datos: {str(e)}", parent=self.window)
+
+            def on_data_loaded(self, datos, al_terminar=None):
+                """Guarda las columnas y los totales por producto que usan dos pestañas."""
+                self.datos = datos
+                self.client_totals = datos.por_cliente()
+                totales = datos.por_producto()
+                self.product_totals = []
+                for codigo, producto in enumerate(datos.productos.filas):
+                    if not totales['lineas'][codigo]:
+                        continue
+                    ingresos = totales['ingresos'][codigo]
+                    ganancia = ingresos - totales['costo'][codigo]
+                    self.product_totals.append({
+                        'nombre_producto': producto['nombre_producto'],
+                        'ganancia_total': ganancia,
+                        'margen': ganancia / ingresos * 100 if ingresos else 0,
+                    })
+                self.product_totals.sort(key=lambda p: p['ganancia_total'], reverse=True)
+                (al_terminar or self.generate_all_charts)()
+
+            def redraw_charts(self):
+                """Vuelve a dibujar las gráficas con los datos recién cargados (sin recrear controles)."""
+                self.generate_sales_chart()
+                self.generate_profits_chart()
+                self.update_temporal_chart()
+                self.all_clients = self.datos.clientes.filas
+                self.refresh_client_combos()
+                self.update_clients_chart()
+                self.generate_groups_chart()
+                self.status_var.set(f"Listo - {len(self.datos):,} líneas de venta")
+
             def generate_all_charts(self):
                 """Genera todas las visualizaciones."""
                 try:
@@ -451,24 +590,15 @@ class AnalisisGananciasApp:
                     self.generate_temporal_chart()
                     self.generate_clients_chart()
                     self.generate_groups_chart()
-                    self.status_var.set("Listo")
+                    self.status_var.set(f"Listo - {len(self.datos):,} líneas de venta")
                 except Exception as e:
                     self.status_var.set(f"Error: {str(e)}")
                     messagebox.showerror("Error", f"No se pudieron generar todos los gráficos: {str(e)}")
                     
             def generate_sales_chart(self):
-                """Genera gráficos de productos rentables y con pérdidas usando las vistas."""
+                """Genera gráficos de productos rentables y con pérdidas (ganancia bruta)."""
                 try:
-                    # Usar la vista vista_ganancias_por_producto
-                    self.cursor.execute("""
-                        SELECT 
-                            nombre_producto,
-                            COALESCE(ganancia_total, 0) AS ganancia_total
-                        FROM vista_ganancias_por_producto
-                        WHERE ganancia_total IS NOT NULL
-                        ORDER BY ganancia_total DESC
-                    """)
-                    all_products = self.cursor.fetchall()
+                    all_products = self.product_totals
                     
                     # Filtrar productos rentables (top 10)
                     profitable_products = sorted([p for p in all_products if float(p['ganancia_total']) > 0],
@@ -534,19 +664,9 @@ class AnalisisGananciasApp:
                     self.show_error_message(self.tabs["sales"]["container"], str(e))
 
             def generate_profits_chart(self):
-                """Genera gráfico de ganancias por producto usando vista."""
+                """Genera gráfico de ganancias por producto (ganancia bruta y margen sobre ingresos)."""
                 try:
-                    self.cursor.execute("""
-                        SELECT 
-                            nombre_producto,
-                            COALESCE(ganancia_total, 0) AS ganancia,
-                            COALESCE(margen_ganancia_porcentaje, 0) AS margen
-                        FROM vista_ganancias_por_producto
-                        WHERE ganancia_total IS NOT NULL
-                        ORDER BY ganancia_total DESC
-                        LIMIT 15
-                    """)
-                    data = self.cursor.fetchall()
+                    data = self.product_totals[:15]
                 
                     if not data:
                         self.show_no_data_message(self.tabs["profits"]["container"])
@@ -558,7 +678,7 @@ class AnalisisGananciasApp:
                     formatter = FuncFormatter(lambda x, _: f"${x:,.2f}" if x is not None else "$0.00")
                     ax.xaxis.set_major_formatter(formatter)
                     
-                    ganancias = [float(p['ganancia']) for p in data]
+                    ganancias = [p['ganancia_total'] for p in data]
                     nombres = [p['nombre_producto'][:25] + ('...' if len(p['nombre_producto']) > 25 else '') 
                               for p in data]
                     
@@ -574,7 +694,7 @@ class AnalisisGananciasApp:
                     max_val = max(abs(g) for g in ganancias) if ganancias else 0
                     for bar, ganancia, producto in zip(bars, ganancias, data):
                         width = bar.get_width()
-                        margen = float(producto['margen'])
+                        margen = producto['margen']
                         
                         # Posición de etiqueta
                         if ganancia >= 0:
@@ -636,7 +756,7 @@ class AnalisisGananciasApp:
                     analysis_combo.grid(row=0, column=3, padx=5)
                     
                     # Botón para actualizar
-                    ttk.Button(control_frame, text="Actualizar", command=self.update_temporal_chart).grid(row=0, column=4, padx=10)
+                    ttk.Button(control_frame, text="Actualizar", command=self.refresh_temporal_chart).grid(row=0, column=4, padx=10)
                     
                     # Segunda fila - Navegación histórica
                     nav_frame = ttk.Frame(control_frame)
@@ -663,57 +783,18 @@ class AnalisisGananciasApp:
                     self.show_error_message(self.tabs["temporal"]["container"], str(e))
             
             def get_period_data(self, period_type):
-                """Obtiene los períodos disponibles según el tipo seleccionado."""
-                period_queries = {
-                    "Año": """
-                        SELECT DISTINCT YEAR(f.fecha_factura) AS periodo 
-                        FROM factura f
-                        WHERE f.fecha_factura IS NOT NULL
-                        ORDER BY periodo DESC
-                        LIMIT 5
-                    """,
-                    "Trimestre": """
-                        SELECT DISTINCT CONCAT(YEAR(f.fecha_factura), '-Q', QUARTER(f.fecha_factura)) AS periodo 
-                        FROM factura f
-                        WHERE f.fecha_factura IS NOT NULL
-                        AND YEAR(f.fecha_factura) >= YEAR(CURRENT_DATE) - 2
-                        ORDER BY periodo DESC
-                        LIMIT 8
-                    """,
-                    "Mes": """
-                        SELECT DISTINCT DATE_FORMAT(f.fecha_factura, '%Y-%m') AS periodo 
-                        FROM factura f
-                        WHERE f.fecha_factura IS NOT NULL
-                        AND f.fecha_factura >= DATE_SUB(CURRENT_DATE, INTERVAL 12 MONTH)
-                        ORDER BY periodo DESC
-                        LIMIT 12
-                    """,
-                    "Semana": """
-                        SELECT DISTINCT DATE_FORMAT(f.fecha_factura, '%x-W%v') AS periodo 
-                        FROM factura f
-                        WHERE f.fecha_factura IS NOT NULL
-                        AND f.fecha_factura >= DATE_SUB(CURRENT_DATE, INTERVAL 12 WEEK)
-                        ORDER BY periodo DESC
-                        LIMIT 12
-                    """,
-                    "Día": """
-                        SELECT DISTINCT DATE_FORMAT(f.fecha_factura, '%Y-%m-%d') AS periodo 
-                        FROM factura f
-                        WHERE f.fecha_factura IS NOT NULL
-                        AND f.fecha_factura >= DATE_SUB(CURRENT_DATE, INTERVAL 30 DAY)
-                        ORDER BY periodo DESC
-                        LIMIT 30
-                    """
+                """Obtiene los períodos con ventas según el tipo seleccionado (más reciente primero)."""
+                hoy = date.today()
+                # (desde, cuántos) por tipo de período
+                ventanas = {
+                    "Año": (None, 5),
+                    "Trimestre": (date(hoy.year - 2, 1, 1), 8),
+                    "Mes": (hoy - timedelta(days=365), 12),
+                    "Semana": (hoy - timedelta(weeks=12), 12),
+                    "Día": (hoy - timedelta(days=30), 30),
                 }
-                
-                try:
-                    query = period_queries.get(period_type, period_queries["Mes"])
-                    self.cursor.execute(query)
-                    periods = [str(row['periodo']) for row in self.cursor.fetchall()]
-                    return periods
-                except Exception as e:
-                    print(f"Error obteniendo períodos: {e}")
-                    return []
+                desde, limite = ventanas.get(period_type, ventanas["Mes"])
+                return self.datos.periodos_con_ventas(period_type, desde, limite)
             
             def navigate_previous(self):
                 """Navega al período anterior."""
@@ -728,6 +809,10 @@ class AnalisisGananciasApp:
                     self.current_period_index += 1
                     self.update_temporal_chart()
                     
+            def refresh_temporal_chart(self):
+                """Vuelve a leer ventas y compras (p. ej. tras editar compras) y redibuja todo."""
+                self.load_data(self.redraw_charts)
+
             def update_temporal_chart(self, event=None):
                 """Actualiza el gráfico temporal con mejoras implementadas."""
                 try:
@@ -768,47 +853,16 @@ class AnalisisGananciasApp:
             def generate_general_temporal_chart(self, period_type, periods):
                 """Genera gráfico temporal general con ganancias y pérdidas separadas."""
                 try:
-                    period_func_map = {
-                        "Día": "DATE(f.fecha_factura)",
-                        "Semana": "DATE_FORMAT(f.fecha_factura, '%x-W%v')",
-                        "Mes": "DATE_FORMAT(f.fecha_factura, '%Y-%m')",
-                        "Trimestre": "CONCAT(YEAR(f.fecha_factura), '-Q', QUARTER(f.fecha_factura))",
-                        "Año": "YEAR(f.fecha_factura)"
-                    }
-                    
-                    period_func = period_func_map.get(period_type, "DATE_FORMAT(f.fecha_factura, '%Y-%m')")
-                    
-                    # Query mejorado usando vistas
-                    self.cursor.execute(f"""
-                        SELECT 
-                            {period_func} AS periodo,
-                            SUM(vd.subtotal_con_descuento) AS ventas_totales,
-                            (SELECT COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0)
-                             FROM compra c 
-                             WHERE {period_func.replace('f.fecha_factura', 'c.fecha_compra')} = periodo) AS compras_totales,
-                            SUM(vd.subtotal_con_descuento) - 
-                            (SELECT COALESCE(SUM(c.cantidad_compra * c.precio_unitario_compra), 0)
-                             FROM compra c 
-                             WHERE {period_func.replace('f.fecha_factura', 'c.fecha_compra')} = periodo) AS ganancia_neta
-                        FROM factura f
-                        JOIN detalle_factura df ON f.id_factura = df.id_factura
-                        JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-                        WHERE {period_func} IN ({','.join([f"'{p}'" for p in periods])})
-                        GROUP BY {period_func}
-                        ORDER BY periodo
-                    """)
-                    
-                    data = self.cursor.fetchall()
-                    
-                    if not data:
+                    # Sumas por período sobre las columnas ya cargadas
+                    periods_data = sorted(str(p) for p in periods)
+                    if not periods_data:
                         self.show_no_data_message(self.tabs["temporal"]["graph_frame"])
                         return
                     
-                    # Preparar datos
-                    periods_data = [d['periodo'] for d in data]
-                    ventas = [float(d['ventas_totales'] or 0) for d in data]
-                    compras = [float(d['compras_totales'] or 0) for d in data]
-                    ganancias = [float(d['ganancia_neta'] or 0) for d in data]
+                    data = self.datos.por_periodo(period_type, periods_data)
+                    ventas = data['ingresos']
+                    compras = data['costo']
+                    ganancias = [v - c for v, c in zip(ventas, compras)]
                     
                     # Crear gráfico
                     fig, ax = plt.subplots(figsize=(14, 8))
@@ -818,10 +872,10 @@ class AnalisisGananciasApp:
                     
                     # Barras para ventas (positivas) y compras (negativas)
                     bars_ventas = ax.bar(x - width/2, ventas, width, label='Ingresos', color='#A5D6A7', alpha=0.8)
-                    bars_compras = ax.bar(x + width/2, [-c for c in compras], width, label='Compras', color='#EF9A9A', alpha=0.8)
+                    bars_compras = ax.bar(x + width/2, [-c for c in compras], width, label='Costo de lo Vendido', color='#EF9A9A', alpha=0.8)
                     
                     # Línea de ganancia neta
-                    line = ax.plot(x, ganancias, marker='o', color='#2196F3', linewidth=3, markersize=8, label='Ganancia Neta')
+                    line = ax.plot(x, ganancias, marker='o', color='#2196F3', linewidth=3, markersize=8, label='Ganancia Bruta')
                     
                     # Etiquetas de montos en todas las barras
                     for i, (bar_v, bar_c, v, c, g) in enumerate(zip(bars_ventas, bars_compras, ventas, compras, ganancias)):
@@ -841,7 +895,7 @@ class AnalisisGananciasApp:
                     
                     ax.set_xlabel(f'{period_type}', fontsize=12)
                     ax.set_ylabel('Monto ($)', fontsize=12)
-                    ax.set_title(f'Análisis General por {period_type}\nVerde: Ingresos | Rojo: Compras | Azul: Ganancia Neta', 
+                    ax.set_title(f'Análisis General por {period_type}\nVerde: Ingresos | Rojo: Costo de lo Vendido | Azul: Ganancia Bruta', 
                                fontsize=14, fontweight='bold')
                     ax.set_xticks(x)
                     ax.set_xticklabels(periods_data, rotation=45 if len(periods_data) > 5 else 0)
@@ -862,72 +916,28 @@ class AnalisisGananciasApp:
             def generate_product_temporal_chart(self, period_type, periods):
                 """Genera gráfico temporal por producto mostrando top 5 con separación de ganancias/pérdidas."""
                 try:
-                    # Mapeo de funciones de período
-                    period_func_map = {
-                        "Día": "DATE_FORMAT(f.fecha_factura, '%Y-%m-%d')",
-                        "Semana": "DATE_FORMAT(f.fecha_factura, '%x-W%v')",
-                        "Mes": "DATE_FORMAT(f.fecha_factura, '%Y-%m')",
-                        "Trimestre": "CONCAT(YEAR(f.fecha_factura), '-Q', QUARTER(f.fecha_factura))",
-                        "Año": "YEAR(f.fecha_factura)"
-                    }
-                    
-                    period_func = period_func_map.get(period_type, "DATE_FORMAT(f.fecha_factura, '%Y-%m')")
-                    periods_str = ','.join([f"'{p}'" for p in periods])
-                    
-                    # Obtener top productos por ganancia total en el período
-                    self.cursor.execute(f"""
-                        SELECT 
-                            p.nombre_producto,
-                            SUM(vd.subtotal_con_descuento) AS ingresos_totales
-                        FROM producto p
-                        JOIN detalle_factura df ON p.id_producto = df.id_producto
-                        JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-                        JOIN factura f ON df.id_factura = f.id_factura
-                        WHERE {period_func} IN ({periods_str})
-                        GROUP BY p.id_producto, p.nombre_producto
-                        ORDER BY ingresos_totales DESC
-                        LIMIT 5
-                    """)
-                    
-                    top_products = [row['nombre_producto'] for row in self.cursor.fetchall()]
-                    
-                    if not top_products:
+                    periods_sorted = sorted([str(p) for p in periods])
+                    if not periods_sorted:
                         self.show_no_data_message(self.tabs["temporal"]["graph_frame"])
                         return
                     
-                    # Obtener datos detallados por período para los top productos
-                    products_in = ','.join([f"'{p}'" for p in top_products])
-                    
-                    self.cursor.execute(f"""
-                        SELECT 
-                            {period_func} AS periodo,
-                            p.nombre_producto,
-                            SUM(vd.subtotal_con_descuento) AS ingresos
-                        FROM producto p
-                        JOIN detalle_factura df ON p.id_producto = df.id_producto
-                        JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-                        JOIN factura f ON df.id_factura = f.id_factura
-                        WHERE {period_func} IN ({periods_str})
-                        AND p.nombre_producto IN ({products_in})
-                        GROUP BY {period_func}, p.id_producto, p.nombre_producto
-                        ORDER BY periodo, ingresos DESC
-                    """)
-                    
-                    data = self.cursor.fetchall()
+                    # Ingresos [período][producto]; top 5 por ingresos en los períodos mostrados
+                    ingresos = self.datos.por_periodo_y_producto(period_type, periods_sorted)
+                    totales = [sum(columna) for columna in zip(*ingresos)]
+                    top_codes = [codigo for codigo in sorted(range(len(totales)), key=lambda c: -totales[c])[:5]
+                                 if totales[codigo] > 0]
                     
-                    if not data:
+                    if not top_codes:
                         self.show_no_data_message(self.tabs["temporal"]["graph_frame"])
                         return
                     
-                    # Organizar datos
-                    period_data = defaultdict(dict)
-                    for row in data:
-                        period_data[str(row['periodo'])][row['nombre_producto']] = float(row['ingresos'] or 0)
+                    top_products = [self.datos.productos[codigo]['nombre_producto'] for codigo in top_codes]
+                    period_data = {period: {top_products[i]: fila[codigo] for i, codigo in enumerate(top_codes)}
+                                   for period, fila in zip(periods_sorted, ingresos)}
                     
                     # Crear gráfico
                     fig, ax = plt.subplots(figsize=(14, 8))
                     
-                    periods_sorted = sorted([str(p) for p in periods])
                     x = np.arange(len(periods_sorted))
                     width = 0.15
                     colors = ['#A5D6A7', '#90CAF9', '#FFE082', '#CE93D8', '#F48FB1']
@@ -973,54 +983,33 @@ class AnalisisGananciasApp:
             def generate_group_temporal_chart(self, period_type, periods):
                 """Genera gráfico temporal por grupo de clientes con barras separadas."""
                 try:
-                    period_func_map = {
-                        "Día": "DATE_FORMAT(f.fecha_factura, '%Y-%m-%d')",
-                        "Semana": "DATE_FORMAT(f.fecha_factura, '%x-W%v')",
-                        "Mes": "DATE_FORMAT(f.fecha_factura, '%Y-%m')",
-                        "Trimestre": "CONCAT(YEAR(f.fecha_factura), '-Q', QUARTER(f.fecha_factura))",
-                        "Año": "YEAR(f.fecha_factura)"
-                    }
-                    
-                    period_func = period_func_map.get(period_type, "DATE_FORMAT(f.fecha_factura, '%Y-%m')")
-                    periods_str = ','.join([f"'{p}'" for p in periods])
-                    
-                    self.cursor.execute(f"""
-                        SELECT 
-                            {period_func} AS periodo,
-                            g.clave_grupo,
-                            SUM(vd.subtotal_con_descuento) AS ventas_totales,
-                            COUNT(DISTINCT c.id_cliente) AS clientes_activos,
-                            COUNT(DISTINCT f.id_factura) AS facturas_emitidas
-                        FROM grupo g
-                        JOIN cliente c ON g.id_grupo = c.id_grupo
-                        JOIN factura f ON c.id_cliente = f.id_cliente
-                        JOIN detalle_factura df ON f.id_factura = df.id_factura
-                        JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-                        WHERE {period_func} IN ({periods_str})
-                        GROUP BY {period_func}, g.id_grupo, g.clave_grupo
-                        ORDER BY periodo, ventas_totales DESC
-                    """)
-                    
-                    data = self.cursor.fetchall()
+                    periods_sorted = sorted([str(p) for p in periods])
+                    if not periods_sorted:
+                        self.show_no_data_message(self.tabs["temporal"]["graph_frame"])
+                        return
                     
-                    if not data:
+                    # Ventas y clientes activos [período][grupo]
+                    data = self.datos.por_periodo_y_grupo(period_type, periods_sorted)
+                    group_codes = [codigo for codigo in range(len(self.datos.grupos))
+                                   if any(fila[codigo] for fila in data['ingresos'])]
+                    
+                    if not group_codes:
                         self.show_no_data_message(self.tabs["temporal"]["graph_frame"])
                         return
                     
                     # Organizar datos por grupo
-                    groups = list(set(row['clave_grupo'] for row in data))
+                    groups = [self.datos.grupos[codigo]['clave_grupo'] for codigo in group_codes]
                     period_data = defaultdict(dict)
                     client_data = defaultdict(dict)
                     
-                    for row in data:
-                        period_str = str(row['periodo'])
-                        period_data[period_str][row['clave_grupo']] = float(row['ventas_totales'] or 0)
-                        client_data[period_str][row['clave_grupo']] = int(row['clientes_activos'] or 0)
+                    for period, ventas_fila, clientes_fila in zip(periods_sorted, data['ingresos'], data['clientes']):
+                        for group, codigo in zip(groups, group_codes):
+                            period_data[period][group] = ventas_fila[codigo]
+                            client_data[period][group] = clientes_fila[codigo]
                     
                     # Crear gráfico con barras separadas
                     fig, ax = plt.subplots(figsize=(14, 8))
                     
-                    periods_sorted = sorted([str(p) for p in periods])
                     x = np.arange(len(periods_sorted))
                     width = 0.8 / max(len(groups), 1)  # Ancho de cada barra
                     colors = ['#A5D6A7', '#90CAF9', '#FFE082', '#CE93D8', '#F48FB1', '#FFAB91']
@@ -1081,19 +1070,8 @@ class AnalisisGananciasApp:
                     self.client_control_frame = ttk.Frame(frame)
                     self.client_control_frame.pack(fill="x", padx=10, pady=5)
                     
-                    # Obtener lista de clientes usando vista
-                    self.cursor.execute("""
-                        SELECT 
-                            c.id_cliente, 
-                            c.nombre_cliente,
-                            g.clave_grupo,
-                            tc.nombre_tipo
-                        FROM cliente c
-                        JOIN grupo g ON c.id_grupo = g.id_grupo
-                        JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
-                        ORDER BY c.nombre_cliente
-                    """)
-                    self.all_clients = self.cursor.fetchall()
+                    # Catálogo de clientes (ordenado por nombre) de las columnas cargadas
+                    self.all_clients = self.datos.clientes.filas
                     
                     # Inicializar variables
                     self.selected_clients = []
@@ -1225,24 +1203,10 @@ class AnalisisGananciasApp:
             def load_top_clients(self):
                 """Carga los top 5 clientes con más ventas."""
                 try:
-                    self.cursor.execute("""
-                        SELECT 
-                            c.id_cliente, 
-                            c.nombre_cliente,
-                            g.clave_grupo,
-                            tc.nombre_tipo,
-                            SUM(vd.subtotal_con_descuento) AS total_vendido
-                        FROM cliente c
-                        JOIN grupo g ON c.id_grupo = g.id_grupo
-                        JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
-                        JOIN factura f ON c.id_cliente = f.id_cliente
-                        JOIN detalle_factura df ON f.id_factura = df.id_factura
-                        JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-                        GROUP BY c.id_cliente, c.nombre_cliente, g.clave_grupo, tc.nombre_tipo
-                        ORDER BY total_vendido DESC
-                        LIMIT 5
-                    """)
-                    top_clients = self.cursor.fetchall()
+                    ingresos = self.client_totals['ingresos']
+                    top_codes = sorted((c for c in range(len(ingresos)) if ingresos[c] > 0),
+                                       key=lambda c: -ingresos[c])[:5]
+                    top_clients = [self.datos.clientes[codigo] for codigo in top_codes]
                     
                     # Limpiar y actualizar
                     self.selected_clients = []
@@ -1296,27 +1260,14 @@ class AnalisisGananciasApp:
                         label.pack(expand=True)
                         return
                     
-                    # Obtener datos manteniendo el orden
-                    client_ids = ','.join([str(c['id_cliente']) for c in clients_to_show])
-                    
-                    self.cursor.execute(f"""
-                        SELECT 
-                            c.id_cliente,
-                            c.nombre_cliente,
-                            g.clave_grupo,
-                            tc.nombre_tipo,
-                            tc.descuento,
-                            SUM(vd.subtotal_con_descuento) AS total_vendido
-                        FROM cliente c
-                        JOIN grupo g ON c.id_grupo = g.id_grupo
-                        JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
-                        JOIN factura f ON c.id_cliente = f.id_cliente
-                        JOIN detalle_factura df ON f.id_factura = df.id_factura
-                        JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-                        WHERE c.id_cliente IN ({client_ids})
-                        GROUP BY c.id_cliente, c.nombre_cliente, g.clave_grupo, tc.nombre_tipo, tc.descuento
-                    """)
-                    raw_data = self.cursor.fetchall()
+                    # Ventas y ganancia bruta por cliente desde las columnas
+                    totales = self.client_totals
+                    raw_data = []
+                    for client in clients_to_show:
+                        codigo = self.datos.clientes.codigos.get(client['id_cliente'])
+                        if codigo is not None and totales['lineas'][codigo]:
+                            raw_data.append(dict(client, total_vendido=totales['ingresos'][codigo],
+                                                 ganancia_bruta=totales['ingresos'][codigo] - totales['costo'][codigo]))
                     
                     if not raw_data:
                         label = ttk.Label(
@@ -1359,9 +1310,10 @@ class AnalisisGananciasApp:
                     # Añadir etiquetas
                     max_amount = max(amounts) if amounts else 0
                     for i, (bar, amount, data) in enumerate(zip(bars, amounts, ordered_data)):
-                        # Etiqueta de monto
+                        # Etiqueta de monto y ganancia bruta (costo_venta)
                         ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max_amount * 0.01,
-                            f'${amount:,.0f}', ha='center', va='bottom', fontweight='bold', fontsize=10)
+                            f'${amount:,.0f}\nGan. ${float(data["ganancia_bruta"] or 0):,.0f}',
+                            ha='center', va='bottom', fontweight='bold', fontsize=10)
                         
                         # Etiqueta de descuento
                         ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() * 0.5,
@@ -1461,26 +1413,14 @@ class AnalisisGananciasApp:
             def generate_groups_chart(self):
                 """Genera gráfico simplificado de ventas por grupo de clientes."""
                 try:
-                    # Usar vista vista_ganancias_por_grupo para datos simplificados
-                    self.cursor.execute("""
-                        SELECT 
-                            g.clave_grupo,
-                            tc.nombre_tipo,
-                            tc.descuento,
-                            COUNT(DISTINCT c.id_cliente) AS cantidad_clientes,
-                            SUM(vd.subtotal_con_descuento) AS total_ventas,
-                            COUNT(DISTINCT f.id_factura) AS cantidad_facturas
-                        FROM grupo g
-                        JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
-                        LEFT JOIN cliente c ON g.id_grupo = c.id_grupo
-                        LEFT JOIN factura f ON c.id_cliente = f.id_cliente
-                        LEFT JOIN detalle_factura df ON f.id_factura = df.id_factura
-                        LEFT JOIN vista_detalle_factura_con_descuento vd ON df.id_detalle = vd.id_detalle
-                        GROUP BY g.id_grupo, g.clave_grupo, tc.nombre_tipo, tc.descuento
-                        HAVING total_ventas > 0
-                        ORDER BY total_ventas DESC
-                    """)
-                    grupos = self.cursor.fetchall()
+                    # Ventas, facturas y clientes por grupo desde las columnas
+                    totales = self.datos.por_grupo()
+                    grupos = sorted(
+                        (dict(grupo, total_ventas=totales['ingresos'][codigo],
+                              cantidad_clientes=totales['clientes'][codigo],
+                              cantidad_facturas=totales['facturas'][codigo])
+                         for codigo, grupo in enumerate(self.datos.grupos.filas) if totales['ingresos'][codigo] > 0),
+                        key=lambda g: -g['total_ventas'])
                     
                     if not grupos:
                         self.show_no_data_message(self.tabs["groups"]["container"])
@@ -1586,6 +1526,7 @@ class AnalisisGananciasApp:
             def cleanup(self):
                 """Limpia recursos antes de cerrar la ventana."""
                 try:
+                    self.consultas.cerrar()
                     if hasattr(self, 'current_figure'):
                         fig, canvas, toolbar = self.current_figure
                         plt.close(fig)
@@ -1596,11 +1537,17 @@ class AnalisisGananciasApp:
                     self.window.destroy()
         
         # Crear e iniciar la ventana de estadísticas
-        StatsWindow(self.root, self.cursor, self.conn)
+        StatsWindow(self.root)
     
     def export_to_pdf(self):
         """Exporta las estadísticas del día a un archivo PDF usando las nuevas vistas."""
         try:
+            from reportlab.lib.pagesizes import letter
+            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+            from reportlab.lib.styles import getSampleStyleSheet
+            from reportlab.lib import colors
+            from reportlab.lib.units import inch
+
             # Crear la carpeta reportes si no existe
             reportes_dir = "reportes"
             if not os.path.exists(reportes_dir):
@@ -1637,7 +1584,7 @@ class AnalisisGananciasApp:
                 FROM vista_detalle_factura_con_descuento vd
                 JOIN factura f ON vd.id_factura = f.id_factura
                 JOIN cliente c ON f.id_cliente = c.id_cliente
-                WHERE DATE(f.fecha_factura) = CURDATE()
+                WHERE f.fecha_factura = CURDATE()
                 ORDER BY f.id_factura
             """)
             ventas = self.cursor.fetchall()
@@ -1652,7 +1599,7 @@ class AnalisisGananciasApp:
                     (c.cantidad_compra * c.precio_unitario_compra) as subtotal
                 FROM compra c
                 JOIN producto p ON c.id_producto = p.id_producto
-                WHERE DATE(c.fecha_compra) = CURDATE()
+                WHERE c.fecha_compra = CURDATE()
                 ORDER BY c.id_compra
             """)
             compras = self.cursor.fetchall()
@@ -1756,6 +1703,7 @@ class AnalisisGananciasApp:
             
     def on_closing(self):
         """Clean up and close connection when closing the app"""
+        self.consultas.cerrar()
         try:
             if hasattr(self, 'conn'):
                 self.conn.close()
@@ -1771,5 +1719,4 @@ if __name__ == "__main__":
         'rol': 'usuario'  # Cambiar a 'admin' para probar funciones administrativas
     }
     app = AnalisisGananciasApp(root, user_data)
-    root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,343 @@
+"""
+DISFRULEG - Ventas y compras en columnas para las estadísticas avanzadas
+
+Cada gráfica de StatsWindow hacía su propia consulta (y otra cada vez que
+se cambiaba de período o de cliente) y convertía cada Decimal fila por
+fila. VentasEnColumnas lee una sola vez las líneas de factura y las compras
+y las guarda en columnas tipadas (array): fechas como ordinales, importes
+como double y producto, cliente, grupo y factura como códigos 0..n-1 de un
+catálogo. Las sumas por producto, cliente, grupo y período se calculan
+sobre esas columnas: con NumPy (bincount sobre la misma memoria, sin
+copiarla) si está instalado, y con un recorrido en Python si no.
+
+Los importes son float porque solo se grafican; la tabla de ganancias y
+los reportes siguen leyendo Decimal de la base.
+"""
+
+from array import array
+from contextlib import closing
+from datetime import date
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # matplotlib lo instala; sin él se suma en Python
+    np = None
+
+from src.database.pool import prestar_conexion
+from src.modules.analytics.costo_ventas import actualizar_costos
+from src.modules.analytics.periodos import etiqueta_periodo, rango_periodo
+
+# Filas por fetchmany al cargar las líneas de factura
+FILAS_POR_LECTURA = 10000
+
+_PRODUCTOS_SQL = "SELECT id_producto, nombre_producto FROM producto ORDER BY id_producto"
+
+_GRUPOS_SQL = """
+    SELECT g.id_grupo, g.clave_grupo, tc.nombre_tipo, tc.descuento
+    FROM grupo g
+    JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+    ORDER BY g.id_grupo
+"""
+
+_CLIENTES_SQL = "SELECT id_cliente, nombre_cliente, id_grupo FROM cliente ORDER BY nombre_cliente"
+
+# Mismo subtotal que vista_detalle_factura_con_descuento, sin unir producto
+# ni sección; el costo es el de costo_venta (NULL si aún no se costeó)
+VENTAS_EN_COLUMNAS_SQL = """
+    SELECT f.fecha_factura, df.id_producto, f.id_cliente, df.id_factura, df.cantidad_factura,
+           ROUND(df.cantidad_factura * pg.precio_base * (1 - tc.descuento/100), 2),
+           cv.costo
+    FROM detalle_factura df
+    JOIN factura f ON df.id_factura = f.id_factura
+    JOIN cliente c ON f.id_cliente = c.id_cliente
+    JOIN grupo g ON c.id_grupo = g.id_grupo
+    JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+    JOIN precio_por_grupo pg ON pg.id_producto = df.id_producto AND pg.id_grupo = c.id_grupo
+    LEFT JOIN costo_venta cv ON cv.id_detalle = df.id_detalle
+"""
+
+COMPRAS_EN_COLUMNAS_SQL = """
+    SELECT fecha_compra, id_producto, cantidad_compra * precio_unitario_compra
+    FROM compra
+"""
+
+
+class Catalogo:
+    """Ids de la base codificados como 0..n-1, con la fila de cada uno"""
+
+    def __init__(self):
+        self.codigos = {}
+        self.filas = []
+
+    def agregar(self, id_registro, fila: Optional[Dict] = None) -> int:
+        codigo = self.codigos.get(id_registro)
+        if codigo is None:
+            codigo = self.codigos[id_registro] = len(self.filas)
+            self.filas.append(fila if fila is not None else {})
+        return codigo
+
+    def __len__(self):
+        return len(self.filas)
+
+    def __getitem__(self, codigo) -> Dict:
+        return self.filas[codigo]
+
+
+def _vista(columna: array):
+    """Arreglo NumPy sobre la memoria de la columna (sin copiarla)"""
+    if not columna:
+        return np.zeros(0, dtype=np.float64 if columna.typecode == 'd' else np.intc)
+    return np.frombuffer(columna, dtype=np.float64 if columna.typecode == 'd' else np.intc)
+
+
+def _combinar(externos, internos, n_internos):
+    """Clave externo * n + interno por fila; -1 donde externo es -1"""
+    if np is not None:
+        externos = np.asarray(externos, dtype=np.int64)
+        return np.where(externos >= 0, externos * n_internos + np.asarray(internos, dtype=np.int64), -1)
+    return [e * n_internos + i if e >= 0 else -1 for e, i in zip(externos, internos)]
+
+
+def _indexar(tabla, codigos):
+    """tabla[codigo] por fila (p. ej. el grupo de cada cliente)"""
+    if np is not None:
+        return np.asarray(tabla, dtype=np.int64)[np.asarray(codigos, dtype=np.int64)]
+    return [tabla[codigo] for codigo in codigos]
+
+
+def _sumar(claves, valores, n: int) -> List[float]:
+    """Suma de valores por clave 0..n-1; las claves -1 se ignoran"""
+    if np is not None:
+        claves = np.asarray(claves, dtype=np.int64)
+        valores = _vista(valores) if isinstance(valores, array) else np.asarray(valores, dtype=np.float64)
+        validas = claves >= 0
+        return np.bincount(claves[validas], weights=valores[validas], minlength=n).tolist()
+    totales = [0.0] * n
+    for clave, valor in zip(claves, valores):
+        if clave >= 0:
+            totales[clave] += valor
+    return totales
+
+
+def _contar(claves, n: int) -> List[int]:
+    """Filas por clave 0..n-1; las claves -1 se ignoran"""
+    if np is not None:
+        claves = np.asarray(claves, dtype=np.int64)
+        return np.bincount(claves[claves >= 0], minlength=n).tolist()
+    totales = [0] * n
+    for clave in claves:
+        if clave >= 0:
+            totales[clave] += 1
+    return totales
+
+
+def _contar_distintos(claves, valores, n: int, n_valores: int) -> List[int]:
+    """Valores distintos por clave 0..n-1; las claves -1 se ignoran"""
+    if np is not None:
+        pares = np.unique(_combinar(claves, valores, n_valores))
+        return _contar(pares[pares >= 0] // n_valores, n)
+    distintos = [set() for _ in range(n)]
+    for clave, valor in zip(claves, valores):
+        if clave >= 0:
+            distintos[clave].add(valor)
+    return [len(valores) for valores in distintos]
+
+
+def _matriz(totales, columnas: int) -> List[List]:
+    return [totales[inicio:inicio + columnas] for inicio in range(0, len(totales), columnas)]
+
+
+class VentasEnColumnas:
+    """
+    Líneas de factura, facturas y compras en columnas paralelas.
+
+    Ventas (una posición por línea): fecha, producto, cliente, cantidad,
+    ingresos, costo. Facturas (una por código): factura_fecha, factura_cliente.
+    Compras: compra_fecha, compra_producto, compra_importe. grupo_cliente da
+    el código de grupo de cada código de cliente.
+    """
+
+    def __init__(self):
+        self.productos = Catalogo()
+        self.grupos = Catalogo()
+        self.clientes = Catalogo()
+        self.grupo_cliente = array('i')
+        self._facturas = {}
+
+        self.fecha = array('i')
+        self.producto = array('i')
+        self.cliente = array('i')
+        self.cantidad = array('d')
+        self.ingresos = array('d')
+        self.costo = array('d')
+
+        self.factura_fecha = array('i')
+        self.factura_cliente = array('i')
+
+        self.compra_fecha = array('i')
+        self.compra_producto = array('i')
+        self.compra_importe = array('d')
+
+    def __len__(self):
+        return len(self.fecha)
+
+    # ==================== CARGA ====================
+
+    def agregar_producto(self, id_producto, nombre_producto) -> int:
+        return self.productos.agregar(id_producto, {'id_producto': id_producto,
+                                                    'nombre_producto': nombre_producto})
+
+    def agregar_grupo(self, id_grupo, clave_grupo, nombre_tipo=None, descuento=0) -> int:
+        return self.grupos.agregar(id_grupo, {'id_grupo': id_grupo, 'clave_grupo': clave_grupo,
+                                              'nombre_tipo': nombre_tipo, 'descuento': descuento})
+
+    def agregar_cliente(self, id_cliente, nombre_cliente, id_grupo) -> int:
+        grupo = self.grupos.agregar(id_grupo, {'id_grupo': id_grupo, 'clave_grupo': str(id_grupo),
+                                               'nombre_tipo': None, 'descuento': 0})
+        codigo = self.clientes.agregar(id_cliente, {'id_cliente': id_cliente, 'nombre_cliente': nombre_cliente,
+                                                    **{c: v for c, v in self.grupos[grupo].items()
+                                                       if c != 'id_grupo'}})
+        if codigo == len(self.grupo_cliente):
+            self.grupo_cliente.append(grupo)
+        return codigo
+
+    def _codigo_cliente(self, id_cliente) -> int:
+        codigo = self.clientes.codigos.get(id_cliente)
+        return codigo if codigo is not None else self.agregar_cliente(id_cliente, f"Cliente {id_cliente}", None)
+
+    def _codigo_producto(self, id_producto) -> int:
+        codigo = self.productos.codigos.get(id_producto)
+        return codigo if codigo is not None else self.agregar_producto(id_producto, f"Producto {id_producto}")
+
+    def agregar_venta(self, fecha, id_producto, id_cliente, id_factura, cantidad, ingresos, costo=None):
+        cliente = self._codigo_cliente(id_cliente)
+        dia = fecha.toordinal()
+        if id_factura not in self._facturas:
+            self._facturas[id_factura] = len(self.factura_fecha)
+            self.factura_fecha.append(dia)
+            self.factura_cliente.append(cliente)
+        self.fecha.append(dia)
+        self.producto.append(self._codigo_producto(id_producto))
+        self.cliente.append(cliente)
+        self.cantidad.append(float(cantidad or 0))
+        self.ingresos.append(float(ingresos or 0))
+        self.costo.append(float(costo or 0))
+
+    def agregar_compra(self, fecha, id_producto, importe):
+        self.compra_fecha.append(fecha.toordinal())
+        self.compra_producto.append(self._codigo_producto(id_producto))
+        self.compra_importe.append(float(importe or 0))
+
+    @classmethod
+    def cargar(cls, cursor) -> 'VentasEnColumnas':
+        """Lee catálogos, líneas de factura y compras con un cursor de tuplas"""
+        datos = cls()
+        cursor.execute(_PRODUCTOS_SQL)
+        for fila in cursor.fetchall():
+            datos.agregar_producto(*fila)
+        cursor.execute(_GRUPOS_SQL)
+        for fila in cursor.fetchall():
+            datos.agregar_grupo(*fila)
+        cursor.execute(_CLIENTES_SQL)
+        for fila in cursor.fetchall():
+            datos.agregar_cliente(*fila)
+
+        cursor.execute(VENTAS_EN_COLUMNAS_SQL)
+        filas = cursor.fetchmany(FILAS_POR_LECTURA)
+        while filas:
+            for fila in filas:
+                datos.agregar_venta(*fila)
+            filas = cursor.fetchmany(FILAS_POR_LECTURA)
+
+        cursor.execute(COMPRAS_EN_COLUMNAS_SQL)
+        for fila in cursor.fetchall():
+            datos.agregar_compra(*fila)
+        return datos
+
+    # ==================== TOTALES ====================
+
+    def por_producto(self) -> Dict[str, List[float]]:
+        """{'ingresos', 'costo', 'cantidad', 'lineas'} por código de producto"""
+        n = len(self.productos)
+        return {'ingresos': _sumar(self.producto, self.ingresos, n),
+                'costo': _sumar(self.producto, self.costo, n),
+                'cantidad': _sumar(self.producto, self.cantidad, n),
+                'lineas': _contar(self.producto, n)}
+
+    def por_cliente(self) -> Dict[str, List[float]]:
+        """{'ingresos', 'costo', 'lineas'} por código de cliente"""
+        n = len(self.clientes)
+        return {'ingresos': _sumar(self.cliente, self.ingresos, n),
+                'costo': _sumar(self.cliente, self.costo, n),
+                'lineas': _contar(self.cliente, n)}
+
+    def por_grupo(self) -> Dict[str, List]:
+        """{'ingresos', 'costo', 'facturas', 'clientes'} por código de grupo (clientes del catálogo)"""
+        n = len(self.grupos)
+        grupo_linea = _indexar(self.grupo_cliente, self.cliente)
+        return {'ingresos': _sumar(grupo_linea, self.ingresos, n),
+                'costo': _sumar(grupo_linea, self.costo, n),
+                'facturas': _contar(_indexar(self.grupo_cliente, self.factura_cliente), n),
+                'clientes': _contar(self.grupo_cliente, n)}
+
+    def periodos_con_ventas(self, tipo: str, desde: Optional[date] = None,
+                            limite: Optional[int] = None) -> List[str]:
+        """Etiquetas de los períodos con ventas desde la fecha dada, de la más reciente a la más antigua"""
+        dias = set(np.unique(_vista(self.fecha)).tolist()) if np is not None else set(self.fecha)
+        minimo = desde.toordinal() if desde else 0
+        etiquetas = {etiqueta_periodo(tipo, date.fromordinal(dia)) for dia in dias if dia >= minimo}
+        return sorted(etiquetas, reverse=True)[:limite]
+
+    def _codigos_periodo(self, fechas: array, tipo: str, periodos: List[str]):
+        """Posición en periodos del período de cada fecha; -1 fuera de ellos"""
+        posiciones = {str(p): i for i, p in enumerate(periodos)}
+        rangos = [rango_periodo(tipo, p) for p in posiciones]
+        inicio = min(r[0] for r in rangos).toordinal()
+        fin = max(r[1] for r in rangos).toordinal()
+        tabla = [posiciones.get(etiqueta_periodo(tipo, date.fromordinal(dia)), -1) for dia in range(inicio, fin)]
+
+        if np is not None:
+            desplazados = _vista(fechas).astype(np.int64) - inicio
+            dentro = (desplazados >= 0) & (desplazados < len(tabla))
+            codigos = np.full(len(desplazados), -1, dtype=np.int64)
+            codigos[dentro] = np.asarray(tabla, dtype=np.int64)[desplazados[dentro]]
+            return codigos
+        return [tabla[dia - inicio] if inicio <= dia < fin else -1 for dia in fechas]
+
+    def por_periodo(self, tipo: str, periodos: List[str]) -> Dict[str, List[float]]:
+        """{'ingresos', 'costo', 'compras'} por posición en periodos"""
+        n = len(periodos)
+        codigos = self._codigos_periodo(self.fecha, tipo, periodos)
+        return {'ingresos': _sumar(codigos, self.ingresos, n),
+                'costo': _sumar(codigos, self.costo, n),
+                'compras': _sumar(self._codigos_periodo(self.compra_fecha, tipo, periodos),
+                                  self.compra_importe, n)}
+
+    def por_periodo_y_producto(self, tipo: str, periodos: List[str]) -> List[List[float]]:
+        """Ingresos [período][código de producto]"""
+        n = len(self.productos)
+        claves = _combinar(self._codigos_periodo(self.fecha, tipo, periodos), self.producto, n)
+        return _matriz(_sumar(claves, self.ingresos, len(periodos) * n), n)
+
+    def por_periodo_y_grupo(self, tipo: str, periodos: List[str]) -> Dict[str, List[List]]:
+        """{'ingresos', 'clientes' (con compras en el período)} [período][código de grupo]"""
+        n = len(self.grupos)
+        claves = _combinar(self._codigos_periodo(self.fecha, tipo, periodos),
+                           _indexar(self.grupo_cliente, self.cliente), n)
+        claves_facturas = _combinar(self._codigos_periodo(self.factura_fecha, tipo, periodos),
+                                    _indexar(self.grupo_cliente, self.factura_cliente), n)
+        return {'ingresos': _matriz(_sumar(claves, self.ingresos, len(periodos) * n), n),
+                'clientes': _matriz(_contar_distintos(claves_facturas, self.factura_cliente,
+                                                      len(periodos) * n, len(self.clientes)), n)}
+
+
+def cargar_ventas_en_columnas() -> VentasEnColumnas:
+    """
+    Pone al día costo_venta y carga las columnas con una conexión del pool.
+    Pensada para correr en un hilo de trabajo.
+    """
+    with prestar_conexion() as conn:
+        actualizar_costos(conn)
+        with closing(conn.cursor()) as cursor:
+            return VentasEnColumnas.cargar(cursor)
@@ -0,0 +1,400 @@
+"""
+DISFRULEG - Costo de lo vendido (FIFO o promedio ponderado)
+
+La ganancia por producto restaba todas las compras del historial a todas las
+ventas, así que la existencia sin vender contaba como pérdida y el margen
+dependía de cuándo se surtía. Este módulo asigna a cada línea de factura el
+costo de las compras que realmente salieron con ella:
+
+    fifo      las compras más antiguas se venden primero
+    promedio  costo promedio ponderado de la existencia al momento de vender
+
+El resultado se guarda en costo_venta (una fila por línea de factura) y el
+estado de cada producto en costo_lote (lo que queda de cada compra),
+costo_compra (las compras ya aplicadas) y costo_producto. costo_control
+marca hasta qué compra y qué línea de factura se procesó, así que
+actualizar_costos solo lee lo nuevo desde entonces.
+
+Los eventos del mismo día se ordenan por su fecha_registro. Un producto se
+recalcula desde su primera compra cuando llega una compra registrada antes
+que su última venta costeada (por fecha y, el mismo día, por registro), una
+venta anterior, o cuando una compra o una venta suya se edita o se borra
+(invalidar_costos_producto). Cambiar de método recalcula todo:
+    python scripts/actualizar_costos.py [--metodo fifo|promedio] [--reconstruir]
+"""
+
+from collections import defaultdict, deque
+from contextlib import closing
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+METODOS = ('fifo', 'promedio')
+
+CENTAVOS = Decimal("0.01")
+# Precisión del costo restante de un lote (costo_lote.costo DECIMAL(14,4))
+_PRECISION_LOTE = Decimal("0.0001")
+
+# Líneas de factura y compras con id menor al último procesado que se vuelven
+# a revisar: una venta o compra confirmada después de otra con id mayor no se
+# pierde
+MARGEN_IDS = 1000
+
+# Filas por sentencia al guardar costo_venta
+LOTE_INSERCION = 1000
+
+Compra = Tuple  # (id_compra, fecha, cantidad, precio_unitario[, registro])
+Venta = Tuple   # (id_detalle, id_factura, fecha, cantidad[, registro])
+
+# Registro de los eventos que no lo traen: van primero dentro de su día
+_SIN_REGISTRO = datetime.min
+
+
+def _momento_compra(compra: Compra) -> Tuple:
+    """(fecha, registro) con que se ordena una compra"""
+    return compra[1], (compra[4] if len(compra) > 4 else None) or _SIN_REGISTRO
+
+
+def _momento_venta(venta: Venta) -> Tuple:
+    """(fecha, registro) con que se ordena una venta"""
+    return venta[2], (venta[4] if len(venta) > 4 else None) or _SIN_REGISTRO
+
+
+class Inventario:
+    """
+    Existencia valuada de un producto.
+
+    Cada lote es [id_compra, fecha, cantidad, costo] con el costo total de lo
+    que queda. Con 'promedio' hay a lo sumo un lote que acumula todas las
+    compras; con 'fifo' se consumen en orden de llegada.
+    """
+
+    def __init__(self, metodo: str = 'fifo', lotes: Iterable = (), ultimo_costo=None):
+        if metodo not in METODOS:
+            raise ValueError(f"Método de costeo desconocido: {metodo}")
+        self.metodo = metodo
+        self.lotes = deque([id_compra, fecha, Decimal(cantidad), Decimal(costo)]
+                           for id_compra, fecha, cantidad, costo in lotes)
+        self.ultimo_costo = None if ultimo_costo is None else Decimal(ultimo_costo)
+
+    @property
+    def existencia(self) -> Decimal:
+        return sum((lote[2] for lote in self.lotes), Decimal(0))
+
+    @property
+    def valor(self) -> Decimal:
+        return sum((lote[3] for lote in self.lotes), Decimal(0))
+
+    def comprar(self, id_compra, fecha, cantidad, precio_unitario):
+        cantidad, precio = Decimal(cantidad), Decimal(precio_unitario)
+        self.ultimo_costo = precio
+        if cantidad <= 0:
+            return
+        lote = [id_compra, fecha, cantidad, cantidad * precio]
+        if self.metodo == 'promedio' and self.lotes:
+            _, _, cantidad_previa, costo_previo = self.lotes.pop()
+            lote[2] += cantidad_previa
+            lote[3] += costo_previo
+        self.lotes.append(lote)
+
+    def vender(self, cantidad) -> Tuple[Decimal, Decimal]:
+        """
+        Saca la cantidad de la existencia.
+
+        Returns:
+            (costo, cantidad_sin_costo): lo que falte por existencia se costea
+            al último precio de compra (o en cero si nunca hubo compras)
+        """
+        pendiente = Decimal(cantidad)
+        costo = Decimal(0)
+        while pendiente > 0 and self.lotes:
+            lote = self.lotes[0]
+            if lote[2] <= pendiente:
+                pendiente -= lote[2]
+                costo += lote[3]
+                self.lotes.popleft()
+            else:
+                parte = (lote[3] * pendiente / lote[2]).quantize(_PRECISION_LOTE)
+                lote[2] -= pendiente
+                lote[3] -= parte
+                costo += parte
+                pendiente = Decimal(0)
+
+        sin_costo = max(pendiente, Decimal(0))
+        if sin_costo and self.ultimo_costo is not None:
+            costo += sin_costo * self.ultimo_costo
+        return costo.quantize(CENTAVOS), sin_costo
+
+
+def costear(inventario: Inventario, compras: Iterable[Compra], ventas: Iterable[Venta]) -> List[Tuple]:
+    """
+    Aplica compras y ventas en orden de fecha y, el mismo día, de registro
+    (a igual registro las compras antes que las ventas, cada grupo por id).
+
+    Returns:
+        List[Tuple]: (id_detalle, id_factura, fecha, cantidad, costo, cantidad_sin_costo) por venta
+    """
+    eventos = ([(_momento_compra(c), 0, c[0], c) for c in compras]
+               + [(_momento_venta(v), 1, v[0], v) for v in ventas])
+    eventos.sort(key=lambda evento: evento[:3])
+
+    resultados = []
+    for _, tipo, _, evento in eventos:
+        if tipo == 0:
+            inventario.comprar(*evento[:4])
+        else:
+            id_detalle, id_factura, fecha, cantidad = evento[:4]
+            costo, sin_costo = inventario.vender(cantidad)
+            resultados.append((id_detalle, id_factura, fecha, Decimal(cantidad), costo, sin_costo))
+    return resultados
+
+
+def requiere_recalculo(estado: Optional[Dict], compras: Iterable[Compra], ventas: Iterable[Venta]) -> bool:
+    """
+    True si las compras o ventas nuevas de un producto no pueden aplicarse
+    sobre su estado guardado: se ordenan antes de ventas ya costeadas. Una
+    compra del mismo día registrada después de la última venta se agrega.
+    """
+    if estado is None:
+        return False
+    if estado['recalcular']:
+        return True
+    if estado['ultima_venta'] is None:
+        return False
+    ultima_venta = (estado['ultima_venta'], estado.get('ultima_venta_registro') or _SIN_REGISTRO)
+    # A igual momento la compra se aplica antes que la venta ya costeada
+    return (any(_momento_compra(compra) <= ultima_venta for compra in compras)
+            or any(_momento_venta(venta) < ultima_venta for venta in ventas))
+
+
+# ==================== BASE DE DATOS ====================
+
+_COMPRAS_SQL = """
+    SELECT c.id_compra, c.id_producto, c.fecha_compra, c.cantidad_compra, c.precio_unitario_compra,
+           c.fecha_registro
+    FROM compra c
+    {union}
+    WHERE {filtro}
+"""
+
+_VENTAS_SQL = """
+    SELECT df.id_detalle, df.id_producto, df.id_factura, f.fecha_factura, df.cantidad_factura,
+           f.fecha_registro
+    FROM detalle_factura df
+    JOIN factura f ON df.id_factura = f.id_factura
+    {union}
+    WHERE {filtro}
+"""
+
+# Compras y líneas de factura desde el último id procesado menos MARGEN_IDS;
+# las ya aplicadas dentro del margen se descartan por costo_compra y costo_venta
+COMPRAS_SIN_COSTEAR_SQL = _COMPRAS_SQL.format(
+    union="LEFT JOIN costo_compra cc ON cc.id_compra = c.id_compra",
+    filtro="c.id_compra > %s AND cc.id_compra IS NULL")
+
+VENTAS_SIN_COSTEAR_SQL = _VENTAS_SQL.format(
+    union="LEFT JOIN costo_venta cv ON cv.id_detalle = df.id_detalle",
+    filtro="df.id_detalle > %s AND cv.id_detalle IS NULL")
+
+_INSERT_COSTO_VENTA = """
+    INSERT INTO costo_venta (id_detalle, id_factura, id_producto, fecha, cantidad, costo, cantidad_sin_costo)
+    VALUES {filas}
+    ON DUPLICATE KEY UPDATE
+        costo = VALUES(costo),
+        cantidad_sin_costo = VALUES(cantidad_sin_costo)
+"""
+
+
+def _bloquear_control(cursor) -> Tuple[str, int, int]:
+    """Toma la fila de costo_control (la crea si no existe); serializa las actualizaciones"""
+    cursor.execute("INSERT INTO costo_control (id) VALUES (1) ON DUPLICATE KEY UPDATE id = id")
+    cursor.execute("SELECT metodo, ultimo_id_detalle, ultimo_id_compra FROM costo_control WHERE id = 1 FOR UPDATE")
+    metodo, ultimo_id_detalle, ultimo_id_compra = cursor.fetchone()
+    return metodo, int(ultimo_id_detalle), int(ultimo_id_compra)
+
+
+def _leer_estados(cursor) -> Dict[int, Dict]:
+    """
+    Estado de todos los productos, con bloqueo: una compra editada mientras
+    tanto espera a que termine esta actualización para marcar su producto.
+    """
+    cursor.execute("""
+        SELECT id_producto, ultima_venta, ultima_venta_registro, ultimo_costo_unitario, recalcular
+        FROM costo_producto
+        FOR UPDATE
+    """)
+    return {id_producto: {'ultima_venta': ultima_venta, 'ultima_venta_registro': registro,
+                          'ultimo_costo': ultimo_costo, 'recalcular': bool(recalcular)}
+            for id_producto, ultima_venta, registro, ultimo_costo, recalcular in cursor.fetchall()}
+
+
+def _agrupar_compras(filas) -> Dict[int, List[Compra]]:
+    por_producto = defaultdict(list)
+    for id_compra, id_producto, fecha, cantidad, precio, registro in filas:
+        por_producto[id_producto].append((id_compra, fecha, cantidad, precio, registro))
+    return por_producto
+
+
+def _agrupar_ventas(filas) -> Dict[int, List[Venta]]:
+    por_producto = defaultdict(list)
+    for id_detalle, id_producto, id_factura, fecha, cantidad, registro in filas:
+        por_producto[id_producto].append((id_detalle, id_factura, fecha, cantidad, registro))
+    return por_producto
+
+
+def _historial_producto(cursor, id_producto) -> Tuple[List[Compra], List[Venta]]:
+    """Todas las compras y ventas de un producto (idx_compra_producto, idx_detalle_producto)"""
+    cursor.execute(_COMPRAS_SQL.format(union="", filtro="c.id_producto = %s"), (id_producto,))
+    compras = _agrupar_compras(cursor.fetchall())[id_producto]
+    cursor.execute(_VENTAS_SQL.format(union="", filtro="df.id_producto = %s"), (id_producto,))
+    ventas = _agrupar_ventas(cursor.fetchall())[id_producto]
+    return compras, ventas
+
+
+def _leer_lotes(cursor, ids_productos) -> Dict[int, List]:
+    por_producto = defaultdict(list)
+    ids = sorted(ids_productos)
+    if ids:
+        cursor.execute(f"""
+            SELECT id_producto, id_compra, fecha_compra, cantidad, costo
+            FROM costo_lote
+            WHERE id_producto IN ({', '.join(['%s'] * len(ids))})
+            ORDER BY id_producto, fecha_compra, id_compra
+        """, ids)
+        for id_producto, id_compra, fecha, cantidad, costo in cursor.fetchall():
+            por_producto[id_producto].append((id_compra, fecha, cantidad, costo))
+    return por_producto
+
+
+def _guardar_costos(cursor, id_producto, resultados):
+    for inicio in range(0, len(resultados), LOTE_INSERCION):
+        parte = resultados[inicio:inicio + LOTE_INSERCION]
+        cursor.execute(
+            _INSERT_COSTO_VENTA.format(filas=", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(parte))),
+            [valor for id_detalle, id_factura, fecha, cantidad, costo, sin_costo in parte
+             for valor in (id_detalle, id_factura, id_producto, fecha, cantidad, costo, sin_costo)])
+
+
+def _guardar_compras(cursor, id_producto, compras, reemplazar):
+    """Registra en costo_compra las compras aplicadas (todas las del producto si se recalculó)"""
+    if reemplazar:
+        cursor.execute("DELETE FROM costo_compra WHERE id_producto = %s", (id_producto,))
+    for inicio in range(0, len(compras), LOTE_INSERCION):
+        parte = compras[inicio:inicio + LOTE_INSERCION]
+        cursor.execute(
+            "INSERT INTO costo_compra (id_compra, id_producto) VALUES " + ", ".join(["(%s, %s)"] * len(parte)),
+            [valor for compra in parte for valor in (compra[0], id_producto)])
+
+
+def _guardar_estado(cursor, id_producto, inventario: Inventario, ultima_venta: Optional[Tuple]):
+    """ultima_venta: (fecha, registro) de la última venta costeada, o None"""
+    fecha, registro = ultima_venta or (None, None)
+    cursor.execute("DELETE FROM costo_lote WHERE id_producto = %s", (id_producto,))
+    if inventario.lotes:
+        cursor.execute(
+            "INSERT INTO costo_lote (id_compra, id_producto, fecha_compra, cantidad, costo) VALUES "
+            + ", ".join(["(%s, %s, %s, %s, %s)"] * len(inventario.lotes)),
+            [valor for id_compra, fecha, cantidad, costo in inventario.lotes
+             for valor in (id_compra, id_producto, fecha, cantidad, costo)])
+    cursor.execute("""
+        INSERT INTO costo_producto (id_producto, ultima_venta, ultima_venta_registro,
+                                    ultimo_costo_unitario, recalcular)
+        VALUES (%s, %s, %s, %s, FALSE)
+        ON DUPLICATE KEY UPDATE
+            ultima_venta = VALUES(ultima_venta),
+            ultima_venta_registro = VALUES(ultima_venta_registro),
+            ultimo_costo_unitario = VALUES(ultimo_costo_unitario),
+            recalcular = FALSE
+    """, (id_producto, fecha, None if registro == _SIN_REGISTRO else registro, inventario.ultimo_costo))
+
+
+def actualizar_costos(conn, metodo: Optional[str] = None, reconstruir: bool = False) -> Dict[str, int]:
+    """
+    Costea las compras y líneas de factura registradas desde la última
+    actualización, en una transacción.
+
+    Args:
+        conn: Conexión (sin autocommit)
+        metodo: 'fifo' o 'promedio'; None conserva el guardado en costo_control.
+            Si cambia, se recalcula todo.
+        reconstruir: Recalcular todos los productos desde el inicio
+
+    Returns:
+        Dict[str, int]: {'lineas': líneas costeadas, 'productos': productos
+        tocados, 'recalculados': productos recalculados desde el inicio}
+    """
+    if metodo is not None and metodo not in METODOS:
+        raise ValueError(f"Método de costeo desconocido: {metodo}")
+
+    with closing(conn.cursor()) as cursor:
+        metodo_guardado, ultimo_id_detalle, ultimo_id_compra = _bloquear_control(cursor)
+        metodo = metodo or metodo_guardado
+        reconstruir = reconstruir or metodo != metodo_guardado
+        estados = _leer_estados(cursor)
+
+        if reconstruir:
+            cursor.execute("SELECT id_producto FROM producto")
+            productos = {fila[0] for fila in cursor.fetchall()}
+            compras_nuevas, ventas_nuevas = {}, {}
+        else:
+            cursor.execute(COMPRAS_SIN_COSTEAR_SQL, (max(ultimo_id_compra - MARGEN_IDS, 0),))
+            compras_nuevas = _agrupar_compras(cursor.fetchall())
+            cursor.execute(VENTAS_SIN_COSTEAR_SQL, (max(ultimo_id_detalle - MARGEN_IDS, 0),))
+            ventas_nuevas = _agrupar_ventas(cursor.fetchall())
+            productos = (set(compras_nuevas) | set(ventas_nuevas)
+                         | {id_producto for id_producto, estado in estados.items() if estado['recalcular']})
+
+        recalcular = {id_producto for id_producto in productos
+                      if reconstruir or requiere_recalculo(estados.get(id_producto),
+                                                           compras_nuevas.get(id_producto, ()),
+                                                           ventas_nuevas.get(id_producto, ()))}
+        lotes = _leer_lotes(cursor, productos - recalcular)
+
+        # Todo lo leído es de la misma vista de la base: lo que se confirme
+        # después queda para la próxima actualización
+        cursor.execute("SELECT COALESCE(MAX(id_compra), 0) FROM compra")
+        hasta_id_compra = cursor.fetchone()[0]
+        hasta_id_detalle = 0 if reconstruir else ultimo_id_detalle
+
+        lineas = 0
+        for id_producto in sorted(productos):
+            if id_producto in recalcular:
+                cursor.execute("DELETE FROM costo_venta WHERE id_producto = %s", (id_producto,))
+                compras, ventas = _historial_producto(cursor, id_producto)
+                inventario, ultima_venta = Inventario(metodo), None
+            else:
+                compras = compras_nuevas.get(id_producto, [])
+                ventas = ventas_nuevas.get(id_producto, [])
+                estado = estados.get(id_producto) or {'ultima_venta': None, 'ultimo_costo': None}
+                inventario = Inventario(metodo, lotes[id_producto], estado['ultimo_costo'])
+                ultima_venta = None
+                if estado['ultima_venta'] is not None:
+                    ultima_venta = (estado['ultima_venta'], estado['ultima_venta_registro'] or _SIN_REGISTRO)
+
+            resultados = costear(inventario, compras, ventas)
+            _guardar_costos(cursor, id_producto, resultados)
+            _guardar_compras(cursor, id_producto, compras, id_producto in recalcular)
+            momentos = [_momento_venta(venta) for venta in ventas]
+            if ultima_venta is not None:
+                momentos.append(ultima_venta)
+            _guardar_estado(cursor, id_producto, inventario, max(momentos, default=None))
+            lineas += len(resultados)
+            hasta_id_detalle = max([hasta_id_detalle] + [resultado[0] for resultado in resultados])
+
+        cursor.execute("""
+            UPDATE costo_control
+            SET metodo = %s, ultimo_id_detalle = %s, ultimo_id_compra = %s, fecha_actualizacion = NOW()
+            WHERE id = 1
+        """, (metodo, hasta_id_detalle, hasta_id_compra))
+        conn.commit()
+
+    return {'lineas': lineas, 'productos': len(productos), 'recalculados': len(recalcular)}
+
+
+def invalidar_costos_producto(cursor, id_producto: int):
+    """
+    Marca el producto para recalcularlo desde su primera compra en la
+    próxima actualización (tras editar o borrar una compra o una venta suya).
+    No hace commit: debe ejecutarse dentro de la transacción del llamador.
+    """
+    cursor.execute("UPDATE costo_producto SET recalcular = TRUE WHERE id_producto = %s", (id_producto,))
@@ -0,0 +1,70 @@
+"""
+Períodos de las gráficas temporales y de la tabla del análisis de ganancias.
+
+Las etiquetas de período son las mismas que producía DATE_FORMAT
+('2024-05-03', '2024-W18', '2024-05', '2024-Q2', '2024'). Cada etiqueta se
+traduce a un rango de fechas [inicio, fin) para filtrar por índice o para
+ubicar las fechas de las columnas de ventas (columnas_ventas.py).
+"""
+
+from datetime import date, timedelta
+
+TIPOS_PERIODO = ("Día", "Semana", "Mes", "Trimestre", "Año")
+
+# Períodos que ofrece la tabla de ganancias por producto
+PERIODOS_ANALISIS = ("Todo el historial", "Este mes", "Mes anterior", "Este año", "Año anterior")
+
+def _inicio_de_mes(anio, mes):
+    """Primer día del mes, admitiendo meses fuera de 1-12"""
+    anio += (mes - 1) // 12
+    return date(anio, (mes - 1) % 12 + 1, 1)
+
+
+def etiqueta_periodo(tipo, fecha):
+    """Retorna la etiqueta del período de tipo dado que contiene la fecha"""
+    if tipo == "Día":
+        return fecha.strftime("%Y-%m-%d")
+    if tipo == "Semana":
+        anio, semana, _ = fecha.isocalendar()
+        return f"{anio}-W{semana:02d}"
+    if tipo == "Trimestre":
+        return f"{fecha.year}-Q{(fecha.month - 1) // 3 + 1}"
+    if tipo == "Año":
+        return str(fecha.year)
+    return fecha.strftime("%Y-%m")
+
+
+def rango_periodo(tipo, etiqueta):
+    """Retorna (inicio, fin) del período; fin es el primer día del siguiente"""
+    etiqueta = str(etiqueta)
+    if tipo == "Día":
+        inicio = date.fromisoformat(etiqueta)
+        return inicio, inicio + timedelta(days=1)
+    if tipo == "Semana":
+        anio, semana = etiqueta.split("-W")
+        inicio = date.fromisocalendar(int(anio), int(semana), 1)
+        return inicio, inicio + timedelta(days=7)
+    if tipo == "Trimestre":
+        anio, trimestre = etiqueta.split("-Q")
+        mes = (int(trimestre) - 1) * 3 + 1
+        return _inicio_de_mes(int(anio), mes), _inicio_de_mes(int(anio), mes + 3)
+    if tipo == "Año":
+        return date(int(etiqueta), 1, 1), date(int(etiqueta) + 1, 1, 1)
+    anio, mes = etiqueta.split("-")
+    return _inicio_de_mes(int(anio), int(mes)), _inicio_de_mes(int(anio), int(mes) + 1)
+
+
+def rango_analisis(opcion, hoy=None):
+    """Retorna (inicio, fin) de una opción de PERIODOS_ANALISIS; (None, None) para todo el historial"""
+    hoy = hoy or date.today()
+    if opcion == "Este mes":
+        return rango_periodo("Mes", etiqueta_periodo("Mes", hoy))
+    if opcion == "Mes anterior":
+        inicio = _inicio_de_mes(hoy.year, hoy.month - 1)
+        return inicio, _inicio_de_mes(hoy.year, hoy.month)
+    if opcion == "Este año":
+        return rango_periodo("Año", hoy.year)
+    if opcion == "Año anterior":
+        return rango_periodo("Año", hoy.year - 1)
+    return None, None
+
@@ -3,6 +3,13 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 import mysql.connector
 from src.database.conexion import conectar
+from src.database.cache_referencia import obtener_cache_referencia
+from src.database.consultas_async import EjecutorConsultas, consultar_filas, cursor_de_espera
+from src.modules.receipts.components.database import recalcular_ventas_diarias_fechas
+from src.modules.analytics.costo_ventas import invalidar_costos_producto
+from src.ui.filas_treeview import FilasTreeview
+from src.ui.buscador_registros import BuscadorRegistros, patron_prefijo
+from src.utils.indice_busqueda import normalizar_texto
 from tkinter import simpledialog
 import re
 
@@ -19,6 +26,7 @@ class ClientManagerApp:
         # Inicializar las listas antes de cargar los datos
         self.groups = []
         self.client_types = []
+        self.all_clients = []
         
         # Load groups and client types
         self.load_groups()
@@ -29,23 +37,35 @@ class ClientManagerApp:
         self.search_var.trace("w", self.filter_clients)
         
         self.create_interface()
+        self.client_rows = FilasTreeview(self.client_tree,
+                                         clave=lambda client: client["id_cliente"],
+                                         valores=self.client_values,
+                                         etiquetas=lambda client: (str(client.get('id_grupo', '')),))
+        
+        # Background queries so the window does not freeze on slow round trips
+        self.consultas = EjecutorConsultas(self.root, indicador=cursor_de_espera(self.root))
+        # Search waits for the user to stop typing; large client lists are searched in SQL
+        self.buscador = BuscadorRegistros(self.root,
+                                          ("nombre_cliente", "telefono", "correo", "clave_grupo", "nombre_tipo"),
+                                          al_mostrar=self.show_filtered_clients,
+                                          consultar=self.search_clients_sql,
+                                          ejecutor=self.consultas, clave_consulta="busqueda_clientes",
+                                          al_fallar=self.show_load_error)
         self.load_clients()
         
     def load_groups(self):
-        """Load groups from database with their associated client types"""
-        self.cursor.execute("""
-            SELECT g.id_grupo, g.clave_grupo, g.descripcion, g.id_tipo_cliente,
-                   tc.nombre_tipo, tc.descuento
-            FROM grupo g
-            LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
-            ORDER BY g.clave_grupo
-        """)
-        self.groups = self.cursor.fetchall()
+        """Load groups with their associated client types from the local reference cache"""
+        types = {t['id_tipo_cliente']: t for t in obtener_cache_referencia().filas('tipo_cliente')}
+        self.groups = obtener_cache_referencia().filas('grupo')
+        for group in self.groups:
+            # Same columns as the former LEFT JOIN with tipo_cliente
+            client_type = types.get(group['id_tipo_cliente'], {})
+            group['nombre_tipo'] = client_type.get('nombre_tipo')
+            group['descuento'] = client_type.get('descuento')
         
     def load_client_types(self):
-        """Load client types from database"""
-        self.cursor.execute("SELECT id_tipo_cliente, nombre_tipo, descuento FROM tipo_cliente ORDER BY nombre_tipo")
-        self.client_types = self.cursor.fetchall()
+        """Load client types from the local reference cache"""
+        self.client_types = obtener_cache_referencia().filas('tipo_cliente')
         
     def create_interface(self):
         """Create the user interface"""
@@ -134,78 +154,78 @@ class ClientManagerApp:
                  bg="#009688", fg="white", padx=10, pady=3).pack(side="left", padx=5)
         
     def load_clients(self):
-        """Load clients from database"""
-        # Clear existing items
-        for item in self.client_tree.get_children():
-            self.client_tree.delete(item)
-            
+        """Load clients from database in the background"""
+        self.status_var.set("Cargando clientes...")
         # Get clients with group and client type info using the new schema
-        self.cursor.execute("""
+        self.consultas.consultar("""
             SELECT c.id_cliente, c.nombre_cliente, c.telefono, c.correo, 
                    g.clave_grupo, tc.nombre_tipo, tc.descuento, c.id_grupo
             FROM cliente c
             JOIN grupo g ON c.id_grupo = g.id_grupo
             JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
             ORDER BY c.nombre_cliente
-        """)
-        
-        clients = self.cursor.fetchall()
-        
-        # Store all clients for reference and filtering
+            LIMIT %s
+        """, (self.buscador.limite,), clave="clientes", al_terminar=self.show_clients, al_fallar=self.show_load_error)
+    
+    def show_load_error(self, error):
+        """Report a failed background load"""
+        self.status_var.set("Error al cargar clientes")
+        messagebox.showerror("Error", f"Error al cargar clientes: {error}")
+    
+    def show_clients(self, clients):
+        """Fill the client list with the rows loaded in the background"""
+        # Store the loaded clients for reference; the search service filters them
         self.all_clients = clients
-        
-         # Insert clients into treeview
-        for client in clients:
-            telefono = client.get('telefono', '') or '---'
-            correo = client.get('correo', '') or '---'
-            grupo = client.get('clave_grupo', '') or '---'
-            tipo_cliente = client.get('nombre_tipo', '') or '---'
-            descuento = client.get('descuento', '') or '---'
-            
-            self.client_tree.insert("", "end", 
-                                  values=(client["id_cliente"], 
-                                         client["nombre_cliente"], 
-                                         telefono,
-                                         correo,
-                                         grupo,
-                                         tipo_cliente,
-                                         descuento),
-                                  tags=(str(client.get('id_grupo', '')),))
-            
-        self.status_var.set(f"Mostrando {len(clients)} clientes")
+        self.buscador.cargar(clients)
+        if self.buscador.en_memoria:
+            self.status_var.set(f"{len(clients)} clientes")
+        else:
+            self.status_var.set(f"Mostrando los primeros {self.buscador.umbral} clientes; escriba para buscar")
+    
+    def search_clients_sql(self, text, limit):
+        """Runs on a worker thread: clients whose name, phone or email start with text"""
+        pattern = patron_prefijo(text)
+        # Groups and types are few and already loaded: match them here by substring
+        folded = normalizar_texto(text)
+        group_ids = [group['id_grupo'] for group in self.groups
+                     if folded in normalizar_texto(group['clave_grupo'])
+                     or folded in normalizar_texto(group.get('nombre_tipo') or '')]
+        
+        # Every condition is on an indexed column of cliente, so MySQL can merge the index ranges
+        query = """
+            SELECT c.id_cliente, c.nombre_cliente, c.telefono, c.correo, 
+                   g.clave_grupo, tc.nombre_tipo, tc.descuento, c.id_grupo
+            FROM cliente c
+            JOIN grupo g ON c.id_grupo = g.id_grupo
+            JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+            WHERE c.nombre_cliente LIKE %s OR c.telefono LIKE %s OR c.correo LIKE %s
+        """
+        params = [pattern, pattern, pattern]
+        if group_ids:
+            query += f" OR c.id_grupo IN ({', '.join(['%s'] * len(group_ids))})"
+            params.extend(group_ids)
+        query += " ORDER BY c.nombre_cliente LIMIT %s"
+        params.append(limit)
+        return consultar_filas(query, params)
+    
+    def client_values(self, client):
+        """Values shown in the client list for one client"""
+        return (client["id_cliente"],
+                client["nombre_cliente"],
+                client.get('telefono', '') or '---',
+                client.get('correo', '') or '---',
+                client.get('clave_grupo', '') or '---',
+                client.get('nombre_tipo', '') or '---',
+                client.get('descuento', '') or '---')
     
     def filter_clients(self, *args):
-        """Filter clients based on search text"""
-        search_text = self.search_var.get().lower()
-        
-        # Clear existing items
-        for item in self.client_tree.get_children():
-            self.client_tree.delete(item)
-        
-        # Filter clients
-        for client in self.all_clients:
-            # Search in name, phone, email, group and client type
-            if (search_text in client["nombre_cliente"].lower() or 
-                (client.get('telefono') and search_text in client.get('telefono').lower()) or
-                (client.get('correo') and search_text in client.get('correo', '').lower()) or
-                (client.get('clave_grupo') and search_text in client.get('clave_grupo', '').lower()) or
-                (client.get('nombre_tipo') and search_text in client.get('nombre_tipo', '').lower())):
-                
-                telefono = client.get('telefono', '') or '---'
-                correo = client.get('correo', '') or '---'
-                grupo = client.get('clave_grupo', '') or '---'
-                tipo_cliente = client.get('nombre_tipo', '') or '---'
-                descuento = client.get('descuento', '') or '---'
-                
-                self.client_tree.insert("", "end", 
-                                      values=(client["id_cliente"], 
-                                             client["nombre_cliente"], 
-                                             telefono,
-                                             correo,
-                                             grupo,
-                                             tipo_cliente,
-                                             descuento),
-                                      tags=(str(client.get('id_grupo', '')),))
+        """Search name, phone, email, group and client type once the user stops typing"""
+        self.buscador.buscar(self.search_var.get())
+    
+    def show_filtered_clients(self, clients):
+        """Show the clients that match the search"""
+        # Only the rows that changed are touched; selection and scroll are kept
+        self.client_rows.actualizar(clients)
     
     def validate_email(self, email):
         """Validate email format"""
@@ -583,6 +603,18 @@ class ClientManagerApp:
         try:
             # Start transaction
             self.conn.autocommit = False
+
+            # Dates whose daily sales summary must be recalculated afterwards
+            self.cursor.execute("SELECT DISTINCT fecha_factura FROM factura WHERE id_cliente = %s", (client_id,))
+            fechas = [row['fecha_factura'] for row in self.cursor.fetchall()]
+
+            # Products whose sale costs must be recalculated from their first purchase
+            self.cursor.execute("""
+                SELECT DISTINCT df.id_producto FROM detalle_factura df
+                JOIN factura f ON df.id_factura = f.id_factura
+                WHERE f.id_cliente = %s
+            """, (client_id,))
+            productos = [row['id_producto'] for row in self.cursor.fetchall()]
             
             # First delete invoice details for all client invoices
             self.cursor.execute("""
@@ -617,6 +649,13 @@ class ClientManagerApp:
             # Finally delete client
             self.cursor.execute("DELETE FROM cliente WHERE id_cliente = %s", (client_id,))
 
+            # Remove the deleted invoices from ventas_diarias
+            recalcular_ventas_diarias_fechas(self.cursor, fechas)
+
+            # Their cost lines went with the invoices; the consumed lots must be restored
+            for id_producto in productos:
+                invalidar_costos_producto(self.cursor, id_producto)
+
             # Commit changes
             self.conn.commit()
             self.conn.autocommit = True
@@ -799,6 +838,7 @@ class ClientManagerApp:
                 VALUES (%s, %s, %s)
             """, (group_name, description, selected_type_id))
             self.conn.commit()
+            obtener_cache_referencia().invalidar()
             
             # Reload groups
             self.load_groups()
@@ -891,6 +931,7 @@ class ClientManagerApp:
                 WHERE id_grupo = %s
             """, (new_name, new_description, selected_type_id, selected_group['id_grupo']))
             self.conn.commit()
+            obtener_cache_referencia().invalidar()
             
             # Reload groups
             self.load_groups()
@@ -940,6 +981,7 @@ class ClientManagerApp:
             # Delete group
             self.cursor.execute("DELETE FROM grupo WHERE id_grupo = %s", (selected_group['id_grupo'],))
             self.conn.commit()
+            obtener_cache_referencia().invalidar()
             
             # Reload groups
             self.load_groups()
@@ -973,6 +1015,7 @@ class ClientManagerApp:
             self.cursor.execute("INSERT INTO tipo_cliente (nombre_tipo, descuento) VALUES (%s, %s)", 
                              (type_name, discount))
             self.conn.commit()
+            obtener_cache_referencia().invalidar()
             
             # Reload types
             self.load_client_types()
@@ -1021,6 +1064,7 @@ class ClientManagerApp:
                 WHERE id_tipo_cliente = %s
             """, (new_name, new_discount, selected_type['id_tipo_cliente']))
             self.conn.commit()
+            obtener_cache_referencia().invalidar()
             
             # Reload types
             self.load_client_types()
@@ -1069,6 +1113,7 @@ class ClientManagerApp:
             # Delete type
             self.cursor.execute("DELETE FROM tipo_cliente WHERE id_tipo_cliente = %s", (selected_type['id_tipo_cliente'],))
             self.conn.commit()
+            obtener_cache_referencia().invalidar()
             
             # Reload types
             self.load_client_types()
@@ -1086,6 +1131,8 @@ class ClientManagerApp:
 
     def on_closing(self):
         """Clean up and close connection when closing the app"""
+        self.buscador.cerrar()
+        self.consultas.cerrar()
         try:
             self.conn.close()
         except:
@@ -4,33 +4,91 @@ Gestor de deudas independiente que utiliza las vistas SQL existentes
 para el control y seguimiento de cuentas por cobrar.
 """
 
+import threading
 import mysql.connector
 from mysql.connector import Error
 from datetime import datetime, date
 from decimal import Decimal
 from typing import List, Dict, Optional, Tuple
-from src.database.conexion import conectar
+from src.database.pool import obtener_pool
+from src.database.paginacion import TAMANO_PAGINA, Llave, Pagina, condicion_despues, cortar_pagina
+from src.modules.deudas.saldos_clientes import actualizar_saldos_clientes, bloquear_saldos_clientes
 from src.config import debug_print
 
+# Saldo que se considera centavos de redondeo: la deuda queda pagada
+MARGEN_PAGADO = Decimal("0.01")
+
+# Abono atómico: suma sobre el valor actual y solo si la deuda sigue pendiente
+# y su saldo alcanza. MySQL asigna de izquierda a derecha, así que pagado ve
+# el monto_pagado nuevo y fecha_pago ve el pagado nuevo. metodo_pago y
+# referencia_pago quedan con los del último pago; cada pago va a la tabla pago.
+_ABONAR_DEUDA = """
+UPDATE deuda 
+SET 
+    monto_pagado = monto_pagado + %s,
+    pagado = (monto - monto_pagado <= %s),
+    fecha_pago = IF(pagado, %s, fecha_pago),
+    metodo_pago = %s,
+    referencia_pago = %s
+WHERE id_deuda = %s AND pagado = FALSE AND monto - monto_pagado >= %s
+"""
+
+# Una fila del registro de pagos; el operador se guarda por id
+_FILA_PAGO = "(%s, %s, %s, %s, %s, (SELECT id_usuario FROM usuarios_sistema WHERE username = %s), %s)"
+
+# Columnas de vista_historial_pagos que leen las consultas del historial
+_COLUMNAS_HISTORIAL = """
+                id_pago,
+                id_deuda,
+                id_cliente,
+                nombre_cliente,
+                id_factura,
+                folio_numero,
+                monto_total,
+                monto_pagado,
+                fecha_pago,
+                metodo_pago,
+                referencia_pago,
+                registrado_por,
+                clave_grupo,
+                tipo_cliente"""
+
 class DebtManager:
     """
     Gestor centralizado para el manejo de deudas y cuentas por cobrar.
     
-    Utiliza las vistas SQL existentes:
-    - vista_estado_cuenta_cliente: Para obtener resumen de deudas por cliente
+    Utiliza las vistas SQL existentes y las tablas de resumen:
+    - saldo_cliente: Resumen de deudas por cliente (ver saldos_clientes.py)
     - vista_deudas_detalladas: Para detalles específicos de cada deuda
-    - vista_historial_pagos: Para historial de pagos realizados
+    - pago / vista_historial_pagos: Un registro por pago realizado
     """
     
     def __init__(self):
-        self.connection = None
-        self.cursor = None
+        # La instancia es compartida: cada hilo (la ventana y las consultas en
+        # segundo plano) guarda su propia conexión y cursor
+        self._local = threading.local()
+    
+    @property
+    def connection(self):
+        return getattr(self._local, 'connection', None)
+    
+    @connection.setter
+    def connection(self, valor):
+        self._local.connection = valor
+    
+    @property
+    def cursor(self):
+        return getattr(self._local, 'cursor', None)
+    
+    @cursor.setter
+    def cursor(self, valor):
+        self._local.cursor = valor
     
     def _get_connection(self):
-        """Obtiene conexión a la base de datos"""
+        """Presta una conexión del pool compartido para la operación en curso"""
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connection = conectar()
+            if not self.connection:
+                self.connection = obtener_pool().obtener()
                 self.cursor = self.connection.cursor(dictionary=True)
             return self.connection
         except Error as e:
@@ -38,41 +96,47 @@ class DebtManager:
             raise
     
     def _close_connection(self):
-        """Cierra la conexión si está activa"""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-        self.connection = None
-        self.cursor = None
+        """Devuelve la conexión al pool (sin cerrarla físicamente)"""
+        try:
+            if self.cursor:
+                self.cursor.close()
+            if self.connection:
+                self.connection.close()
+        finally:
+            self.connection = None
+            self.cursor = None
     
     def obtener_clientes_con_deudas(self) -> List[Dict]:
         """
         Obtiene todos los clientes que tienen deudas pendientes.
         
         Returns:
-            List[Dict]: Lista de clientes con saldo pendiente > 0
+            List[Dict]: Lista de clientes con saldo pendiente > 0, leída de
+            saldo_cliente por el rango de idx_saldo_cliente_pendiente
         """
         try:
             self._get_connection()
             
             query = """
             SELECT 
-                id_cliente,
-                nombre_cliente,
-                clave_grupo,
-                tipo_cliente,
-                saldo_pendiente,
-                total_deuda_pendiente,
-                total_deuda_pagada,
-                deudas_pendientes,
-                deudas_pagadas,
-                ultima_deuda_generada,
-                ultimo_pago,
-                estado_cuenta
-            FROM vista_estado_cuenta_cliente 
-            WHERE saldo_pendiente > 0
-            ORDER BY saldo_pendiente DESC
+                s.id_cliente,
+                c.nombre_cliente,
+                g.clave_grupo,
+                tc.nombre_tipo AS tipo_cliente,
+                s.saldo_pendiente,
+                s.total_deuda_pendiente,
+                s.total_deuda_pagada,
+                s.deudas_pendientes,
+                s.deudas_pagadas,
+                s.ultima_deuda_generada,
+                s.ultimo_pago,
+                'Con deuda' AS estado_cuenta
+            FROM saldo_cliente s
+            JOIN cliente c ON s.id_cliente = c.id_cliente
+            LEFT JOIN grupo g ON c.id_grupo = g.id_grupo
+            LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+            WHERE s.saldo_pendiente > 0
+            ORDER BY s.saldo_pendiente DESC
             """
             
             self.cursor.execute(query)
@@ -195,71 +259,90 @@ class DebtManager:
             
         Returns:
             bool: True si el pago se registró correctamente
+            
+        Raises:
+            ValueError: Si la deuda no existe, ya está pagada o el monto excede su saldo
+        """
+        self.registrar_pagos([(id_deuda, monto_pago, metodo_pago, referencia_pago)], usuario)
+        return True
+    
+    def registrar_pagos(self, pagos: List[Tuple[int, Decimal, str, Optional[str]]],
+                        usuario: str = None) -> int:
         """
+        Registra varios pagos en una sola transacción (por ejemplo, el corte de
+        caja del día): se aplican todos o ninguno.
+        
+        Cada abono es un UPDATE condicional que suma sobre el valor actual y
+        solo se aplica si la deuda sigue pendiente y su saldo alcanza; si no
+        afecta la fila, el pago se rechaza. Así dos cajeros que cobran la misma
+        deuda no pisan el pago del otro ni la dejan pagada de más. Los pagos
+        aceptados se agregan a la tabla pago en un solo INSERT.
+        
+        Args:
+            pagos: Lista de (id_deuda, monto, metodo_pago, referencia_pago); una
+                   deuda puede recibir varios pagos en el mismo lote
+            usuario (str, optional): Usuario que registra los pagos
+            
+        Returns:
+            int: Pagos registrados
+            
+        Raises:
+            ValueError: Con todos los pagos rechazados; en ese caso no se registra ninguno
+        """
+        pagos = [(int(id_deuda), Decimal(str(monto)), metodo, referencia)
+                 for id_deuda, monto, metodo, referencia in pagos]
+        if not pagos:
+            return 0
+        for id_deuda, monto, _, _ in pagos:
+            if monto <= 0:
+                raise ValueError(f"El monto del pago a la deuda {id_deuda} debe ser mayor a 0")
+        
         try:
             self._get_connection()
-
-            query_deuda = "SELECT * FROM vista_deudas_detalladas WHERE id_deuda = %s"
-            debug_print(f"DEBUG: About to execute SELECT query. Cursor is: {self.cursor}")
-            debug_print(f"DEBUG: Connection is: {self.connection}")
-            self.cursor.execute(query_deuda, (id_deuda,))
-            deuda_actual = self.cursor.fetchone()
-            if not deuda_actual:
-                raise ValueError(f"Deuda {id_deuda} no encontrada")
-            
-            # Validar que el monto no exceda el saldo pendiente
-            saldo_pendiente = deuda_actual['saldo_pendiente']
-            if monto_pago > saldo_pendiente:
-                raise ValueError(f"El monto del pago ({monto_pago}) excede el saldo pendiente ({saldo_pendiente})")
-            
-            # Calcular nuevo monto pagado
-            nuevo_monto_pagado = Decimal(str(deuda_actual['monto_pagado'])) + monto_pago
-            nuevo_saldo = Decimal(str(deuda_actual['monto_total'])) - nuevo_monto_pagado
-            
-            # Determinar si la deuda queda completamente pagada
-            pagado_completo = nuevo_saldo <= 0.01  # Considerar margen de error de centavos
-            
-            # Preparar descripción del pago
-            descripcion = f"Pago registrado: {monto_pago} via {metodo_pago}"
-            if referencia_pago:
-                descripcion += f" - Ref: {referencia_pago}"
-            if usuario:
-                descripcion += f" - Operador: {usuario}"
-            descripcion += f" - Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            
-            # Actualizar la deuda
-            update_query = """
-            UPDATE deuda 
-            SET 
-                monto_pagado = %s,
-                pagado = %s,
-                fecha_pago = %s,
-                metodo_pago = %s,
-                referencia_pago = %s,
-                descripcion = CONCAT(IFNULL(descripcion, ''), '\n', %s)
-            WHERE id_deuda = %s
-            """
             
-            fecha_pago = date.today() if pagado_completo else deuda_actual.get('fecha_pago')
-
-            debug_print(f"DEBUG: About to execute UPDATE query. Cursor is: {self.cursor}")
-            debug_print(f"DEBUG: Connection is: {self.connection}")
-            self.cursor.execute(update_query, (
-                nuevo_monto_pagado,
-                pagado_completo,
-                fecha_pago,
-                metodo_pago,
-                referencia_pago,
-                descripcion,
-                id_deuda
-            ))
+            # Solo el cliente de cada deuda (por llave primaria), para bloquear su saldo
+            ids_deudas = sorted({pago[0] for pago in pagos})
+            marcadores = ", ".join(["%s"] * len(ids_deudas))
+            self.cursor.execute(f"SELECT id_deuda, id_cliente FROM deuda WHERE id_deuda IN ({marcadores})",
+                                ids_deudas)
+            clientes = {fila['id_deuda']: fila['id_cliente'] for fila in self.cursor.fetchall()}
+            rechazos = [f"Deuda {id_deuda} no encontrada" for id_deuda in ids_deudas if id_deuda not in clientes]
+            if rechazos:
+                raise ValueError("; ".join(rechazos))
+            
+            # Ordenar los cambios de cada cliente antes de tocar sus deudas
+            bloquear_saldos_clientes(self.cursor, clientes.values())
+            
+            momento = datetime.now().replace(microsecond=0)
+            for id_deuda, monto, metodo, referencia in pagos:
+                self.cursor.execute(_ABONAR_DEUDA, (
+                    monto,
+                    MARGEN_PAGADO,
+                    momento.date(),
+                    metodo,
+                    referencia,
+                    id_deuda,
+                    monto
+                ))
+                if self.cursor.rowcount != 1:
+                    rechazos.append(self._motivo_rechazo(id_deuda, monto))
+            if rechazos:
+                raise ValueError("; ".join(rechazos))
+            
+            # Registro de pagos: una fila por pago
+            self.cursor.execute(
+                "INSERT INTO pago (id_deuda, id_cliente, monto, metodo_pago, referencia_pago, id_usuario, fecha_pago) "
+                f"VALUES {', '.join([_FILA_PAGO] * len(pagos))}",
+                [valor for id_deuda, monto, metodo, referencia in pagos
+                 for valor in (id_deuda, clientes[id_deuda], monto, metodo, referencia, usuario, momento)])
+            
+            # Mantener el saldo de los clientes en la misma transacción
+            actualizar_saldos_clientes(self.cursor, clientes.values())
             
             self.connection.commit()
             
-            debug_print(f"Pago registrado para deuda {id_deuda}: {monto_pago}")
-            debug_print(f"Nuevo estado: pagado={pagado_completo}, saldo={nuevo_saldo}")
-            
-            return True
+            debug_print(f"Pagos registrados: {len(pagos)} en {len(ids_deudas)} deudas")
+            return len(pagos)
             
         except (Error, ValueError) as e:
             if self.connection:
@@ -269,38 +352,35 @@ class DebtManager:
         finally:
             self._close_connection()
     
+    def _motivo_rechazo(self, id_deuda: int, monto: Decimal) -> str:
+        """Por qué el abono no afectó la deuda (lectura con bloqueo: el saldo actual)"""
+        self.cursor.execute("SELECT monto - monto_pagado AS saldo_pendiente, pagado FROM deuda "
+                            "WHERE id_deuda = %s FOR UPDATE", (id_deuda,))
+        deuda = self.cursor.fetchone()
+        if deuda['pagado']:
+            return f"La deuda {id_deuda} ya está pagada"
+        return (f"El monto del pago ({monto}) excede el saldo pendiente "
+                f"({deuda['saldo_pendiente']}) de la deuda {id_deuda}")
+    
     def obtener_historial_pagos(self, id_cliente: int = None, 
                                fecha_inicio: date = None, fecha_fin: date = None) -> List[Dict]:
         """
-        Obtiene el historial de pagos realizados.
+        Obtiene el historial de pagos realizados, uno por fila de la tabla pago.
         
         Args:
             id_cliente (int, optional): Filtrar por cliente específico
             fecha_inicio (date, optional): Fecha de inicio del filtro
-            fecha_fin (date, optional): Fecha de fin del filtro
+            fecha_fin (date, optional): Fecha de fin del filtro (incluida)
             
         Returns:
-            List[Dict]: Lista de pagos realizados
+            List[Dict]: Lista de pagos realizados; monto_pagado es el monto de
+            cada pago y monto_total el de su deuda
         """
         try:
             self._get_connection()
             
-            query = """
-            SELECT 
-                id_deuda,
-                id_cliente,
-                nombre_cliente,
-                id_factura,
-                folio_numero,
-                monto_total,
-                monto_pagado,
-                fecha_pago,
-                metodo_pago,
-                referencia_pago,
-                registrado_por,
-                descripcion,
-                clave_grupo,
-                tipo_cliente
+            query = f"""
+            SELECT {_COLUMNAS_HISTORIAL}
             FROM vista_historial_pagos 
             WHERE 1=1
             """
@@ -316,10 +396,11 @@ class DebtManager:
                 params.append(fecha_inicio)
             
             if fecha_fin:
-                query += " AND fecha_pago <= %s"
+                # fecha_pago guarda la hora: incluir todo el último día
+                query += " AND fecha_pago < %s + INTERVAL 1 DAY"
                 params.append(fecha_fin)
             
-            query += " ORDER BY fecha_pago DESC"
+            query += " ORDER BY fecha_pago DESC, id_pago DESC"
             
             self.cursor.execute(query, params)
             result = self.cursor.fetchall()
@@ -335,26 +416,85 @@ class DebtManager:
         finally:
             self._close_connection()
     
+    def obtener_pagina_historial_pagos(self, id_cliente: int = None, busqueda: str = None,
+                                       despues: Optional[Llave] = None,
+                                       tamano: int = TAMANO_PAGINA) -> Pagina:
+        """
+        Obtiene una página del historial de pagos, del más reciente al más antiguo.
+        
+        Args:
+            id_cliente (int, optional): Filtrar por cliente específico
+            busqueda (str, optional): Parte del nombre del cliente
+            despues (Llave, optional): Llave de la página anterior (None para la primera)
+            tamano (int): Pagos por página
+            
+        Returns:
+            Pagina: (pagos, llave de la siguiente página o None si no hay más).
+            Ordena por fecha_pago e id_pago sobre idx_pago_fecha (o
+            idx_pago_cliente_fecha con id_cliente), así que cada página lee
+            solo sus filas aunque el historial sea muy grande.
+        """
+        try:
+            self._get_connection()
+            
+            query = f"""
+            SELECT {_COLUMNAS_HISTORIAL}
+            FROM vista_historial_pagos 
+            WHERE 1=1
+            """
+            
+            params = []
+            
+            if id_cliente:
+                query += " AND id_cliente = %s"
+                params.append(id_cliente)
+            
+            if busqueda:
+                query += " AND nombre_cliente LIKE %s"
+                params.append(f"%{busqueda}%")
+            
+            condicion, params_despues = condicion_despues('fecha_pago', 'id_pago', despues)
+            if condicion:
+                query += " AND " + condicion
+                params.extend(params_despues)
+            
+            query += " ORDER BY fecha_pago DESC, id_pago DESC LIMIT %s"
+            params.append(tamano + 1)
+            
+            self.cursor.execute(query, params)
+            pagos, siguiente = cortar_pagina(self.cursor.fetchall(), tamano, ('fecha_pago', 'id_pago'))
+            
+            debug_print(f"Página de historial de pagos: {len(pagos)} registros")
+            return pagos, siguiente
+            
+        except Error as e:
+            debug_print(f"Error obteniendo página del historial de pagos: {e}")
+            raise
+        finally:
+            self._close_connection()
+    
     def obtener_estadisticas_deudas(self) -> Dict:
         """
         Obtiene estadísticas generales de las deudas.
         
         Returns:
-            Dict: Estadísticas de deudas
+            Dict: Estadísticas de deudas. Suma una fila por cliente de
+            saldo_cliente, sin volver a agrupar las deudas; las columnas están
+            en idx_saldo_cliente_pendiente, así que no se lee la tabla.
         """
         try:
             self._get_connection()
             
             query = """
             SELECT 
-                COUNT(DISTINCT CASE WHEN saldo_pendiente > 0 THEN id_cliente END) as clientes_con_deuda,
-                COUNT(DISTINCT id_cliente) as total_clientes,
-                SUM(saldo_pendiente) as total_saldo_pendiente,
-                SUM(total_deuda_pendiente) as total_deuda_pendiente,
-                SUM(total_deuda_pagada) as total_deuda_pagada,
-                SUM(deudas_pendientes) as total_deudas_pendientes,
-                SUM(deudas_pagadas) as total_deudas_pagadas
-            FROM vista_estado_cuenta_cliente
+                COUNT(CASE WHEN saldo_pendiente > 0 THEN 1 END) as clientes_con_deuda,
+                (SELECT COUNT(*) FROM cliente) as total_clientes,
+                COALESCE(SUM(saldo_pendiente), 0) as total_saldo_pendiente,
+                COALESCE(SUM(total_deuda_pendiente), 0) as total_deuda_pendiente,
+                COALESCE(SUM(total_deuda_pagada), 0) as total_deuda_pagada,
+                COALESCE(SUM(deudas_pendientes), 0) as total_deudas_pendientes,
+                COALESCE(SUM(deudas_pagadas), 0) as total_deudas_pagadas
+            FROM saldo_cliente
             """
             
             self.cursor.execute(query)
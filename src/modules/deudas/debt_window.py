@@ -6,13 +6,20 @@ Ventana principal del módulo de gestión de deudas
 import tkinter as tk
 from tkinter import messagebox, ttk
 from src.modules.deudas.debt_manager import obtener_debt_manager
+from src.database.consultas_async import EjecutorConsultas, cursor_de_espera
+from src.ui.scroll_infinito import ScrollInfinito
 from src.config import debug_print
 from decimal import Decimal
+from functools import partial
 import decimal
 
+# Espera tras la última tecla antes de buscar en el historial de pagos
+ESPERA_BUSQUEDA_MS = 300
+
 class DebtManagementWindow:
-    def __init__(self, root):
+    def __init__(self, root, user_data=None):
         self.root = root
+        self.user_data = user_data
         self.root.title("Gestión de Deudas - Disfruleg")
         self.root.geometry("1000x700")
         
@@ -25,9 +32,19 @@ class DebtManagementWindow:
         self.search_history_var = tk.StringVar()
         self.search_history_var.trace("w", self.filter_payment_history)
         self.clientes_deudas = []
-        self.historial_pagos = []
+        self._busqueda_historial = None
         
         self.create_interface()
+        self.consultas = EjecutorConsultas(self.root, indicador=cursor_de_espera(self.root))
+        # El historial de pagos se pide por páginas al desplazarse
+        self.historial_scroll = ScrollInfinito(self.history_tree, self._pagina_historial(),
+                                               valores=self._valores_pago,
+                                               etiquetas=lambda pago: (pago['id_deuda'],),
+                                               scrollbar=self.history_scrollbar,
+                                               ejecutor=self.consultas, clave_consulta="historial",
+                                               al_cargar=self._mostrar_historial,
+                                               al_fallar=self._error_historial)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.load_data()
     
     def create_interface(self):
@@ -216,56 +233,49 @@ class DebtManagementWindow:
         self.history_tree.column("referencia", width=120)
 
         # Create scrollbar for history tree
-        history_scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.history_tree.yview)
-        self.history_tree.configure(yscrollcommand=history_scrollbar.set)
+        # (ScrollInfinito connects yscrollcommand and forwards it to the scrollbar)
+        self.history_scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.history_tree.yview)
 
         # Pack treeview and scrollbar
         self.history_tree.pack(side="left", fill="both", expand=True)
-        history_scrollbar.pack(side="right", fill="y")
+        self.history_scrollbar.pack(side="right", fill="y")
     
     def load_data(self):
-        """Load all data: statistics, clients with debts, and payment history"""
+        """Load all data in the background: statistics, clients with debts, and the first page of payment history"""
         self.status_var.set("Cargando datos...")
-        try:
-            # Load statistics
-            self.load_statistics()
-
-            # Load clients with debts
-            self.load_clients_with_debts()
+        self.consultas.ejecutar(self._consultar_datos, clave="datos",
+                                al_terminar=self._mostrar_datos, al_fallar=self._error_carga_datos)
 
-            # Load payment history
-            self.load_payment_history()
-
-            self.status_var.set(f"Datos cargados - {len(self.clientes_deudas)} clientes con deuda, {len(self.historial_pagos)} pagos registrados")
-            debug_print("Datos de deudas cargados correctamente")
-
-        except Exception as e:
-            self.status_var.set("Error cargando datos")
-            messagebox.showerror("Error", f"Error cargando datos: {e}")
-            debug_print(f"Error cargando datos de deudas: {e}")
-    
-    def load_statistics(self):
-        """Load and display debt statistics"""
+    def _consultar_datos(self):
+        """Runs on a worker thread: database access only, no widgets"""
         try:
             stats = self.debt_manager.obtener_estadisticas_deudas()
-            
-            self.stats_vars['total_clientes'].set(str(stats.get('total_clientes', 0)))
-            self.stats_vars['clientes_con_deuda'].set(str(stats.get('clientes_con_deuda', 0)))
-            self.stats_vars['total_saldo_pendiente'].set(f"${stats.get('total_saldo_pendiente', 0):,.2f}")
-            self.stats_vars['total_deudas_pendientes'].set(str(stats.get('total_deudas_pendientes', 0)))
-            
         except Exception as e:
             debug_print(f"Error cargando estadísticas: {e}")
+            stats = None
+        return stats, self.debt_manager.obtener_clientes_con_deudas()
+
+    def _mostrar_datos(self, datos):
+        stats, self.clientes_deudas = datos
+        if stats is not None:
+            self.show_statistics(stats)
+        self.update_treeview()
+        self.load_payment_history()
+
+        self.status_var.set(f"Datos cargados - {len(self.clientes_deudas)} clientes con deuda")
+        debug_print("Datos de deudas cargados correctamente")
+
+    def _error_carga_datos(self, e):
+        self.status_var.set("Error cargando datos")
+        messagebox.showerror("Error", f"Error cargando datos: {e}")
+        debug_print(f"Error cargando datos de deudas: {e}")
     
-    def load_clients_with_debts(self):
-        """Load clients that have pending debts"""
-        try:
-            self.clientes_deudas = self.debt_manager.obtener_clientes_con_deudas()
-            self.update_treeview()
-            
-        except Exception as e:
-            debug_print(f"Error cargando clientes con deudas: {e}")
-            raise
+    def show_statistics(self, stats):
+        """Display debt statistics"""
+        self.stats_vars['total_clientes'].set(str(stats.get('total_clientes', 0)))
+        self.stats_vars['clientes_con_deuda'].set(str(stats.get('clientes_con_deuda', 0)))
+        self.stats_vars['total_saldo_pendiente'].set(f"${stats.get('total_saldo_pendiente', 0):,.2f}")
+        self.stats_vars['total_deudas_pendientes'].set(str(stats.get('total_deudas_pendientes', 0)))
     
     def update_treeview(self):
         """Update the treeview with current data"""
@@ -289,45 +299,48 @@ class DebtManagementWindow:
                 ), tags=(cliente['id_cliente'],))
     
     def load_payment_history(self):
-        """Load payment history data"""
-        try:
-            self.historial_pagos = self.debt_manager.obtener_historial_pagos()
-            self.update_payment_history_treeview()
-            debug_print(f"Historial de pagos cargado: {len(self.historial_pagos)} registros")
-        except Exception as e:
-            debug_print(f"Error cargando historial de pagos: {e}")
-            messagebox.showerror("Error", f"Error cargando historial de pagos: {e}")
-
-    def update_payment_history_treeview(self):
-        """Update the payment history treeview with current data"""
-        # Clear existing items
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-
-        # Filter payments based on search term
-        search_term = self.search_history_var.get().lower()
-
-        for pago in self.historial_pagos:
-            if not search_term or search_term in pago['nombre_cliente'].lower():
-                # Insert payment data
-                self.history_tree.insert("", "end", values=(
-                    pago['nombre_cliente'],
-                    pago['clave_grupo'],
-                    pago['folio_numero'],
-                    f"${pago['monto_total']:,.2f}",
-                    f"${pago['monto_pagado']:,.2f}",
-                    pago['fecha_pago'] or "N/A",
-                    pago['metodo_pago'] or "N/A",
-                    pago['referencia_pago'] or "N/A"
-                ), tags=(pago['id_deuda'],))
+        """Reload payment history from the first page, with the current search"""
+        self._busqueda_historial = None
+        self.historial_scroll.reiniciar(self._pagina_historial())
+
+    def _pagina_historial(self):
+        """Page loader for the current search; runs on a worker thread, so it must not read widgets"""
+        busqueda = self.search_history_var.get().strip() or None
+        return partial(self._consultar_pagina_historial, busqueda)
+
+    def _consultar_pagina_historial(self, busqueda, despues):
+        return self.debt_manager.obtener_pagina_historial_pagos(busqueda=busqueda, despues=despues)
+
+    def _valores_pago(self, pago):
+        """Row values for a payment"""
+        return (
+            pago['nombre_cliente'],
+            pago['clave_grupo'],
+            pago['folio_numero'],
+            f"${pago['monto_total']:,.2f}",
+            f"${pago['monto_pagado']:,.2f}",
+            pago['fecha_pago'] or "N/A",
+            pago['metodo_pago'] or "N/A",
+            pago['referencia_pago'] or "N/A"
+        )
+
+    def _mostrar_historial(self, pagos):
+        mas = " (desplace para ver más)" if self.historial_scroll.hay_mas else ""
+        debug_print(f"Historial de pagos: {len(self.historial_scroll)} registros mostrados{mas}")
+
+    def _error_historial(self, e):
+        debug_print(f"Error cargando historial de pagos: {e}")
+        messagebox.showerror("Error", f"Error cargando historial de pagos: {e}")
 
     def filter_debts(self, *args):
         """Filter debts based on search term"""
         self.update_treeview()
 
     def filter_payment_history(self, *args):
-        """Filter payment history based on search term"""
-        self.update_payment_history_treeview()
+        """Search payment history on the server once the user stops typing"""
+        if self._busqueda_historial is not None:
+            self.root.after_cancel(self._busqueda_historial)
+        self._busqueda_historial = self.root.after(ESPERA_BUSQUEDA_MS, self.load_payment_history)
 
     
     def on_double_click(self, event):
@@ -540,8 +553,14 @@ class DebtManagementWindow:
                     referencia = referencia_var.get().strip() if referencia_var.get().strip() else None
                     
                     # Register payment
-                    usuario = "admin"  # TODO: Get from user_data
-                    self.debt_manager.registrar_pago(id_deuda, monto, metodo, referencia, usuario)
+                    # Sin sesión el pago queda sin usuario (id_usuario NULL), no a nombre de admin
+                    usuario = (self.user_data or {}).get('username')
+                    try:
+                        self.debt_manager.registrar_pago(id_deuda, monto, metodo, referencia, usuario)
+                    except ValueError as e:
+                        # Otro pago pudo registrarse antes: el saldo mostrado ya no es el actual
+                        messagebox.showerror("Error", str(e))
+                        return
                     
                     messagebox.showinfo("Éxito", f"Pago de ${monto:,.2f} registrado correctamente")
                     payment_window.destroy()
@@ -573,12 +592,22 @@ class DebtManagementWindow:
             messagebox.showerror("Error", f"Error cargando información de la deuda: {e}")
             payment_window.destroy()
 
-def launch_debt_window(user_data=None):
-    """Launch the debt management window"""
+    def on_closing(self):
+        """Cancel pending searches and queries, then close the window"""
+        if self._busqueda_historial is not None:
+            self.root.after_cancel(self._busqueda_historial)
+            self._busqueda_historial = None
+        self.consultas.cerrar()
+        self.root.destroy()
+
+def launch_debt_window(user_data=None, master=None):
+    """Launch the debt management window (as a Toplevel of master if given)"""
     try:
-        root = tk.Tk()
-        app = DebtManagementWindow(root)
-        root.mainloop()
+        root = tk.Tk() if master is None else tk.Toplevel(master)
+        app = DebtManagementWindow(root, user_data)
+        if master is None:
+            root.mainloop()
+        return root
     except Exception as e:
         messagebox.showerror("Error", f"Error iniciando módulo de deudas: {e}")
 
@@ -0,0 +1,139 @@
+"""
+DISFRULEG - Saldos por cliente (tabla saldo_cliente)
+La ventana de deudas leía vista_estado_cuenta_cliente, que agrupa todos los
+clientes contra todas las filas de deuda en cada consulta, y las
+estadísticas volvían a agregar esa vista. saldo_cliente guarda una fila por
+cliente con los mismos totales, y se recalcula solo para el cliente que
+cambia: al crear su factura (_finalizar_factura) y al registrar un pago
+(DebtManager.registrar_pagos), dentro de la misma transacción.
+
+El recálculo de un cliente lee únicamente sus deudas (idx_deuda_cliente_pagado),
+así que no acumula errores como un incremento; verificar_saldos compara toda
+la tabla con deuda y corrige las diferencias:
+    python scripts/verificar_saldos_clientes.py [--corregir]
+"""
+
+from contextlib import closing
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+COLUMNAS = ('id_cliente', 'saldo_pendiente', 'total_deuda_pendiente', 'total_deuda_pagada',
+            'deudas_pendientes', 'deudas_pagadas', 'ultima_deuda_generada', 'ultimo_pago')
+
+# Mismas fórmulas que vista_estado_cuenta_cliente (data/sql/disfruleg_views.sql)
+_SELECT_SALDOS = """
+    SELECT
+        c.id_cliente,
+        COALESCE(SUM(CASE WHEN d.pagado = FALSE THEN d.monto - d.monto_pagado ELSE 0 END), 0),
+        COALESCE(SUM(CASE WHEN d.pagado = FALSE THEN d.monto ELSE 0 END), 0),
+        COALESCE(SUM(CASE WHEN d.pagado = TRUE THEN d.monto ELSE 0 END), 0),
+        COUNT(CASE WHEN d.pagado = FALSE THEN d.id_deuda END),
+        COUNT(CASE WHEN d.pagado = TRUE THEN d.id_deuda END),
+        MAX(CASE WHEN d.pagado = FALSE THEN d.fecha_generada END),
+        MAX(CASE WHEN d.pagado = TRUE THEN d.fecha_pago END)
+    FROM cliente c
+    LEFT JOIN deuda d ON d.id_cliente = c.id_cliente
+    WHERE {filtro}
+    GROUP BY c.id_cliente
+"""
+
+_INSERT_SALDOS = f"INSERT INTO saldo_cliente ({', '.join(COLUMNAS)})"
+
+_ACTUALIZAR_SALDOS = "ON DUPLICATE KEY UPDATE " + ", ".join(
+    f"{columna} = VALUES({columna})" for columna in COLUMNAS[1:])
+
+Saldo = Tuple  # Fila en el orden de COLUMNAS
+
+
+def bloquear_saldo_cliente(cursor, id_cliente: int):
+    """
+    Toma el bloqueo de la fila del cliente en saldo_cliente (la crea si no
+    existe). Se llama antes de modificar sus deudas, así dos transacciones
+    sobre el mismo cliente se ordenan aquí en lugar de bloquearse entre sí
+    al recalcular. No hace commit.
+    """
+    bloquear_saldos_clientes(cursor, [id_cliente])
+
+
+def bloquear_saldos_clientes(cursor, ids_clientes: Iterable[int]):
+    """Como bloquear_saldo_cliente para varios clientes, en orden de id y en una sentencia"""
+    ids = sorted(set(ids_clientes))
+    if not ids:
+        return
+    cursor.execute(f"INSERT INTO saldo_cliente (id_cliente) VALUES {', '.join(['(%s)'] * len(ids))} "
+                   "ON DUPLICATE KEY UPDATE id_cliente = id_cliente", ids)
+
+
+def actualizar_saldo_cliente(cursor, id_cliente: int):
+    """
+    Recalcula la fila del cliente desde sus deudas.
+    No hace commit: debe ejecutarse dentro de la transacción del llamador.
+    """
+    actualizar_saldos_clientes(cursor, [id_cliente])
+
+
+def actualizar_saldos_clientes(cursor, ids_clientes: Iterable[int]):
+    """Como actualizar_saldo_cliente para varios clientes, en una sentencia"""
+    ids = sorted(set(ids_clientes))
+    if not ids:
+        return
+    filtro = f"c.id_cliente IN ({', '.join(['%s'] * len(ids))})"
+    cursor.execute(f"{_INSERT_SALDOS} {_SELECT_SALDOS.format(filtro=filtro)} {_ACTUALIZAR_SALDOS}", ids)
+
+
+def calcular_saldos(cursor) -> Dict[int, Saldo]:
+    """Saldos de todos los clientes calculados desde deuda, por id_cliente"""
+    cursor.execute(_SELECT_SALDOS.format(filtro="TRUE"))
+    return {fila[0]: tuple(fila) for fila in cursor.fetchall()}
+
+
+def leer_saldos(cursor) -> Dict[int, Saldo]:
+    """Filas guardadas en saldo_cliente, por id_cliente"""
+    cursor.execute(f"SELECT {', '.join(COLUMNAS)} FROM saldo_cliente")
+    return {fila[0]: tuple(fila) for fila in cursor.fetchall()}
+
+
+def _normalizar(fila: Saldo) -> Saldo:
+    id_cliente, saldo, pendiente, pagada, n_pendientes, n_pagadas, ultima, ultimo = fila
+    centavos = Decimal("0.01")
+    return (id_cliente,
+            *(Decimal(str(valor or 0)).quantize(centavos) for valor in (saldo, pendiente, pagada)),
+            int(n_pendientes or 0), int(n_pagadas or 0), ultima, ultimo)
+
+
+def comparar_saldos(esperados: Dict[int, Saldo], guardados: Dict[int, Saldo]) -> List[Dict]:
+    """
+    Diferencias entre los saldos calculados y los guardados. Un cliente sin
+    fila en saldo_cliente equivale a uno sin deudas.
+
+    Returns:
+        List[Dict]: {'id_cliente', 'esperado', 'guardado'} por cada cliente distinto
+    """
+    diferencias = []
+    for id_cliente in sorted(set(esperados) | set(guardados)):
+        vacio = (id_cliente, 0, 0, 0, 0, 0, None, None)
+        esperado = _normalizar(esperados.get(id_cliente, vacio))
+        guardado = _normalizar(guardados.get(id_cliente, vacio))
+        if esperado != guardado:
+            diferencias.append({'id_cliente': id_cliente,
+                                'esperado': dict(zip(COLUMNAS, esperado)),
+                                'guardado': dict(zip(COLUMNAS, guardado))})
+    return diferencias
+
+
+def verificar_saldos(conn, corregir: bool = False) -> List[Dict]:
+    """
+    Compara saldo_cliente con lo que dice deuda y, si se pide, recalcula los
+    clientes que difieren en una transacción.
+
+    Returns:
+        List[Dict]: Diferencias encontradas (antes de corregir)
+    """
+    with closing(conn.cursor()) as cursor:
+        diferencias = comparar_saldos(calcular_saldos(cursor), leer_saldos(cursor))
+        if corregir and diferencias:
+            for diferencia in diferencias:
+                bloquear_saldo_cliente(cursor, diferencia['id_cliente'])
+                actualizar_saldo_cliente(cursor, diferencia['id_cliente'])
+            conn.commit()
+    return diferencias
@@ -5,7 +5,16 @@ import mysql.connector
 from src.database.conexion import conectar
 from decimal import Decimal
 from datetime import datetime
+from functools import partial
 from src.auth.auth_manager import AuthManager
+from src.database.cache_referencia import obtener_cache_referencia
+from src.database.paginacion import TAMANO_PAGINA, condicion_despues, cortar_pagina
+from src.modules.analytics.costo_ventas import invalidar_costos_producto
+from src.ui.scroll_infinito import ScrollInfinito
+from src.utils.indice_busqueda import IndiceBusqueda
+
+# Espera tras la última tecla antes de filtrar la lista de compras
+ESPERA_FILTRO_MS = 300
 
 class ComprasApp:
     def __init__(self, root, user_data):
@@ -27,6 +36,7 @@ class ComprasApp:
         self.cantidad_var = tk.DoubleVar()
         self.precio_var = tk.DoubleVar()
         self.fecha_var = tk.StringVar(value=datetime.now().strftime("%Y-%m-%d"))
+        self._filtro_pendiente = None
         
         self.load_productos()
         self.create_interface()
@@ -34,8 +44,24 @@ class ComprasApp:
         
     def load_productos(self):
         """Cargar productos desde la base de datos"""
-        self.cursor.execute("SELECT id_producto, nombre_producto, unidad_producto, es_especial FROM producto ORDER BY nombre_producto")
-        self.productos = self.cursor.fetchall()
+        self.productos = obtener_cache_referencia().filas('producto')
+        self.productos_por_id = {p['id_producto']: p for p in self.productos}
+        self.indice_productos = IndiceBusqueda((p['id_producto'], p['nombre_producto']) for p in self.productos)
+    
+    def etiqueta_producto(self, producto):
+        """Texto con que se muestra un producto en el combo"""
+        return f"{producto['nombre_producto']} ({producto['unidad_producto']})"
+    
+    def filtrar_combo_productos(self, event=None):
+        """Reducir las opciones del combo a los productos que coinciden con lo escrito"""
+        if event is not None and event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        texto = self.selected_product.get().strip()
+        if texto:
+            productos = [self.productos_por_id[id_producto] for id_producto in self.indice_productos.buscar(texto)]
+        else:
+            productos = self.productos
+        self.producto_combo['values'] = [self.etiqueta_producto(p) for p in productos]
         
     def create_interface(self):
         """Crear la interfaz de usuario"""
@@ -73,10 +99,12 @@ class ComprasApp:
         
         # Producto
         tk.Label(row1, text="Producto:", width=15, anchor="w").pack(side="left")
-        productos_nombres = [f"{p['nombre_producto']} ({p['unidad_producto']})" for p in self.productos]
+        productos_nombres = [self.etiqueta_producto(p) for p in self.productos]
         self.producto_combo = ttk.Combobox(row1, textvariable=self.selected_product, 
-                                         values=productos_nombres, state="readonly", width=30)
+                                         values=productos_nombres, width=30)
         self.producto_combo.pack(side="left", padx=5)
+        # Escribir en el combo filtra los productos (sin acentos y tolerante a errores)
+        self.producto_combo.bind("<KeyRelease>", self.filtrar_combo_productos)
         
         # Fecha
         tk.Label(row1, text="Fecha:", anchor="w").pack(side="left", padx=(20, 5))
@@ -155,8 +183,7 @@ class ComprasApp:
         # Treeview
         self.compras_tree = ttk.Treeview(table_frame, 
                                        columns=("id", "fecha", "producto", "cantidad", "precio", "total"),
-                                       show="headings", 
-                                       yscrollcommand=scrollbar.set)
+                                       show="headings")
         
         # Configurar columnas
         self.compras_tree.heading("id", text="ID")
@@ -176,6 +203,11 @@ class ComprasApp:
         self.compras_tree.pack(side="left", fill="both", expand=True)
         scrollbar.config(command=self.compras_tree.yview)
         
+        # Las compras se piden por páginas al desplazarse
+        self.compras_scroll = ScrollInfinito(self.compras_tree, self.obtener_pagina_compras,
+                                             valores=self.valores_compra, scrollbar=scrollbar,
+                                             al_cargar=self.actualizar_estado_compras)
+        
         # Double-click para editar
         self.compras_tree.bind("<Double-1>", lambda event: self.editar_compra())
     
@@ -329,64 +361,81 @@ class ComprasApp:
     def limpiar_formulario(self):
         """Limpiar formulario"""
         self.selected_product.set("")
+        self.filtrar_combo_productos()
         self.cantidad_var.set(0)
         self.precio_var.set(0)
         self.fecha_var.set(datetime.now().strftime("%Y-%m-%d"))
         self.total_var.set("$0.00")
     
-    def load_compras(self):
-        """Cargar compras desde la base de datos"""
-        # Limpiar tabla existente
-        for item in self.compras_tree.get_children():
-            self.compras_tree.delete(item)
+    def obtener_pagina_compras(self, despues=None, tamano=TAMANO_PAGINA, ids_producto=None):
+        """
+        Obtener una página de compras, de la más reciente a la más antigua.
+        
+        Args:
+            despues: Llave (fecha, id_compra) de la página anterior, o None
+            tamano: Compras por página
+            ids_producto: Solo compras de estos productos (None para todas)
+            
+        Returns:
+            (compras, llave de la siguiente página o None si no hay más)
+        """
+        if ids_producto is not None and not ids_producto:
+            return [], None
         
-        # Obtener compras con detalles del producto
-        self.cursor.execute("""
+        query = """
             SELECT c.id_compra, c.fecha_compra as fecha, p.nombre_producto, p.unidad_producto as unidad, 
                    c.cantidad_compra as cantidad, c.precio_unitario_compra as precio_unitario_compra,
                    (c.cantidad_compra * c.precio_unitario_compra) as total
             FROM compra c
             JOIN producto p ON c.id_producto = p.id_producto
-            ORDER BY c.fecha_compra DESC, c.id_compra DESC
-        """)
-        
-        compras = self.cursor.fetchall()
-        
-        # Guardar todas las compras para filtrado
-        self.all_compras = compras
-        
-        # Insertar en la tabla
-        for compra in compras:
-            self.compras_tree.insert("", "end", 
-                                   values=(compra["id_compra"],
-                                          compra["fecha"],
-                                          f"{compra['nombre_producto']} ({compra['unidad']})",
-                                          f"{compra['cantidad']:.2f}",
-                                          f"${compra['precio_unitario_compra']:.2f}",
-                                          f"${compra['total']:.2f}"))
-        
-        # Actualizar contador en barra de estado
-        total_compras = sum(c['total'] for c in compras if c['total'])
-        self.status_var.set(f"Usuario: {self.user_data['nombre_completo']} | Compras: {len(compras)} registros - Total: ${total_compras:.2f}")
+            WHERE 1=1
+        """
+        params = []
+        
+        if ids_producto is not None:
+            query += f" AND c.id_producto IN ({', '.join(['%s'] * len(ids_producto))})"
+            params.extend(ids_producto)
+        
+        condicion, params_despues = condicion_despues("c.fecha_compra", "c.id_compra", despues)
+        if condicion:
+            query += " AND " + condicion
+            params.extend(params_despues)
+        
+        query += " ORDER BY c.fecha_compra DESC, c.id_compra DESC LIMIT %s"
+        params.append(tamano + 1)
+        
+        self.cursor.execute(query, params)
+        return cortar_pagina(self.cursor.fetchall(), tamano, ("fecha", "id_compra"))
+    
+    def valores_compra(self, compra):
+        """Valores de la fila de una compra"""
+        return (compra["id_compra"],
+                compra["fecha"],
+                f"{compra['nombre_producto']} ({compra['unidad']})",
+                f"{compra['cantidad']:.2f}",
+                f"${compra['precio_unitario_compra']:.2f}",
+                f"${compra['total']:.2f}")
+    
+    def load_compras(self):
+        """Cargar la primera página de compras con el filtro actual"""
+        self._filtro_pendiente = None
+        filtro = self.filtro_var.get().strip()
+        # El filtro usa el mismo índice de productos que el combo de registro
+        ids_producto = self.indice_productos.buscar(filtro) if filtro else None
+        self.compras_scroll.reiniciar(partial(self.obtener_pagina_compras, ids_producto=ids_producto))
+    
+    def actualizar_estado_compras(self, compras):
+        """Actualizar contador en barra de estado con las compras mostradas"""
+        mostradas = [self.compras_scroll.fila(item) for item in self.compras_tree.get_children()]
+        total_compras = sum(c['total'] for c in mostradas if c['total'])
+        mas = " (desplace para ver más)" if self.compras_scroll.hay_mas else ""
+        self.status_var.set(f"Usuario: {self.user_data['nombre_completo']} | Compras: {len(mostradas)} mostradas{mas} - Total: ${total_compras:.2f}")
     
     def filtrar_compras(self, *args):
-        """Filtrar compras por producto"""
-        filtro = self.filtro_var.get().lower()
-        
-        # Limpiar tabla
-        for item in self.compras_tree.get_children():
-            self.compras_tree.delete(item)
-        
-        # Filtrar y mostrar
-        for compra in self.all_compras:
-            if filtro in compra['nombre_producto'].lower():
-                self.compras_tree.insert("", "end", 
-                                       values=(compra["id_compra"],
-                                              compra["fecha"],
-                                              f"{compra['nombre_producto']} ({compra['unidad']})",
-                                              f"{compra['cantidad']:.2f}",
-                                              f"${compra['precio_unitario_compra']:.2f}",
-                                              f"${compra['total']:.2f}"))
+        """Filtrar compras por producto cuando el usuario deja de escribir"""
+        if self._filtro_pendiente is not None:
+            self.root.after_cancel(self._filtro_pendiente)
+        self._filtro_pendiente = self.root.after(ESPERA_FILTRO_MS, self.load_compras)
     
     def editar_compra(self):
         """Editar compra seleccionada"""
@@ -565,6 +614,12 @@ class ComprasApp:
                     WHERE id_producto = %s
                 """, (float(diferencia_cantidad), old_data['id_producto']))
             
+            # El costo de lo vendido se recalcula desde el inicio para el producto
+            # anterior y el actual de la compra
+            self.cursor.execute("SELECT id_producto FROM compra WHERE id_compra = %s", (compra_id,))
+            for id_producto in {old_data['id_producto'], self.cursor.fetchone()['id_producto']}:
+                invalidar_costos_producto(self.cursor, id_producto)
+            
             self.conn.commit()
             
             messagebox.showinfo("Éxito", "Compra actualizada exitosamente")
@@ -614,6 +669,8 @@ class ComprasApp:
                     SET stock = stock - %s 
                     WHERE id_producto = %s
                 """, (compra_data['cantidad_compra'], compra_data['id_producto']))
+                
+                invalidar_costos_producto(self.cursor, compra_data['id_producto'])
             
             self.conn.commit()
             
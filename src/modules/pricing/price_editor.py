@@ -3,8 +3,12 @@ import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog
 import mysql.connector
 from src.database.conexion import conectar
+from src.database.cache_referencia import obtener_cache_referencia
+from src.modules.receipts.components.database import recalcular_ventas_diarias_producto
 from decimal import Decimal
 from src.auth.auth_manager import AuthManager
+from src.utils.indice_busqueda import IndiceBusqueda
+from src.ui.filas_treeview import FilasTreeview
 
 class PriceEditorApp:
     def __init__(self, root, user_data=None):
@@ -28,6 +32,10 @@ class PriceEditorApp:
         self.client_types = []
         
         self.create_interface()
+        self.product_rows = FilasTreeview(self.product_tree,
+                                          clave=lambda product: product['id_producto'],
+                                          valores=self.product_values,
+                                          etiquetas=self.product_tags)
         self.load_groups()
         self.load_client_types()
         self.load_products()
@@ -273,8 +281,7 @@ class PriceEditorApp:
         for widget in self.group_buttons_frame.winfo_children():
             widget.destroy()
         
-        self.cursor.execute("SELECT id_grupo, clave_grupo FROM grupo ORDER BY clave_grupo")
-        self.groups = self.cursor.fetchall()
+        self.groups = obtener_cache_referencia().filas('grupo')
         
         for group in self.groups:
             rb = tk.Radiobutton(
@@ -290,8 +297,7 @@ class PriceEditorApp:
             
     def load_client_types(self):
         """Cargar tipos de cliente desde la base de datos"""
-        self.cursor.execute("SELECT id_tipo_cliente, nombre_tipo, descuento FROM tipo_cliente ORDER BY nombre_tipo")
-        self.client_types = self.cursor.fetchall()
+        self.client_types = obtener_cache_referencia().filas('tipo_cliente')
         
     def on_group_change(self):
         """Manejar cambio de grupo seleccionado"""
@@ -322,9 +328,6 @@ class PriceEditorApp:
     
     def load_products(self):
         """Cargar productos desde la base de datos"""
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-            
         group_id = self.current_group.get()
         
         # Get all products with their base prices for the selected group
@@ -336,6 +339,8 @@ class PriceEditorApp:
             ORDER BY p.nombre_producto
         """, (group_id,))
         self.all_products = self.cursor.fetchall()
+        self.products_by_id = {p['id_producto']: p for p in self.all_products}
+        self.search_index = IndiceBusqueda((p['id_producto'], p['nombre_producto']) for p in self.all_products)
         
         # Get clients count in this group
         self.cursor.execute("""
@@ -345,31 +350,9 @@ class PriceEditorApp:
         """, (group_id,))
         client_count_result = self.cursor.fetchone()
         client_count = client_count_result['client_count'] if client_count_result else 0
+        self.client_count = client_count
         
-        for product in self.all_products:
-            precio_base = product['precio_base'] if product['precio_base'] else Decimal('0.00')
-            
-            # Color coding for special products
-            tags = ()
-            if product['es_especial']:
-                tags = ('special',)
-            
-            # Color coding for products without price
-            if precio_base == 0:
-                tags = tags + ('no_price',)
-            
-            self.product_tree.insert("", "end",
-                values=(
-                    product["id_producto"],
-                    product["nombre_producto"],
-                    product["unidad_producto"],
-                    f"${precio_base:.2f}" if precio_base > 0 else "Sin precio",
-                    f"{client_count} clientes",
-                    f"{product['stock']:.2f}",
-                    "🔒 Sí" if product['es_especial'] else "No"
-                ),
-                tags=tags
-            )
+        self.product_rows.actualizar(self.all_products)
         
         # Configure tags for special products and products without price
         self.product_tree.tag_configure('special', background='#FFE5B4')
@@ -384,58 +367,44 @@ class PriceEditorApp:
         group = next((g for g in self.groups if g['id_grupo'] == group_id), None)
         return group['clave_grupo'] if group else "Desconocido"
     
+    def product_values(self, product):
+        """Valores de la fila de un producto en la lista"""
+        precio_base = product['precio_base'] if product['precio_base'] else Decimal('0.00')
+        return (
+            product["id_producto"],
+            product["nombre_producto"],
+            product["unidad_producto"],
+            f"${precio_base:.2f}" if precio_base > 0 else "Sin precio",
+            f"{self.client_count} clientes",
+            f"{product['stock']:.2f}",
+            "🔒 Sí" if product['es_especial'] else "No"
+        )
+    
+    def product_tags(self, product):
+        """Tags de color de un producto (especial, sin precio)"""
+        tags = ()
+        if product['es_especial']:
+            tags = ('special',)
+        
+        # Color coding for products without price
+        if not product['precio_base']:
+            tags = tags + ('no_price',)
+        return tags
+    
     def filter_products(self, event=None):
         """Filtrar productos por búsqueda"""
-        search_text = self.search_entry.get().lower()
-        
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
+        search_text = self.search_entry.get().strip()
         
         if not search_text:
-            self.load_products()
+            # Los productos ya están en memoria; no hace falta volver a consultarlos
+            self.product_rows.actualizar(self.all_products)
+            group_name = self.get_current_group_name()
+            self.status_var.set(f"Mostrando {len(self.all_products)} productos para grupo: {group_name}")
             return
         
-        group_id = self.current_group.get()
-        
-        # Get clients count in this group
-        self.cursor.execute("""
-            SELECT COUNT(*) as client_count
-            FROM cliente c
-            WHERE c.id_grupo = %s
-        """, (group_id,))
-        client_count_result = self.cursor.fetchone()
-        client_count = client_count_result['client_count'] if client_count_result else 0
-        
-        filtered_count = 0
-        for product in self.all_products:
-            if search_text in product["nombre_producto"].lower():
-                precio_base = product['precio_base'] if product['precio_base'] else Decimal('0.00')
-                
-                tags = ()
-                if product['es_especial']:
-                    tags = ('special',)
-                
-                # Color coding for products without price
-                if precio_base == 0:
-                    tags = tags + ('no_price',)
-                
-                self.product_tree.insert("", "end",
-                    values=(
-                        product["id_producto"],
-                        product["nombre_producto"],
-                        product["unidad_producto"],
-                        f"${precio_base:.2f}" if precio_base > 0 else "Sin precio",
-                        f"{client_count} clientes",
-                        f"{product['stock']:.2f}",
-                        "🔒 Sí" if product['es_especial'] else "No"
-                    ),
-                    tags=tags
-                )
-                filtered_count += 1
-        
-        self.product_tree.tag_configure('special', background='#FFE5B4')
-        self.product_tree.tag_configure('no_price', background='#FFE5E5')
-        self.status_var.set(f"Filtrado: {filtered_count} productos encontrados")
+        filtered = [self.products_by_id[product_id] for product_id in self.search_index.buscar(search_text)]
+        self.product_rows.actualizar(filtered)
+        self.status_var.set(f"Filtrado: {len(filtered)} productos encontrados")
     
     def add_product_dialog(self):
         """Mostrar popup para agregar nuevo producto"""
@@ -719,7 +688,9 @@ class PriceEditorApp:
                         DELETE FROM precio_por_grupo 
                         WHERE id_grupo = %s AND id_producto = %s
                     """, (group_id, product_id))
-                
+
+                # ventas_diarias.ingresos usa el precio vigente del grupo
+                recalcular_ventas_diarias_producto(self.cursor, product_id, group_id)
                 self.conn.commit()
                 self.changes_made = True
                 popup.destroy()
@@ -0,0 +1,150 @@
+# src/modules/receipts/components/cambios_ordenes.py
+# Copia local de las órdenes que se mantiene al día con los cambios
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+# Las marcas vienen de la hora del servidor al ejecutar cada escritura, no
+# al confirmarla: una transacción que confirma tarde puede quedar con una
+# marca anterior a la última vista. Se vuelve a pedir este margen hacia
+# atrás; aplicar la misma orden dos veces no cambia el resultado.
+MARGEN_CAMBIOS = timedelta(seconds=5)
+
+# Si la consulta de cambios devuelve tantas filas, cuesta menos recargar todo
+LIMITE_CAMBIOS = 500
+
+
+class SeguimientoOrdenes:
+    """
+    Órdenes activas e historial de la ventana de órdenes, actualizados con
+    OrdenManager.obtener_cambios() en lugar de recargar las listas completas.
+
+    Se necesita una carga completa (requiere_recarga) al inicio, después de
+    un error en la consulta de cambios, cuando llegan demasiados cambios de
+    golpe, o cuando los conteos del servidor no cuadran con la copia local
+    (órdenes borradas físicamente, que no dejan marca de modificación).
+
+    El historial empieza con las limite_historial más recientes; las páginas
+    más antiguas que se piden al desplazarse (agregar_antiguas) amplían el
+    límite hasta la siguiente carga completa.
+    """
+
+    def __init__(self, limite_historial: int = 100, limite_cambios: int = LIMITE_CAMBIOS):
+        self.limite_historial = self._limite_inicial = limite_historial
+        self.limite_cambios = limite_cambios
+        self.marca: Optional[datetime] = None
+        self._activas: Dict[int, Dict[str, Any]] = {}
+        self._historial: Dict[int, Dict[str, Any]] = {}
+        self._hay_mas_historial = False
+
+    @property
+    def requiere_recarga(self) -> bool:
+        return self.marca is None
+
+    def invalidar(self):
+        """Fuerza una carga completa en la próxima actualización"""
+        self.marca = None
+
+    def desde(self) -> datetime:
+        """Marca a partir de la cual pedir cambios"""
+        return self.marca - MARGEN_CAMBIOS
+
+    # ==================== CARGA Y CAMBIOS ====================
+
+    def cargar(self, marca: Optional[datetime], activas: List[Dict[str, Any]],
+               historial: List[Dict[str, Any]]):
+        """
+        Reemplaza la copia local con una carga completa. marca es la hora del
+        servidor tomada antes de consultar las listas (None si falló).
+        """
+        self._activas = {orden['folio_numero']: orden for orden in activas}
+        self._historial = {orden['folio_numero']: orden for orden in historial}
+        self.limite_historial = self._limite_inicial
+        self._hay_mas_historial = len(historial) >= self.limite_historial
+        self.marca = marca
+
+    def aplicar(self, cambios: Optional[Dict[str, Any]]) -> Tuple[bool, bool]:
+        """
+        Combina el resultado de obtener_cambios() con la copia local.
+
+        Returns:
+            (cambiaron_activas, cambio_historial). Si los cambios no se pueden
+            usar, la copia queda marcada con requiere_recarga.
+        """
+        if cambios is None or self.marca is None:
+            self.invalidar()
+            return False, False
+
+        ordenes = cambios['ordenes']
+        if len(ordenes) >= self.limite_cambios:
+            self.invalidar()
+            return False, False
+
+        cambio_activas = cambio_historial = False
+        marca = self.marca
+        for orden in ordenes:
+            folio = orden['folio_numero']
+            activa = bool(orden['activo']) and orden['estado'] == 'guardada'
+            registrada = bool(orden['activo']) and orden['estado'] == 'registrada'
+            cambio_activas |= self._poner(self._activas, folio, orden if activa else None)
+            cambio_historial |= self._poner(self._historial, folio, orden if registrada else None)
+            marca = max(marca, orden['fecha_modificacion'])
+        self.marca = marca
+
+        # El historial solo guarda las más recientes, como la carga completa
+        if len(self._historial) > self.limite_historial:
+            for orden in self.historial()[self.limite_historial:]:
+                del self._historial[orden['folio_numero']]
+            self._hay_mas_historial = True
+
+        if (cambios['guardadas'] != len(self._activas)
+                or min(cambios['registradas'], self.limite_historial) != len(self._historial)):
+            self.invalidar()
+
+        return cambio_activas, cambio_historial
+
+    def agregar_antiguas(self, ordenes: List[Dict[str, Any]], hay_mas: bool) -> bool:
+        """
+        Agrega una página del historial anterior a la orden más antigua
+        mostrada (OrdenManager.obtener_historial_pagina).
+
+        Args:
+            hay_mas: Si el servidor tiene órdenes aún más antiguas
+
+        Returns:
+            True si el historial cambió
+        """
+        nuevas = [orden for orden in ordenes if orden['folio_numero'] not in self._historial]
+        for orden in nuevas:
+            self._historial[orden['folio_numero']] = orden
+        self.limite_historial += len(nuevas)
+        self._hay_mas_historial = hay_mas
+        return bool(nuevas)
+
+    def siguiente_historial(self) -> Optional[Tuple[datetime, int]]:
+        """Llave para pedir la página anterior a la orden más antigua, o None si no hay más"""
+        if not self._hay_mas_historial or not self._historial:
+            return None
+        ultima = min(self._historial.values(),
+                     key=lambda orden: (orden['fecha_modificacion'], orden['folio_numero']))
+        return ultima['fecha_modificacion'], ultima['folio_numero']
+
+    @staticmethod
+    def _poner(lista: Dict[int, Dict[str, Any]], folio: int, orden: Optional[Dict[str, Any]]) -> bool:
+        """Agrega, reemplaza o quita (orden=None) una orden; True si la lista cambió"""
+        if orden is not None:
+            lista[folio] = orden
+            return True
+        return lista.pop(folio, None) is not None
+
+    # ==================== LISTAS ====================
+
+    def activas(self) -> List[Dict[str, Any]]:
+        """Órdenes guardadas, por folio (como obtener_ordenes_activas)"""
+        return [self._activas[folio] for folio in sorted(self._activas)]
+
+    def historial(self) -> List[Dict[str, Any]]:
+        """Órdenes registradas, de la más reciente a la más antigua (como obtener_historial)"""
+        return sorted(self._historial.values(),
+                      key=lambda orden: (orden['fecha_modificacion'], orden['folio_numero']),
+                      reverse=True)
@@ -6,6 +6,8 @@ from tkinter import ttk, messagebox, simpledialog
 import uuid
 from typing import Dict, List, Optional
 
+from src.ui.filas_treeview import FilasTreeview
+
 class SeccionCarrito:
     """Representa una sección del carrito"""
     def __init__(self, id_seccion: str, nombre: str):
@@ -95,6 +97,14 @@ class CarritoConSecciones:
         # Vincular eventos de clic y doble clic
         self.tree.bind("<ButtonRelease-1>", self._handle_click)
         self.tree.bind("<Double-1>", self._handle_double_click)
+        
+        # Filas: (clave, texto, valores, tags, hijas)
+        self.filas = FilasTreeview(self.tree,
+                                   clave=lambda fila: fila[0],
+                                   texto=lambda fila: fila[1],
+                                   valores=lambda fila: fila[2],
+                                   etiquetas=lambda fila: fila[3],
+                                   hijos=lambda fila: fila[4])
 
     def _handle_double_click(self, event):
         """Maneja el doble clic para editar la cantidad de un item."""
@@ -316,41 +326,34 @@ class CarritoConSecciones:
             return True
         return False
 
+    def _fila_item(self, key: str, item: ItemCarrito) -> tuple:
+        """Fila del árbol para un producto; el tag es la clave del item"""
+        return (key, item.nombre_producto,
+                (f"{item.cantidad:.2f}",
+                 item.unidad_producto,
+                 f"${item.precio_unitario:.2f}",
+                 f"${item.subtotal:.2f}",
+                 "🗑️"),
+                (key,), ())
+
     def _actualizar_display(self):
         """Actualiza la visualización del carrito"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         if not self.sectioning_enabled:
-            for key, item in self.items.items():
-                self.tree.insert("", "end",
-                                 text=item.nombre_producto,
-                                 values=(f"{item.cantidad:.2f}",
-                                         item.unidad_producto,
-                                         f"${item.precio_unitario:.2f}",
-                                         f"${item.subtotal:.2f}",
-                                         "🗑️"),
-                                 tags=(key,))
+            filas = [self._fila_item(key, item) for key, item in self.items.items()]
         else:
+            filas = []
             for seccion_id, seccion in self.secciones.items():
-                items_seccion = [item for item in self.items.values() if item.seccion_id == seccion_id]
+                items_seccion = [self._fila_item(key, item) for key, item in self.items.items()
+                                 if item.seccion_id == seccion_id]
                 
                 if items_seccion:
-                    subtotal_seccion = sum(item.subtotal for item in items_seccion)
-                    seccion_node = self.tree.insert("", "end", text=seccion.nombre,
-                                                  values=("", "", "", f"${subtotal_seccion:.2f}", ""),
-                                                  tags=("seccion",), open=True)
-                    
-                    for key, item in self.items.items():
-                        if item.seccion_id == seccion_id:
-                            self.tree.insert(seccion_node, "end",
-                                             text=item.nombre_producto,
-                                             values=(f"{item.cantidad:.2f}",
-                                                     item.unidad_producto,
-                                                     f"${item.precio_unitario:.2f}",
-                                                     f"${item.subtotal:.2f}",
-                                                     "🗑️"),
-                                             tags=(key,))
+                    subtotal_seccion = sum(self.items[fila[0]].subtotal for fila in items_seccion)
+                    filas.append((("seccion", seccion_id), seccion.nombre,
+                                  ("", "", "", f"${subtotal_seccion:.2f}", ""),
+                                  ("seccion",), items_seccion))
+        
+        # Solo cambia lo que cambió: agregar un producto no redibuja todo el carrito
+        self.filas.actualizar(filas)
 
     def _handle_click(self, event):
         """Maneja los clics en el árbol para eliminar items"""
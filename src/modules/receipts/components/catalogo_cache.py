@@ -0,0 +1,171 @@
+# catalogo_cache.py
+# Caché en memoria del catálogo de productos y precios por grupo de cliente
+
+import time
+import threading
+from contextlib import closing
+from mysql.connector import Error
+from src.utils.indice_busqueda import IndiceBusqueda
+from .database import conectar
+
+# Segundos entre verificaciones de la firma del catálogo contra la base
+VERIFICAR_CADA = 30
+
+
+class CatalogoCache:
+    """
+    Mantiene en memoria los productos con stock y su precio para cada grupo.
+
+    El catálogo de un grupo se carga una sola vez (producto JOIN precio_por_grupo)
+    y las búsquedas se resuelven en memoria. Cada VERIFICAR_CADA segundos se
+    consulta una firma ligera del grupo (última fecha_actualizacion de precios,
+    productos disponibles y un checksum) y el catálogo se recarga solo si cambió.
+    """
+
+    def __init__(self, verificar_cada=VERIFICAR_CADA):
+        self.verificar_cada = verificar_cada
+        self._grupos = {}
+        self._lock = threading.Lock()
+
+    # ==================== CONSULTAS ====================
+
+    def buscar(self, id_grupo, texto=""):
+        """
+        Busca productos del grupo por nombre con el índice de búsqueda
+        (sin acentos, por prefijo de palabra y tolerante a errores de tecleo).
+        Con texto vacío retorna todo el catálogo ordenado por nombre.
+        Retorna lista de diccionarios con id, nombre, precio, unidad y es_especial.
+        """
+        entrada = self._obtener_entrada(id_grupo)
+        if not texto.strip():
+            return list(entrada['productos'])
+        return [entrada['por_id'][id_producto] for id_producto in entrada['indice'].buscar(texto)]
+
+    def obtener_producto(self, id_grupo, id_producto):
+        """
+        Retorna el producto del catálogo ya cargado, sin consultar la base.
+        None si el grupo no está cargado o el producto no pertenece a él.
+        """
+        with self._lock:
+            entrada = self._grupos.get(id_grupo)
+        if entrada is None:
+            return None
+        return entrada['por_id'].get(id_producto)
+
+    def invalidar(self, id_grupo=None):
+        """Descarta el catálogo de un grupo, o de todos si no se indica"""
+        with self._lock:
+            if id_grupo is None:
+                self._grupos.clear()
+            else:
+                self._grupos.pop(id_grupo, None)
+
+    # ==================== CARGA Y VERIFICACIÓN ====================
+
+    def _obtener_entrada(self, id_grupo):
+        with self._lock:
+            entrada = self._grupos.get(id_grupo)
+
+        ahora = time.monotonic()
+        if entrada is not None and ahora - entrada['verificado'] < self.verificar_cada:
+            return entrada
+
+        firma = self._consultar_firma(id_grupo)
+        if entrada is not None:
+            if firma is not None and firma == entrada['firma']:
+                entrada['verificado'] = ahora
+                return entrada
+            if firma is None:
+                # Sin conexión: seguir con lo que hay en memoria
+                return entrada
+
+        productos = self._cargar_productos(id_grupo)
+        if productos is None:
+            # Sin guardar: la próxima búsqueda vuelve a intentar la carga
+            return entrada or self._crear_entrada([], None, ahora)
+
+        entrada = self._crear_entrada(productos, firma, ahora)
+        with self._lock:
+            self._grupos[id_grupo] = entrada
+        return entrada
+
+    def _crear_entrada(self, productos, firma, ahora):
+        return {
+            'productos': productos,
+            'indice': IndiceBusqueda((p['id'], p['nombre']) for p in productos),
+            'por_id': {p['id']: p for p in productos},
+            'firma': firma,
+            'verificado': ahora,
+        }
+
+    def _consultar_firma(self, id_grupo):
+        """Retorna una tupla que cambia si cambian los precios o el stock del grupo"""
+        conn = conectar()
+        if not conn: return None
+
+        firma = None
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                sql = """
+                    SELECT
+                        MAX(ppg.fecha_actualizacion),
+                        COUNT(*),
+                        BIT_XOR(CRC32(CONCAT_WS('|', p.id_producto, p.nombre_producto,
+                                                ppg.precio_base, p.unidad_producto, p.es_especial)))
+                    FROM producto p
+                    JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
+                    WHERE ppg.id_grupo = %s
+                    AND p.stock > 0
+                """
+                cursor.execute(sql, (id_grupo,))
+                firma = tuple(cursor.fetchone())
+
+            except Error as e:
+                print(f"Error al verificar catálogo del grupo {id_grupo}: {e}")
+        return firma
+
+    def _cargar_productos(self, id_grupo):
+        """Retorna los productos con stock del grupo, o None si no se pudieron leer"""
+        conn = conectar()
+        if not conn: return None
+
+        productos = None
+        with conn, closing(conn.cursor(dictionary=True)) as cursor:
+            try:
+                sql = """
+                    SELECT
+                        p.id_producto as id,
+                        p.nombre_producto as nombre,
+                        ppg.precio_base as precio,
+                        p.unidad_producto as unidad,
+                        p.es_especial
+                    FROM producto p
+                    JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
+                    WHERE ppg.id_grupo = %s
+                    AND p.stock > 0
+                    ORDER BY p.nombre_producto
+                """
+                cursor.execute(sql, (id_grupo,))
+                productos = cursor.fetchall()
+
+            except Error as e:
+                print(f"Error al cargar catálogo del grupo {id_grupo}: {e}")
+        return productos
+
+
+# Instancia compartida por todas las ventanas de ventas del proceso
+_catalogo = None
+_catalogo_lock = threading.Lock()
+
+def obtener_catalogo():
+    """
+    Retorna la caché de catálogo compartida del proceso.
+
+    Returns:
+        CatalogoCache: Instancia compartida
+    """
+    global _catalogo
+    with _catalogo_lock:
+        if _catalogo is None:
+            _catalogo = CatalogoCache()
+        return _catalogo
@@ -5,7 +5,10 @@ import mysql.connector
 from mysql.connector import Error
 import bcrypt  # Para el manejo seguro de contraseñas
 from datetime import date
+from contextlib import closing
 import json
+import os
+import threading
 
 # --- CONFIGURACIÓN DE CONEXIÓN A GOOGLE CLOUD SQL ---
 try:
@@ -47,11 +50,35 @@ except ImportError:
 # Obtener configuración de la base de datos
 db_config = get_db_config()
 
+# --- POOL DE CONEXIONES COMPARTIDO ---
+try:
+    from src.database.pool import obtener_pool
+except ImportError:
+    # Ejecución aislada: sin pool, cada conexión es directa
+    obtener_pool = None
+
+# --- CACHÉ LOCAL DE TABLAS DE REFERENCIA ---
+try:
+    from src.database.cache_referencia import obtener_cache_referencia
+except ImportError:
+    obtener_cache_referencia = None
+
+# --- SALDOS POR CLIENTE (tabla saldo_cliente) ---
+try:
+    from src.modules.deudas.saldos_clientes import actualizar_saldo_cliente, bloquear_saldo_cliente
+except ImportError:
+    # Ejecución aislada: scripts/verificar_saldos_clientes.py concilia después
+    actualizar_saldo_cliente = bloquear_saldo_cliente = None
+
 def conectar():
-    """Establece la conexión a la base de datos."""
+    """
+    Obtiene una conexión del pool compartido.
+    Llamar a close() la devuelve al pool en lugar de cerrarla.
+    """
     try:
-        conn = mysql.connector.connect(**db_config)
-        return conn
+        if obtener_pool is not None:
+            return obtener_pool().obtener()
+        return mysql.connector.connect(**db_config)
     except Error as e:
         print(f"Error al conectar a MySQL: {e}")
         return None
@@ -67,26 +94,22 @@ def validar_usuario(username, password):
     if not conn: return None
     
     rol_usuario = None
-    cursor = conn.cursor(dictionary=True)  # dictionary=True para obtener resultados como dict
-    
-    try:
-        query = "SELECT password_hash, rol FROM usuarios_sistema WHERE username = %s AND activo = TRUE"
-        cursor.execute(query, (username,))
-        usuario = cursor.fetchone()
-
-        if usuario:
-            # Compara la contraseña proporcionada con el hash almacenado
-            if bcrypt.checkpw(password.encode('utf-8'), usuario['password_hash'].encode('utf-8')):
-                rol_usuario = usuario['rol']
-                # Actualizar último acceso
-                update_query = "UPDATE usuarios_sistema SET ultimo_acceso = NOW() WHERE username = %s"
-                cursor.execute(update_query, (username,))
-                conn.commit()
-    except Error as e:
-        print(f"Error al validar usuario: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+    with conn, closing(conn.cursor(dictionary=True)) as cursor:
+        try:
+            query = "SELECT password_hash, rol FROM usuarios_sistema WHERE username = %s AND activo = TRUE"
+            cursor.execute(query, (username,))
+            usuario = cursor.fetchone()
+
+            if usuario:
+                # Compara la contraseña proporcionada con el hash almacenado
+                if bcrypt.checkpw(password.encode('utf-8'), usuario['password_hash'].encode('utf-8')):
+                    rol_usuario = usuario['rol']
+                    # Actualizar último acceso
+                    update_query = "UPDATE usuarios_sistema SET ultimo_acceso = NOW() WHERE username = %s"
+                    cursor.execute(update_query, (username,))
+                    conn.commit()
+        except Error as e:
+            print(f"Error al validar usuario: {e}")
         
     return rol_usuario
 
@@ -94,19 +117,19 @@ def validar_usuario(username, password):
 
 def obtener_grupos():
     """Obtiene todos los grupos de clientes."""
+    if obtener_cache_referencia is not None:
+        return [(g['id_grupo'], g['clave_grupo']) for g in obtener_cache_referencia().filas('grupo')]
+    
     conn = conectar()
     if not conn: return []
     
     grupos = []
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT id_grupo, clave_grupo FROM grupo ORDER BY clave_grupo")
-        grupos = cursor.fetchall()
-    except Error as e:
-        print(f"Error al obtener grupos: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            cursor.execute("SELECT id_grupo, clave_grupo FROM grupo ORDER BY clave_grupo")
+            grupos = cursor.fetchall()
+        except Error as e:
+            print(f"Error al obtener grupos: {e}")
     return grupos
 
 def obtener_clientes_por_grupo(id_grupo):
@@ -115,16 +138,13 @@ def obtener_clientes_por_grupo(id_grupo):
     if not conn: return []
     
     clientes = []
-    cursor = conn.cursor()
-    try:
-        query = "SELECT id_cliente, nombre_cliente FROM cliente WHERE id_grupo = %s ORDER BY nombre_cliente"
-        cursor.execute(query, (id_grupo,))
-        clientes = cursor.fetchall()
-    except Error as e:
-        print(f"Error al obtener clientes: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            query = "SELECT id_cliente, nombre_cliente FROM cliente WHERE id_grupo = %s ORDER BY nombre_cliente"
+            cursor.execute(query, (id_grupo,))
+            clientes = cursor.fetchall()
+        except Error as e:
+            print(f"Error al obtener clientes: {e}")
     return clientes
 
 # --- Funciones de Productos y Precios (ADAPTADAS PARA NUEVA ESTRUCTURA) ---
@@ -138,24 +158,21 @@ def buscar_productos_por_grupo(id_grupo, texto_busqueda):
     if not conn: return []
     
     productos = []
-    cursor = conn.cursor()
-    try:
-        # Unimos producto con precio_por_grupo para obtener el precio correcto
-        query = """
-            SELECT p.nombre_producto, ppg.precio_base, p.unidad_producto
-            FROM producto p
-            JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
-            WHERE ppg.id_grupo = %s AND p.nombre_producto LIKE %s AND p.stock > 0
-            ORDER BY p.nombre_producto
-        """
-        valores = (id_grupo, f"%{texto_busqueda}%")
-        cursor.execute(query, valores)
-        productos = cursor.fetchall()
-    except Error as e:
-        print(f"Error al buscar productos: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            # Unimos producto con precio_por_grupo para obtener el precio correcto
+            query = """
+                SELECT p.nombre_producto, ppg.precio_base, p.unidad_producto
+                FROM producto p
+                JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
+                WHERE ppg.id_grupo = %s AND p.nombre_producto LIKE %s AND p.stock > 0
+                ORDER BY p.nombre_producto
+            """
+            valores = (id_grupo, f"%{texto_busqueda}%")
+            cursor.execute(query, valores)
+            productos = cursor.fetchall()
+        except Error as e:
+            print(f"Error al buscar productos: {e}")
     return productos
 
 def buscar_productos_por_grupo_con_especial(id_grupo, texto_busqueda):
@@ -168,23 +185,20 @@ def buscar_productos_por_grupo_con_especial(id_grupo, texto_busqueda):
     if not conn: return []
     
     productos = []
-    cursor = conn.cursor()
-    try:
-        query = """
-            SELECT p.nombre_producto, ppg.precio_base, p.es_especial, p.unidad_producto
-            FROM producto p
-            JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
-            WHERE ppg.id_grupo = %s AND p.nombre_producto LIKE %s AND p.stock > 0
-            ORDER BY p.nombre_producto
-        """
-        valores = (id_grupo, f"%{texto_busqueda}%")
-        cursor.execute(query, valores)
-        productos = cursor.fetchall()
-    except Error as e:
-        print(f"Error al buscar productos con es_especial: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            query = """
+                SELECT p.nombre_producto, ppg.precio_base, p.es_especial, p.unidad_producto
+                FROM producto p
+                JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
+                WHERE ppg.id_grupo = %s AND p.nombre_producto LIKE %s AND p.stock > 0
+                ORDER BY p.nombre_producto
+            """
+            valores = (id_grupo, f"%{texto_busqueda}%")
+            cursor.execute(query, valores)
+            productos = cursor.fetchall()
+        except Error as e:
+            print(f"Error al buscar productos con es_especial: {e}")
     return productos
 
 def buscar_insumos(query, id_grupo):
@@ -196,30 +210,27 @@ def buscar_insumos(query, id_grupo):
     if not conn: return []
     
     resultados = []
-    cursor = conn.cursor(dictionary=True)
-    try:
-        sql = """
-            SELECT 
-                p.id_producto as id,
-                p.nombre_producto as nombre, 
-                ppg.precio_base as precio,
-                p.unidad_producto as unidad,
-                p.es_especial
-            FROM producto p
-            JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
-            WHERE ppg.id_grupo = %s 
-            AND p.nombre_producto LIKE %s 
-            AND p.stock > 0
-            ORDER BY p.nombre_producto
-        """
-        cursor.execute(sql, (id_grupo, f"%{query}%"))
-        resultados = cursor.fetchall()
+    with conn, closing(conn.cursor(dictionary=True)) as cursor:
+        try:
+            sql = """
+                SELECT 
+                    p.id_producto as id,
+                    p.nombre_producto as nombre, 
+                    ppg.precio_base as precio,
+                    p.unidad_producto as unidad,
+                    p.es_especial
+                FROM producto p
+                JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
+                WHERE ppg.id_grupo = %s 
+                AND p.nombre_producto LIKE %s 
+                AND p.stock > 0
+                ORDER BY p.nombre_producto
+            """
+            cursor.execute(sql, (id_grupo, f"%{query}%"))
+            resultados = cursor.fetchall()
         
-    except Error as e:
-        print(f"Error al buscar insumos: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+        except Error as e:
+            print(f"Error al buscar insumos: {e}")
     return resultados
 
 def buscar_todos_insumos(id_grupo):
@@ -231,78 +242,370 @@ def buscar_todos_insumos(id_grupo):
     if not conn: return []
     
     resultados = []
-    cursor = conn.cursor(dictionary=True)
-    try:
-        sql = """
-            SELECT 
-                p.id_producto as id,
-                p.nombre_producto as nombre, 
-                ppg.precio_base as precio,
-                p.unidad_producto as unidad,
-                p.es_especial
-            FROM producto p
-            JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
-            WHERE ppg.id_grupo = %s 
-            AND p.stock > 0
-            ORDER BY p.nombre_producto
-        """
-        cursor.execute(sql, (id_grupo,))
-        resultados = cursor.fetchall()
+    with conn, closing(conn.cursor(dictionary=True)) as cursor:
+        try:
+            sql = """
+                SELECT 
+                    p.id_producto as id,
+                    p.nombre_producto as nombre, 
+                    ppg.precio_base as precio,
+                    p.unidad_producto as unidad,
+                    p.es_especial
+                FROM producto p
+                JOIN precio_por_grupo ppg ON p.id_producto = ppg.id_producto
+                WHERE ppg.id_grupo = %s 
+                AND p.stock > 0
+                ORDER BY p.nombre_producto
+            """
+            cursor.execute(sql, (id_grupo,))
+            resultados = cursor.fetchall()
         
-    except Error as e:
-        print(f"Error al buscar todos los insumos: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+        except Error as e:
+            print(f"Error al buscar todos los insumos: {e}")
     return resultados
 
 # --- Funciones de Numeración de Folios (ACTUALIZADAS) ---
 
+def _reservar_folios(cursor, cantidad=1):
+    """
+    Reserva `cantidad` folios consecutivos de folio_sequence usando el cursor dado
+    y retorna el primero. No hace commit: el bloqueo de la fila de la secuencia
+    dura hasta que el llamador confirme o revierta su transacción.
+    """
+    # LAST_INSERT_ID(expr) devuelve el nuevo valor en la misma respuesta del
+    # UPDATE, sin un SELECT ... FOR UPDATE previo
+    cursor.execute(
+        "UPDATE folio_sequence SET next_val = LAST_INSERT_ID(next_val + %s) WHERE id = 1",
+        (cantidad,)
+    )
+    if cursor.rowcount == 0:
+        # Inicializar la secuencia si no existe
+        cursor.execute(
+            "INSERT INTO folio_sequence (id, next_val) VALUES (1, %s)",
+            (cantidad + 1,)
+        )
+        return 1
+    return cursor.lastrowid - cantidad
+
 def obtener_siguiente_folio():
     """
-    Obtiene el siguiente número de folio disponible desde la tabla folio_sequence.
+    Obtiene el siguiente número de folio disponible desde la tabla folio_sequence
+    en una transacción propia.
     Retorna un número de folio único e incremental.
     """
     conn = conectar()
     if not conn: return None
     
-    cursor = conn.cursor()
     siguiente_folio = None
-    
-    try:
-        # Iniciar transacción para evitar race conditions
-        conn.start_transaction()
-        
-        # Usar la tabla folio_sequence para obtener el siguiente folio con bloqueo
-        query = "SELECT next_val FROM folio_sequence WHERE id = 1 FOR UPDATE"
-        cursor.execute(query)
-        resultado = cursor.fetchone()
-        
-        if resultado:
-            siguiente_folio = resultado[0]
-            
-            # Actualizar el siguiente valor
-            update_query = "UPDATE folio_sequence SET next_val = next_val + 1 WHERE id = 1"
-            cursor.execute(update_query)
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            conn.start_transaction()
+            siguiente_folio = _reservar_folios(cursor)
             conn.commit()
-        else:
-            # Inicializar la secuencia si no existe
-            insert_query = "INSERT INTO folio_sequence (id, next_val) VALUES (1, 1)"
-            cursor.execute(insert_query)
-            conn.commit()
-            siguiente_folio = 1
             
-    except Error as e:
-        print(f"Error al obtener siguiente folio: {e}")
-        conn.rollback()
-    finally:
-        cursor.close()
-        conn.close()
+        except Error as e:
+            print(f"Error al obtener siguiente folio: {e}")
+            conn.rollback()
+            siguiente_folio = None
     
     return siguiente_folio
 
+class ReservaFolios:
+    """
+    Reserva bloques de folios para una estación de trabajo y los entrega localmente.
+    
+    Cada bloque se toma de folio_sequence en una transacción corta, así las ventas
+    no compiten por la fila de la secuencia mientras dura su propia transacción.
+    Los folios de un bloque que no lleguen a usarse (ventas revertidas o cierre
+    de la aplicación) quedan como huecos en la numeración.
+    """
+    
+    def __init__(self, tamano_bloque):
+        if tamano_bloque < 1:
+            raise ValueError("El tamaño de bloque debe ser al menos 1")
+        self.tamano_bloque = tamano_bloque
+        self._siguiente = 0
+        self._limite = 0
+        self._lock = threading.Lock()
+    
+    def siguiente(self):
+        """Retorna el siguiente folio del bloque local, reservando otro si se agotó"""
+        with self._lock:
+            if self._siguiente >= self._limite:
+                inicio = self._reservar_bloque()
+                if inicio is None:
+                    return None
+                self._siguiente = inicio
+                self._limite = inicio + self.tamano_bloque
+            folio = self._siguiente
+            self._siguiente += 1
+            return folio
+    
+    def disponibles(self):
+        """Folios del bloque actual que aún no se han entregado"""
+        with self._lock:
+            return self._limite - self._siguiente
+    
+    def _reservar_bloque(self):
+        conn = conectar()
+        if not conn: return None
+        
+        inicio = None
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                conn.start_transaction()
+                inicio = _reservar_folios(cursor, self.tamano_bloque)
+                conn.commit()
+            except Error as e:
+                print(f"Error al reservar bloque de folios: {e}")
+                conn.rollback()
+                inicio = None
+        return inicio
+
+# Modo de reserva por bloques: FOLIO_BLOCK_SIZE > 0 lo activa para esta estación
+_reserva_folios = None
+_reserva_folios_lock = threading.Lock()
+
+def obtener_reserva_folios():
+    """Retorna la reserva de folios de la estación, o None si se asignan uno a uno"""
+    global _reserva_folios
+    tamano_bloque = int(os.getenv('FOLIO_BLOCK_SIZE', 0))
+    if tamano_bloque <= 0:
+        return None
+    with _reserva_folios_lock:
+        if _reserva_folios is None or _reserva_folios.tamano_bloque != tamano_bloque:
+            _reserva_folios = ReservaFolios(tamano_bloque)
+        return _reserva_folios
+
 # --- Funciones de Facturación (CORREGIDA PARA NUEVA ESTRUCTURA) ---
 
+# Máximo de filas por sentencia al insertar líneas y descontar stock en lote
+TAMANO_LOTE = 500
+
+def _insertar_factura(cursor, id_cliente, items_carrito, fecha_venta, folio_numero):
+    """
+    Inserta la factura, sus líneas y descuenta el stock usando el cursor dado.
+    Las líneas se escriben con un INSERT multi-fila y el stock con un único
+    UPDATE ... CASE, así los viajes a la base no crecen con el tamaño del carrito.
+    No hace commit: debe ejecutarse dentro de la transacción del llamador.
+    Retorna el ID de la factura creada.
+    """
+    query_factura = """
+        INSERT INTO factura (fecha_factura, id_cliente, folio_numero) 
+        VALUES (%s, %s, %s)
+    """
+    cursor.execute(query_factura, (fecha_venta, id_cliente, folio_numero))
+    id_factura = cursor.lastrowid  # Obtener el ID de la factura recién creada
+
+    detalles = []
+    cantidades_por_producto = {}
+    for item in items_carrito:
+        # El formato correcto: [id_producto, nombre, precio, cantidad, subtotal]
+        id_producto = int(item[0])
+        cantidad = float(item[3])  # Asegurar que sea float
+        precio = float(item[2])    # Asegurar que sea float
+        
+        detalles.append((id_factura, id_producto, cantidad, precio))
+        # Un mismo producto puede aparecer en varias secciones del carrito
+        cantidades_por_producto[id_producto] = cantidades_por_producto.get(id_producto, 0.0) + cantidad
+
+    for inicio in range(0, len(detalles), TAMANO_LOTE):
+        _insertar_detalles(cursor, detalles[inicio:inicio + TAMANO_LOTE])
+
+    # Ordenar por ID para que ventas concurrentes bloqueen los productos en el mismo orden
+    descuentos = sorted(cantidades_por_producto.items())
+    for inicio in range(0, len(descuentos), TAMANO_LOTE):
+        _descontar_stock(cursor, descuentos[inicio:inicio + TAMANO_LOTE])
+
+    return id_factura
+
+def _insertar_detalles(cursor, detalles):
+    """Inserta varias líneas de detalle_factura en una sola sentencia"""
+    if not detalles:
+        return
+    marcadores = ", ".join(["(%s, %s, %s, %s)"] * len(detalles))
+    query_detalle = f"""
+        INSERT INTO detalle_factura (id_factura, id_producto, cantidad_factura, precio_unitario_venta)
+        VALUES {marcadores}
+    """
+    cursor.execute(query_detalle, [valor for detalle in detalles for valor in detalle])
+
+def _descontar_stock(cursor, descuentos):
+    """
+    Descuenta el stock de varios productos en una sola sentencia.
+    
+    Args:
+        descuentos: Lista de tuplas (id_producto, cantidad)
+    """
+    if not descuentos:
+        return
+    casos = " ".join(["WHEN %s THEN %s"] * len(descuentos))
+    marcadores = ", ".join(["%s"] * len(descuentos))
+    query_stock = f"""
+        UPDATE producto
+        SET stock = stock - CASE id_producto {casos} END
+        WHERE id_producto IN ({marcadores})
+    """
+    valores = [valor for descuento in descuentos for valor in descuento]
+    valores.extend(id_producto for id_producto, _ in descuentos)
+    cursor.execute(query_stock, valores)
+
+def _finalizar_factura(cursor, id_factura, id_cliente):
+    """
+    Genera la deuda de la factura una sola vez, con todas sus líneas ya insertadas,
+    actualiza el saldo del cliente y acumula la factura en el resumen ventas_diarias.
+    Reemplaza al trigger after_detalle_insert_update_deuda, que recalculaba
+    el total completo con cada línea (O(n²) lecturas por factura).
+    """
+    if bloquear_saldo_cliente is not None:
+        bloquear_saldo_cliente(cursor, id_cliente)
+
+    query_deuda = """
+        INSERT INTO deuda (id_cliente, id_factura, monto, fecha_generada, monto_pagado, pagado, descripcion)
+        SELECT 
+            f.id_cliente,
+            f.id_factura,
+            SUM(df.cantidad_factura * df.precio_unitario_venta),
+            CURDATE(),
+            0.00,
+            FALSE,
+            CONCAT('Deuda por factura #', f.id_factura)
+        FROM factura f
+        JOIN detalle_factura df ON f.id_factura = df.id_factura
+        WHERE f.id_factura = %s
+        GROUP BY f.id_cliente, f.id_factura
+        ON DUPLICATE KEY UPDATE
+            monto = VALUES(monto)
+    """
+    cursor.execute(query_deuda, (id_factura,))
+    if actualizar_saldo_cliente is not None:
+        actualizar_saldo_cliente(cursor, id_cliente)
+
+    # Mantener el resumen diario de ventas en la misma transacción
+    _acumular_ventas_diarias(cursor, id_factura)
+
+# --- Resumen Diario de Ventas (tabla ventas_diarias) ---
+
+# Agregado por día × producto × grupo de cliente. Los ingresos usan la misma
+# fórmula que vista_detalle_factura_con_descuento (precio del grupo menos el
+# descuento del tipo de cliente, redondeado por línea) con el precio vigente:
+# al cambiar un precio_por_grupo se recalcula ese producto y grupo
+# (recalcular_ventas_diarias_producto)
+SELECT_VENTAS_DIARIAS = """
+    SELECT
+        f.fecha_factura,
+        df.id_producto,
+        c.id_grupo,
+        SUM(df.cantidad_factura),
+        COALESCE(SUM(ROUND(df.cantidad_factura * pg.precio_base * (1 - tc.descuento/100), 2)), 0),
+        SUM(df.cantidad_factura * df.precio_unitario_venta),
+        COUNT(*),
+        COUNT(DISTINCT df.id_factura)
+    FROM detalle_factura df
+    JOIN factura f ON df.id_factura = f.id_factura
+    JOIN cliente c ON f.id_cliente = c.id_cliente
+    JOIN grupo g ON c.id_grupo = g.id_grupo
+    LEFT JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
+    LEFT JOIN precio_por_grupo pg ON df.id_producto = pg.id_producto AND c.id_grupo = pg.id_grupo
+    WHERE {filtro}
+    GROUP BY f.fecha_factura, df.id_producto, c.id_grupo
+"""
+
+_INSERT_VENTAS_DIARIAS = """
+    INSERT INTO ventas_diarias
+        (fecha, id_producto, id_grupo, cantidad_vendida, ingresos, ingresos_registrados, lineas, facturas)
+"""
+
+def _acumular_ventas_diarias(cursor, id_factura):
+    """
+    Suma las líneas de una factura al resumen ventas_diarias.
+    No hace commit: debe ejecutarse dentro de la transacción del llamador.
+    """
+    query = _INSERT_VENTAS_DIARIAS + SELECT_VENTAS_DIARIAS.format(filtro="df.id_factura = %s") + """
+        ON DUPLICATE KEY UPDATE
+            cantidad_vendida = cantidad_vendida + VALUES(cantidad_vendida),
+            ingresos = ingresos + VALUES(ingresos),
+            ingresos_registrados = ingresos_registrados + VALUES(ingresos_registrados),
+            lineas = lineas + VALUES(lineas),
+            facturas = facturas + VALUES(facturas)
+    """
+    cursor.execute(query, (id_factura,))
+
+def _recalcular_ventas_diarias(cursor, filtro_facturas, parametros):
+    """
+    Borra y vuelve a sumar ventas_diarias para las fechas que cumplen el
+    filtro (escrito sobre fecha_factura). No hace commit.
+    """
+    cursor.execute(
+        "DELETE FROM ventas_diarias WHERE " + filtro_facturas.replace("fecha_factura", "fecha"),
+        parametros
+    )
+    cursor.execute(
+        _INSERT_VENTAS_DIARIAS + SELECT_VENTAS_DIARIAS.format(
+            filtro=filtro_facturas.replace("fecha_factura", "f.fecha_factura")),
+        parametros
+    )
+    return cursor.rowcount
+
+def recalcular_ventas_diarias_fechas(cursor, fechas):
+    """
+    Recalcula ventas_diarias solo para las fechas indicadas (p. ej. las de
+    facturas recién borradas).
+    No hace commit: debe ejecutarse dentro de la transacción del llamador.
+    """
+    fechas = sorted(set(fechas))
+    if not fechas:
+        return 0
+    marcadores = ", ".join(["%s"] * len(fechas))
+    return _recalcular_ventas_diarias(cursor, f"fecha_factura IN ({marcadores})", fechas)
+
+def recalcular_ventas_diarias_producto(cursor, id_producto, id_grupo):
+    """
+    Recalcula ventas_diarias de un producto para un grupo de clientes en todo
+    el historial (p. ej. tras cambiar su precio_por_grupo).
+    No hace commit: debe ejecutarse dentro de la transacción del llamador.
+    """
+    parametros = (id_producto, id_grupo)
+    cursor.execute("DELETE FROM ventas_diarias WHERE id_producto = %s AND id_grupo = %s", parametros)
+    cursor.execute(
+        _INSERT_VENTAS_DIARIAS + SELECT_VENTAS_DIARIAS.format(
+            filtro="df.id_producto = %s AND c.id_grupo = %s"),
+        parametros
+    )
+    return cursor.rowcount
+
+def reconstruir_ventas_diarias(desde=None, hasta=None):
+    """
+    Recalcula ventas_diarias desde detalle_factura para un rango de fechas
+    (todo el historial si no se indica). Útil tras cambios de grupo de
+    clientes, de descuentos o correcciones manuales de facturas.
+    Retorna el número de filas del resumen generadas, o None si hubo error.
+    """
+    condiciones, parametros = [], []
+    if desde is not None:
+        condiciones.append("fecha_factura >= %s")
+        parametros.append(desde)
+    if hasta is not None:
+        condiciones.append("fecha_factura <= %s")
+        parametros.append(hasta)
+    filtro_facturas = " AND ".join(condiciones) or "TRUE"
+
+    conn = conectar()
+    if not conn: return None
+
+    filas = None
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            conn.start_transaction()
+            filas = _recalcular_ventas_diarias(cursor, filtro_facturas, parametros)
+            conn.commit()
+
+        except Error as e:
+            print(f"Error al reconstruir ventas diarias: {e}")
+            conn.rollback()
+            filas = None
+    return filas
+
 def crear_factura_completa(id_cliente, items_carrito, fecha_venta=None, folio_especifico=None):
     """
     Crea una transacción completa: factura, detalles, deuda y actualiza stock.
@@ -325,69 +628,43 @@ def crear_factura_completa(id_cliente, items_carrito, fecha_venta=None, folio_es
     conn = conectar()
     if not conn: return None
     
-    cursor = conn.cursor()
     id_factura_nueva = None
     folio_numero = None
-    
-    try:
-        # Iniciar una transacción para asegurar que todas las operaciones se completen
-        conn.start_transaction()
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            # 1. Obtener el número de folio (específico, del bloque reservado o de la secuencia)
+            reserva = obtener_reserva_folios() if folio_especifico is None else None
+            if folio_especifico is not None:
+                folio_numero = folio_especifico
+                print(f"Usando folio específico para orden guardada: {folio_numero}")
+            elif reserva is not None:
+                folio_numero = reserva.siguiente()
+                if folio_numero is None:
+                    raise Error("No se pudo obtener el número de folio")
+
+            # Iniciar una transacción para asegurar que todas las operaciones se completen
+            conn.start_transaction()
 
-        # 1. Obtener el número de folio (específico o siguiente disponible)
-        if folio_especifico is not None:
-            folio_numero = folio_especifico
-            print(f"Usando folio específico para orden guardada: {folio_numero}")
-        else:
-            folio_numero = obtener_siguiente_folio()
             if folio_numero is None:
-                raise Error("No se pudo obtener el número de folio")
-
-        # 2. Crear la factura con número de folio
-        query_factura = """
-            INSERT INTO factura (fecha_factura, id_cliente, folio_numero) 
-            VALUES (%s, %s, %s)
-        """
-        cursor.execute(query_factura, (fecha_venta, id_cliente, folio_numero))
-        id_factura_nueva = cursor.lastrowid  # Obtener el ID de la factura recién creada
-
-        # 3. Insertar cada producto en detalle_factura y actualizar stock
-        monto_total = 0.0
-        query_detalle = """
-            INSERT INTO detalle_factura (id_factura, id_producto, cantidad_factura, precio_unitario_venta)
-            VALUES (%s, %s, %s, %s)
-        """
-        
-        query_stock = "UPDATE producto SET stock = stock - %s WHERE id_producto = %s"
+                # Sin bloque reservado: el folio se toma dentro de la misma transacción
+                folio_numero = _reservar_folios(cursor)
 
-        for item in items_carrito:
-            # El formato correcto: [id_producto, nombre, precio, cantidad, subtotal]
-            id_producto = int(item[0])
-            cantidad = float(item[3])  # Asegurar que sea float
-            precio = float(item[2])    # Asegurar que sea float
-            
-            # Insertar detalle
-            cursor.execute(query_detalle, (id_factura_nueva, id_producto, cantidad, precio))
-            # Actualizar stock
-            cursor.execute(query_stock, (cantidad, id_producto))
-            
-            monto_total += cantidad * precio
+            # 2. Crear la factura con sus líneas y actualizar stock
+            id_factura_nueva = _insertar_factura(cursor, id_cliente, items_carrito, fecha_venta, folio_numero)
 
-        # 4. Los triggers SQL se encargan automáticamente de crear la deuda
-        # (after_detalle_insert_update_deuda en disfruleg_triggers.sql)
+            # 3. Generar la deuda y el resumen diario una sola vez con la factura completa
+            _finalizar_factura(cursor, id_factura_nueva, id_cliente)
         
-        # Si todo fue exitoso, confirmar la transacción
-        conn.commit()
-        print(f"Factura creada exitosamente: ID={id_factura_nueva}, Folio={folio_numero}")
-
-    except Error as e:
-        print(f"Error en la transacción de facturación: {e}")
-        # Si algo falla, revertir todos los cambios
-        conn.rollback()
-        id_factura_nueva = None
-        folio_numero = None
-    finally:
-        cursor.close()
-        conn.close()
+            # Si todo fue exitoso, confirmar la transacción
+            conn.commit()
+            print(f"Factura creada exitosamente: ID={id_factura_nueva}, Folio={folio_numero}")
+
+        except Error as e:
+            print(f"Error en la transacción de facturación: {e}")
+            # Si algo falla, revertir todos los cambios
+            conn.rollback()
+            id_factura_nueva = None
+            folio_numero = None
         
     return {
         'id_factura': id_factura_nueva,
@@ -412,31 +689,27 @@ def guardar_orden(folio, id_cliente, usuario, datos_carrito, total_estimado):
     conn = conectar()
     if not conn: return False
     
-    cursor = conn.cursor()
     exito = False
-    
-    try:
-        # Convertir datos_carrito a JSON si es un diccionario
-        if isinstance(datos_carrito, dict):
-            datos_carrito_json = json.dumps(datos_carrito, ensure_ascii=False)
-        else:
-            datos_carrito_json = datos_carrito
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            # Convertir datos_carrito a JSON si es un diccionario
+            if isinstance(datos_carrito, dict):
+                datos_carrito_json = json.dumps(datos_carrito, ensure_ascii=False)
+            else:
+                datos_carrito_json = datos_carrito
             
-        query = """
-            INSERT INTO ordenes_guardadas 
-            (folio_numero, id_cliente, usuario_creador, datos_carrito, total_estimado, estado)
-            VALUES (%s, %s, %s, %s, %s, 'guardada')
-        """
-        cursor.execute(query, (folio, id_cliente, usuario, datos_carrito_json, total_estimado))
-        conn.commit()
-        exito = True
+            query = """
+                INSERT INTO ordenes_guardadas 
+                (folio_numero, id_cliente, usuario_creador, datos_carrito, total_estimado, estado)
+                VALUES (%s, %s, %s, %s, %s, 'guardada')
+            """
+            cursor.execute(query, (folio, id_cliente, usuario, datos_carrito_json, total_estimado))
+            conn.commit()
+            exito = True
         
-    except Error as e:
-        print(f"Error al guardar orden: {e}")
-        conn.rollback()
-    finally:
-        cursor.close()
-        conn.close()
+        except Error as e:
+            print(f"Error al guardar orden: {e}")
+            conn.rollback()
         
     return exito
 
@@ -448,32 +721,28 @@ def cargar_orden(folio):
     conn = conectar()
     if not conn: return None
     
-    cursor = conn.cursor(dictionary=True)
     orden = None
-    
-    try:
-        query = """
-            SELECT 
-                og.folio_numero, 
-                og.id_cliente, 
-                c.nombre_cliente,
-                og.usuario_creador,
-                og.datos_carrito,
-                og.total_estimado,
-                og.estado,
-                og.fecha_creacion
-            FROM ordenes_guardadas og
-            JOIN cliente c ON og.id_cliente = c.id_cliente
-            WHERE og.folio_numero = %s AND og.activo = TRUE
-        """
-        cursor.execute(query, (folio,))
-        orden = cursor.fetchone()
+    with conn, closing(conn.cursor(dictionary=True)) as cursor:
+        try:
+            query = """
+                SELECT 
+                    og.folio_numero, 
+                    og.id_cliente, 
+                    c.nombre_cliente,
+                    og.usuario_creador,
+                    og.datos_carrito,
+                    og.total_estimado,
+                    og.estado,
+                    og.fecha_creacion
+                FROM ordenes_guardadas og
+                JOIN cliente c ON og.id_cliente = c.id_cliente
+                WHERE og.folio_numero = %s AND og.activo = TRUE
+            """
+            cursor.execute(query, (folio,))
+            orden = cursor.fetchone()
         
-    except Error as e:
-        print(f"Error al cargar orden: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+        except Error as e:
+            print(f"Error al cargar orden: {e}")
         
     return orden
 
@@ -485,31 +754,27 @@ def actualizar_orden(folio, datos_carrito, total_estimado):
     conn = conectar()
     if not conn: return False
     
-    cursor = conn.cursor()
     exito = False
-    
-    try:
-        # Convertir datos_carrito a JSON si es un diccionario
-        if isinstance(datos_carrito, dict):
-            datos_carrito_json = json.dumps(datos_carrito, ensure_ascii=False)
-        else:
-            datos_carrito_json = datos_carrito
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            # Convertir datos_carrito a JSON si es un diccionario
+            if isinstance(datos_carrito, dict):
+                datos_carrito_json = json.dumps(datos_carrito, ensure_ascii=False)
+            else:
+                datos_carrito_json = datos_carrito
             
-        query = """
-            UPDATE ordenes_guardadas 
-            SET datos_carrito = %s, total_estimado = %s, fecha_modificacion = NOW()
-            WHERE folio_numero = %s AND estado = 'guardada'
-        """
-        cursor.execute(query, (datos_carrito_json, total_estimado, folio))
-        conn.commit()
-        exito = cursor.rowcount > 0
+            query = """
+                UPDATE ordenes_guardadas 
+                SET datos_carrito = %s, total_estimado = %s, fecha_modificacion = NOW(6)
+                WHERE folio_numero = %s AND estado = 'guardada'
+            """
+            cursor.execute(query, (datos_carrito_json, total_estimado, folio))
+            conn.commit()
+            exito = cursor.rowcount > 0
         
-    except Error as e:
-        print(f"Error al actualizar orden: {e}")
-        conn.rollback()
-    finally:
-        cursor.close()
-        conn.close()
+        except Error as e:
+            print(f"Error al actualizar orden: {e}")
+            conn.rollback()
         
     return exito
 
@@ -521,25 +786,21 @@ def marcar_orden_como_completada(folio, id_factura):
     conn = conectar()
     if not conn: return False
     
-    cursor = conn.cursor()
     exito = False
-    
-    try:
-        query = """
-            UPDATE ordenes_guardadas 
-            SET estado = 'registrada', fecha_modificacion = NOW()
-            WHERE folio_numero = %s AND estado = 'guardada'
-        """
-        cursor.execute(query, (folio,))
-        conn.commit()
-        exito = cursor.rowcount > 0
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            query = """
+                UPDATE ordenes_guardadas 
+                SET estado = 'registrada', fecha_modificacion = NOW(6)
+                WHERE folio_numero = %s AND estado = 'guardada'
+            """
+            cursor.execute(query, (folio,))
+            conn.commit()
+            exito = cursor.rowcount > 0
         
-    except Error as e:
-        print(f"Error al marcar orden como completada: {e}")
-        conn.rollback()
-    finally:
-        cursor.close()
-        conn.close()
+        except Error as e:
+            print(f"Error al marcar orden como completada: {e}")
+            conn.rollback()
         
     return exito
 
@@ -551,29 +812,25 @@ def verificar_folio_disponible(folio):
     conn = conectar()
     if not conn: return False
     
-    cursor = conn.cursor()
     disponible = True
-    
-    try:
-        # Verificar en órdenes guardadas
-        query_ordenes = "SELECT 1 FROM ordenes_guardadas WHERE folio_numero = %s AND activo = TRUE"
-        cursor.execute(query_ordenes, (folio,))
-        if cursor.fetchone():
-            disponible = False
-        
-        # Verificar en facturas si no se encontró en órdenes
-        if disponible:
-            query_facturas = "SELECT 1 FROM factura WHERE folio_numero = %s"
-            cursor.execute(query_facturas, (folio,))
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            # Verificar en órdenes guardadas
+            query_ordenes = "SELECT 1 FROM ordenes_guardadas WHERE folio_numero = %s AND activo = TRUE"
+            cursor.execute(query_ordenes, (folio,))
             if cursor.fetchone():
                 disponible = False
+        
+            # Verificar en facturas si no se encontró en órdenes
+            if disponible:
+                query_facturas = "SELECT 1 FROM factura WHERE folio_numero = %s"
+                cursor.execute(query_facturas, (folio,))
+                if cursor.fetchone():
+                    disponible = False
                 
-    except Error as e:
-        print(f"Error al verificar folio: {e}")
-        disponible = False
-    finally:
-        cursor.close()
-        conn.close()
+        except Error as e:
+            print(f"Error al verificar folio: {e}")
+            disponible = False
         
     return disponible
 
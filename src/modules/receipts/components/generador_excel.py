@@ -1,8 +1,6 @@
 import os
 from datetime import datetime
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+# openpyxl se importa al generar el Excel, no al abrir el módulo de recibos
 
 # Define el directorio absoluto donde se guardarán los archivos Excel
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -17,6 +15,9 @@ def crear_excel_simple(nombre_restaurante, items_carrito):
     :return: Ruta del archivo Excel creado o None si hay error
     """
     try:
+        import openpyxl
+        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
         # 1. Crear el directorio 'excel' si no existe
         os.makedirs(DIRECTORIO_EXCEL, exist_ok=True)
 
@@ -157,6 +158,9 @@ def crear_excel_con_secciones(nombre_restaurante, items_por_seccion, total_gener
     :return: Ruta del archivo Excel creado o None si hay error
     """
     try:
+        import openpyxl
+        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
         # 1. Crear el directorio 'excel' si no existe
         os.makedirs(DIRECTORIO_EXCEL, exist_ok=True)
 
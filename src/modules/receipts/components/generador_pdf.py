@@ -1,10 +1,6 @@
 import os
 from datetime import datetime
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER
-from reportlab.lib import colors
+# reportlab se importa al generar el PDF, no al abrir el módulo de recibos
 
 # Define el directorio absoluto donde se guardarán los recibos
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -22,6 +18,12 @@ def crear_recibo_simple(nombre_restaurante, items_carrito, total_str, folio_nume
     Crea un recibo PDF simple (sin secciones) - mantiene compatibilidad.
     """
     try:
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_RIGHT
+        from reportlab.lib import colors
+
         # 1. Crear el directorio 'recibos' si no existe
         os.makedirs(DIRECTORIO_RECIBOS, exist_ok=True)
 
@@ -125,6 +127,12 @@ def crear_recibo_con_secciones(nombre_restaurante, items_por_seccion, total_gene
     :return: Ruta del archivo PDF creado o None si hay error
     """
     try:
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_RIGHT, TA_CENTER
+        from reportlab.lib import colors
+
         # 1. Crear el directorio 'recibos' si no existe
         os.makedirs(DIRECTORIO_RECIBOS, exist_ok=True)
 
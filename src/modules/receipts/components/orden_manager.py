@@ -5,8 +5,10 @@ import json
 import mysql.connector
 from mysql.connector import Error
 from datetime import datetime, date
+from contextlib import closing
 from typing import Dict, List, Optional, Tuple, Any
-from .database import conectar
+from src.database.paginacion import TAMANO_PAGINA, Llave, Pagina, condicion_despues, cortar_pagina
+from .database import conectar, _reservar_folios
 
 class OrdenManager:
     """
@@ -23,14 +25,15 @@ class OrdenManager:
         self.connection = None
     
     def _get_connection(self):
-        """Obtiene conexión a la base de datos usando la configuración existente"""
-        if not self.connection or not self.connection.is_connected():
-            self.connection = conectar()
-        return self.connection
+        """
+        Presta una conexión del pool compartido. Cada operación la usa
+        dentro de un bloque 'with', que la devuelve al pool al terminar.
+        """
+        return conectar()
     
     def _close_connection(self):
-        """Cierra la conexión si está activa"""
-        if self.connection and self.connection.is_connected():
+        """Devuelve al pool la conexión retenida, si la hay"""
+        if self.connection:
             self.connection.close()
             self.connection = None
     
@@ -48,37 +51,18 @@ class OrdenManager:
             print("Error: No se pudo conectar a la base de datos")
             return None
         
-        cursor = conn.cursor()
         siguiente_folio = None
-        
-        try:
-            # Usar tabla folio_sequence para obtener el siguiente folio
-            query = "SELECT next_val FROM folio_sequence WHERE id = 1 FOR UPDATE"
-            cursor.execute(query)
-            resultado = cursor.fetchone()
-            
-            if resultado:
-                siguiente_folio = resultado[0]
-                
-                # Actualizar el siguiente valor
-                update_query = "UPDATE folio_sequence SET next_val = next_val + 1 WHERE id = 1"
-                cursor.execute(update_query)
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                # Usar tabla folio_sequence para obtener el siguiente folio
+                siguiente_folio = _reservar_folios(cursor)
                 conn.commit()
-                
                 print(f"Siguiente folio disponible: {siguiente_folio}")
-            else:
-                # Inicializar la secuencia si no existe
-                insert_query = "INSERT INTO folio_sequence (id, next_val) VALUES (1, 1)"
-                cursor.execute(insert_query)
-                conn.commit()
-                siguiente_folio = 1
-                print(f"Inicializado folio_sequence, primer folio: {siguiente_folio}")
             
-        except Error as e:
-            print(f"Error al obtener siguiente folio: {e}")
-            conn.rollback()
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al obtener siguiente folio: {e}")
+                conn.rollback()
+                siguiente_folio = None
         
         return siguiente_folio
     
@@ -96,24 +80,21 @@ class OrdenManager:
         if not conn:
             return False
         
-        cursor = conn.cursor()
         disponible = False
-        
-        try:
-            # Verificar en órdenes guardadas activas
-            query_orden = """
-                SELECT COUNT(*) FROM ordenes_guardadas 
-                WHERE folio_numero = %s AND activo = TRUE
-            """
-            cursor.execute(query_orden, (folio,))
-            count_orden = cursor.fetchone()[0]
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                # Verificar en órdenes guardadas activas
+                query_orden = """
+                    SELECT COUNT(*) FROM ordenes_guardadas 
+                    WHERE folio_numero = %s AND activo = TRUE
+                """
+                cursor.execute(query_orden, (folio,))
+                count_orden = cursor.fetchone()[0]
             
-            disponible = count_orden == 0
+                disponible = count_orden == 0
             
-        except Error as e:
-            print(f"Error al verificar disponibilidad del folio {folio}: {e}")
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al verificar disponibilidad del folio {folio}: {e}")
         
         return disponible
     
@@ -142,34 +123,31 @@ class OrdenManager:
         if not conn:
             return False
         
-        cursor = conn.cursor()
-        
-        try:
-            # Serializar datos del carrito
-            carrito_json = json.dumps(datos_carrito, ensure_ascii=False, indent=2)
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                # Serializar datos del carrito
+                carrito_json = json.dumps(datos_carrito, ensure_ascii=False, indent=2)
             
-            # Insertar orden guardada
-            query = """
-                INSERT INTO ordenes_guardadas 
-                (folio_numero, id_cliente, usuario_creador, datos_carrito, total_estimado, estado)
-                VALUES (%s, %s, %s, %s, %s, 'guardada')
-            """
+                # Insertar orden guardada
+                query = """
+                    INSERT INTO ordenes_guardadas 
+                    (folio_numero, id_cliente, usuario_creador, datos_carrito, total_estimado, estado)
+                    VALUES (%s, %s, %s, %s, %s, 'guardada')
+                """
             
-            cursor.execute(query, (folio, id_cliente, usuario, carrito_json, total))
-            conn.commit()
+                cursor.execute(query, (folio, id_cliente, usuario, carrito_json, total))
+                conn.commit()
             
-            print(f"Folio {folio} reservado exitosamente para usuario {usuario}")
-            return True
+                print(f"Folio {folio} reservado exitosamente para usuario {usuario}")
+                return True
             
-        except Error as e:
-            if e.errno == 1062:  # Duplicate entry error
-                print(f"Error: El folio {folio} ya está siendo usado (conflicto de clave duplicada)")
-            else:
-                print(f"Error al reservar folio {folio}: {e}")
-            conn.rollback()
-            return False
-        finally:
-            cursor.close()
+            except Error as e:
+                if e.errno == 1062:  # Duplicate entry error
+                    print(f"Error: El folio {folio} ya está siendo usado (conflicto de clave duplicada)")
+                else:
+                    print(f"Error al reservar folio {folio}: {e}")
+                conn.rollback()
+                return False
     
     def liberar_folio(self, folio: int) -> bool:
         """
@@ -185,32 +163,29 @@ class OrdenManager:
         if not conn:
             return False
         
-        cursor = conn.cursor()
-        
-        try:
-            # Soft delete: marcar como inactivo
-            query = """
-                UPDATE ordenes_guardadas 
-                SET activo = FALSE, fecha_modificacion = CURRENT_TIMESTAMP
-                WHERE folio_numero = %s AND estado = 'guardada' AND activo = TRUE
-            """
-            
-            cursor.execute(query, (folio,))
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                print(f"Folio {folio} liberado exitosamente")
-                return True
-            else:
-                print(f"No se encontró orden guardada con folio {folio}")
-                return False
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                # Soft delete: marcar como inactivo
+                query = """
+                    UPDATE ordenes_guardadas 
+                    SET activo = FALSE, fecha_modificacion = CURRENT_TIMESTAMP(6)
+                    WHERE folio_numero = %s AND estado = 'guardada' AND activo = TRUE
+                """
+            
+                cursor.execute(query, (folio,))
+            
+                if cursor.rowcount > 0:
+                    conn.commit()
+                    print(f"Folio {folio} liberado exitosamente")
+                    return True
+                else:
+                    print(f"No se encontró orden guardada con folio {folio}")
+                    return False
                 
-        except Error as e:
-            print(f"Error al liberar folio {folio}: {e}")
-            conn.rollback()
-            return False
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al liberar folio {folio}: {e}")
+                conn.rollback()
+                return False
     
     def obtener_ordenes_activas(self, usuario: str, es_admin: bool = False) -> List[Dict[str, Any]]:
         """
@@ -227,48 +202,44 @@ class OrdenManager:
         if not conn:
             return []
         
-        cursor = conn.cursor(dictionary=True)
         ordenes = []
-        
-        try:
-            # Query base
-            query = """
-                SELECT 
-                    og.folio_numero,
-                    og.id_cliente,
-                    c.nombre_cliente,
-                    og.usuario_creador,
-                    og.fecha_creacion,
-                    og.fecha_modificacion,
-                    og.total_estimado,
-                    JSON_LENGTH(og.datos_carrito, '$.items') as num_items
-                FROM ordenes_guardadas og
-                JOIN cliente c ON og.id_cliente = c.id_cliente
-                WHERE og.estado = 'guardada' AND og.activo = TRUE
-            """
-            
-            # Filtrar por usuario si no es admin
-            if not es_admin:
-                query += " AND og.usuario_creador = %s"
-                cursor.execute(query, (usuario,))
-            else:
-                cursor.execute(query)
-            
-            ordenes = cursor.fetchall()
-            
-            # Formatear fechas para mejor legibilidad
-            for orden in ordenes:
-                if orden['fecha_creacion']:
-                    orden['fecha_creacion_str'] = orden['fecha_creacion'].strftime('%d/%m/%Y %H:%M')
-                if orden['fecha_modificacion']:
-                    orden['fecha_modificacion_str'] = orden['fecha_modificacion'].strftime('%d/%m/%Y %H:%M')
-            
-            print(f"Obtenidas {len(ordenes)} órdenes activas para usuario {usuario}")
-            
-        except Error as e:
-            print(f"Error al obtener órdenes activas: {e}")
-        finally:
-            cursor.close()
+        with conn, closing(conn.cursor(dictionary=True)) as cursor:
+            try:
+                # Query base
+                query = """
+                    SELECT 
+                        og.folio_numero,
+                        og.id_cliente,
+                        c.nombre_cliente,
+                        og.usuario_creador,
+                        og.fecha_creacion,
+                        og.fecha_modificacion,
+                        og.total_estimado,
+                        JSON_LENGTH(og.datos_carrito, '$.items') as num_items
+                    FROM ordenes_guardadas og
+                    JOIN cliente c ON og.id_cliente = c.id_cliente
+                    WHERE og.estado = 'guardada' AND og.activo = TRUE
+                """
+            
+                # Filtrar por usuario si no es admin
+                if not es_admin:
+                    query += " AND og.usuario_creador = %s"
+                query += " ORDER BY og.folio_numero"
+            
+                if not es_admin:
+                    cursor.execute(query, (usuario,))
+                else:
+                    cursor.execute(query)
+            
+                ordenes = cursor.fetchall()
+            
+                # Formatear fechas para mejor legibilidad
+                _formatear_fechas(ordenes)
+            
+                print(f"Obtenidas {len(ordenes)} órdenes activas para usuario {usuario}")
+            
+            except Error as e:
+                print(f"Error al obtener órdenes activas: {e}")
         
         return ordenes
     
@@ -289,54 +260,202 @@ class OrdenManager:
         if not conn:
             return []
         
-        cursor = conn.cursor(dictionary=True)
         historial = []
+        with conn, closing(conn.cursor(dictionary=True)) as cursor:
+            try:
+                query = """
+                    SELECT 
+                        og.folio_numero,
+                        og.id_cliente,
+                        c.nombre_cliente,
+                        og.usuario_creador,
+                        og.fecha_creacion,
+                        og.fecha_modificacion,
+                        og.total_estimado,
+                        f.id_factura as id_venta_asociada
+                    FROM ordenes_guardadas og
+                    JOIN cliente c ON og.id_cliente = c.id_cliente
+                    LEFT JOIN factura f ON og.folio_numero = f.id_factura
+                    WHERE og.estado = 'registrada' AND og.activo = TRUE
+                """
+            
+                # Filtrar por usuario si no es admin
+                if not es_admin:
+                    query += " AND og.usuario_creador = %s"
+            
+                query += " ORDER BY og.fecha_modificacion DESC, og.folio_numero DESC LIMIT %s"
+            
+                if not es_admin:
+                    cursor.execute(query, (usuario, limite))
+                else:
+                    cursor.execute(query, (limite,))
+            
+                historial = cursor.fetchall()
+            
+                # Formatear fechas
+                _formatear_fechas(historial)
+            
+                print(f"Obtenido historial de {len(historial)} órdenes para usuario {usuario}")
+            
+            except Error as e:
+                print(f"Error al obtener historial: {e}")
         
-        try:
-            query = """
-                SELECT 
-                    og.folio_numero,
-                    og.id_cliente,
-                    c.nombre_cliente,
-                    og.usuario_creador,
-                    og.fecha_creacion,
-                    og.fecha_modificacion,
-                    og.total_estimado,
-                    f.id_factura as id_venta_asociada
-                FROM ordenes_guardadas og
-                JOIN cliente c ON og.id_cliente = c.id_cliente
-                LEFT JOIN factura f ON og.folio_numero = f.id_factura
-                WHERE og.estado = 'registrada' AND og.activo = TRUE
-            """
-            
-            # Filtrar por usuario si no es admin
-            if not es_admin:
-                query += " AND og.usuario_creador = %s"
-            
-            query += " ORDER BY og.fecha_modificacion DESC LIMIT %s"
-            
-            if not es_admin:
-                cursor.execute(query, (usuario, limite))
-            else:
-                cursor.execute(query, (limite,))
-            
-            historial = cursor.fetchall()
-            
-            # Formatear fechas
-            for orden in historial:
-                if orden['fecha_creacion']:
-                    orden['fecha_creacion_str'] = orden['fecha_creacion'].strftime('%d/%m/%Y %H:%M')
-                if orden['fecha_modificacion']:
-                    orden['fecha_modificacion_str'] = orden['fecha_modificacion'].strftime('%d/%m/%Y %H:%M')
+        return historial
+    
+    def obtener_historial_pagina(self, usuario: str, es_admin: bool = False,
+                                 despues: Optional[Llave] = None,
+                                 tamano: int = TAMANO_PAGINA) -> Pagina:
+        """
+        Obtiene una página del historial completo de órdenes registradas,
+        de la más reciente a la más antigua.
+        
+        Args:
+            usuario: Usuario que solicita el historial
+            es_admin: Si el usuario es administrador
+            despues: Llave de la página anterior (None para la primera)
+            tamano: Órdenes por página
             
-            print(f"Obtenido historial de {len(historial)} órdenes para usuario {usuario}")
+        Returns:
+            (órdenes, llave de la siguiente página o None si no hay más).
+            Usa idx_orden_historial, así que cada página cuesta lo mismo sin
+            importar cuántas órdenes haya antes.
+        """
+        conn = self._get_connection()
+        if not conn:
+            return [], None
+        
+        with conn, closing(conn.cursor(dictionary=True)) as cursor:
+            try:
+                query = """
+                    SELECT 
+                        og.folio_numero,
+                        og.id_cliente,
+                        c.nombre_cliente,
+                        og.usuario_creador,
+                        og.fecha_creacion,
+                        og.fecha_modificacion,
+                        og.total_estimado,
+                        f.id_factura as id_venta_asociada
+                    FROM ordenes_guardadas og
+                    JOIN cliente c ON og.id_cliente = c.id_cliente
+                    LEFT JOIN factura f ON og.folio_numero = f.id_factura
+                    WHERE og.estado = 'registrada' AND og.activo = TRUE
+                """
+                params = []
+                
+                if not es_admin:
+                    query += " AND og.usuario_creador = %s"
+                    params.append(usuario)
+                
+                condicion, params_despues = condicion_despues('og.fecha_modificacion', 'og.folio_numero', despues)
+                if condicion:
+                    query += " AND " + condicion
+                    params += params_despues
+                
+                query += " ORDER BY og.fecha_modificacion DESC, og.folio_numero DESC LIMIT %s"
+                params.append(tamano + 1)
+                
+                cursor.execute(query, params)
+                ordenes, siguiente = cortar_pagina(cursor.fetchall(), tamano,
+                                                   ('fecha_modificacion', 'folio_numero'))
+                _formatear_fechas(ordenes)
+                return ordenes, siguiente
+            
+            except Error as e:
+                print(f"Error al obtener página del historial: {e}")
+                return [], None
+    
+    # ==================== CAMBIOS DESDE UNA MARCA ====================
+    
+    def obtener_marca_cambios(self) -> Optional[datetime]:
+        """
+        Hora actual del servidor. Se toma antes de una carga completa y sirve
+        de punto de partida para obtener_cambios().
+        """
+        conn = self._get_connection()
+        if not conn:
+            return None
+        
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                cursor.execute("SELECT CURRENT_TIMESTAMP(6)")
+                return cursor.fetchone()[0]
+            except Error as e:
+                print(f"Error al obtener marca de cambios: {e}")
+                return None
+    
+    def obtener_cambios(self, usuario: str, es_admin: bool, desde: datetime,
+                        limite: int = 500) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene las órdenes modificadas desde una marca de tiempo.
+        
+        Todas las escrituras sobre ordenes_guardadas actualizan
+        fecha_modificacion, así que basta un rango sobre esa columna
+        (idx_orden_modificacion) para saber qué cambió, en cualquier estado,
+        incluidas las liberadas (activo = FALSE).
+        
+        Args:
+            usuario: Usuario que solicita los cambios
+            es_admin: Si el usuario es administrador (ve las órdenes de todos)
+            desde: Marca de tiempo del servidor (inclusive)
+            limite: Máximo de cambios; si se alcanza conviene recargar todo
             
-        except Error as e:
-            print(f"Error al obtener historial: {e}")
-        finally:
-            cursor.close()
+        Returns:
+            Dict con 'ordenes' (filas con los campos de obtener_ordenes_activas
+            y obtener_historial más estado y activo), 'guardadas' y
+            'registradas' (cuántas órdenes activas hay de cada estado, para
+            detectar borrados físicos), o None si hubo error
+        """
+        conn = self._get_connection()
+        if not conn:
+            return None
         
-        return historial
+        with conn, closing(conn.cursor(dictionary=True)) as cursor:
+            try:
+                filtro_usuario = "" if es_admin else " AND og.usuario_creador = %s"
+                parametros_usuario = () if es_admin else (usuario,)
+                
+                cursor.execute(f"""
+                    SELECT 
+                        og.folio_numero,
+                        og.id_cliente,
+                        c.nombre_cliente,
+                        og.usuario_creador,
+                        og.fecha_creacion,
+                        og.fecha_modificacion,
+                        og.total_estimado,
+                        og.estado,
+                        og.activo,
+                        JSON_LENGTH(og.datos_carrito, '$.items') as num_items,
+                        f.id_factura as id_venta_asociada
+                    FROM ordenes_guardadas og
+                    JOIN cliente c ON og.id_cliente = c.id_cliente
+                    LEFT JOIN factura f ON og.folio_numero = f.id_factura
+                    WHERE og.fecha_modificacion >= %s{filtro_usuario}
+                    ORDER BY og.fecha_modificacion
+                    LIMIT %s
+                """, (desde, *parametros_usuario, limite))
+                ordenes = cursor.fetchall()
+                _formatear_fechas(ordenes)
+                
+                cursor.execute(f"""
+                    SELECT 
+                        COALESCE(SUM(og.estado = 'guardada'), 0) AS guardadas,
+                        COALESCE(SUM(og.estado = 'registrada'), 0) AS registradas
+                    FROM ordenes_guardadas og
+                    WHERE og.activo = TRUE{filtro_usuario}
+                """, parametros_usuario)
+                conteos = cursor.fetchone()
+                
+                return {
+                    'ordenes': ordenes,
+                    'guardadas': int(conteos['guardadas']),
+                    'registradas': int(conteos['registradas']),
+                }
+            
+            except Error as e:
+                print(f"Error al obtener cambios de órdenes: {e}")
+                return None
     
     def cargar_orden(self, folio: int) -> Optional[Dict[str, Any]]:
         """
@@ -352,43 +471,40 @@ class OrdenManager:
         if not conn:
             return None
         
-        cursor = conn.cursor(dictionary=True)
         orden = None
-        
-        try:
-            query = """
-                SELECT 
-                    og.*,
-                    c.nombre_cliente,
-                    t.nombre_tipo as tipo_cliente
-                FROM ordenes_guardadas og
-                JOIN cliente c ON og.id_cliente = c.id_cliente
-                JOIN grupo g ON c.id_grupo = g.id_grupo
-                JOIN tipo_cliente t ON g.id_tipo_cliente = t.id_tipo_cliente
-                WHERE og.folio_numero = %s AND og.activo = TRUE
-            """
-            
-            cursor.execute(query, (folio,))
-            resultado = cursor.fetchone()
-            
-            if resultado:
-                # Deserializar datos del carrito
-                try:
-                    datos_carrito = json.loads(resultado['datos_carrito'])
-                    resultado['datos_carrito_obj'] = datos_carrito
-                except json.JSONDecodeError as e:
-                    print(f"Error al deserializar carrito del folio {folio}: {e}")
-                    resultado['datos_carrito_obj'] = None
+        with conn, closing(conn.cursor(dictionary=True)) as cursor:
+            try:
+                query = """
+                    SELECT 
+                        og.*,
+                        c.nombre_cliente,
+                        t.nombre_tipo as tipo_cliente
+                    FROM ordenes_guardadas og
+                    JOIN cliente c ON og.id_cliente = c.id_cliente
+                    JOIN grupo g ON c.id_grupo = g.id_grupo
+                    JOIN tipo_cliente t ON g.id_tipo_cliente = t.id_tipo_cliente
+                    WHERE og.folio_numero = %s AND og.activo = TRUE
+                """
+            
+                cursor.execute(query, (folio,))
+                resultado = cursor.fetchone()
+            
+                if resultado:
+                    # Deserializar datos del carrito
+                    try:
+                        datos_carrito = json.loads(resultado['datos_carrito'])
+                        resultado['datos_carrito_obj'] = datos_carrito
+                    except json.JSONDecodeError as e:
+                        print(f"Error al deserializar carrito del folio {folio}: {e}")
+                        resultado['datos_carrito_obj'] = None
                 
-                orden = resultado
-                print(f"Orden {folio} cargada exitosamente")
-            else:
-                print(f"No se encontró orden con folio {folio}")
+                    orden = resultado
+                    print(f"Orden {folio} cargada exitosamente")
+                else:
+                    print(f"No se encontró orden con folio {folio}")
         
-        except Error as e:
-            print(f"Error al cargar orden {folio}: {e}")
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al cargar orden {folio}: {e}")
         
         return orden
     
@@ -409,37 +525,34 @@ class OrdenManager:
         if not conn:
             return False
         
-        cursor = conn.cursor()
-        
-        try:
-            # Serializar nuevos datos del carrito
-            carrito_json = json.dumps(datos_carrito, ensure_ascii=False, indent=2)
-            
-            # Actualizar orden
-            query = """
-                UPDATE ordenes_guardadas 
-                SET datos_carrito = %s, 
-                    total_estimado = %s,
-                    fecha_modificacion = CURRENT_TIMESTAMP
-                WHERE folio_numero = %s AND estado = 'guardada' AND activo = TRUE
-            """
-            
-            cursor.execute(query, (carrito_json, total, folio))
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                print(f"Orden {folio} actualizada exitosamente")
-                return True
-            else:
-                print(f"No se encontró orden guardada con folio {folio}")
-                return False
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                # Serializar nuevos datos del carrito
+                carrito_json = json.dumps(datos_carrito, ensure_ascii=False, indent=2)
+            
+                # Actualizar orden
+                query = """
+                    UPDATE ordenes_guardadas 
+                    SET datos_carrito = %s, 
+                        total_estimado = %s,
+                        fecha_modificacion = CURRENT_TIMESTAMP(6)
+                    WHERE folio_numero = %s AND estado = 'guardada' AND activo = TRUE
+                """
+            
+                cursor.execute(query, (carrito_json, total, folio))
+            
+                if cursor.rowcount > 0:
+                    conn.commit()
+                    print(f"Orden {folio} actualizada exitosamente")
+                    return True
+                else:
+                    print(f"No se encontró orden guardada con folio {folio}")
+                    return False
                 
-        except Error as e:
-            print(f"Error al actualizar orden {folio}: {e}")
-            conn.rollback()
-            return False
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al actualizar orden {folio}: {e}")
+                conn.rollback()
+                return False
     
     def marcar_como_completada(self, folio: int, id_venta: int) -> bool:
         """
@@ -456,31 +569,28 @@ class OrdenManager:
         if not conn:
             return False
         
-        cursor = conn.cursor()
-        
-        try:
-            query = """
-                UPDATE ordenes_guardadas 
-                SET estado = 'registrada', fecha_modificacion = CURRENT_TIMESTAMP
-                WHERE folio_numero = %s AND estado = 'guardada' AND activo = TRUE
-            """
-            
-            cursor.execute(query, (folio,))
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                print(f"Orden {folio} marcada como registrada (venta ID: {id_venta})")
-                return True
-            else:
-                print(f"No se encontró orden guardada con folio {folio}")
-                return False
+        with conn, closing(conn.cursor()) as cursor:
+            try:
+                query = """
+                    UPDATE ordenes_guardadas 
+                    SET estado = 'registrada', fecha_modificacion = CURRENT_TIMESTAMP(6)
+                    WHERE folio_numero = %s AND estado = 'guardada' AND activo = TRUE
+                """
+            
+                cursor.execute(query, (folio,))
+            
+                if cursor.rowcount > 0:
+                    conn.commit()
+                    print(f"Orden {folio} marcada como registrada (venta ID: {id_venta})")
+                    return True
+                else:
+                    print(f"No se encontró orden guardada con folio {folio}")
+                    return False
                 
-        except Error as e:
-            print(f"Error al marcar orden {folio} como registrada: {e}")
-            conn.rollback()
-            return False
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al marcar orden {folio} como registrada: {e}")
+                conn.rollback()
+                return False
     
     # ==================== UTILIDADES DE CONVERSIÓN ====================
     
@@ -597,6 +707,14 @@ class OrdenManager:
 
 # ==================== FUNCIONES DE CONVENIENCIA ====================
 
+def _formatear_fechas(ordenes: List[Dict[str, Any]]):
+    """Agrega fecha_creacion_str y fecha_modificacion_str legibles"""
+    for orden in ordenes:
+        if orden['fecha_creacion']:
+            orden['fecha_creacion_str'] = orden['fecha_creacion'].strftime('%d/%m/%Y %H:%M')
+        if orden['fecha_modificacion']:
+            orden['fecha_modificacion_str'] = orden['fecha_modificacion'].strftime('%d/%m/%Y %H:%M')
+
 def obtener_manager():
     """
     Factory function para obtener una instancia del OrdenManager.
@@ -622,29 +740,25 @@ def limpiar_ordenes_antiguas(dias: int = 30) -> int:
     if not conn:
         return 0
     
-    cursor = conn.cursor()
     ordenes_limpiadas = 0
-    
-    try:
-        query = """
-            DELETE FROM ordenes_guardadas 
-            WHERE estado = 'guardada' 
-            AND activo = FALSE 
-            AND fecha_modificacion < DATE_SUB(NOW(), INTERVAL %s DAY)
-        """
+    with conn, closing(conn.cursor()) as cursor:
+        try:
+            query = """
+                DELETE FROM ordenes_guardadas 
+                WHERE estado = 'guardada' 
+                AND activo = FALSE 
+                AND fecha_modificacion < DATE_SUB(NOW(), INTERVAL %s DAY)
+            """
         
-        cursor.execute(query, (dias,))
-        ordenes_limpiadas = cursor.rowcount
-        conn.commit()
+            cursor.execute(query, (dias,))
+            ordenes_limpiadas = cursor.rowcount
+            conn.commit()
         
-        print(f"Limpiadas {ordenes_limpiadas} órdenes antiguas")
+            print(f"Limpiadas {ordenes_limpiadas} órdenes antiguas")
         
-    except Error as e:
-        print(f"Error al limpiar órdenes antiguas: {e}")
-        conn.rollback()
-    finally:
-        cursor.close()
-        manager._close_connection()
+        except Error as e:
+            print(f"Error al limpiar órdenes antiguas: {e}")
+            conn.rollback()
     
     return ordenes_limpiadas
 
@@ -7,7 +7,15 @@ from typing import Dict, List, Optional, Callable, Any
 import threading
 from datetime import datetime
 
+from src.database.consultas_async import EjecutorConsultas, cursor_de_espera
+from src.ui.filas_treeview import FilasTreeview
+from src.ui.scroll_infinito import ScrollInfinito
 from .orden_manager import obtener_manager
+from .cambios_ordenes import SeguimientoOrdenes
+
+# Con la consulta de cambios cada revisión cuesta poco; antes era una recarga completa cada 30 s
+INTERVALO_CAMBIOS_MS = 10000
+LIMITE_HISTORIAL = 100
 
 
 class VentanaOrdenes:
@@ -40,8 +48,10 @@ class VentanaOrdenes:
         self.username = self.user_data.get('username', 'usuario')
         self.es_admin = self.user_data.get('rol', '').lower() == 'admin'
         
-        # Manager de órdenes
+        # Manager de órdenes y copia local que se actualiza con los cambios
         self.orden_manager = obtener_manager()
+        self.seguimiento = SeguimientoOrdenes(limite_historial=LIMITE_HISTORIAL)
+        self._recarga = None
         
         # Variables de control
         self.auto_refresh_active = True
@@ -52,6 +62,20 @@ class VentanaOrdenes:
         self.root = tk.Toplevel(parent) if parent else tk.Tk()
         self._configurar_ventana()
         self._crear_interfaz()
+        # Los tags los maneja la ventana (filtro y resaltado), no el enlace
+        self.filas_activas = FilasTreeview(self.tree_activas,
+                                           clave=lambda orden: orden['folio_numero'],
+                                           valores=self._valores_orden_activa)
+        self.filas_historial = FilasTreeview(self.tree_historial,
+                                             clave=lambda orden: orden['folio_numero'],
+                                             valores=self._valores_orden_historial)
+        self.consultas = EjecutorConsultas(self.root, indicador=cursor_de_espera(self.root))
+        # Las órdenes anteriores a las más recientes se piden al desplazarse
+        self.scroll_historial = ScrollInfinito(self.tree_historial, self._consultar_historial_antiguo,
+                                               agregar=self._agregar_historial_antiguo,
+                                               scrollbar=self.scrollbar_historial,
+                                               ejecutor=self.consultas, clave_consulta="historial",
+                                               al_fallar=lambda e: print(f"Error al cargar historial anterior: {e}"))
         self._cargar_datos_iniciales()
         self._iniciar_auto_refresh()
     
@@ -236,6 +260,8 @@ class VentanaOrdenes:
         
         # Guardar referencia al tree
         setattr(self, tree_name, tree)
+        if tipo != "activas":
+            self.scrollbar_historial = scrollbar_v
         
         # Eventos para órdenes activas
         if tipo == "activas":
@@ -337,11 +363,8 @@ class VentanaOrdenes:
     
     def _on_tab_changed(self, event):
         """Maneja cambio de pestaña"""
-        tab_actual = self.notebook.index(self.notebook.select())
-        if tab_actual == 0:  # Pestaña activas
-            self._cargar_ordenes_activas()
-        else:  # Pestaña historial
-            self._cargar_historial()
+        # Ambas pestañas se mantienen al día; basta revisar si hubo cambios
+        self._actualizar_listas()
     
     def _on_filtro_changed(self, *args):
         """Maneja cambios en el filtro de búsqueda"""
@@ -495,117 +518,151 @@ class VentanaOrdenes:
     
     def _cargar_datos_iniciales(self):
         """Carga los datos iniciales en ambas pestañas"""
-        self._cargar_ordenes_activas()
-        self._cargar_historial()
+        self._recargar_todo()
+    
+    def _recargar_todo(self):
+        """Carga completa de ambas listas en segundo plano"""
+        self.consultas.cancelar("cambios")
+        self._recarga = self.consultas.ejecutar(
+            self._consultar_todo,
+            clave="recarga",
+            al_terminar=self._mostrar_todo,
+            al_fallar=lambda e: messagebox.showerror("Error", f"Error al cargar órdenes: {str(e)}")
+        )
+    
+    def _consultar_todo(self):
+        """(Hilo de trabajo) Marca del servidor y listas completas"""
+        # La marca se toma antes: lo que cambie durante la carga llega con los cambios
+        marca = self.orden_manager.obtener_marca_cambios()
+        activas = self.orden_manager.obtener_ordenes_activas(self.username, self.es_admin)
+        historial = self.orden_manager.obtener_historial(self.username, self.es_admin, limite=LIMITE_HISTORIAL)
+        return marca, activas, historial
+    
+    def _mostrar_todo(self, datos):
+        """Reemplaza ambas listas con una carga completa"""
+        self.seguimiento.cargar(*datos)
+        self._mostrar_ordenes_activas(self.seguimiento.activas())
+        self._mostrar_historial(self.seguimiento.historial())
+        self._marcar_actualizacion()
+    
+    def _consultar_cambios(self):
+        """Pide solo las órdenes modificadas desde la última marca"""
+        self.consultas.ejecutar(
+            self.orden_manager.obtener_cambios,
+            self.username, self.es_admin, self.seguimiento.desde(), self.seguimiento.limite_cambios,
+            clave="cambios",
+            al_terminar=self._aplicar_cambios,
+            al_fallar=lambda e: self._aplicar_cambios(None)
+        )
+    
+    def _aplicar_cambios(self, cambios):
+        """Combina los cambios con las listas mostradas"""
+        cambiaron_activas, cambio_historial = self.seguimiento.aplicar(cambios)
+        if cambiaron_activas:
+            self._mostrar_ordenes_activas(self.seguimiento.activas())
+        if cambio_historial:
+            self._mostrar_historial(self.seguimiento.historial())
+        
+        if not self.seguimiento.requiere_recarga:
+            self._marcar_actualizacion()
+        elif cambios is not None:
+            # Demasiados cambios o conteos que no cuadran: recargar ya
+            self._recargar_todo()
+        # Si la consulta falló, se reintenta con una carga completa en la siguiente revisión
+    
+    def _marcar_actualizacion(self):
+        ahora = datetime.now().strftime("%H:%M:%S")
+        self.lbl_ultima_actualizacion.config(text=f"Actualizado: {ahora}")
+    
+    def _valores_orden_activa(self, orden):
+        """Valores de la fila de una orden activa"""
+        # Formatear fecha correctamente (sin tiempo si es solo fecha)
+        fecha_mod = orden.get('fecha_modificacion_str', 'N/A')
+        if fecha_mod and ' ' in fecha_mod:
+            fecha_mod = fecha_mod.split(' ')[0]  # Solo la parte de la fecha
+        
+        return (f"{orden['folio_numero']:06d}", orden['nombre_cliente'],
+                f"${orden['total_estimado']:,.2f}", fecha_mod,
+                orden['usuario_creador'], "[Clic para acciones]")
     
-    def _cargar_ordenes_activas(self):
+    def _mostrar_ordenes_activas(self, ordenes):
         """Carga las órdenes activas en el treeview"""
         try:
-            # Limpiar tree
-            for item in self.tree_activas.get_children():
-                self.tree_activas.delete(item)
-            
-            # Obtener datos
-            ordenes = self.orden_manager.obtener_ordenes_activas(self.username, self.es_admin)
-            
-            # Poblar tree
-            for orden in ordenes:
-                folio_str = f"{orden['folio_numero']:06d}"
-                cliente = orden['nombre_cliente']
-                total = f"${orden['total_estimado']:,.2f}"
-                
-                # Formatear fecha correctamente (sin tiempo si es solo fecha)
-                fecha_mod = orden.get('fecha_modificacion_str', 'N/A')
-                if fecha_mod and ' ' in fecha_mod:
-                    fecha_mod = fecha_mod.split(' ')[0]  # Solo la parte de la fecha
-                
-                usuario = orden['usuario_creador']
-                acciones = "[Clic para acciones]"
-                
-                self.tree_activas.insert("", "end", values=(
-                    folio_str, cliente, total, fecha_mod, usuario, acciones
-                ))
+            # Solo se tocan las filas que cambiaron; selección y scroll se conservan
+            self.filas_activas.actualizar(ordenes)
             
             # Actualizar contador
             self.lbl_count_activas.config(text=f"Órdenes activas: {len(ordenes)}")
             
+            # Los datos llegan después de que el usuario pudo escribir un filtro
+            if self.filtro_busqueda.get().strip():
+                self._filtrar_tree(self.tree_activas, self.filtro_busqueda.get().strip().lower())
+            
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar órdenes activas: {str(e)}")
     
-    def _cargar_historial(self):
+    def _valores_orden_historial(self, orden):
+        """Valores de la fila de una orden del historial"""
+        # Formatear fecha correctamente (sin tiempo si es solo fecha)
+        fecha_reg = orden.get('fecha_creacion_str', 'N/A')
+        if fecha_reg and ' ' in fecha_reg:
+            fecha_reg = fecha_reg.split(' ')[0]  # Solo la parte de la fecha
+        
+        return (f"{orden['folio_numero']:06d}", orden['nombre_cliente'],
+                f"${orden['total_estimado']:,.2f}", fecha_reg, orden['usuario_creador'])
+    
+    def _consultar_historial_antiguo(self, despues):
+        """(Hilo de trabajo) Página del historial anterior a la orden más antigua mostrada"""
+        return self.orden_manager.obtener_historial_pagina(self.username, self.es_admin, despues)
+    
+    def _agregar_historial_antiguo(self, ordenes):
+        """Agrega al final del historial una página pedida al desplazarse"""
+        if self.seguimiento.agregar_antiguas(ordenes, self.scroll_historial.hay_mas):
+            self._mostrar_historial(self.seguimiento.historial())
+        else:
+            self.scroll_historial.continuar(self.seguimiento.siguiente_historial())
+    
+    def _mostrar_historial(self, historial):
         """Carga el historial de órdenes en el treeview"""
         try:
-            # Limpiar tree
-            for item in self.tree_historial.get_children():
-                self.tree_historial.delete(item)
-            
-            # Obtener datos
-            historial = self.orden_manager.obtener_historial(self.username, self.es_admin, limite=100)
-            
-            # Poblar tree
-            for orden in historial:
-                folio_str = f"{orden['folio_numero']:06d}"
-                cliente = orden['nombre_cliente']
-                total = f"${orden['total_estimado']:,.2f}"
-                
-                # Formatear fecha correctamente (sin tiempo si es solo fecha)
-                fecha_reg = orden.get('fecha_creacion_str', 'N/A')
-                if fecha_reg and ' ' in fecha_reg:
-                    fecha_reg = fecha_reg.split(' ')[0]  # Solo la parte de la fecha
-                
-                usuario = orden['usuario_creador']
-                
-                self.tree_historial.insert("", "end", values=(
-                    folio_str, cliente, total, fecha_reg, usuario
-                ))
+            self.filas_historial.actualizar(historial)
+            # La siguiente página parte de la orden más antigua que quedó en la lista
+            siguiente = self.seguimiento.siguiente_historial()
+            self.scroll_historial.continuar(siguiente)
             
             # Actualizar contador
-            self.lbl_count_historial.config(text=f"| Historial: {len(historial)}")
+            mas = "+" if siguiente is not None else ""
+            self.lbl_count_historial.config(text=f"| Historial: {len(historial)}{mas}")
+            
+            if self.filtro_busqueda.get().strip():
+                self._filtrar_tree(self.tree_historial, self.filtro_busqueda.get().strip().lower())
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar historial: {str(e)}")
     
     def _actualizar_listas(self):
-        """Actualiza ambas listas de órdenes"""
-        self._cargar_ordenes_activas()
-        self._cargar_historial()
-        
-        # Actualizar timestamp
-        ahora = datetime.now().strftime("%H:%M:%S")
-        self.lbl_ultima_actualizacion.config(text=f"Actualizado: {ahora}")
+        """Actualiza ambas listas con los cambios desde la última revisión"""
+        if self._recarga is not None and not self._recarga.terminada:
+            return  # La carga completa en curso ya trae todo
+        if self.seguimiento.requiere_recarga:
+            self._recargar_todo()
+        else:
+            self._consultar_cambios()
     
     def _forzar_actualizacion_manual(self):
         """Fuerza actualización manual cuando se presiona el botón"""
         try:
             print("🔄 Actualizando listas manualmente...")
-
-            # NUEVO: Forzar nueva conexión para evitar cache
-            self.orden_manager._close_connection()
-
-            
-            # Limpiar filtros temporalmente para mostrar todos los datos
-            filtro_actual = self.filtro_busqueda.get()
-            self.filtro_busqueda.set("")
-            
-            # Cargar datos frescos
-            self._cargar_ordenes_activas()
-            self._cargar_historial()
-            
-            # Restaurar filtro si había uno
-            if filtro_actual:
-                self.filtro_busqueda.set(filtro_actual)
-                self._aplicar_filtro()
             
-            # Actualizar timestamp
-            from datetime import datetime
-            ahora = datetime.now().strftime("%H:%M:%S")
-            self.lbl_ultima_actualizacion.config(text=f"Actualizado: {ahora}")
+            # El botón pide una carga completa (también trae nombres de cliente
+            # cambiados, que no modifican la orden); el filtro se reaplica al llegar
+            self._recargar_todo()
             
             # Mensaje visual opcional
             self.lbl_ultima_actualizacion.config(foreground="green")
             self.root.after(2000, lambda: self.lbl_ultima_actualizacion.config(foreground="black"))
             
-            print("✅ Actualización completada exitosamente")
+            print("✅ Actualización solicitada")
             
         except Exception as e:
             print(f"❌ Error en actualización manual: {e}")
@@ -636,10 +693,10 @@ class VentanaOrdenes:
     # ==================== AUTO-REFRESH ====================
     
     def _iniciar_auto_refresh(self):
-        """Inicia el auto-refresh cada 30 segundos"""
+        """Revisa cambios cada INTERVALO_CAMBIOS_MS"""
         if self.auto_refresh_active:
             self._actualizar_listas()
-            self.root.after(30000, self._iniciar_auto_refresh)
+            self.root.after(INTERVALO_CAMBIOS_MS, self._iniciar_auto_refresh)
     
     def _detener_auto_refresh(self):
         """Detiene el auto-refresh"""
@@ -650,6 +707,7 @@ class VentanaOrdenes:
     def _on_closing(self):
         """Maneja el cierre de la ventana"""
         self._detener_auto_refresh()
+        self.consultas.cerrar()
         if self.parent:
             self.root.destroy()
         else:
@@ -662,6 +720,7 @@ class VentanaOrdenes:
     def destroy(self):
         """Destruye la ventana"""
         self._detener_auto_refresh()
+        self.consultas.cerrar()
         self.root.destroy()
 
 
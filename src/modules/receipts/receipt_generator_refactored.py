@@ -10,6 +10,7 @@ from src.modules.receipts.components import generador_pdf
 from src.modules.receipts.components.carrito_module import CarritoConSecciones, DialogoSeccion
 from src.modules.receipts.components import generador_excel
 from src.modules.receipts.components.orden_manager import obtener_manager, OrdenManager
+from src.modules.receipts.components.catalogo_cache import obtener_catalogo
 from src.modules.receipts.components.ventana_ordenes import abrir_ventana_ordenes
 
 class ReciboAppMejorado:
@@ -33,6 +34,7 @@ class ReciboAppMejorado:
         self.folios_pestanas = {}  # Diccionario para tracking de folios por pestaña
         self.orden_guardada = None
         self.orden_manager = obtener_manager()
+        self.catalogo = obtener_catalogo()
         
         # Configuración de usuario
         self.username = self.user_data.get('username', 'usuario')
@@ -831,6 +833,9 @@ class ReciboAppMejorado:
                 venta_id = resultado_venta['id_factura']
                 folio_factura = resultado_venta['folio_numero']
                 
+                # La venta descontó stock: recargar el catálogo en la próxima búsqueda
+                self.catalogo.invalidar()
+                
                 # Si era una orden guardada, marcarla como completada
                 if self.folio_actual and self.orden_guardada:
                     self.orden_manager.marcar_como_completada(self.folio_actual, venta_id)
@@ -953,11 +958,8 @@ class ReciboAppMejorado:
             
         grupo_id = self.grupos_data[grupo_seleccionado]
         
-        # Si la búsqueda está vacía, mostrar todos los productos
-        if not query:
-            resultados = database.buscar_todos_insumos(grupo_id)
-        else:
-            resultados = database.buscar_insumos(query, grupo_id)
+        # Búsqueda en el catálogo en memoria (vacía = todos los productos)
+        resultados = self.catalogo.buscar(grupo_id, query)
         
         # Limpiar resultados anteriores
         for item in widgets['tree_resultados'].get_children():
@@ -981,17 +983,11 @@ class ReciboAppMejorado:
         nombre_insumo = item['values'][0]
         precio = float(item['values'][1].replace('$', ''))
         
-        # Obtener información adicional del producto
+        # Obtener información adicional del producto desde el catálogo ya cargado
         grupo_id = self.grupos_data[widgets['combo_grupos'].get()]
-        productos = database.buscar_insumos(nombre_insumo, grupo_id)
-        unidad_producto = "unidad"  # Valor por defecto
-        es_especial = False
-        
-        for producto in productos:
-            if producto['id'] == int(id_insumo):
-                unidad_producto = producto.get('unidad', 'unidad')
-                es_especial = producto.get('es_especial', False)
-                break
+        producto = self.catalogo.obtener_producto(grupo_id, int(id_insumo)) or {}
+        unidad_producto = producto.get('unidad', 'unidad')
+        es_especial = producto.get('es_especial', False)
         
         # Abrir diálogo de cantidad
         dialogo = tk.Toplevel(self.root)
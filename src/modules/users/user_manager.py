@@ -7,6 +7,8 @@ import re
 from src.auth.auth_manager import AuthManager
 from src.auth.session_manager import session_manager
 from src.database.conexion import conectar
+from src.ui.buscador_registros import BuscadorRegistros, patron_prefijo
+from src.ui.filas_treeview import FilasTreeview
 
 class UserManagerApp:
     def __init__(self, root, user_data=None):
@@ -41,8 +43,17 @@ class UserManagerApp:
             self.root.destroy()
             return
         
+        # Search waits for the user to stop typing; large user lists are searched in SQL
+        self.buscador = BuscadorRegistros(self.root, ("username", "nombre_completo"),
+                                          al_mostrar=self.show_users,
+                                          consultar=self.search_users_sql,
+                                          al_fallar=lambda e: messagebox.showerror("Error", f"Error al filtrar usuarios: {e}"))
+        
         # Setup interface
         self.setup_interface()
+        self.user_rows = FilasTreeview(self.users_tree,
+                                       clave=lambda user: user['id_usuario'],
+                                       valores=self.user_values)
         self.load_users()
         
         # Protocol for window closing
@@ -203,96 +214,64 @@ class UserManagerApp:
                  **button_config).pack(side="right")
     
     def load_users(self):
-        """Load all users from database"""
+        """Load users from database and show those matching the current search"""
         try:
-            # Clear existing items
-            for item in self.users_tree.get_children():
-                self.users_tree.delete(item)
-            
-            # Fetch users
             self.cursor.execute("""
                 SELECT id_usuario, username, nombre_completo, rol, activo, 
                        ultimo_acceso, intentos_fallidos, bloqueado_hasta
                 FROM usuarios_sistema
                 ORDER BY username
-            """)
+                LIMIT %s
+            """, (self.buscador.limite,))
             
-            users = self.cursor.fetchall()
-            
-            for user in users:
-                # Format last access
-                ultimo_acceso = "Nunca"
-                if user['ultimo_acceso']:
-                    ultimo_acceso = user['ultimo_acceso'].strftime("%Y-%m-%d %H:%M")
-                
-                # Determine status
-                estado = "Activo" if user['activo'] else "Inactivo"
-                if user['bloqueado_hasta'] and user['bloqueado_hasta'] > datetime.now():
-                    estado = "Bloqueado"
-                
-                # Insert into tree
-                self.users_tree.insert("", "end", values=(
-                    user['id_usuario'],
-                    user['username'],
-                    user['nombre_completo'],
-                    user['rol'].upper(),
-                    estado,
-                    ultimo_acceso,
-                    user['intentos_fallidos']
-                ))
+            self.buscador.cargar(self.cursor.fetchall())
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar usuarios: {e}")
     
-    def filter_users(self, *args):
-        """Filter users based on search text"""
-        search_text = self.search_var.get().lower()
-        
-        # If no search text, reload all users
-        if not search_text:
-            self.load_users()
-            return
-        
-        # Clear existing items
-        for item in self.users_tree.get_children():
-            self.users_tree.delete(item)
-        
+    def search_users_sql(self, text, limit):
+        """Users whose username or full name start with text (indexed)"""
+        pattern = patron_prefijo(text)
+        self.cursor.execute("""
+            SELECT id_usuario, username, nombre_completo, rol, activo, 
+                   ultimo_acceso, intentos_fallidos, bloqueado_hasta
+            FROM usuarios_sistema
+            WHERE username LIKE %s OR nombre_completo LIKE %s
+            ORDER BY username
+            LIMIT %s
+        """, (pattern, pattern, limit))
+        return self.cursor.fetchall()
+    
+    def user_values(self, user):
+        """Values shown in the users table for one user"""
+        # Format last access
+        ultimo_acceso = "Nunca"
+        if user['ultimo_acceso']:
+            ultimo_acceso = user['ultimo_acceso'].strftime("%Y-%m-%d %H:%M")
+        
+        # Determine status
+        estado = "Activo" if user['activo'] else "Inactivo"
+        if user['bloqueado_hasta'] and user['bloqueado_hasta'] > datetime.now():
+            estado = "Bloqueado"
+        
+        return (user['id_usuario'],
+                user['username'],
+                user['nombre_completo'],
+                user['rol'].upper(),
+                estado,
+                ultimo_acceso,
+                user['intentos_fallidos'])
+    
+    def show_users(self, users):
+        """Show the users that match the search"""
         try:
-            # Search in username and full name
-            self.cursor.execute("""
-                SELECT id_usuario, username, nombre_completo, rol, activo, 
-                       ultimo_acceso, intentos_fallidos, bloqueado_hasta
-                FROM usuarios_sistema
-                WHERE LOWER(username) LIKE %s OR LOWER(nombre_completo) LIKE %s
-                ORDER BY username
-            """, (f"%{search_text}%", f"%{search_text}%"))
-            
-            users = self.cursor.fetchall()
-            
-            for user in users:
-                # Format last access
-                ultimo_acceso = "Nunca"
-                if user['ultimo_acceso']:
-                    ultimo_acceso = user['ultimo_acceso'].strftime("%Y-%m-%d %H:%M")
-                
-                # Determine status
-                estado = "Activo" if user['activo'] else "Inactivo"
-                if user['bloqueado_hasta'] and user['bloqueado_hasta'] > datetime.now():
-                    estado = "Bloqueado"
-                
-                # Insert into tree
-                self.users_tree.insert("", "end", values=(
-                    user['id_usuario'],
-                    user['username'],
-                    user['nombre_completo'],
-                    user['rol'].upper(),
-                    estado,
-                    ultimo_acceso,
-                    user['intentos_fallidos']
-                ))
-        
+            self.user_rows.actualizar(users)
         except Exception as e:
-            messagebox.showerror("Error", f"Error al filtrar usuarios: {e}")
+            messagebox.showerror("Error", f"Error al mostrar usuarios: {e}")
+    
+    def filter_users(self, *args):
+        """Filter users by username or full name once the user stops typing"""
+        self.buscador.buscar(self.search_var.get())
     
     def create_new_user(self):
         """Create a new user"""
@@ -432,6 +411,8 @@ class UserManagerApp:
     
     def on_closing(self):
         """Handle window closing"""
+        if hasattr(self, 'buscador'):
+            self.buscador.cerrar()
         try:
             if hasattr(self, 'conn'):
                 self.conn.close()
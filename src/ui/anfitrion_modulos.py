@@ -0,0 +1,257 @@
+"""
+DISFRULEG - Proceso anfitrión de módulos
+Lanzar cada módulo con su propio intérprete repite en cada clic la importación
+de tkinter, matplotlib, reportlab, openpyxl y mysql.connector, y la
+verificación de la base de datos. El anfitrión es un proceso de larga vida
+que hace ese trabajo una sola vez y abre los módulos como Toplevel.
+
+- AnfitrionModulos (lado de la aplicación principal) escucha en 127.0.0.1 con
+  una clave aleatoria, arranca el anfitrión al iniciar la aplicación (se
+  calienta mientras el usuario inicia sesión) y le envía las solicitudes.
+  Las que llegan antes de que termine de arrancar quedan en espera.
+- servir() (lado del anfitrión) recibe las solicitudes en un hilo y las pasa
+  al hilo de Tk por una cola, como EjecutorConsultas. Si la aplicación
+  principal se cierra, el anfitrión termina al cerrarse su última ventana.
+
+Todos los módulos comparten el hilo de Tk del anfitrión: una operación
+bloqueante en uno congela a los demás, pero no al menú principal.
+"""
+
+import os
+import sys
+import queue
+import importlib
+import threading
+import subprocess
+from multiprocessing.connection import AuthenticationError, Client, Listener
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Variables de entorno con las que el anfitrión encuentra a la aplicación
+ENV_DIRECCION = "DISFRULEG_ANFITRION_DIRECCION"
+ENV_CLAVE = "DISFRULEG_ANFITRION_CLAVE"
+
+# Intervalo con el que el hilo de Tk del anfitrión revisa las solicitudes
+INTERVALO_MS = 50
+
+
+def lanzar_proceso(comando: List[str], cwd: str, env: Optional[Dict[str, str]] = None):
+    """Inicia un proceso de Python como lo hace ModuleLauncher (consola propia en Windows)"""
+    if sys.platform.startswith('win'):
+        return subprocess.Popen(comando, cwd=cwd, env=env,
+                                creationflags=subprocess.CREATE_NEW_CONSOLE)
+    return subprocess.Popen(comando, cwd=cwd, env=env)
+
+
+class AnfitrionModulos:
+    """
+    Conexión de la aplicación principal con el proceso anfitrión.
+
+    Args:
+        comando: Comando que arranca el anfitrión (launch_module.py --host)
+        cwd: Directorio de trabajo del anfitrión
+        lanzar: Función (comando, cwd, env) -> proceso con poll(); por
+            defecto lanzar_proceso
+    """
+
+    def __init__(self, comando: List[str], cwd: str,
+                 lanzar: Callable[..., Any] = lanzar_proceso):
+        self.comando = list(comando)
+        self.cwd = cwd
+        self.lanzar = lanzar
+        self._proceso = None
+        self._escucha: Optional[Listener] = None
+        self._conexion = None
+        self._pendientes: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def conectado(self) -> bool:
+        """True si el anfitrión ya terminó de arrancar y está conectado"""
+        return self._conexion is not None
+
+    @property
+    def vivo(self) -> bool:
+        return self._proceso is not None and self._proceso.poll() is None
+
+    # ==================== ARRANQUE ====================
+
+    def iniciar(self):
+        """Arranca el anfitrión si no está corriendo"""
+        with self._lock:
+            if self.vivo:
+                return
+            self._cerrar_locked()
+            clave = os.urandom(32)
+            escucha = Listener(('127.0.0.1', 0), authkey=clave)
+            host, puerto = escucha.address
+            env = dict(os.environ)
+            env[ENV_DIRECCION] = f"{host}:{puerto}"
+            env[ENV_CLAVE] = clave.hex()
+            try:
+                self._proceso = self.lanzar(self.comando, self.cwd, env)
+            except Exception:
+                escucha.close()
+                raise
+            self._escucha = escucha
+        threading.Thread(target=self._aceptar, args=(escucha,), daemon=True,
+                         name="anfitrion-modulos").start()
+
+    def _aceptar(self, escucha: Listener):
+        while True:
+            try:
+                conexion = escucha.accept()
+            except AuthenticationError:
+                continue  # Otro proceso local sin la clave
+            except OSError:
+                return  # Se cerró la escucha
+            with self._lock:
+                if escucha is not self._escucha:
+                    conexion.close()
+                    return
+                self._conexion = conexion
+                pendientes, self._pendientes = self._pendientes, []
+                for solicitud in pendientes:
+                    self._enviar_locked(solicitud)
+            return
+
+    # ==================== SOLICITUDES ====================
+
+    def abrir(self, module_key: str, user_data: Optional[Dict[str, Any]] = None, **opciones) -> bool:
+        """
+        Pide al anfitrión que abra un módulo.
+
+        Returns:
+            bool: False si el anfitrión no está disponible (usar otro modo)
+        """
+        solicitud = dict(opciones, accion='abrir', modulo=module_key, usuario=user_data)
+        with self._lock:
+            if self._conexion is not None:
+                return self._enviar_locked(solicitud)
+            if self.vivo:
+                # Todavía arrancando: se envía al conectarse
+                self._pendientes.append(solicitud)
+                return True
+        return False
+
+    def recibir(self, espera: Optional[float] = None):
+        """Respuesta del anfitrión a una solicitud con responder=True (None si no llegó)"""
+        conexion = self._conexion
+        if conexion is None or not conexion.poll(espera):
+            return None
+        return conexion.recv()
+
+    def _enviar_locked(self, solicitud: Dict[str, Any]) -> bool:
+        try:
+            self._conexion.send(solicitud)
+            return True
+        except (OSError, ValueError):
+            # El anfitrión se cerró: la siguiente iniciar() lo vuelve a arrancar
+            self._cerrar_locked()
+            return False
+
+    # ==================== CIERRE ====================
+
+    def cerrar(self):
+        """Desconecta el anfitrión; sus ventanas abiertas siguen hasta que se cierren"""
+        with self._lock:
+            self._cerrar_locked()
+
+    def _cerrar_locked(self):
+        for recurso in (self._conexion, self._escucha):
+            if recurso is not None:
+                try:
+                    recurso.close()
+                except OSError:
+                    pass
+        self._conexion = None
+        self._escucha = None
+        self._proceso = None
+        self._pendientes = []
+
+
+# ==================== LADO DEL ANFITRIÓN ====================
+
+def atender(solicitud: Dict[str, Any], abrir_modulo: Callable[..., Any], raiz) -> Optional[Dict[str, Any]]:
+    """
+    Atiende una solicitud en el hilo de Tk y retorna la respuesta a enviar,
+    si la pidió. Con medir=True la ventana se dibuja y se cierra enseguida
+    (scripts/benchmark_arranque_modulos.py).
+    """
+    if solicitud.get('accion') != 'abrir':
+        return None
+    ventana = abrir_modulo(solicitud['modulo'], solicitud.get('usuario'), master=raiz)
+    if ventana is not None and solicitud.get('medir'):
+        ventana.update_idletasks()
+        ventana.destroy()
+    if not solicitud.get('responder'):
+        return None
+    return {'modulo': solicitud['modulo'], 'abierto': ventana is not None}
+
+
+def servir(abrir_modulo: Callable[..., Any], precargar: Iterable[str] = ()):
+    """
+    Ciclo del proceso anfitrión: precarga los módulos, se conecta a la
+    aplicación principal y abre los módulos que pida.
+
+    Args:
+        abrir_modulo: Función (module_key, user_data, master) -> ventana
+        precargar: Módulos de Python a importar antes de conectarse
+    """
+    import tkinter as tk
+    from tkinter import messagebox
+
+    host, puerto = os.environ[ENV_DIRECCION].rsplit(":", 1)
+    clave = bytes.fromhex(os.environ[ENV_CLAVE])
+
+    raiz = tk.Tk()
+    raiz.withdraw()
+    for nombre in precargar:
+        try:
+            importlib.import_module(nombre)
+        except Exception as e:
+            print(f"No se pudo precargar {nombre}: {e}")
+
+    conexion = Client((host, int(puerto)), authkey=clave)
+    solicitudes: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+
+    def recibir():
+        try:
+            while True:
+                solicitudes.put(conexion.recv())
+        except (EOFError, OSError):
+            solicitudes.put(None)  # La aplicación principal se cerró
+
+    threading.Thread(target=recibir, daemon=True).start()
+    estado = {'desconectado': False}
+
+    def revisar():
+        while True:
+            try:
+                solicitud = solicitudes.get_nowait()
+            except queue.Empty:
+                break
+            if solicitud is None:
+                estado['desconectado'] = True
+                continue
+            try:
+                respuesta = atender(solicitud, abrir_modulo, raiz)
+            except Exception as e:
+                print(f"Error al abrir el módulo {solicitud.get('modulo')}: {e}")
+                messagebox.showerror("Error", f"No se pudo abrir el módulo '{solicitud.get('modulo')}': {e}",
+                                     parent=raiz)
+                respuesta = {'modulo': solicitud.get('modulo'), 'abierto': False} \
+                    if solicitud.get('responder') else None
+            if respuesta is not None and not estado['desconectado']:
+                try:
+                    conexion.send(respuesta)
+                except OSError:
+                    estado['desconectado'] = True
+
+        abiertas = [w for w in raiz.winfo_children() if isinstance(w, tk.Toplevel)]
+        if estado['desconectado'] and not abiertas:
+            raiz.destroy()
+            return
+        raiz.after(INTERVALO_MS, revisar)
+
+    raiz.after(INTERVALO_MS, revisar)
+    raiz.mainloop()
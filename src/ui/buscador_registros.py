@@ -0,0 +1,172 @@
+"""
+DISFRULEG - Búsqueda de registros para las ventanas de administración
+Filtra listas como clientes o usuarios mientras el usuario escribe:
+
+- Espera a que deje de teclear (ESPERA_MS) en lugar de buscar con cada tecla.
+- Cada registro guarda una clave de búsqueda precalculada (sus campos en
+  minúsculas y sin acentos), así que filtrar es una comparación por registro.
+  Si el texto nuevo contiene al anterior, solo se revisan los que ya coincidían.
+- Con más de UMBRAL_MEMORIA registros la ventana no los carga todos: la
+  búsqueda se hace en SQL sobre columnas con índice, en un hilo de trabajo, y
+  la consulta de un texto anterior que siga en curso se descarta.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.utils.indice_busqueda import normalizar_texto
+
+# Registros que se filtran en memoria; con más se busca en SQL
+UMBRAL_MEMORIA = 5000
+
+# Espera tras la última tecla antes de buscar
+ESPERA_MS = 150
+
+
+def clave_busqueda(registro: Dict[str, Any], campos: Sequence[str]) -> str:
+    """
+    Campos del registro normalizados en un solo texto. Se separan con un
+    salto de línea para que una búsqueda no coincida a caballo de dos campos.
+    """
+    return "\n".join(normalizar_texto(registro[campo]) for campo in campos if registro.get(campo))
+
+
+def patron_prefijo(texto: str) -> str:
+    """
+    Patrón LIKE para valores que empiezan con texto. Un LIKE con comodín
+    solo al final usa el índice de la columna; la intercalación
+    utf8mb4_unicode_ci ya ignora mayúsculas y acentos.
+    """
+    escapado = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escapado + "%"
+
+
+class BuscadorRegistros:
+    """
+    Filtro con espera entre teclas para una lista de registros.
+
+    Args:
+        widget: Widget de Tk cuyo after() mide la espera
+        campos: Campos del registro en los que se busca
+        al_mostrar: Recibe los registros a mostrar (en el hilo de Tk)
+        consultar: Función (texto, límite) -> registros que busca en SQL;
+            sin ella la búsqueda siempre es en memoria
+        ejecutor: EjecutorConsultas para correr consultar en segundo plano;
+            sin él la consulta corre en el hilo de Tk
+        clave_consulta: Clave de las búsquedas en el ejecutor
+        umbral: Registros a partir de los cuales se busca en SQL
+        espera_ms: Espera tras la última tecla
+        al_fallar: Recibe la excepción si falla una búsqueda en SQL
+
+    La ventana carga los registros con LIMIT buscador.limite y se los pasa a
+    cargar(); si llegan más que umbral, la búsqueda pasa a SQL.
+    """
+
+    def __init__(self, widget, campos: Sequence[str],
+                 al_mostrar: Callable[[List[Dict[str, Any]]], None],
+                 consultar: Optional[Callable[[str, int], List[Dict[str, Any]]]] = None,
+                 ejecutor=None, clave_consulta: str = "busqueda",
+                 umbral: int = UMBRAL_MEMORIA, espera_ms: int = ESPERA_MS,
+                 al_fallar: Optional[Callable[[Exception], None]] = None):
+        self.widget = widget
+        self.campos = tuple(campos)
+        self.al_mostrar = al_mostrar
+        self.consultar = consultar
+        self.ejecutor = ejecutor
+        self.clave_consulta = clave_consulta
+        self.umbral = umbral
+        self.espera_ms = espera_ms
+        self.al_fallar = al_fallar
+
+        self.texto = ""
+        self.en_memoria = True
+        self._registros: List[Dict[str, Any]] = []
+        self._claves: List[str] = []
+        self._ultimo = ("", None)  # (texto, índices) del último filtro en memoria
+        self._espera = None
+
+    @property
+    def limite(self) -> int:
+        """Registros a pedir al cargar: uno más que el umbral para saber si se pasa"""
+        return self.umbral + 1
+
+    # ==================== CARGA ====================
+
+    def cargar(self, registros: List[Dict[str, Any]]):
+        """Recibe los registros de la ventana y muestra los que coinciden con el texto actual"""
+        self.en_memoria = self.consultar is None or len(registros) <= self.umbral
+        self._registros = list(registros if self.en_memoria else registros[:self.umbral])
+        self._claves = [clave_busqueda(registro, self.campos) for registro in self._registros]
+        self._ultimo = ("", None)
+        self.aplicar()
+
+    # ==================== BÚSQUEDA ====================
+
+    def buscar(self, texto: str):
+        """Programa la búsqueda para cuando el usuario deje de escribir"""
+        self.texto = texto
+        # Lo que siga en curso ya es de un texto anterior
+        self._cancelar_consulta()
+        if self._espera is not None:
+            self.widget.after_cancel(self._espera)
+        self._espera = self.widget.after(self.espera_ms, self.aplicar)
+
+    def aplicar(self):
+        """Busca ya con el texto actual (al cargar o al terminar la espera)"""
+        self._cancelar_espera()
+        self._cancelar_consulta()
+        texto = self.texto.strip()
+
+        # Sin texto se muestran los registros cargados (los primeros si son muchos)
+        if self.en_memoria or not texto:
+            self.al_mostrar(self.filtrar(texto))
+            return
+
+        if self.ejecutor is not None:
+            self.ejecutor.ejecutar(self.consultar, texto, self.umbral, clave=self.clave_consulta,
+                                   al_terminar=self.al_mostrar, al_fallar=self._fallar)
+            return
+        try:
+            registros = self.consultar(texto, self.umbral)
+        except Exception as e:
+            self._fallar(e)
+        else:
+            self.al_mostrar(registros)
+
+    def filtrar(self, texto: str) -> List[Dict[str, Any]]:
+        """Registros cargados cuya clave de búsqueda contiene texto"""
+        texto = normalizar_texto(texto).strip()
+        if not texto:
+            self._ultimo = ("", None)
+            return list(self._registros)
+
+        anterior, indices = self._ultimo
+        if indices is None or anterior not in texto:
+            indices = range(len(self._registros))
+        indices = [i for i in indices if texto in self._claves[i]]
+        self._ultimo = (texto, indices)
+        return [self._registros[i] for i in indices]
+
+    # ==================== CANCELACIÓN ====================
+
+    def cerrar(self):
+        """Descarta la espera y la consulta en curso (al cerrar la ventana)"""
+        self._cancelar_espera()
+        self._cancelar_consulta()
+
+    def _cancelar_espera(self):
+        if self._espera is not None:
+            try:
+                self.widget.after_cancel(self._espera)
+            except Exception:
+                pass  # Ya se ejecutó o la ventana se cerró
+            self._espera = None
+
+    def _cancelar_consulta(self):
+        if self.ejecutor is not None:
+            self.ejecutor.cancelar(self.clave_consulta)
+
+    def _fallar(self, e: Exception):
+        if self.al_fallar is not None:
+            self.al_fallar(e)
+        else:
+            print(f"Error en búsqueda: {e}")
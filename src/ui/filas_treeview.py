@@ -0,0 +1,229 @@
+"""
+DISFRULEG - Actualización incremental de Treeviews
+Enlaza un ttk.Treeview con una lista de filas identificadas por una clave y,
+en cada actualización, solo inserta, modifica, mueve o elimina las filas que
+cambiaron, en lugar de borrar todo y volver a insertar la lista completa.
+
+Mantener los items existentes conserva la selección, el foco, las ramas
+abiertas y la posición del scroll, y en listas de miles de filas evita que
+cada refresco o cada tecla del buscador rehaga todo el árbol. Las filas que
+dejan de mostrarse se desenganchan (detach) en lugar de borrarse, así que
+al borrar un filtro vuelven a su lugar sin crearse de nuevo.
+"""
+
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+_RAIZ = object()  # clave del nivel superior
+
+
+def _subsecuencia_creciente(posiciones: List[int]) -> List[int]:
+    """
+    Índices de una subsecuencia creciente más larga de posiciones.
+    Las filas en esos índices ya están en orden relativo correcto y no se
+    mueven; el resto se reubica (n - LIS movimientos, el mínimo).
+    """
+    colas = []        # valor final de la mejor subsecuencia de cada largo
+    indices_cola = [] # índice en posiciones de cada valor de colas
+    anterior = [-1] * len(posiciones)
+    for i, valor in enumerate(posiciones):
+        largo = bisect_left(colas, valor)
+        if largo == len(colas):
+            colas.append(valor)
+            indices_cola.append(i)
+        else:
+            colas[largo] = valor
+            indices_cola[largo] = i
+        anterior[i] = indices_cola[largo - 1] if largo else -1
+
+    resultado = []
+    i = indices_cola[-1] if indices_cola else -1
+    while i != -1:
+        resultado.append(i)
+        i = anterior[i]
+    resultado.reverse()
+    return resultado
+
+
+class FilasTreeview:
+    """
+    Mantiene un Treeview sincronizado con una lista de filas.
+
+    Args:
+        tree: ttk.Treeview a controlar; el enlace es dueño de todos sus items
+        clave: Función fila -> clave única (id del registro)
+        valores: Función fila -> tupla de valores de las columnas
+        texto: Función fila -> texto de la columna #0 (opcional)
+        etiquetas: Función fila -> tupla de tags (opcional). Si no se indica,
+            el enlace no toca los tags y los filtros o resaltados que la
+            ventana aplique sobre ellos se conservan
+        hijos: Función fila -> filas hijas (opcional, para árboles con ramas)
+        max_ocultas: Filas ocultas que se conservan para reusar; al pasar
+            de este número se borran del Treeview
+
+    Las claves deben ser únicas en todo el árbol, no solo entre hermanos;
+    una fila que cambia de rama se mueve sin recrearse.
+    """
+
+    def __init__(self, tree, clave: Callable[[Any], Hashable],
+                 valores: Callable[[Any], tuple],
+                 texto: Optional[Callable[[Any], str]] = None,
+                 etiquetas: Optional[Callable[[Any], tuple]] = None,
+                 hijos: Optional[Callable[[Any], Iterable]] = None,
+                 max_ocultas: int = 20_000):
+        self.tree = tree
+        self.clave = clave
+        self.valores = valores
+        self.texto = texto
+        self.etiquetas = etiquetas
+        self.hijos = hijos
+        self.max_ocultas = max_ocultas
+        self._items: Dict[Hashable, str] = {}    # clave -> iid
+        self._claves: Dict[str, Hashable] = {}   # iid -> clave
+        self._mostrado: Dict[Hashable, tuple] = {}
+        self._filas: Dict[Hashable, Any] = {}
+        self._visibles = set()
+
+    # ==================== CONSULTA ====================
+
+    def fila(self, iid: str):
+        """Fila original mostrada en el item iid (None si no es del enlace)"""
+        clave = self._claves.get(iid)
+        return self._filas.get(clave) if clave is not None else None
+
+    def item(self, clave: Hashable) -> Optional[str]:
+        """iid del item que muestra la fila con esa clave (None si no se muestra)"""
+        return self._items.get(clave) if clave in self._visibles else None
+
+    def __len__(self):
+        return len(self._visibles)
+
+    # ==================== ACTUALIZACIÓN ====================
+
+    def actualizar(self, filas: Iterable) -> Dict[str, int]:
+        """
+        Lleva el Treeview al contenido y orden de filas.
+        Retorna cuántas filas se insertaron, actualizaron, movieron y quitaron.
+        """
+        cambios = {'insertadas': 0, 'actualizadas': 0, 'movidas': 0, 'quitadas': 0}
+
+        niveles = []   # (padre, [(clave, fila)])
+        presentes = set()
+        self._recorrer(_RAIZ, list(filas), niveles, presentes)
+
+        seleccion = self.tree.selection()
+        foco = self.tree.focus()
+        scroll = self.tree.yview()[0]
+
+        # Cada nivel desengancha lo que ya no le corresponde; las filas
+        # quitadas quedan sueltas o bajo un padre suelto, listas para reusar
+        for padre, nivel in niveles:
+            self._sincronizar_nivel(padre, nivel, cambios)
+        cambios['quitadas'] = len(self._visibles - presentes)
+        self._visibles = presentes
+
+        if len(self._items) - len(self._visibles) > self.max_ocultas:
+            self._borrar([clave for clave in self._items if clave not in self._visibles])
+
+        self._restaurar_vista(seleccion, foco, scroll)
+        return cambios
+
+    def limpiar(self):
+        """Borra todas las filas del Treeview, incluidas las ocultas"""
+        self._visibles = set()
+        self._borrar(list(self._items))
+
+    def _borrar(self, claves):
+        for clave in claves:
+            iid = self._items.pop(clave)
+            # Un padre borrado arrastra a sus hijos
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+            del self._claves[iid]
+            del self._mostrado[clave]
+            del self._filas[clave]
+
+    def _recorrer(self, padre, filas, niveles, presentes):
+        """Aplana el árbol nuevo en niveles, del padre hacia los hijos"""
+        nivel = []
+        for fila in filas:
+            clave = self.clave(fila)
+            if clave in presentes:
+                raise ValueError(f"Clave de fila repetida: {clave!r}")
+            presentes.add(clave)
+            nivel.append((clave, fila))
+        niveles.append((padre, nivel))
+
+        if self.hijos is None:
+            return
+        for clave, fila in nivel:
+            hijas = list(self.hijos(fila) or ())
+            if hijas or clave in self._items:
+                # El padre aún no tiene iid si es nuevo; se resuelve al sincronizar
+                self._recorrer(clave, hijas, niveles, presentes)
+
+    def _sincronizar_nivel(self, padre_clave, nivel, cambios):
+        padre = '' if padre_clave is _RAIZ else self._items[padre_clave]
+
+        # Items del nivel que siguen aquí, en el orden actual del Treeview
+        destino = {clave: i for i, (clave, _) in enumerate(nivel)}
+        actuales = self.tree.get_children(padre)
+        conservadas = [self._claves[iid] for iid in actuales if self._claves.get(iid) in destino]
+        posiciones = [destino[clave] for clave in conservadas]
+        fijas = {conservadas[i] for i in _subsecuencia_creciente(posiciones)}
+
+        # Lo que no está fijo se saca del nivel (y queda oculto si no vuelve)
+        sueltos = [iid for iid in actuales if self._claves.get(iid) not in fijas]
+        if sueltos:
+            self.tree.detach(*sueltos)
+
+        # Con solo las fijas en el nivel (ya en orden), cada fila se coloca en su índice
+        for i, (clave, fila) in enumerate(nivel):
+            mostrado = self._mostrar(fila)
+            iid = self._items.get(clave)
+            if iid is None:
+                iid = self.tree.insert(padre, i, **self._opciones(mostrado, nueva=True))
+                self._items[clave] = iid
+                self._claves[iid] = clave
+                cambios['insertadas'] += 1
+            else:
+                if clave not in fijas:
+                    self.tree.move(iid, padre, i)
+                if clave not in self._visibles:
+                    cambios['insertadas'] += 1  # reaparece una fila oculta
+                elif clave not in fijas:
+                    cambios['movidas'] += 1
+                if mostrado != self._mostrado[clave]:
+                    self.tree.item(iid, **self._opciones(mostrado))
+                    cambios['actualizadas'] += 1
+            self._mostrado[clave] = mostrado
+            self._filas[clave] = fila
+
+    def _mostrar(self, fila) -> tuple:
+        return (
+            tuple(self.valores(fila)),
+            self.texto(fila) if self.texto else None,
+            tuple(self.etiquetas(fila)) if self.etiquetas else None,
+        )
+
+    def _opciones(self, mostrado, nueva=False) -> dict:
+        valores, texto, etiquetas = mostrado
+        opciones = {'values': valores}
+        if texto is not None:
+            opciones['text'] = texto
+        if etiquetas is not None:
+            opciones['tags'] = etiquetas
+        if nueva and self.hijos is not None:
+            opciones['open'] = True
+        return opciones
+
+    def _restaurar_vista(self, seleccion, foco, scroll):
+        """Devuelve selección, foco y scroll de los items que siguen existiendo"""
+        vigentes = tuple(iid for iid in seleccion if self._claves.get(iid) in self._visibles)
+        # Solo si cambió: selection_set dispara <<TreeviewSelect>>
+        if tuple(self.tree.selection()) != vigentes:
+            self.tree.selection_set(vigentes)
+        if foco and self._claves.get(foco) in self._visibles and self.tree.focus() != foco:
+            self.tree.focus(foco)
+        if self.tree.yview()[0] != scroll:
+            self.tree.yview_moveto(scroll)
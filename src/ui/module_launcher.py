@@ -5,15 +5,17 @@ Handles module definitions, launching, and management
 
 import os
 import sys
+import importlib
 import subprocess
 from tkinter import messagebox
-from src.config import debug_print, USE_SESSION_MANAGER
+from src.config import debug_print, USE_SESSION_MANAGER, MODULE_LAUNCH_MODE
 
 class ModuleLauncher:
     """Class for managing and launching application modules"""
     
-    def __init__(self):
+    def __init__(self, launch_mode=MODULE_LAUNCH_MODE):
         self.modules = self._get_module_definitions()
+        self.launch_mode = launch_mode
         
         # Calculate absolute path to project root
         # This file is in src/ui/module_launcher.py
@@ -27,6 +29,15 @@ class ModuleLauncher:
         debug_print(f"  Project root: {self.project_root}")
         debug_print(f"  Launcher script: {self.launcher_script_path}")
         debug_print(f"  Launcher exists: {os.path.exists(self.launcher_script_path)}")
+        debug_print(f"  Launch mode: {self.launch_mode}")
+        
+        # Start the warm host right away so it imports while the user logs in
+        self.host = None
+        if self.launch_mode == "host":
+            from src.ui.anfitrion_modulos import AnfitrionModulos
+            self.host = AnfitrionModulos([sys.executable, self.launcher_script_path, "--host"],
+                                         cwd=self.project_root)
+            self._start_host()
     
     def _get_module_definitions(self):
         """Get all module definitions"""
@@ -101,8 +112,13 @@ class ModuleLauncher:
         debug_print(f"Available modules for role '{user_role}': {len(available_modules)}")
         return available_modules
     
-    def launch_module(self, module_key, user_data=None):
-        """Launch a module using the proper launcher"""
+    def launch_module(self, module_key, user_data=None, master=None):
+        """
+        Launch a module according to launch_mode.
+        
+        master is the main window, needed by the "in_process" mode. The
+        "host" mode falls back to a new process if the host is unavailable.
+        """
         debug_print(f"Launching module: {module_key}")
         
         try:
@@ -114,6 +130,16 @@ class ModuleLauncher:
                 except ImportError:
                     debug_print("Session manager not available")
             
+            if self.launch_mode == "in_process" and master is not None:
+                return self._launch_in_process(module_key, user_data, master)
+            
+            if self.host is not None:
+                if self.host.abrir(module_key, user_data):
+                    debug_print(f"Module {module_key} sent to host process")
+                    return True
+                debug_print("Host process unavailable, launching a new process")
+                self._start_host()
+            
             # Check if launcher script exists using absolute path
             if not os.path.exists(self.launcher_script_path):
                 error_msg = f"No se encontró el launcher: {self.launcher_script_path}"
@@ -178,6 +204,27 @@ class ModuleLauncher:
             messagebox.showerror("Error", error_msg)
             return False
     
+    def _launch_in_process(self, module_key, user_data, master):
+        """Open the module as a Toplevel of the main window"""
+        if self.project_root not in sys.path:
+            sys.path.insert(0, self.project_root)
+        launcher = importlib.import_module("launch_module")
+        window = launcher.open_module(module_key, user_data, master=master)
+        debug_print(f"Module {module_key} opened in process: {window is not None}")
+        return window is not None
+    
+    def _start_host(self):
+        """Start (or restart) the host process; failures leave subprocess mode"""
+        try:
+            self.host.iniciar()
+        except Exception as e:
+            debug_print(f"Could not start module host: {e}")
+    
+    def shutdown(self):
+        """Disconnect the host; its open windows stay until closed"""
+        if self.host is not None:
+            self.host.cerrar()
+    
     def validate_module_launcher(self):
         """Validate that the module launcher exists"""
         if not os.path.exists(self.launcher_script_path):
@@ -201,5 +248,7 @@ class ModuleLauncher:
             "launcher_path": self.launcher_script_path,
             "project_root": self.project_root,
             "current_working_directory": os.getcwd(),
-            "python_executable": sys.executable
+            "python_executable": sys.executable,
+            "launch_mode": self.launch_mode,
+            "host_connected": self.host is not None and self.host.conectado
         }
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+DISFRULEG - Scroll infinito para Treeviews con historiales largos
+Muestra la primera página de una lista paginada por llave
+(src/database/paginacion.py) y pide la siguiente cuando el usuario se
+acerca al final del scroll. El tiempo hasta la primera pintura y la memoria
+dependen de las páginas que el usuario recorre, no del tamaño del historial.
+
+El aviso de desplazamiento llega por el yscrollcommand del Treeview, que Tk
+llama cada vez que cambia la vista (scroll, rueda, teclado o filas nuevas).
+Si una página no llena la vista, el siguiente aviso ya pide la otra.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from src.database.paginacion import Llave, Pagina
+
+# Fracción del scroll a partir de la cual se pide la siguiente página
+UMBRAL_SCROLL = 0.9
+
+
+class ScrollInfinito:
+    """
+    Carga por páginas un Treeview a medida que se desplaza.
+
+    Args:
+        tree: ttk.Treeview a llenar
+        cargar_pagina: Función despues -> (filas, siguiente); con ejecutor
+            corre en un hilo de trabajo, así que no debe tocar widgets
+        valores: Función fila -> tupla de valores de las columnas. El
+            adaptador inserta las filas al final del árbol
+        etiquetas: Función fila -> tupla de tags (opcional)
+        agregar: En lugar de valores, función que recibe cada página y la
+            muestra (para listas que la ventana ya mantiene con FilasTreeview);
+            la ventana indica desde dónde seguir con continuar()
+        scrollbar: Scrollbar vertical a la que se reenvía el desplazamiento
+        ejecutor: EjecutorConsultas para cargar sin congelar la ventana;
+            sin él las páginas se cargan en el hilo de Tk
+        clave_consulta: Clave de las solicitudes en el ejecutor
+        umbral: Fracción del scroll que dispara la siguiente página
+        al_cargar: Se llama con las filas de cada página, ya mostradas
+        al_fallar: Se llama con la excepción si falla una página; el
+            siguiente desplazamiento la vuelve a pedir
+    """
+
+    def __init__(self, tree, cargar_pagina: Callable[[Optional[Llave]], Pagina],
+                 valores: Optional[Callable[[Dict[str, Any]], tuple]] = None,
+                 etiquetas: Optional[Callable[[Dict[str, Any]], tuple]] = None,
+                 agregar: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 scrollbar=None, ejecutor=None, clave_consulta: str = "pagina",
+                 umbral: float = UMBRAL_SCROLL,
+                 al_cargar: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 al_fallar: Optional[Callable[[Exception], None]] = None):
+        if (valores is None) == (agregar is None):
+            raise ValueError("Indique valores o agregar, no ambos")
+        self.tree = tree
+        self.cargar_pagina = cargar_pagina
+        self.valores = valores
+        self.etiquetas = etiquetas
+        self.agregar = agregar
+        self.scrollbar = scrollbar
+        self.ejecutor = ejecutor
+        self.clave_consulta = clave_consulta
+        self.umbral = umbral
+        self.al_cargar = al_cargar
+        self.al_fallar = al_fallar
+
+        self._filas: Dict[str, Dict[str, Any]] = {}
+        self._siguiente: Optional[Llave] = None
+        self._hay_mas = False
+        self._solicitud = None
+        self._cargando = False
+
+        tree.configure(yscrollcommand=self._al_desplazar)
+
+    # ==================== ESTADO ====================
+
+    @property
+    def hay_mas(self) -> bool:
+        """True si quedan páginas por pedir"""
+        return self._hay_mas
+
+    @property
+    def cargando(self) -> bool:
+        return self._cargando
+
+    def __len__(self) -> int:
+        """Filas insertadas por el adaptador hasta ahora"""
+        return len(self._filas)
+
+    def fila(self, iid: str) -> Optional[Dict[str, Any]]:
+        """Fila mostrada en el item iid"""
+        return self._filas.get(iid)
+
+    # ==================== CARGA ====================
+
+    def reiniciar(self, cargar_pagina: Optional[Callable[[Optional[Llave]], Pagina]] = None):
+        """
+        Vacía la lista y pide la primera página, p. ej. al cambiar la
+        búsqueda (con la nueva función de carga) o al pulsar "Actualizar".
+        """
+        if cargar_pagina is not None:
+            self.cargar_pagina = cargar_pagina
+        self._cancelar()
+        if self.agregar is None:
+            self.tree.delete(*self.tree.get_children())
+            self._filas.clear()
+        self.tree.yview_moveto(0)
+        self._siguiente = None
+        self._hay_mas = True
+        self.cargar_siguiente()
+
+    def continuar(self, siguiente: Optional[Llave]):
+        """
+        Fija desde dónde sigue la lista cuando la ventana cargó las filas por
+        su cuenta (None si ya no hay más). Una página en curso pedida con otra
+        llave se descarta.
+        """
+        if self._cargando and siguiente != self._siguiente:
+            self._cancelar()
+        self._siguiente = siguiente
+        self._hay_mas = siguiente is not None
+
+    def cargar_siguiente(self):
+        """Pide la siguiente página si hay más y no se está cargando otra"""
+        if not self._hay_mas or self._cargando:
+            return
+        self._cargando = True
+        if self.ejecutor is not None:
+            self._solicitud = self.ejecutor.ejecutar(
+                self.cargar_pagina, self._siguiente, clave=self.clave_consulta,
+                al_terminar=self._recibir, al_fallar=self._fallar)
+            return
+        try:
+            pagina = self.cargar_pagina(self._siguiente)
+        except Exception as e:
+            self._fallar(e)
+        else:
+            self._recibir(pagina)
+
+    def _cancelar(self):
+        if self._solicitud is not None:
+            self._solicitud.cancelar()
+            self._solicitud = None
+        self._cargando = False
+
+    def _recibir(self, pagina: Pagina):
+        filas, siguiente = pagina
+        self._solicitud = None
+        self._cargando = False
+        # Antes de mostrar: agregar() puede volver a fijar la llave con continuar()
+        self._siguiente = siguiente
+        self._hay_mas = siguiente is not None
+
+        if self.agregar is not None:
+            self.agregar(filas)
+        else:
+            for fila in filas:
+                opciones = {'values': self.valores(fila)}
+                if self.etiquetas is not None:
+                    opciones['tags'] = self.etiquetas(fila)
+                self._filas[self.tree.insert("", "end", **opciones)] = fila
+
+        if self.al_cargar is not None:
+            self.al_cargar(filas)
+
+    def _fallar(self, e: Exception):
+        self._solicitud = None
+        self._cargando = False
+        if self.al_fallar is not None:
+            self.al_fallar(e)
+        else:
+            print(f"Error al cargar página: {e}")
+
+    # ==================== SCROLL ====================
+
+    def _al_desplazar(self, primero, ultimo):
+        """yscrollcommand del Treeview: mueve la scrollbar y pide más cerca del final"""
+        if self.scrollbar is not None:
+            self.scrollbar.set(primero, ultimo)
+        if float(ultimo) >= self.umbral:
+            self.cargar_siguiente()
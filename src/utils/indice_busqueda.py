@@ -0,0 +1,290 @@
+"""
+DISFRULEG - Índice de búsqueda de productos en memoria
+
+Búsqueda por nombre sin acentos ni mayúsculas, por prefijo de palabra,
+con coincidencias dentro de la palabra y tolerancia a errores de tecleo.
+Lo comparten la búsqueda de ventas, el editor de precios y el registro de compras.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from itertools import islice
+
+_SEPARADOR = re.compile(r"[^\w]+")
+
+# Puntaje de cada tipo de coincidencia de una palabra de la búsqueda
+PUNTOS_EXACTA = 4
+PUNTOS_PREFIJO = 3
+PUNTOS_INTERNA = 2
+PUNTOS_APROXIMADA = 1
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin acentos, para comparar como lo hace utf8mb4_unicode_ci"""
+    descompuesto = unicodedata.normalize('NFKD', str(texto).casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def separar_palabras(texto):
+    """Normaliza el texto y lo separa en palabras"""
+    return [p for p in _SEPARADOR.split(normalizar_texto(texto)) if p]
+
+
+def _trigramas(palabra):
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+
+def _borrados(palabra):
+    """Variantes de la palabra con una letra menos"""
+    return {palabra[:i] + palabra[i + 1:] for i in range(len(palabra))}
+
+
+def _distancia_maxima(palabra):
+    """Errores de tecleo tolerados según el largo de la palabra buscada"""
+    if len(palabra) < 4:
+        return 0
+    return 1 if len(palabra) < 8 else 2
+
+
+def _distancia(a, b, maxima):
+    """
+    Distancia de edición con transposiciones (Damerau-Levenshtein restringida).
+    Se corta en cuanto supera `maxima` y en ese caso retorna maxima + 1.
+    """
+    if abs(len(a) - len(b)) > maxima:
+        return maxima + 1
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        minimo_fila = i
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if (anterior2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+            minimo_fila = min(minimo_fila, actual[j])
+        if minimo_fila > maxima:
+            return maxima + 1
+        anterior2, anterior = anterior, actual
+    return anterior[-1]
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido sobre nombres de productos.
+
+    Cada nombre se normaliza y se separa en palabras. El vocabulario ordenado
+    permite buscar por prefijo con bisect; los índices de trigramas y de
+    borrados de una letra sobre el vocabulario resuelven coincidencias dentro
+    de la palabra y errores de tecleo sin recorrer todo el catálogo.
+    """
+
+    def __init__(self, documentos=()):
+        """
+        Args:
+            documentos: Iterable de (id, nombre)
+        """
+        self._nombres = {}
+        self._orden = {}
+        self._ids_ordenados = []
+        self._vocabulario = []
+        self._publicaciones = {}
+        self._por_primera_palabra = {}
+        self._primeras_palabras = []
+        self._por_inicial = {}
+        self._inicial_primera = {}
+        self._trigramas = {}
+        self._por_borrado = {}
+        self.construir(documentos)
+
+    def construir(self, documentos):
+        """Reconstruye el índice con los (id, nombre) dados"""
+        self._nombres = {id_doc: normalizar_texto(nombre) for id_doc, nombre in documentos}
+        # Desempate estable: nombres más cortos y luego alfabético
+        self._ids_ordenados = sorted(self._nombres, key=lambda d: (len(self._nombres[d]), self._nombres[d]))
+        self._orden = {id_doc: posicion for posicion, id_doc in enumerate(self._ids_ordenados)}
+
+        publicaciones = {}
+        for id_doc, nombre in self._nombres.items():
+            for palabra in set(_SEPARADOR.split(nombre)):
+                if palabra:
+                    publicaciones.setdefault(palabra, []).append(id_doc)
+        self._publicaciones = publicaciones
+        self._vocabulario = sorted(publicaciones)
+
+        por_primera_palabra = {}
+        for id_doc, nombre in self._nombres.items():
+            palabras = [p for p in _SEPARADOR.split(nombre) if p]
+            if palabras:
+                por_primera_palabra.setdefault(palabras[0], []).append(id_doc)
+        self._por_primera_palabra = por_primera_palabra
+        self._primeras_palabras = sorted(por_primera_palabra)
+
+        # Búsquedas de una sola letra: abarcan buena parte del catálogo, se precalculan
+        por_inicial, inicial_primera = {}, {}
+        for palabra, ids in publicaciones.items():
+            por_inicial.setdefault(palabra[0], set()).update(ids)
+        for palabra, ids in por_primera_palabra.items():
+            inicial_primera.setdefault(palabra[0], set()).update(ids)
+        self._por_inicial = {letra: frozenset(ids) for letra, ids in por_inicial.items()}
+        self._inicial_primera = {letra: frozenset(ids) for letra, ids in inicial_primera.items()}
+
+        trigramas = {}
+        for palabra in self._vocabulario:
+            for trigrama in _trigramas(palabra):
+                trigramas.setdefault(trigrama, []).append(palabra)
+        self._trigramas = trigramas
+
+        por_borrado = {}
+        for palabra in self._vocabulario:
+            if len(palabra) >= 3:
+                for variante in _borrados(palabra) | {palabra}:
+                    por_borrado.setdefault(variante, []).append(palabra)
+        self._por_borrado = por_borrado
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def buscar(self, texto, limite=None):
+        """
+        Busca documentos que contengan todas las palabras del texto.
+
+        Cada palabra puede coincidir exacta, por prefijo, dentro de otra palabra
+        o con errores de tecleo. Los resultados se ordenan por relevancia.
+
+        Returns:
+            list: IDs de documentos, del más relevante al menos relevante
+        """
+        palabras = separar_palabras(texto)
+        if not palabras:
+            return []
+
+        # Los puntajes se manejan como niveles {puntos: set(ids)}: así combinar
+        # palabras y ordenar son operaciones de conjuntos, no un ciclo por documento
+        niveles = None
+        for palabra in palabras:
+            coincidencias = self._coincidencias_palabra(palabra)
+            if niveles is None:
+                niveles = coincidencias
+            else:
+                combinados = {}
+                for puntos, ids in niveles.items():
+                    for puntos_palabra, ids_palabra in coincidencias.items():
+                        comunes = ids & ids_palabra
+                        if comunes:
+                            combinados.setdefault(puntos + puntos_palabra, set()).update(comunes)
+                niveles = combinados
+            if not niveles:
+                return []
+
+        # Bonificación si el nombre empieza con lo buscado
+        empiezan = self._empiezan_con(palabras[0])
+        con_bonificacion = {}
+        for puntos, ids in niveles.items():
+            for nivel, parte in ((puntos + 1, ids & empiezan), (puntos, ids - empiezan)):
+                if parte:
+                    con_bonificacion.setdefault(nivel, set()).update(parte)
+
+        # Dentro de cada nivel, desempate por el orden precalculado
+        resultado = []
+        for puntos in sorted(con_bonificacion, reverse=True):
+            ids = con_bonificacion[puntos]
+            faltan = None if limite is None else limite - len(resultado)
+            if faltan is not None and faltan < len(ids):
+                # Recorrer los documentos ya ordenados hasta juntar los que faltan
+                resultado.extend(islice(filter(ids.__contains__, self._ids_ordenados), faltan))
+                break
+            resultado.extend(sorted(ids, key=self._orden.__getitem__))
+        return resultado
+
+    def _rango_prefijo(self, vocabulario, prefijo):
+        """Palabras de un vocabulario ordenado que empiezan con el prefijo"""
+        inicio = bisect_left(vocabulario, prefijo)
+        fin = inicio
+        while fin < len(vocabulario) and vocabulario[fin].startswith(prefijo):
+            fin += 1
+        return vocabulario[inicio:fin]
+
+    def _empiezan_con(self, prefijo):
+        """IDs de documentos cuyo nombre empieza con el prefijo"""
+        if len(prefijo) == 1:
+            return self._inicial_primera.get(prefijo, frozenset())
+        ids = set()
+        for palabra in self._rango_prefijo(self._primeras_palabras, prefijo):
+            ids.update(self._por_primera_palabra[palabra])
+        return ids
+
+    def _coincidencias_palabra(self, palabra):
+        """Retorna los niveles {puntos: set(ids)} de una palabra de la búsqueda"""
+        if len(palabra) == 1:
+            exactas = frozenset(self._publicaciones.get(palabra, ()))
+            niveles = {PUNTOS_EXACTA: exactas,
+                       PUNTOS_PREFIJO: self._por_inicial.get(palabra, frozenset()) - exactas}
+            return {puntos: ids for puntos, ids in niveles.items() if ids}
+
+        # Palabra del vocabulario -> puntos; al final cada documento queda en su mejor nivel
+        encontradas = {}
+
+        # 1. Exacta y por prefijo, con bisect sobre el vocabulario ordenado
+        for candidata in self._rango_prefijo(self._vocabulario, palabra):
+            encontradas[candidata] = PUNTOS_EXACTA if candidata == palabra else PUNTOS_PREFIJO
+
+        trigramas = _trigramas(palabra)
+        if not trigramas:
+            return self._aplicar(encontradas)
+
+        # 2. Dentro de otra palabra (manzana -> "zana"), como el LIKE '%texto%'
+        candidatas = None
+        for trigrama in sorted(trigramas, key=lambda t: len(self._trigramas.get(t, ()))):
+            palabras_trigrama = self._trigramas.get(trigrama)
+            if not palabras_trigrama:
+                candidatas = set()
+                break
+            candidatas = set(palabras_trigrama) if candidatas is None else candidatas.intersection(palabras_trigrama)
+            if not candidatas:
+                break
+        for candidata in candidatas or ():
+            if palabra in candidata and not candidata.startswith(palabra):
+                encontradas[candidata] = PUNTOS_INTERNA
+
+        # 3. Errores de tecleo, solo si no hubo coincidencias directas
+        maxima = _distancia_maxima(palabra)
+        if encontradas or not maxima:
+            return self._aplicar(encontradas)
+
+        # Candidatas: palabras que comparten un borrado de una letra con la buscada
+        # (cubre cambios, faltas, sobras y letras invertidas aunque no queden
+        # trigramas en común) y palabras que comparten suficientes trigramas
+        candidatas = set()
+        for variante in _borrados(palabra) | {palabra}:
+            candidatas.update(self._por_borrado.get(variante, ()))
+        conteo = {}
+        for trigrama in trigramas:
+            for candidata in self._trigramas.get(trigrama, ()):
+                conteo[candidata] = conteo.get(candidata, 0) + 1
+        minimo_comun = max(1, len(trigramas) - 3 * maxima)
+        candidatas.update(candidata for candidata, comunes in conteo.items() if comunes >= minimo_comun)
+
+        for candidata in candidatas:
+            # Comparar contra la palabra completa y contra su prefijo del mismo largo
+            if (_distancia(palabra, candidata, maxima) <= maxima
+                    or _distancia(palabra, candidata[:len(palabra)], maxima) <= maxima):
+                encontradas[candidata] = PUNTOS_APROXIMADA
+        return self._aplicar(encontradas)
+
+    def _aplicar(self, encontradas):
+        """Convierte {palabra: puntos} en niveles {puntos: set(ids)} sin repetir documentos"""
+        niveles = {}
+        vistos = set()
+        for candidata, puntos in sorted(encontradas.items(), key=lambda par: -par[1]):
+            niveles.setdefault(puntos, set()).update(self._publicaciones[candidata])
+        for puntos in sorted(niveles, reverse=True):
+            # Cada documento se queda en su mejor nivel
+            niveles[puntos] -= vistos
+            vistos |= niveles[puntos]
+            if not niveles[puntos]:
+                del niveles[puntos]
+        return niveles
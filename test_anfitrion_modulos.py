@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+test_anfitrion_modulos.py
+Pruebas del proceso anfitrión de módulos (src/ui/anfitrion_modulos.py) sin
+Tk ni procesos: un hilo hace de anfitrión y se conecta con los datos que
+recibiría en su entorno.
+"""
+
+import sys
+import os
+import time
+import unittest
+from multiprocessing.connection import AuthenticationError, Client
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.ui.anfitrion_modulos import AnfitrionModulos, ENV_CLAVE, ENV_DIRECCION, atender
+
+
+class ProcesoFalso:
+    def __init__(self):
+        self.codigo = None
+
+    def poll(self):
+        return self.codigo
+
+
+class AnfitrionFalso:
+    """Hace de proceso anfitrión: se conecta cuando la prueba lo indica"""
+
+    def __init__(self):
+        self.proceso = ProcesoFalso()
+        self.env = None
+        self.conexion = None
+
+    def lanzar(self, comando, cwd, env):
+        self.env = env
+        return self.proceso
+
+    def conectar(self, clave=None):
+        host, puerto = self.env[ENV_DIRECCION].rsplit(":", 1)
+        self.conexion = Client((host, int(puerto)),
+                               authkey=clave or bytes.fromhex(self.env[ENV_CLAVE]))
+        return self.conexion
+
+
+def esperar(condicion, limite=5.0):
+    fin = time.monotonic() + limite
+    while not condicion() and time.monotonic() < fin:
+        time.sleep(0.005)
+    return condicion()
+
+
+class TestAnfitrionModulos(unittest.TestCase):
+
+    def setUp(self):
+        self.falso = AnfitrionFalso()
+        self.anfitrion = AnfitrionModulos(["python", "launch_module.py", "--host"], cwd=project_root,
+                                          lanzar=self.falso.lanzar)
+        self.anfitrion.iniciar()
+
+    def tearDown(self):
+        self.anfitrion.cerrar()
+        if self.falso.conexion is not None:
+            self.falso.conexion.close()
+
+    def test_solicitudes_antes_de_conectar_esperan(self):
+        self.assertTrue(self.anfitrion.abrir("pricing", {'rol': 'admin'}))
+        self.assertTrue(self.anfitrion.abrir("clients"))
+        self.assertFalse(self.anfitrion.conectado)
+
+        conexion = self.falso.conectar()
+        self.assertTrue(esperar(lambda: self.anfitrion.conectado))
+        self.assertTrue(self.anfitrion.abrir("debts"))
+
+        recibidas = [conexion.recv() for _ in range(3)]
+        self.assertEqual([s['modulo'] for s in recibidas], ["pricing", "clients", "debts"])
+        self.assertEqual(recibidas[0]['usuario'], {'rol': 'admin'})
+        self.assertEqual(recibidas[0]['accion'], 'abrir')
+
+    def test_respuesta_del_anfitrion(self):
+        conexion = self.falso.conectar()
+        self.assertTrue(esperar(lambda: self.anfitrion.conectado))
+        self.anfitrion.abrir("users", responder=True)
+        self.assertTrue(conexion.recv()['responder'])
+        conexion.send({'modulo': "users", 'abierto': True})
+        self.assertEqual(self.anfitrion.recibir(espera=5), {'modulo': "users", 'abierto': True})
+        self.assertIsNone(self.anfitrion.recibir(espera=0))
+
+    def test_clave_incorrecta_no_ocupa_el_lugar(self):
+        with self.assertRaises(AuthenticationError):
+            self.falso.conectar(clave=b"otra clave")
+        self.falso.conectar()
+        self.assertTrue(esperar(lambda: self.anfitrion.conectado))
+
+    def test_anfitrion_caido_no_acepta_solicitudes(self):
+        self.falso.proceso.codigo = 1
+        self.assertFalse(self.anfitrion.abrir("pricing"))
+
+        # iniciar() lo vuelve a arrancar con otra dirección y clave
+        env_anterior = self.falso.env
+        self.falso.proceso = ProcesoFalso()
+        self.anfitrion.iniciar()
+        self.assertNotEqual(self.falso.env[ENV_CLAVE], env_anterior[ENV_CLAVE])
+        self.assertTrue(self.anfitrion.abrir("pricing"))
+
+    def test_conexion_cerrada_por_el_anfitrion(self):
+        self.falso.conectar()
+        self.assertTrue(esperar(lambda: self.anfitrion.conectado))
+        self.falso.conexion.close()
+        self.falso.proceso.codigo = 0
+        # El primer envío puede quedar en el búfer; los siguientes fallan
+        self.assertTrue(esperar(lambda: not self.anfitrion.abrir("pricing")))
+        self.assertFalse(self.anfitrion.conectado)
+
+
+class VentanaFalsa:
+    def __init__(self):
+        self.eventos = []
+
+    def update_idletasks(self):
+        self.eventos.append("dibujar")
+
+    def destroy(self):
+        self.eventos.append("cerrar")
+
+
+class TestAtender(unittest.TestCase):
+
+    def setUp(self):
+        self.abiertos = []
+        self.ventana = VentanaFalsa()
+
+    def abrir_modulo(self, modulo, usuario, master=None):
+        self.abiertos.append((modulo, usuario, master))
+        return self.ventana if modulo != "roto" else None
+
+    def test_abre_como_toplevel_de_la_raiz(self):
+        self.assertIsNone(atender({'accion': 'abrir', 'modulo': "clients", 'usuario': None},
+                                  self.abrir_modulo, "raiz"))
+        self.assertEqual(self.abiertos, [("clients", None, "raiz")])
+        self.assertEqual(self.ventana.eventos, [])
+
+    def test_medir_dibuja_cierra_y_responde(self):
+        respuesta = atender({'accion': 'abrir', 'modulo': "pricing", 'medir': True, 'responder': True},
+                            self.abrir_modulo, "raiz")
+        self.assertEqual(respuesta, {'modulo': "pricing", 'abierto': True})
+        self.assertEqual(self.ventana.eventos, ["dibujar", "cerrar"])
+
+    def test_fallo_al_abrir(self):
+        respuesta = atender({'accion': 'abrir', 'modulo': "roto", 'responder': True},
+                            self.abrir_modulo, "raiz")
+        self.assertEqual(respuesta, {'modulo': "roto", 'abierto': False})
+        self.assertIsNone(atender({'accion': 'otra'}, self.abrir_modulo, "raiz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+test_auditoria_explain.py
+Pruebas del análisis de planes EXPLAIN (scripts/auditoria_explain.py), de la
+migración de índices 004 y de los procedimientos auxiliares que
+comparten las migraciones (procedimientos.sql).
+"""
+
+import sys
+import os
+import re
+import glob
+import unittest
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'scripts'))
+
+from auditoria_explain import analizar_plan, CONSULTAS
+from aplicar_migraciones import separar_sentencias, crear_procedimientos, MIGRACIONES_DIR, PROCEDIMIENTOS
+
+MIGRACION = os.path.join(project_root, 'data', 'sql', 'migraciones', '004_indices_reportes.sql')
+ESQUEMA = os.path.join(project_root, 'data', 'sql', 'disfruleg_schema.sql')
+
+
+def paso(tabla, tipo, filas, key=None, extra=None):
+    return {'table': tabla, 'type': tipo, 'rows': filas, 'key': key, 'Extra': extra}
+
+
+class TestAnalizarPlan(unittest.TestCase):
+
+    def test_plan_con_indices(self):
+        plan = [paso('f', 'range', 5000, 'idx_factura_fecha', 'Using where; Using index'),
+                paso('c', 'eq_ref', 1, 'PRIMARY')]
+        self.assertEqual(analizar_plan(plan), [])
+
+    def test_recorridos_completos(self):
+        plan = [paso('compra', 'ALL', 100000, extra='Using where; Using filesort'),
+                paso('df', 'index', 50000, 'id_producto')]
+        hallazgos = analizar_plan(plan)
+        self.assertEqual(len(hallazgos), 3)
+        self.assertIn('recorrido completo de compra', hallazgos[0])
+        self.assertIn('ordenamiento en memoria', hallazgos[1])
+        self.assertIn('índice id_producto de df', hallazgos[2])
+
+    def test_ignora_tablas_pequenas_y_derivadas(self):
+        plan = [paso('tipo_cliente', 'ALL', 2), paso('<derived2>', 'ALL', 90000, extra='Using temporary')]
+        self.assertEqual(analizar_plan(plan), [])
+        self.assertEqual(len(analizar_plan([paso('grupo', 'ALL', 10)], umbral=5)), 1)
+
+    def test_catalogo_bien_formado(self):
+        for nombre, origen, consulta, claves, recorre_todo in CONSULTAS:
+            with self.subTest(consulta=nombre):
+                self.assertEqual(consulta.count('%s'), len(claves))
+                self.assertIsInstance(recorre_todo, bool)
+
+
+class TestMigracionIndices(unittest.TestCase):
+
+    def test_procedimiento_en_una_sentencia(self):
+        with open(PROCEDIMIENTOS, encoding='utf-8') as f:
+            sentencias = separar_sentencias(f.read())
+        procedimientos = [s for s in sentencias if s.startswith('CREATE PROCEDURE')]
+        self.assertEqual(len(procedimientos), 2)
+        for procedimiento in procedimientos:
+            self.assertTrue(procedimiento.endswith('END'))
+
+    def test_procedimientos_definidos_una_vez(self):
+        class Cursor:
+            with_rows = False
+            def __init__(self):
+                self.sentencias = []
+            def execute(self, sentencia):
+                self.sentencias.append(sentencia)
+
+        cursor = Cursor()
+        self.assertEqual(crear_procedimientos(cursor), ['crear_indice_si_falta', 'agregar_columna_si_falta'])
+        self.assertEqual(cursor.sentencias[0], 'DROP PROCEDURE IF EXISTS crear_indice_si_falta')
+        for ruta in glob.glob(os.path.join(MIGRACIONES_DIR, '[0-9]*.sql')):
+            with self.subTest(migracion=os.path.basename(ruta)), open(ruta, encoding='utf-8') as f:
+                self.assertNotIn('CREATE PROCEDURE', f.read())
+
+    def test_esquema_incluye_los_indices(self):
+        with open(MIGRACION, encoding='utf-8') as f:
+            migracion = re.findall(r"CALL crear_indice_si_falta\('(\w+)', '(\w+)', '([^']+)'\)", f.read())
+        with open(ESQUEMA, encoding='utf-8') as f:
+            esquema = f.read()
+        self.assertEqual(len(migracion), 8)
+        for tabla, indice, columnas in migracion:
+            with self.subTest(indice=indice):
+                self.assertIn(f"CREATE INDEX {indice} ON {tabla}({columnas});", esquema)
+
+
+if __name__ == "__main__":
+    unittest.main()
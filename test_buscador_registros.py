@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+test_buscador_registros.py
+Pruebas del filtro con espera entre teclas de clientes y usuarios
+(src/ui/buscador_registros.py) sin Tk: un widget falso guarda los after()
+y la prueba decide cuándo vence la espera.
+"""
+
+import sys
+import os
+import time
+import threading
+import unittest
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.database.consultas_async import EjecutorConsultas
+from src.ui.buscador_registros import BuscadorRegistros, clave_busqueda, patron_prefijo
+
+
+class WidgetFalso:
+    """Sustituto de un widget de Tk con after() y after_cancel()"""
+
+    def __init__(self):
+        self.programados = {}
+        self._siguiente = 0
+
+    def after(self, ms, funcion):
+        self._siguiente += 1
+        ident = f"after#{self._siguiente}"
+        self.programados[ident] = funcion
+        return ident
+
+    def after_cancel(self, ident):
+        self.programados.pop(ident, None)
+
+    def vencer(self):
+        """Ejecuta los after() pendientes, como si hubiera pasado el tiempo"""
+        pendientes, self.programados = self.programados, {}
+        for funcion in pendientes.values():
+            funcion()
+
+    def bombear(self, ejecutor, limite=5.0):
+        fin = time.monotonic() + limite
+        while (ejecutor.ocupado or self.programados) and time.monotonic() < fin:
+            if self.programados:
+                self.vencer()
+            else:
+                time.sleep(0.005)
+
+
+CLIENTES = [
+    {'id': 1, 'nombre': "José Pérez", 'telefono': "5551234", 'grupo': "MAYOREO"},
+    {'id': 2, 'nombre': "Ana López", 'telefono': None, 'grupo': "MENUDEO"},
+    {'id': 3, 'nombre': "Mariana Ruiz", 'telefono': "5559876", 'grupo': "MAYOREO"},
+]
+CAMPOS = ("nombre", "telefono", "grupo")
+
+
+class TestClaveBusqueda(unittest.TestCase):
+
+    def test_minusculas_sin_acentos_y_campos_separados(self):
+        self.assertEqual(clave_busqueda(CLIENTES[0], CAMPOS), "jose perez\n5551234\nmayoreo")
+        self.assertEqual(clave_busqueda(CLIENTES[1], CAMPOS), "ana lopez\nmenudeo")
+
+    def test_patron_prefijo_escapa_comodines(self):
+        self.assertEqual(patron_prefijo("ana"), "ana%")
+        self.assertEqual(patron_prefijo("50%_a\\b"), "50\\%\\_a\\\\b%")
+
+
+class TestBuscadorEnMemoria(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = WidgetFalso()
+        self.mostrados = []
+        self.buscador = BuscadorRegistros(self.widget, CAMPOS, al_mostrar=self.mostrar)
+        self.buscador.cargar(CLIENTES)
+
+    def mostrar(self, registros):
+        self.mostrados.append([r['id'] for r in registros])
+
+    def test_espera_a_que_termine_de_escribir(self):
+        self.assertEqual(self.mostrados, [[1, 2, 3]])
+        for texto in ("l", "lo", "lop"):
+            self.buscador.buscar(texto)
+        self.assertEqual(len(self.widget.programados), 1)
+        self.assertEqual(len(self.mostrados), 1)
+
+        self.widget.vencer()
+        self.assertEqual(self.mostrados[-1], [2])
+
+    def test_acentos_mayusculas_y_otros_campos(self):
+        for texto, esperados in (("PEREZ", [1]), ("lópez", [2]), ("mayo", [1, 3]),
+                                 ("9876", [3]), ("ana", [2, 3]), ("  ", [1, 2, 3]),
+                                 ("perez 555", [])):
+            self.buscador.texto = texto
+            self.buscador.aplicar()
+            self.assertEqual(self.mostrados[-1], esperados, texto)
+
+    def test_texto_mas_largo_solo_revisa_los_que_coincidian(self):
+        self.assertEqual([r['id'] for r in self.buscador.filtrar("ma")], [1, 3])
+        self.assertEqual(self.buscador._ultimo[1], [0, 2])
+        self.assertEqual([r['id'] for r in self.buscador.filtrar("mar")], [3])
+        # Borrar letras vuelve a revisar todos
+        self.assertEqual([r['id'] for r in self.buscador.filtrar("a")], [1, 2, 3])
+
+
+class TestBuscadorEnSQL(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = WidgetFalso()
+        self.ejecutor = EjecutorConsultas(self.widget)
+        self.mostrados = []
+        self.consultas = []
+        self.puede_seguir = threading.Event()
+        self.buscador = BuscadorRegistros(self.widget, CAMPOS, al_mostrar=self.mostrar,
+                                          consultar=self.consultar, ejecutor=self.ejecutor,
+                                          umbral=2)
+
+    def tearDown(self):
+        self.puede_seguir.set()
+        self.ejecutor.cerrar()
+
+    def mostrar(self, registros):
+        self.mostrados.append([r['id'] for r in registros])
+
+    def consultar(self, texto, limite):
+        self.consultas.append((texto, limite))
+        self.puede_seguir.wait(5)
+        return [c for c in CLIENTES if c['nombre'].lower().startswith(texto.lower())][:limite]
+
+    def test_muchos_registros_buscan_en_sql(self):
+        self.buscador.cargar(CLIENTES)
+        self.assertFalse(self.buscador.en_memoria)
+        self.assertEqual(self.buscador.limite, 3)
+        # Sin texto se muestran los primeros, sin consultar
+        self.assertEqual(self.mostrados, [[1, 2]])
+
+        self.puede_seguir.set()
+        self.buscador.buscar("mar")
+        self.widget.bombear(self.ejecutor)
+        self.assertEqual(self.consultas, [("mar", 2)])
+        self.assertEqual(self.mostrados[-1], [3])
+
+    def test_busqueda_anterior_en_curso_se_descarta(self):
+        self.buscador.cargar(CLIENTES)
+        self.buscador.buscar("jo")
+        self.widget.vencer()
+        # La consulta de "jo" sigue en curso cuando el usuario escribe otra cosa
+        self.buscador.buscar("ana")
+        self.puede_seguir.set()
+        self.widget.bombear(self.ejecutor)
+        self.assertEqual(self.mostrados, [[1, 2], [2]])
+
+    def test_pocos_registros_no_consultan(self):
+        self.buscador.cargar(CLIENTES[:2])
+        self.assertTrue(self.buscador.en_memoria)
+        self.buscador.buscar("ana")
+        self.widget.vencer()
+        self.assertEqual(self.consultas, [])
+        self.assertEqual(self.mostrados[-1], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
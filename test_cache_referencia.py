@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+test_cache_referencia.py
+Pruebas de la caché local de tablas de referencia (src/database/cache_referencia.py).
+Un servidor falso reemplaza las dos consultas a MySQL; el archivo SQLite es real.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.database.cache_referencia import CacheReferencia, TABLAS
+
+
+class ServidorFalso:
+    """Tablas de referencia con firma calculada a partir de su contenido"""
+
+    def __init__(self):
+        self.tablas = {
+            'grupo': [{'id_grupo': 1, 'clave_grupo': "MAY", 'descripcion': None, 'id_tipo_cliente': 1}],
+            'tipo_cliente': [{'id_tipo_cliente': 1, 'nombre_tipo': "Mayoreo", 'descuento': Decimal("10.00")}],
+            'producto': [{'id_producto': 7, 'nombre_producto': "Manzana", 'unidad_producto': "kg",
+                          'es_especial': 0}],
+        }
+        self.disponible = True
+        self.firmas_consultadas = 0
+        self.cargas = []
+
+    def firmas(self):
+        if not self.disponible:
+            return None
+        self.firmas_consultadas += 1
+        return {tabla: [len(filas), hash(repr(filas)) & 0xFFFFFFFF] for tabla, filas in self.tablas.items()}
+
+    def cargar(self, tablas):
+        if not self.disponible:
+            return None
+        self.cargas.append(sorted(tablas))
+        return {tabla: [dict(fila) for fila in self.tablas[tabla]] for tabla in tablas}
+
+
+class CacheConServidorFalso(CacheReferencia):
+    def __init__(self, servidor, ruta, verificar_cada=30):
+        super().__init__(ruta, verificar_cada)
+        self.servidor = servidor
+
+    def _consultar_firmas(self):
+        return self.servidor.firmas()
+
+    def _cargar_tablas(self, tablas):
+        return self.servidor.cargar(tablas)
+
+
+class TestCacheReferencia(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, "cache", "referencia.sqlite3")
+        self.servidor = ServidorFalso()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def nuevo_proceso(self, **opciones):
+        return CacheConServidorFalso(self.servidor, self.ruta, **opciones)
+
+    def test_primer_proceso_carga_y_los_siguientes_usan_el_archivo(self):
+        cache = self.nuevo_proceso()
+        self.assertEqual(cache.filas('grupo')[0]['clave_grupo'], "MAY")
+        self.assertEqual(self.servidor.cargas, [sorted(TABLAS)])
+        self.assertTrue(os.path.exists(self.ruta))
+
+        # Otro proceso: una consulta de firmas y ninguna carga
+        otro = self.nuevo_proceso()
+        self.assertEqual(otro.filas('tipo_cliente'), self.servidor.tablas['tipo_cliente'])
+        self.assertIsInstance(otro.filas('tipo_cliente')[0]['descuento'], Decimal)
+        self.assertEqual(self.servidor.firmas_consultadas, 2)
+        self.assertEqual(len(self.servidor.cargas), 1)
+
+    def test_solo_recarga_la_tabla_que_cambio(self):
+        self.nuevo_proceso().filas('grupo')
+        self.servidor.tablas['producto'].append(
+            {'id_producto': 8, 'nombre_producto': "Pera", 'unidad_producto': "kg", 'es_especial': 0})
+
+        cache = self.nuevo_proceso()
+        self.assertEqual(len(cache.filas('producto')), 2)
+        self.assertEqual(self.servidor.cargas[-1], ['producto'])
+
+        # El archivo quedó con la versión nueva
+        self.nuevo_proceso().filas('producto')
+        self.assertEqual(len(self.servidor.cargas), 2)
+
+    def test_verifica_de_nuevo_solo_al_vencer_o_al_invalidar(self):
+        cache = self.nuevo_proceso()
+        cache.filas('grupo')
+        cache.filas('producto')
+        self.assertEqual(self.servidor.firmas_consultadas, 1)
+
+        self.servidor.tablas['grupo'][0]['clave_grupo'] = "MAYOREO"
+        self.assertEqual(cache.filas('grupo')[0]['clave_grupo'], "MAY")
+        cache.invalidar()
+        self.assertEqual(cache.filas('grupo')[0]['clave_grupo'], "MAYOREO")
+        self.assertEqual(self.servidor.firmas_consultadas, 2)
+
+    def test_sin_conexion_usa_el_archivo(self):
+        self.nuevo_proceso().filas('grupo')
+        self.servidor.disponible = False
+        cache = self.nuevo_proceso()
+        self.assertEqual(cache.filas('producto')[0]['nombre_producto'], "Manzana")
+
+        # Sin archivo ni conexión no hay datos, pero tampoco error
+        vacia = CacheConServidorFalso(self.servidor, os.path.join(self.directorio, "otra.sqlite3"))
+        self.assertEqual(vacia.filas('grupo'), [])
+
+    def test_retorna_copias(self):
+        cache = self.nuevo_proceso()
+        cache.filas('grupo')[0]['clave_grupo'] = "X"
+        self.assertEqual(cache.filas('grupo')[0]['clave_grupo'], "MAY")
+        with self.assertRaises(KeyError):
+            cache.filas('cliente')
+
+    def test_archivo_danado_se_recarga(self):
+        os.makedirs(os.path.dirname(self.ruta))
+        with open(self.ruta, "w") as archivo:
+            archivo.write("no es sqlite")
+        cache = self.nuevo_proceso()
+        self.assertEqual(len(cache.filas('grupo')), 1)
+        # El archivo se reemplazó: el siguiente proceso ya no carga de MySQL
+        self.nuevo_proceso().filas('grupo')
+        self.assertEqual(len(self.servidor.cargas), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+test_cambios_ordenes.py
+Pruebas de la copia local de órdenes que se actualiza con la consulta de
+cambios (src/modules/receipts/components/cambios_ordenes.py).
+"""
+
+import sys
+import os
+import unittest
+from datetime import datetime, timedelta
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.receipts.components.cambios_ordenes import SeguimientoOrdenes, MARGEN_CAMBIOS
+
+INICIO = datetime(2026, 3, 2, 10, 0, 0)
+
+
+def orden(folio, segundos, estado='guardada', activo=True, total=100):
+    return {'folio_numero': folio, 'estado': estado, 'activo': int(activo),
+            'fecha_modificacion': INICIO + timedelta(seconds=segundos),
+            'nombre_cliente': f"Cliente {folio}", 'total_estimado': total}
+
+
+def cambios(*ordenes, guardadas, registradas):
+    return {'ordenes': list(ordenes), 'guardadas': guardadas, 'registradas': registradas}
+
+
+class TestSeguimientoOrdenes(unittest.TestCase):
+
+    def setUp(self):
+        self.seguimiento = SeguimientoOrdenes(limite_historial=3, limite_cambios=10)
+        self.seguimiento.cargar(INICIO, [orden(5, -60), orden(2, -50)],
+                                [orden(1, -40, 'registrada'), orden(3, -30, 'registrada')])
+
+    def folios(self, lista):
+        return [o['folio_numero'] for o in lista]
+
+    def test_requiere_carga_inicial(self):
+        nuevo = SeguimientoOrdenes()
+        self.assertTrue(nuevo.requiere_recarga)
+        self.assertEqual(nuevo.aplicar(cambios(guardadas=0, registradas=0)), (False, False))
+        self.assertFalse(self.seguimiento.requiere_recarga)
+        self.assertEqual(self.seguimiento.desde(), INICIO - MARGEN_CAMBIOS)
+
+    def test_orden_nueva_editada_y_liberada(self):
+        resultado = self.seguimiento.aplicar(cambios(
+            orden(7, 1), orden(2, 2, total=250), orden(5, 3, activo=False),
+            guardadas=2, registradas=2))
+
+        self.assertEqual(resultado, (True, False))
+        self.assertEqual(self.folios(self.seguimiento.activas()), [2, 7])
+        self.assertEqual(self.seguimiento.activas()[0]['total_estimado'], 250)
+        self.assertEqual(self.seguimiento.marca, INICIO + timedelta(seconds=3))
+        self.assertFalse(self.seguimiento.requiere_recarga)
+
+    def test_orden_registrada_pasa_al_historial(self):
+        resultado = self.seguimiento.aplicar(cambios(orden(2, 5, 'registrada'),
+                                                     guardadas=1, registradas=3))
+        self.assertEqual(resultado, (True, True))
+        self.assertEqual(self.folios(self.seguimiento.activas()), [5])
+        self.assertEqual(self.folios(self.seguimiento.historial()), [2, 3, 1])
+
+    def test_historial_conserva_solo_las_recientes(self):
+        self.seguimiento.aplicar(cambios(orden(5, 5, 'registrada'), orden(2, 6, 'registrada'),
+                                         guardadas=0, registradas=4))
+        self.assertEqual(self.folios(self.seguimiento.historial()), [2, 5, 3])
+        self.assertFalse(self.seguimiento.requiere_recarga)
+
+    def test_repetir_cambios_del_margen_no_altera(self):
+        lote = cambios(orden(7, 1), guardadas=3, registradas=2)
+        self.seguimiento.aplicar(lote)
+        activas = self.seguimiento.activas()
+        self.seguimiento.aplicar(lote)
+        self.assertEqual(self.seguimiento.activas(), activas)
+        self.assertFalse(self.seguimiento.requiere_recarga)
+
+    def test_paginas_antiguas_amplian_el_historial(self):
+        # La carga inicial trajo menos que el límite: no hay más antiguas
+        self.assertIsNone(self.seguimiento.siguiente_historial())
+
+        self.seguimiento.cargar(INICIO, [], [orden(1, -40, 'registrada'), orden(3, -30, 'registrada'),
+                                             orden(4, -20, 'registrada')])
+        self.assertEqual(self.seguimiento.siguiente_historial(), (INICIO - timedelta(seconds=40), 1))
+
+        self.assertTrue(self.seguimiento.agregar_antiguas(
+            [orden(8, -90, 'registrada'), orden(6, -95, 'registrada')], hay_mas=False))
+        self.assertEqual(self.folios(self.seguimiento.historial()), [4, 3, 1, 8, 6])
+        self.assertIsNone(self.seguimiento.siguiente_historial())
+
+        # Una orden registrada nueva no expulsa las antiguas ya cargadas
+        self.seguimiento.aplicar(cambios(orden(9, 5, 'registrada'), guardadas=0, registradas=6))
+        self.assertEqual(self.folios(self.seguimiento.historial()), [9, 4, 3, 1, 8])
+        self.assertFalse(self.seguimiento.requiere_recarga)
+        self.assertEqual(self.seguimiento.siguiente_historial(), (INICIO - timedelta(seconds=90), 8))
+
+        # Una carga completa vuelve al límite inicial
+        self.seguimiento.cargar(INICIO, [], [])
+        self.assertEqual(self.seguimiento.limite_historial, 3)
+
+    def test_casos_que_piden_carga_completa(self):
+        # Error en la consulta
+        self.seguimiento.aplicar(None)
+        self.assertTrue(self.seguimiento.requiere_recarga)
+
+        # Demasiados cambios de golpe
+        self.setUp()
+        self.seguimiento.aplicar(cambios(*[orden(100 + i, i) for i in range(10)],
+                                         guardadas=12, registradas=2))
+        self.assertTrue(self.seguimiento.requiere_recarga)
+        self.assertEqual(self.folios(self.seguimiento.activas()), [2, 5])
+
+        # Borrado físico: no deja marca pero el conteo ya no cuadra
+        self.setUp()
+        self.seguimiento.aplicar(cambios(guardadas=1, registradas=2))
+        self.assertTrue(self.seguimiento.requiere_recarga)
+
+
+if __name__ == "__main__":
+    unittest.main()
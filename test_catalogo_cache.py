@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+test_catalogo_cache.py
+Pruebas de la caché de catálogo por grupo (catalogo_cache.py).
+
+Sustituye las consultas a la base por datos en memoria.
+"""
+
+import sys
+import os
+import unittest
+from unittest import mock
+from mysql.connector import Error
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.receipts.components import catalogo_cache
+from src.modules.receipts.components.catalogo_cache import CatalogoCache
+
+
+def producto(id_producto, nombre, precio=10.0, unidad='kg', es_especial=0):
+    return {'id': id_producto, 'nombre': nombre, 'precio': precio,
+            'unidad': unidad, 'es_especial': es_especial}
+
+
+class CatalogoEnMemoria(CatalogoCache):
+    """Catálogo cuyo origen es un diccionario en lugar de la base"""
+
+    def __init__(self, datos, **kwargs):
+        super().__init__(**kwargs)
+        self.datos = datos
+        self.version = 1
+        self.cargas = 0
+        self.verificaciones = 0
+
+    def _consultar_firma(self, id_grupo):
+        self.verificaciones += 1
+        return (self.version,)
+
+    def _cargar_productos(self, id_grupo):
+        self.cargas += 1
+        return sorted(self.datos.get(id_grupo, []), key=lambda p: p['nombre'])
+
+
+class TestCatalogoCache(unittest.TestCase):
+
+    def setUp(self):
+        self.catalogo = CatalogoEnMemoria({
+            1: [producto(1, 'Plátano'), producto(2, 'Manzana roja'),
+                producto(3, 'Salsa de manzana', es_especial=1)],
+            2: [producto(1, 'Plátano', precio=8.0)],
+        })
+
+    def test_busca_en_memoria_con_una_sola_carga(self):
+        self.assertEqual([p['id'] for p in self.catalogo.buscar(1, 'platano')], [1])
+        self.assertEqual(len(self.catalogo.buscar(1, '')), 3)
+        self.assertEqual(len(self.catalogo.buscar(1, 'MANZ')), 2)
+
+        self.assertEqual(self.catalogo.cargas, 1)
+
+    def test_prefijo_antes_que_subcadena(self):
+        nombres = [p['nombre'] for p in self.catalogo.buscar(1, 'manzana')]
+        self.assertEqual(nombres, ['Manzana roja', 'Salsa de manzana'])
+
+    def test_catalogo_separado_por_grupo(self):
+        self.assertEqual(self.catalogo.buscar(2, 'platano')[0]['precio'], 8.0)
+        self.assertEqual(self.catalogo.buscar(1, 'platano')[0]['precio'], 10.0)
+
+    def test_obtener_producto_sin_consultas(self):
+        self.catalogo.buscar(1, 'salsa')
+        cargas, verificaciones = self.catalogo.cargas, self.catalogo.verificaciones
+
+        self.assertEqual(self.catalogo.obtener_producto(1, 3)['es_especial'], 1)
+        self.assertIsNone(self.catalogo.obtener_producto(1, 99))
+        self.assertEqual((self.catalogo.cargas, self.catalogo.verificaciones), (cargas, verificaciones))
+
+    def test_recarga_solo_si_cambia_la_firma(self):
+        self.catalogo.verificar_cada = 0
+        self.catalogo.buscar(1, 'manzana')
+        self.catalogo.buscar(1, 'manzana')
+        self.assertEqual(self.catalogo.cargas, 1)
+
+        self.catalogo.datos[1].append(producto(4, 'Mango'))
+        self.catalogo.version += 1
+        verificaciones = self.catalogo.verificaciones
+
+        self.assertEqual([p['id'] for p in self.catalogo.buscar(1, 'mango')], [4])
+        self.assertEqual(self.catalogo.cargas, 2)
+        # La firma leída al verificar es la que se guarda con la recarga
+        self.assertEqual(self.catalogo.verificaciones, verificaciones + 1)
+
+    def test_no_verifica_antes_de_tiempo(self):
+        self.catalogo.buscar(1, 'a')
+        self.catalogo.buscar(1, 'b')
+        self.assertEqual(self.catalogo.verificaciones, 1)
+
+    def test_invalidar_fuerza_recarga(self):
+        self.catalogo.buscar(1, '')
+        self.catalogo.invalidar()
+        self.catalogo.buscar(1, '')
+        self.assertEqual(self.catalogo.cargas, 2)
+
+
+class ConexionQueFalla:
+    """Conexión cuyo cursor falla al consultar, como una caída a media carga"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self, **opciones):
+        return self
+
+    def execute(self, consulta, parametros=None):
+        raise Error("Lost connection to MySQL server during query")
+
+    def close(self):
+        pass
+
+
+class CatalogoConFirma(CatalogoCache):
+    """Firma siempre disponible; los productos se leen con _cargar_productos real"""
+
+    def _consultar_firma(self, id_grupo):
+        return (1,)
+
+
+class TestCargaFallida(unittest.TestCase):
+
+    def test_carga_fallida_no_se_guarda(self):
+        catalogo = CatalogoConFirma(verificar_cada=60)
+        with mock.patch.object(catalogo_cache, 'conectar', ConexionQueFalla):
+            self.assertEqual(catalogo.buscar(1, ''), [])
+
+        # La firma no cambió, pero el catálogo vacío no quedó en caché
+        with mock.patch.object(CatalogoConFirma, '_cargar_productos', return_value=[producto(1, 'Mango')]):
+            self.assertEqual([p['id'] for p in catalogo.buscar(1, 'mango')], [1])
+
+    def test_carga_fallida_conserva_el_catalogo_anterior(self):
+        catalogo = CatalogoEnMemoria({1: [producto(1, 'Mango')]}, verificar_cada=0)
+        catalogo.buscar(1, '')
+        catalogo.version += 1
+        with mock.patch.object(CatalogoEnMemoria, '_cargar_productos', return_value=None):
+            self.assertEqual(len(catalogo.buscar(1, '')), 1)
+        self.assertEqual(len(catalogo.buscar(1, '')), 1)
+        self.assertEqual(catalogo.cargas, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
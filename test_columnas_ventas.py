@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+test_columnas_ventas.py
+Pruebas de las columnas de ventas de las estadísticas avanzadas
+(src/modules/analytics/columnas_ventas.py).
+
+Compara cada suma por producto, cliente, grupo y período con una agregación
+directa fila por fila sobre los mismos datos aleatorios. Con NumPy instalado
+también comprueba que el cálculo vectorizado y el de Python coinciden.
+"""
+
+import sys
+import os
+import random
+import unittest
+from collections import defaultdict
+from datetime import date, timedelta
+from unittest import mock
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.analytics import columnas_ventas
+from src.modules.analytics.columnas_ventas import VentasEnColumnas
+from src.modules.analytics.periodos import etiqueta_periodo
+
+INICIO = date(2023, 11, 1)
+
+
+def generar(semilla=9, lineas=3000):
+    """(datos en columnas, filas originales) con ids de la base no consecutivos"""
+    azar = random.Random(semilla)
+    datos = VentasEnColumnas()
+    for id_grupo in (10, 20, 30):
+        datos.agregar_grupo(id_grupo, f"G{id_grupo}", "Mayoreo", 5)
+    for id_producto in range(100, 140, 2):
+        datos.agregar_producto(id_producto, f"Producto {id_producto}")
+    grupos = {}
+    # Los clientes 60+ no tienen ventas
+    for id_cliente in range(1, 70):
+        grupos[id_cliente] = azar.choice((10, 20, 30))
+        datos.agregar_cliente(id_cliente, f"Cliente {id_cliente:02d}", grupos[id_cliente])
+
+    filas = []
+    facturas = {}
+    for _ in range(lineas):
+        id_factura = azar.randint(1, 800)
+        if id_factura not in facturas:
+            facturas[id_factura] = (INICIO + timedelta(days=azar.randint(0, 500)), azar.randint(1, 59))
+        fecha, id_cliente = facturas[id_factura]
+        fila = (fecha, azar.randrange(100, 140, 2), id_cliente, id_factura, azar.randint(1, 9),
+                azar.randint(100, 9999) / 100, azar.choice((None, azar.randint(50, 5000) / 100)))
+        datos.agregar_venta(*fila)
+        filas.append(fila)
+
+    compras = [(INICIO + timedelta(days=azar.randint(0, 500)), azar.randrange(100, 140, 2),
+                azar.randint(100, 90000) / 100) for _ in range(300)]
+    for compra in compras:
+        datos.agregar_compra(*compra)
+    return datos, filas, compras, grupos
+
+
+class TestSumas(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.datos, cls.filas, cls.compras, cls.grupos = generar()
+
+    def esperado(self, clave):
+        totales = defaultdict(lambda: [0.0, 0.0])
+        for fila in self.filas:
+            totales[clave(fila)][0] += fila[5]
+            totales[clave(fila)][1] += fila[6] or 0
+        return totales
+
+    def assertTotales(self, obtenidos, esperados, catalogo):
+        for codigo, fila in enumerate(catalogo.filas):
+            id_registro = next(i for i, c in catalogo.codigos.items() if c == codigo)
+            ingresos, costo = esperados.get(id_registro, (0.0, 0.0))
+            self.assertAlmostEqual(obtenidos['ingresos'][codigo], ingresos, places=6)
+            self.assertAlmostEqual(obtenidos['costo'][codigo], costo, places=6)
+
+    def test_por_producto(self):
+        self.assertTotales(self.datos.por_producto(), self.esperado(lambda f: f[1]), self.datos.productos)
+        self.assertEqual(sum(self.datos.por_producto()['lineas']), len(self.filas))
+
+    def test_por_cliente(self):
+        totales = self.datos.por_cliente()
+        self.assertTotales(totales, self.esperado(lambda f: f[2]), self.datos.clientes)
+        self.assertEqual(totales['lineas'][self.datos.clientes.codigos[65]], 0)
+
+    def test_por_grupo(self):
+        totales = self.datos.por_grupo()
+        self.assertTotales(totales, self.esperado(lambda f: self.grupos[f[2]]), self.datos.grupos)
+        facturas = defaultdict(set)
+        for fila in self.filas:
+            facturas[self.grupos[fila[2]]].add(fila[3])
+        for id_grupo, codigo in self.datos.grupos.codigos.items():
+            self.assertEqual(totales['facturas'][codigo], len(facturas[id_grupo]))
+            self.assertEqual(totales['clientes'][codigo], sum(1 for g in self.grupos.values() if g == id_grupo))
+
+    def test_por_periodo(self):
+        periodos = ["2024-Q1", "2024-Q2", "2024-Q4"]
+        totales = self.datos.por_periodo("Trimestre", periodos)
+        for i, periodo in enumerate(periodos):
+            ventas = [f for f in self.filas if etiqueta_periodo("Trimestre", f[0]) == periodo]
+            compras = [c for c in self.compras if etiqueta_periodo("Trimestre", c[0]) == periodo]
+            self.assertAlmostEqual(totales['ingresos'][i], sum(f[5] for f in ventas), places=6)
+            self.assertAlmostEqual(totales['costo'][i], sum(f[6] or 0 for f in ventas), places=6)
+            self.assertAlmostEqual(totales['compras'][i], sum(c[2] for c in compras), places=6)
+
+    def test_por_periodo_y_producto(self):
+        periodos = ["2024-W05", "2024-W06"]
+        matriz = self.datos.por_periodo_y_producto("Semana", periodos)
+        self.assertEqual(len(matriz), 2)
+        for i, periodo in enumerate(periodos):
+            for id_producto, codigo in self.datos.productos.codigos.items():
+                esperado = sum(f[5] for f in self.filas
+                               if f[1] == id_producto and etiqueta_periodo("Semana", f[0]) == periodo)
+                self.assertAlmostEqual(matriz[i][codigo], esperado, places=6)
+
+    def test_por_periodo_y_grupo(self):
+        periodos = ["2024-03", "2024-04"]
+        data = self.datos.por_periodo_y_grupo("Mes", periodos)
+        for i, periodo in enumerate(periodos):
+            del_periodo = [f for f in self.filas if etiqueta_periodo("Mes", f[0]) == periodo]
+            for id_grupo, codigo in self.datos.grupos.codigos.items():
+                propias = [f for f in del_periodo if self.grupos[f[2]] == id_grupo]
+                self.assertAlmostEqual(data['ingresos'][i][codigo], sum(f[5] for f in propias), places=6)
+                self.assertEqual(data['clientes'][i][codigo], len({f[2] for f in propias}))
+
+    def test_periodos_con_ventas(self):
+        meses = self.datos.periodos_con_ventas("Mes", desde=date(2024, 10, 1), limite=3)
+        todos = sorted({etiqueta_periodo("Mes", f[0]) for f in self.filas if f[0] >= date(2024, 10, 1)},
+                       reverse=True)
+        self.assertEqual(meses, todos[:3])
+        self.assertEqual(self.datos.periodos_con_ventas("Año"), ["2025", "2024", "2023"])
+
+    @unittest.skipUnless(columnas_ventas.np is not None, "NumPy no está instalado")
+    def test_numpy_igual_que_python(self):
+        consultas = [
+            lambda d: d.por_producto(), lambda d: d.por_cliente(), lambda d: d.por_grupo(),
+            lambda d: d.por_periodo("Mes", ["2024-01", "2024-07"]),
+            lambda d: d.por_periodo_y_grupo("Trimestre", ["2024-Q1", "2024-Q3"]),
+            lambda d: d.periodos_con_ventas("Semana", limite=10),
+        ]
+        vectorizado = [consulta(self.datos) for consulta in consultas]
+        with mock.patch.object(columnas_ventas, 'np', None):
+            en_python = [consulta(self.datos) for consulta in consultas]
+        for a, b in zip(vectorizado, en_python):
+            if not isinstance(a, dict):
+                self.assertEqual(a, b)
+                continue
+            for clave in a:
+                planos_a = [v for x in a[clave] for v in (x if isinstance(x, list) else [x])]
+                planos_b = [v for x in b[clave] for v in (x if isinstance(x, list) else [x])]
+                self.assertEqual(len(planos_a), len(planos_b))
+                for x, y in zip(planos_a, planos_b):
+                    self.assertAlmostEqual(x, y, places=6)
+
+
+class CursorFalso:
+    """Responde las consultas de carga con listas de tuplas"""
+
+    def __init__(self, tablas):
+        self.tablas = tablas
+        self._filas = []
+
+    def execute(self, consulta):
+        tabla = next(t for t in ('producto', 'grupo', 'cliente', 'detalle_factura', 'compra')
+                     if f"FROM {t} " in " ".join(consulta.split()) + " ")
+        self._filas = list(self.tablas[tabla])
+
+    def fetchall(self):
+        filas, self._filas = self._filas, []
+        return filas
+
+    def fetchmany(self, cantidad):
+        filas, self._filas = self._filas[:cantidad], self._filas[cantidad:]
+        return filas
+
+
+class TestCarga(unittest.TestCase):
+
+    def test_cargar_desde_cursor(self):
+        hoy = date(2024, 5, 2)
+        cursor = CursorFalso({
+            'producto': [(7, "Manzana"), (8, "Pera")],
+            'grupo': [(1, "G1", "Mayoreo", 10)],
+            'cliente': [(3, "Ana", 1), (4, "Beto", 1)],
+            'detalle_factura': [(hoy, 7, 3, 50, 2, 40.5, 30), (hoy, 8, 3, 50, 1, 10, None),
+                                (hoy, 7, 4, 51, 5, 100, 80)] * 5,
+            'compra': [(hoy, 8, 25)],
+        })
+        with mock.patch.object(columnas_ventas, 'FILAS_POR_LECTURA', 4):
+            datos = VentasEnColumnas.cargar(cursor)
+        self.assertEqual(len(datos), 15)
+        self.assertEqual(len(datos.factura_fecha), 2)
+        self.assertEqual(datos.clientes[0]['clave_grupo'], "G1")
+        self.assertEqual(datos.por_producto()['ingresos'], [702.5, 50.0])
+        self.assertEqual(datos.por_producto()['costo'], [550.0, 0.0])
+        self.assertEqual(datos.por_grupo()['facturas'], [2])
+        self.assertEqual(datos.por_periodo("Día", ["2024-05-02"])['compras'], [25.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+test_consultas_async.py
+Pruebas del ejecutor de consultas en segundo plano (src/database/consultas_async.py)
+sin Tk: un widget falso guarda los after() y la prueba los ejecuta.
+"""
+
+import sys
+import os
+import time
+import threading
+import unittest
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.database.consultas_async import EjecutorConsultas
+
+
+class WidgetFalso:
+    """Sustituto de un widget de Tk: after() solo encola el callback"""
+
+    def __init__(self):
+        self.programados = []
+        self.hilo = threading.get_ident()
+
+    def after(self, ms, funcion):
+        self.programados.append(funcion)
+
+    def bombear(self, ejecutor, limite=5.0):
+        """Ejecuta los after() pendientes hasta que no quede trabajo"""
+        fin = time.monotonic() + limite
+        while (ejecutor.ocupado or self.programados) and time.monotonic() < fin:
+            if self.programados:
+                self.programados.pop(0)()
+            else:
+                time.sleep(0.005)
+
+
+class TestEjecutorConsultas(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = WidgetFalso()
+        self.estados = []
+        self.ejecutor = EjecutorConsultas(self.widget, indicador=self.estados.append)
+
+    def tearDown(self):
+        self.ejecutor.cerrar()
+
+    def test_entrega_en_el_hilo_principal(self):
+        recibidos = []
+        self.ejecutor.ejecutar(lambda a, b: (a + b, threading.get_ident()), 2, 3,
+                               al_terminar=recibidos.append)
+        self.widget.bombear(self.ejecutor)
+
+        self.assertEqual(len(recibidos), 1)
+        resultado, hilo_trabajo = recibidos[0]
+        self.assertEqual(resultado, 5)
+        self.assertNotEqual(hilo_trabajo, self.widget.hilo)
+        self.assertEqual(self.estados, [True, False])
+
+    def test_error_llega_a_al_fallar(self):
+        errores, resultados = [], []
+
+        def falla():
+            raise ValueError("sin conexión")
+
+        self.ejecutor.ejecutar(falla, al_terminar=resultados.append, al_fallar=errores.append)
+        self.widget.bombear(self.ejecutor)
+
+        self.assertEqual(resultados, [])
+        self.assertIsInstance(errores[0], ValueError)
+        self.assertFalse(self.ejecutor.ocupado)
+
+    def test_misma_clave_reemplaza_la_anterior(self):
+        liberar = threading.Event()
+        recibidos = []
+
+        def lenta(valor):
+            liberar.wait(2)
+            return valor
+
+        self.ejecutor.ejecutar(lenta, "vieja", clave="clientes", al_terminar=recibidos.append)
+        self.ejecutor.ejecutar(lenta, "nueva", clave="clientes", al_terminar=recibidos.append)
+        liberar.set()
+        self.widget.bombear(self.ejecutor)
+
+        self.assertEqual(recibidos, ["nueva"])
+        self.assertEqual(self.estados, [True, False])
+
+    def test_cancelar_antes_de_empezar(self):
+        liberar = threading.Event()
+        recibidos = []
+        # Con dos hilos ocupados la tercera solicitud queda en espera
+        for _ in range(2):
+            self.ejecutor.ejecutar(liberar.wait, 2)
+        solicitud = self.ejecutor.ejecutar(lambda: "nunca", clave="x", al_terminar=recibidos.append)
+        solicitud.cancelar()
+        liberar.set()
+        self.widget.bombear(self.ejecutor)
+
+        self.assertEqual(recibidos, [])
+        self.assertFalse(self.ejecutor.ocupado)
+        self.assertEqual(self.estados, [True, False])
+
+    def test_cerrado_no_entrega_ni_acepta(self):
+        recibidos = []
+        self.ejecutor.ejecutar(lambda: 1, al_terminar=recibidos.append)
+        self.ejecutor.cerrar()
+        self.widget.bombear(self.ejecutor, limite=0.2)
+
+        self.assertEqual(recibidos, [])
+        self.assertEqual(self.estados, [True, False])
+        with self.assertRaises(RuntimeError):
+            self.ejecutor.ejecutar(lambda: 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
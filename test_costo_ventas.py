@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+test_costo_ventas.py
+Pruebas del costo de lo vendido (src/modules/analytics/costo_ventas.py).
+
+Costea compras y ventas con FIFO y con promedio ponderado, y comprueba que
+continuar desde los lotes guardados da lo mismo que recalcular desde el
+inicio. actualizar_costos se ejecuta sobre una base SQLite en memoria; no
+requiere MySQL.
+"""
+
+import sys
+import os
+import re
+import random
+import sqlite3
+import unittest
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.analytics.costo_ventas import (Inventario, actualizar_costos, costear,
+                                                invalidar_costos_producto, requiere_recalculo)
+
+D1, D2, D3 = date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)
+
+
+def historial(semilla=3, dias=60):
+    """Compras y ventas aleatorias de un producto, con ids crecientes"""
+    azar = random.Random(semilla)
+    compras, ventas = [], []
+    for dia in range(dias):
+        fecha = D1 + timedelta(days=dia)
+        if azar.random() < 0.3:
+            compras.append((len(compras) + 1, fecha, Decimal(azar.randint(5, 40)),
+                            Decimal(azar.randint(100, 900)) / 100))
+        for _ in range(azar.randint(0, 3)):
+            ventas.append((len(ventas) + 1, len(ventas) + 1, fecha, Decimal(azar.randint(1, 7))))
+    return compras, ventas
+
+
+class TestInventario(unittest.TestCase):
+
+    def test_fifo_sale_lo_mas_antiguo(self):
+        resultados = costear(Inventario('fifo'),
+                             [(1, D1, 10, Decimal("2")), (2, D2, 10, Decimal("3"))],
+                             [(1, 1, D3, 15)])
+        self.assertEqual(resultados, [(1, 1, D3, Decimal(15), Decimal("35.00"), Decimal(0))])
+
+    def test_promedio_ponderado(self):
+        inventario = Inventario('promedio')
+        resultados = costear(inventario,
+                             [(1, D1, 10, Decimal("2")), (2, D2, 10, Decimal("3"))],
+                             [(1, 1, D3, 15)])
+        self.assertEqual(resultados[0][4], Decimal("37.50"))
+        self.assertEqual(len(inventario.lotes), 1)
+        self.assertEqual(inventario.existencia, 5)
+        self.assertEqual(inventario.valor, Decimal("12.50"))
+
+    def test_venta_sin_existencia_al_ultimo_precio(self):
+        resultados = costear(Inventario('fifo'), [(1, D1, 4, Decimal("2.50"))], [(1, 1, D2, 6)])
+        self.assertEqual(resultados[0][4:], (Decimal("15.00"), Decimal(2)))
+        # Sin ninguna compra el costo queda en cero y toda la cantidad sin costo
+        self.assertEqual(costear(Inventario('fifo'), [], [(1, 1, D1, 3)])[0][4:], (Decimal("0.00"), Decimal(3)))
+
+    def test_compra_del_mismo_dia_antes_que_la_venta(self):
+        resultados = costear(Inventario('fifo'), [(1, D1, 5, Decimal("4"))], [(1, 1, D1, 5)])
+        self.assertEqual(resultados[0][4:], (Decimal("20.00"), Decimal(0)))
+
+    def test_compra_registrada_despues_de_la_venta_del_dia(self):
+        compra = (1, D1, 5, Decimal("4"), datetime.combine(D1, time(15)))
+        venta = (1, 1, D1, 5, datetime.combine(D1, time(10)))
+        self.assertEqual(costear(Inventario('fifo'), [compra], [venta])[0][4:], (Decimal("0.00"), Decimal(5)))
+
+    def test_metodo_desconocido(self):
+        with self.assertRaises(ValueError):
+            Inventario('lifo')
+
+
+class TestIncremental(unittest.TestCase):
+
+    def continuar_desde_lotes(self, metodo, corte):
+        """Costea hasta la fecha de corte, guarda los lotes y continúa con el resto"""
+        compras, ventas = historial()
+        primera = Inventario(metodo)
+        resultados = costear(primera, [c for c in compras if c[1] < corte], [v for v in ventas if v[2] < corte])
+        guardados = [tuple(lote) for lote in primera.lotes]
+        segunda = Inventario(metodo, guardados, primera.ultimo_costo)
+        resultados += costear(segunda, [c for c in compras if c[1] >= corte], [v for v in ventas if v[2] >= corte])
+        return resultados, segunda
+
+    def test_igual_que_recalcular_todo(self):
+        compras, ventas = historial()
+        for metodo in ('fifo', 'promedio'):
+            completo = Inventario(metodo)
+            esperados = costear(completo, compras, ventas)
+            for corte in (D1 + timedelta(days=n) for n in (1, 17, 30, 59)):
+                with self.subTest(metodo=metodo, corte=corte):
+                    resultados, inventario = self.continuar_desde_lotes(metodo, corte)
+                    self.assertEqual(resultados, esperados)
+                    self.assertEqual(inventario.valor, completo.valor)
+
+    def test_costo_total_no_excede_las_compras(self):
+        compras, ventas = historial()
+        inventario = Inventario('fifo')
+        resultados = costear(inventario, compras, ventas)
+        con_existencia = sum(r[4] for r in resultados if r[5] == 0)
+        comprado = sum(c[2] * c[3] for c in compras)
+        self.assertLessEqual(con_existencia + inventario.valor, comprado)
+
+
+class TestRequiereRecalculo(unittest.TestCase):
+
+    def test_casos(self):
+        estado = {'ultima_venta': D2, 'recalcular': False}
+        self.assertFalse(requiere_recalculo(None, [(1, D1, 1, 1)], []))
+        self.assertFalse(requiere_recalculo(estado, [(1, D3, 1, 1)], [(1, 1, D2, 1)]))
+        # Sin registro, una compra del mismo día que la última venta va antes que ella
+        self.assertTrue(requiere_recalculo(estado, [(1, D2, 1, 1)], []))
+        self.assertTrue(requiere_recalculo(estado, [], [(1, 1, D1, 1)]))
+        self.assertTrue(requiere_recalculo(dict(estado, recalcular=True), [], []))
+        self.assertFalse(requiere_recalculo({'ultima_venta': None, 'recalcular': False}, [(1, D1, 1, 1)], []))
+
+    def test_compra_del_mismo_dia_por_registro(self):
+        estado = {'ultima_venta': D2, 'ultima_venta_registro': datetime.combine(D2, time(12)),
+                  'recalcular': False}
+        self.assertFalse(requiere_recalculo(estado, [(1, D2, 1, 1, datetime.combine(D2, time(16)))], []))
+        self.assertTrue(requiere_recalculo(estado, [(1, D2, 1, 1, datetime.combine(D2, time(9)))], []))
+
+
+ESQUEMA = """
+    CREATE TABLE producto (id_producto INTEGER PRIMARY KEY);
+    CREATE TABLE compra (id_compra INTEGER PRIMARY KEY, id_producto INTEGER, fecha_compra DATE,
+                         cantidad_compra DECIMAL, precio_unitario_compra DECIMAL, fecha_registro TIMESTAMP);
+    CREATE TABLE factura (id_factura INTEGER PRIMARY KEY, fecha_factura DATE, fecha_registro TIMESTAMP);
+    CREATE TABLE detalle_factura (id_detalle INTEGER PRIMARY KEY, id_factura INTEGER,
+                                  id_producto INTEGER, cantidad_factura DECIMAL);
+    CREATE TABLE costo_venta (id_detalle INTEGER PRIMARY KEY, id_factura INTEGER, id_producto INTEGER,
+                              fecha DATE, cantidad DECIMAL, costo DECIMAL, cantidad_sin_costo DECIMAL);
+    CREATE TABLE costo_lote (id_compra INTEGER PRIMARY KEY, id_producto INTEGER, fecha_compra DATE,
+                             cantidad DECIMAL, costo DECIMAL);
+    CREATE TABLE costo_compra (id_compra INTEGER PRIMARY KEY, id_producto INTEGER);
+    CREATE TABLE costo_producto (id_producto INTEGER PRIMARY KEY, ultima_venta DATE,
+                                 ultima_venta_registro TIMESTAMP, ultimo_costo_unitario DECIMAL, recalcular BOOLEAN DEFAULT FALSE);
+    CREATE TABLE costo_control (id INTEGER PRIMARY KEY, metodo TEXT DEFAULT 'fifo',
+                                ultimo_id_detalle INTEGER DEFAULT 0, ultimo_id_compra INTEGER DEFAULT 0,
+                                fecha_actualizacion TEXT);
+"""
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DECIMAL", lambda valor: Decimal(valor.decode()))
+
+
+class CursorSQLite:
+    """Traduce a SQLite lo propio de MySQL que usa actualizar_costos"""
+
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+
+    def execute(self, consulta, parametros=()):
+        consulta = consulta.replace("%s", "?").replace("FOR UPDATE", "").replace("NOW()", "CURRENT_TIMESTAMP")
+        consulta = consulta.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+        consulta = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", consulta)
+        self.cursor.execute(consulta, list(parametros))
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def close(self):
+        self.cursor.close()
+
+
+class ConexionSQLite:
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+        self.conn.executescript(ESQUEMA)
+
+    def cursor(self):
+        return CursorSQLite(self.conn)
+
+    def commit(self):
+        self.conn.commit()
+
+
+class TestActualizarCostos(unittest.TestCase):
+
+    def setUp(self):
+        self.db = ConexionSQLite()
+        compras, ventas = historial()
+        # Las compras se registran por la mañana y las facturas al mediodía
+        self.compras = [(compra[0], 1) + compra[1:] + (datetime.combine(compra[1], time(8)),)
+                        for compra in compras]
+        self.db.conn.execute("INSERT INTO producto VALUES (1)")
+        for id_detalle, id_factura, fecha, cantidad in ventas:
+            self.db.conn.execute("INSERT INTO factura VALUES (?, ?, ?)",
+                                 (id_factura, fecha, datetime.combine(fecha, time(12))))
+            self.db.conn.execute("INSERT INTO detalle_factura VALUES (?, ?, 1, ?)", (id_detalle, id_factura, cantidad))
+
+    def comprar(self, compras):
+        self.db.conn.executemany("INSERT INTO compra VALUES (?, ?, ?, ?, ?, ?)", compras)
+
+    def costos(self):
+        return self.db.conn.execute("SELECT * FROM costo_venta ORDER BY id_detalle").fetchall()
+
+    def reconstruido(self):
+        actualizar_costos(self.db, reconstruir=True)
+        return self.costos()
+
+    def test_compra_confirmada_fuera_de_orden(self):
+        # La compra 3 se confirma después de que se costeó hasta la última
+        tardia = next(c for c in self.compras if c[0] == 3)
+        self.comprar([c for c in self.compras if c[0] != 3])
+        actualizar_costos(self.db)
+        self.comprar([tardia])
+
+        actualizar_costos(self.db)
+        self.assertEqual(self.costos(), self.reconstruido())
+        # Volver a revisar el margen no aplica dos veces la misma compra
+        actualizar_costos(self.db)
+        self.assertEqual(self.costos(), self.reconstruido())
+
+    def test_resurtido_del_mismo_dia_no_recalcula(self):
+        self.comprar(self.compras)
+        actualizar_costos(self.db)
+        ultima_venta = self.db.conn.execute("SELECT ultima_venta FROM costo_producto").fetchone()[0]
+        self.comprar([(len(self.compras) + 1, 1, ultima_venta, Decimal(50), Decimal("1.25"),
+                       datetime.combine(ultima_venta, time(18)))])
+
+        self.assertEqual(actualizar_costos(self.db)['recalculados'], 0)
+        lotes = self.db.conn.execute("SELECT * FROM costo_lote ORDER BY id_compra").fetchall()
+        self.assertEqual(self.costos(), self.reconstruido())
+        self.assertEqual(lotes, self.db.conn.execute("SELECT * FROM costo_lote ORDER BY id_compra").fetchall())
+
+    def test_borrar_facturas_restaura_los_lotes(self):
+        self.comprar(self.compras)
+        actualizar_costos(self.db)
+        self.db.conn.execute("DELETE FROM costo_venta WHERE id_factura <= 40")
+        self.db.conn.execute("DELETE FROM detalle_factura WHERE id_factura <= 40")
+        invalidar_costos_producto(self.db.cursor(), 1)
+
+        actualizar_costos(self.db)
+        self.assertEqual(self.costos(), self.reconstruido())
+
+
+if __name__ == "__main__":
+    unittest.main()
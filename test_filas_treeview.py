@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+test_filas_treeview.py
+Pruebas de la actualización incremental de Treeviews (src/ui/filas_treeview.py)
+sobre un Treeview falso con la misma semántica de insert/move/detach/delete.
+"""
+
+import sys
+import os
+import random
+import unittest
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.ui.filas_treeview import FilasTreeview, _subsecuencia_creciente
+
+
+class TreeviewFalso:
+    """Lo mínimo de ttk.Treeview que usa FilasTreeview, contando operaciones"""
+
+    def __init__(self):
+        self.hijos = {'': []}
+        self.padre = {}
+        self.opciones = {}
+        self.seleccion = ()
+        self.foco = ''
+        self.scroll = 0.0
+        self.operaciones = {'insert': 0, 'item': 0, 'move': 0, 'delete': 0, 'selection_set': 0}
+        self._siguiente = 0
+
+    def _colocar(self, iid, padre, indice):
+        hermanos = self.hijos[padre]
+        hermanos.insert(len(hermanos) if indice == 'end' else indice, iid)
+        self.padre[iid] = padre
+
+    def _quitar(self, iid):
+        if self.padre.get(iid) is not None:
+            self.hijos[self.padre[iid]].remove(iid)
+            self.padre[iid] = None
+
+    def insert(self, padre, indice, **opciones):
+        self._siguiente += 1
+        iid = f"I{self._siguiente:03X}"
+        self.hijos[iid] = []
+        self.opciones[iid] = dict(opciones)
+        self._colocar(iid, padre, indice)
+        self.operaciones['insert'] += 1
+        return iid
+
+    def get_children(self, item=''):
+        return tuple(self.hijos[item])
+
+    def item(self, iid, opcion=None, **opciones):
+        if opcion is not None:
+            return self.opciones[iid].get(opcion, '')
+        self.opciones[iid].update(opciones)
+        self.operaciones['item'] += 1
+
+    def move(self, iid, padre, indice):
+        self._quitar(iid)
+        self._colocar(iid, padre, indice)
+        self.operaciones['move'] += 1
+
+    def detach(self, *iids):
+        for iid in iids:
+            self._quitar(iid)
+
+    def delete(self, *iids):
+        for iid in iids:
+            if iid not in self.opciones:
+                continue
+            for hijo in list(self.hijos[iid]):
+                self.delete(hijo)
+            self._quitar(iid)
+            del self.hijos[iid], self.padre[iid], self.opciones[iid]
+            self.operaciones['delete'] += 1
+        self.seleccion = tuple(i for i in self.seleccion if i in self.opciones)
+
+    def exists(self, iid):
+        return iid in self.opciones
+
+    def selection(self):
+        return self.seleccion
+
+    def selection_set(self, iids):
+        self.seleccion = tuple(iids)
+        self.operaciones['selection_set'] += 1
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self.foco
+        self.foco = iid
+
+    def yview(self):
+        return (self.scroll, 1.0)
+
+    def yview_moveto(self, fraccion):
+        self.scroll = fraccion
+
+    def valores(self, padre=''):
+        return [self.opciones[iid]['values'] for iid in self.hijos[padre]]
+
+    def reiniciar_conteo(self):
+        self.operaciones = dict.fromkeys(self.operaciones, 0)
+
+
+def enlace_plano(tree, **opciones):
+    return FilasTreeview(tree, clave=lambda f: f['id'],
+                         valores=lambda f: (f['id'], f['nombre']), **opciones)
+
+
+def filas(*ids, sufijo=""):
+    return [{'id': i, 'nombre': f"Cliente {i}{sufijo}"} for i in ids]
+
+
+class TestSubsecuenciaCreciente(unittest.TestCase):
+
+    def test_largo_minimo_de_movimientos(self):
+        self.assertEqual(_subsecuencia_creciente([]), [])
+        self.assertEqual(_subsecuencia_creciente([0, 1, 2]), [0, 1, 2])
+        self.assertEqual(len(_subsecuencia_creciente([3, 0, 1, 2])), 3)
+        posiciones = [2, 5, 3, 7, 11, 8, 10, 13, 6]
+        indices = _subsecuencia_creciente(posiciones)
+        self.assertEqual(len(indices), 6)
+        valores = [posiciones[i] for i in indices]
+        self.assertEqual(valores, sorted(valores))
+
+
+class TestFilasTreeview(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = TreeviewFalso()
+        self.enlace = enlace_plano(self.tree)
+
+    def test_carga_inicial(self):
+        cambios = self.enlace.actualizar(filas(1, 2, 3))
+        self.assertEqual(cambios['insertadas'], 3)
+        self.assertEqual(self.tree.valores(), [(1, "Cliente 1"), (2, "Cliente 2"), (3, "Cliente 3")])
+        self.assertEqual(self.enlace.fila(self.enlace.item(2))['nombre'], "Cliente 2")
+
+    def test_refresco_sin_cambios_no_toca_el_arbol(self):
+        self.enlace.actualizar(filas(*range(50)))
+        iids = self.tree.get_children()
+        self.tree.reiniciar_conteo()
+
+        cambios = self.enlace.actualizar(filas(*range(50)))
+        self.assertEqual(set(cambios.values()), {0})
+        self.assertEqual(set(self.tree.operaciones.values()), {0})
+        self.assertEqual(self.tree.get_children(), iids)
+
+    def test_solo_actualiza_la_fila_cambiada(self):
+        self.enlace.actualizar(filas(1, 2, 3))
+        self.tree.reiniciar_conteo()
+        nuevas = filas(1, 2, 3)
+        nuevas[1]['nombre'] = "Renombrado"
+
+        cambios = self.enlace.actualizar(nuevas)
+        self.assertEqual(cambios['actualizadas'], 1)
+        self.assertEqual(self.tree.operaciones['item'], 1)
+        self.assertEqual(self.tree.valores()[1], (2, "Renombrado"))
+
+    def test_mover_una_fila_es_un_movimiento(self):
+        self.enlace.actualizar(filas(*range(10)))
+        self.tree.reiniciar_conteo()
+        cambios = self.enlace.actualizar(filas(*range(1, 10), 0))
+        self.assertEqual(cambios['movidas'], 1)
+        self.assertEqual([v[0] for v in self.tree.valores()], [*range(1, 10), 0])
+
+    def test_cambios_aleatorios_terminan_en_el_orden_pedido(self):
+        azar = random.Random(7)
+        for _ in range(200):
+            ids = azar.sample(range(40), azar.randint(0, 30))
+            self.enlace.actualizar(filas(*ids, sufijo=azar.choice(["", "*"])))
+            self.assertEqual([v[0] for v in self.tree.valores()], ids)
+            self.assertEqual(len(self.enlace), len(ids))
+        self.assertLessEqual(len(self.enlace), len(self.tree.opciones))
+
+    def test_filtrar_y_quitar_filtro_conserva_items(self):
+        self.enlace.actualizar(filas(*range(20)))
+        iids = self.tree.get_children()
+        self.enlace.actualizar(filas(3, 13))
+        self.assertEqual(len(self.tree.get_children()), 2)
+        self.tree.reiniciar_conteo()
+        cambios = self.enlace.actualizar(filas(*range(20)))
+        self.assertEqual(cambios['insertadas'], 18)
+        self.assertEqual(self.tree.operaciones['insert'], 0)
+        self.assertEqual(self.tree.get_children(), iids)
+
+    def test_ocultas_se_borran_al_pasar_el_limite(self):
+        enlace = enlace_plano(self.tree, max_ocultas=5)
+        enlace.actualizar(filas(*range(10)))
+        enlace.actualizar(filas(*range(5)))
+        self.assertEqual(len(self.tree.opciones), 10)
+        enlace.actualizar(filas(0))
+        self.assertEqual(len(self.tree.opciones), 1)
+        self.assertIsNone(enlace.item(3))
+        enlace.limpiar()
+        self.assertEqual(self.tree.opciones, {})
+
+    def test_conserva_seleccion_foco_y_scroll(self):
+        self.enlace.actualizar(filas(*range(10)))
+        self.tree.selection_set((self.enlace.item(4), self.enlace.item(7)))
+        self.tree.focus(self.enlace.item(4))
+        self.tree.scroll = 0.4
+        self.tree.reiniciar_conteo()
+
+        self.enlace.actualizar(filas(*range(10, 0, -1)))
+        self.assertEqual(set(self.tree.selection()), {self.enlace.item(4), self.enlace.item(7)})
+        self.assertEqual(self.tree.focus(), self.enlace.item(4))
+        self.assertEqual(self.tree.scroll, 0.4)
+        # La selección no cambió: no se vuelve a fijar (evita <<TreeviewSelect>>)
+        self.assertEqual(self.tree.operaciones['selection_set'], 0)
+
+        self.enlace.actualizar(filas(*range(5)))
+        self.assertEqual(self.tree.selection(), (self.enlace.item(4),))
+
+    def test_sin_etiquetas_respeta_los_tags_de_la_ventana(self):
+        self.enlace.actualizar(filas(1, 2))
+        self.tree.item(self.enlace.item(1), tags=("hidden",))
+        self.enlace.actualizar(filas(1, 2, sufijo="!"))
+        self.assertEqual(self.tree.item(self.enlace.item(1), "tags"), ("hidden",))
+
+    def test_clave_repetida(self):
+        with self.assertRaises(ValueError):
+            self.enlace.actualizar(filas(1, 2, 1))
+
+
+class TestFilasTreeviewConRamas(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = TreeviewFalso()
+        self.enlace = FilasTreeview(
+            self.tree,
+            clave=lambda f: f['clave'],
+            valores=lambda f: (f.get('total', ''),),
+            texto=lambda f: f['nombre'],
+            etiquetas=lambda f: (f['clave'] if 'productos' not in f else "seccion",),
+            hijos=lambda f: f.get('productos', ()))
+
+    def seccion(self, id_seccion, *productos):
+        return {'clave': ('seccion', id_seccion), 'nombre': f"Sección {id_seccion}",
+                'productos': [{'clave': p, 'nombre': p, 'total': 10} for p in productos]}
+
+    def test_mover_producto_entre_secciones(self):
+        self.enlace.actualizar([self.seccion(1, "manzana", "pera"), self.seccion(2, "uva")])
+        pera = self.enlace.item("pera")
+        self.tree.reiniciar_conteo()
+
+        cambios = self.enlace.actualizar([self.seccion(1, "manzana"), self.seccion(2, "pera", "uva")])
+        self.assertEqual(cambios['movidas'], 1)
+        self.assertEqual(cambios['insertadas'], 0)
+        seccion_2 = self.enlace.item(('seccion', 2))
+        self.assertEqual(self.tree.get_children(seccion_2), (pera, self.enlace.item("uva")))
+        self.assertEqual(self.tree.item(pera, "tags"), ("pera",))
+        self.assertTrue(self.tree.item(seccion_2, "open"))
+
+    def test_eliminar_seccion_con_productos(self):
+        self.enlace.actualizar([self.seccion(1, "manzana"), self.seccion(2, "uva", "kiwi")])
+        cambios = self.enlace.actualizar([self.seccion(1, "manzana")])
+        self.assertEqual(cambios['quitadas'], 3)
+        self.assertEqual(self.tree.get_children(), (self.enlace.item(('seccion', 1)),))
+        self.assertIsNone(self.enlace.item("kiwi"))
+
+        # La sección vuelve con otro producto; kiwi sigue oculto bajo ella
+        cambios = self.enlace.actualizar([self.seccion(1, "manzana"), self.seccion(2, "uva")])
+        self.assertEqual(cambios['insertadas'], 2)
+        self.assertEqual(cambios['quitadas'], 0)
+        seccion_2 = self.enlace.item(('seccion', 2))
+        self.assertEqual(self.tree.get_children(seccion_2), (self.enlace.item("uva"),))
+        self.assertEqual(self.tree.operaciones['insert'], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+test_folios_concurrencia.py
+Prueba de estrés de asignación de folios con muchas ventas simultáneas.
+
+Simula la base con una secuencia de folios cuyo bloqueo de fila dura hasta
+el commit, igual que InnoDB, por lo que no requiere base de datos.
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.receipts.components import database
+
+HILOS = 16
+VENTAS_POR_HILO = 25
+# Latencia simulada de cada viaje a la base
+LATENCIA = 0.0005
+
+
+class BaseFalsa:
+    """Estado compartido: folio_sequence y facturas registradas"""
+
+    def __init__(self):
+        self.next_val = 1
+        self.bloqueo_secuencia = threading.Lock()
+        self.estado_lock = threading.Lock()
+        self.folios_facturas = []
+        self.reservas_secuencia = 0
+        self.conexiones = 0
+
+
+class CursorFalso:
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.base = conn.base
+        self.lastrowid = None
+        self.rowcount = 0
+
+    def execute(self, query, params=()):
+        time.sleep(LATENCIA)
+        sql = " ".join(query.split())
+        if sql.startswith("UPDATE folio_sequence"):
+            # El bloqueo de la fila se mantiene hasta commit/rollback
+            if not self.conn.tiene_secuencia:
+                self.base.bloqueo_secuencia.acquire()
+                self.conn.tiene_secuencia = True
+                self.conn.next_val_inicial = self.base.next_val
+            self.base.next_val += params[0]
+            self.base.reservas_secuencia += 1
+            self.lastrowid = self.base.next_val
+            self.rowcount = 1
+        elif sql.startswith("INSERT INTO factura"):
+            self.conn.facturas_pendientes.append(params[2])
+            self.lastrowid = len(self.conn.facturas_pendientes)
+            self.rowcount = 1
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+
+    def __init__(self, base):
+        self.base = base
+        self.tiene_secuencia = False
+        self.facturas_pendientes = []
+        with base.estado_lock:
+            base.conexiones += 1
+
+    def cursor(self, *args, **kwargs):
+        return CursorFalso(self)
+
+    def start_transaction(self):
+        pass
+
+    def _terminar(self, confirmar):
+        if confirmar:
+            with self.base.estado_lock:
+                self.base.folios_facturas.extend(self.facturas_pendientes)
+        self.facturas_pendientes = []
+        if self.tiene_secuencia:
+            if not confirmar:
+                self.base.next_val = self.next_val_inicial
+            self.tiene_secuencia = False
+            self.base.bloqueo_secuencia.release()
+
+    def commit(self):
+        self._terminar(True)
+
+    def rollback(self):
+        self._terminar(False)
+
+    def close(self):
+        self.rollback()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def registrar_ventas_concurrentes(base):
+    """Registra HILOS * VENTAS_POR_HILO ventas en paralelo. Retorna (segundos, errores)"""
+    carrito = [[1, "Manzana", 10.0, 2.0, 20.0], [2, "Pera", 12.5, 1.0, 12.5]]
+    errores = []
+
+    def trabajo():
+        try:
+            for _ in range(VENTAS_POR_HILO):
+                resultado = database.crear_factura_completa(1, carrito)
+                if resultado is None:
+                    errores.append("venta no registrada")
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=trabajo) for _ in range(HILOS)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return time.perf_counter() - inicio, errores
+
+
+class TestFoliosConcurrencia(unittest.TestCase):
+
+    def setUp(self):
+        self.base = BaseFalsa()
+        parches = [
+            mock.patch.object(database, 'conectar', lambda: ConexionFalsa(self.base)),
+            mock.patch.object(database, '_reserva_folios', None),
+            mock.patch('builtins.print'),
+        ]
+        for parche in parches:
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _verificar_sin_colisiones(self):
+        folios = self.base.folios_facturas
+        self.assertEqual(len(folios), HILOS * VENTAS_POR_HILO)
+        self.assertEqual(len(set(folios)), len(folios))
+
+    def test_folio_en_la_transaccion_de_la_venta(self):
+        with mock.patch.dict(os.environ, {'FOLIO_BLOCK_SIZE': '0'}):
+            segundos, errores = registrar_ventas_concurrentes(self.base)
+
+        self.assertEqual(errores, [])
+        self._verificar_sin_colisiones()
+        # Sin huecos y una sola conexión por venta
+        self.assertEqual(sorted(self.base.folios_facturas),
+                         list(range(1, HILOS * VENTAS_POR_HILO + 1)))
+        self.assertEqual(self.base.conexiones, HILOS * VENTAS_POR_HILO)
+        sys.stderr.write(f"\n  folio en transacción: {len(self.base.folios_facturas) / segundos:.0f} ventas/s\n")
+
+    def test_reserva_por_bloques(self):
+        tamano_bloque = 50
+        with mock.patch.dict(os.environ, {'FOLIO_BLOCK_SIZE': str(tamano_bloque)}):
+            segundos, errores = registrar_ventas_concurrentes(self.base)
+
+        self.assertEqual(errores, [])
+        self._verificar_sin_colisiones()
+        self.assertEqual(self.base.reservas_secuencia, HILOS * VENTAS_POR_HILO // tamano_bloque)
+        sys.stderr.write(f"\n  reserva por bloques: {len(self.base.folios_facturas) / segundos:.0f} ventas/s\n")
+
+    def test_venta_revertida_libera_su_folio(self):
+        with mock.patch.object(database, '_insertar_factura', side_effect=database.Error("falla")):
+            self.assertIsNone(database.crear_factura_completa(1, [[1, "Manzana", 10.0, 1.0, 10.0]]))
+
+        self.assertEqual(database.obtener_siguiente_folio(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+test_indice_busqueda.py
+Pruebas del índice de búsqueda de productos (src/utils/indice_busqueda.py).
+"""
+
+import sys
+import os
+import unittest
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.utils.indice_busqueda import IndiceBusqueda, normalizar_texto, separar_palabras
+
+PRODUCTOS = [
+    (1, "Plátano Tabasco"),
+    (2, "Manzana roja"),
+    (3, "Salsa de manzana"),
+    (4, "Papa blanca"),
+    (5, "Mango Ataulfo"),
+    (6, "Jitomate saladet"),
+    (7, "Plátano macho"),
+    (8, "Champiñón"),
+]
+
+
+class TestIndiceBusqueda(unittest.TestCase):
+
+    def setUp(self):
+        self.indice = IndiceBusqueda(PRODUCTOS)
+
+    def test_normaliza_acentos_y_mayusculas(self):
+        self.assertEqual(normalizar_texto("PLÁTANO Ñ"), "platano n")
+        self.assertEqual(separar_palabras("  Champiñón, 1kg "), ["champinon", "1kg"])
+
+    def test_ignora_acentos(self):
+        self.assertEqual(sorted(self.indice.buscar("platano")), [1, 7])
+        self.assertEqual(self.indice.buscar("CHAMPIÑON"), [8])
+
+    def test_prefijo_de_palabra(self):
+        self.assertEqual(self.indice.buscar("tab"), [1])
+        self.assertEqual(self.indice.buscar("p"), [4, 7, 1])
+
+    def test_todas_las_palabras(self):
+        self.assertEqual(self.indice.buscar("plat mach"), [7])
+        self.assertEqual(self.indice.buscar("manzana verde"), [])
+
+    def test_dentro_de_la_palabra(self):
+        self.assertEqual(self.indice.buscar("zana"), [2, 3])
+
+    def test_tolera_errores_de_tecleo(self):
+        self.assertEqual(self.indice.buscar("jitomte"), [6])
+        self.assertEqual(self.indice.buscar("mnago"), [5])
+        self.assertEqual(self.indice.buscar("xyz"), [])
+
+    def test_relevancia(self):
+        # El nombre que empieza con lo buscado va primero
+        self.assertEqual(self.indice.buscar("manzana"), [2, 3])
+        # Exacta antes que prefijo
+        indice = IndiceBusqueda([(1, "Limonada natural"), (2, "Limón verde")])
+        self.assertEqual(indice.buscar("limon"), [2, 1])
+
+    def test_limite(self):
+        self.assertEqual(self.indice.buscar("a", limite=2), [5])
+        self.assertEqual(len(self.indice.buscar("pla", limite=1)), 1)
+
+    def test_texto_vacio(self):
+        self.assertEqual(self.indice.buscar(""), [])
+        self.assertEqual(self.indice.buscar(" - "), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+test_login_auth.py
+Pruebas del login con una sola conexión (src/auth/auth_manager.py): una
+consulta trae usuario y bloqueo, un UPDATE registra el resultado, el log de
+accesos se encola sin tocar la base y bcrypt no se repite al reautenticar.
+"""
+
+import sys
+import os
+import unittest
+from unittest import mock
+
+import bcrypt
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.auth import auth_manager as modulo_auth
+from src.auth.auth_manager import AuthManager
+from src.database import db_manager as modulo_db
+
+HASH = bcrypt.hashpw(b"secreta123", bcrypt.gensalt(rounds=4)).decode()
+
+
+class CursorFalso:
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self._fila = None
+
+    def execute(self, consulta, params=None):
+        consulta = " ".join(consulta.split())
+        self.servidor.consultas.append((consulta, params))
+        if consulta.startswith("SELECT"):
+            self._fila = self.servidor.usuarios.get(params[0])
+            if self._fila is not None:
+                self._fila = dict(self._fila)
+
+    def fetchone(self):
+        return self._fila
+
+
+class ConexionFalsa:
+    def __init__(self, servidor):
+        self.servidor = servidor
+
+    def cursor(self, dictionary=False):
+        return CursorFalso(self.servidor)
+
+    def commit(self):
+        self.servidor.commits += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class ServidorFalso:
+    def __init__(self):
+        self.usuarios = {'ana': {'id_usuario': 1, 'username': 'ana', 'password_hash': HASH,
+                                 'nombre_completo': "Ana López", 'rol': 'admin', 'activo': 1,
+                                 'segundos_bloqueo': 0}}
+        self.consultas = []
+        self.commits = 0
+        self.conexiones = 0
+
+    def conectar(self):
+        self.conexiones += 1
+        return ConexionFalsa(self)
+
+    def de_tipo(self, inicio):
+        return [c for c in self.consultas if c[0].startswith(inicio)]
+
+
+class RegistroFalso:
+    """Recibe los intentos que irían a log_accesos"""
+
+    def __init__(self):
+        self.eventos = []
+
+    def registrar(self, username, exito, detalle=""):
+        self.eventos.append((username, exito, detalle))
+
+
+class AuthManagerFalso(AuthManager):
+    def __init__(self, servidor):
+        super().__init__()
+        self.servidor = servidor
+        self.access_log = RegistroFalso()
+
+    def _get_admin_connection(self):
+        return self.servidor.conectar()
+
+
+class TestAutenticar(unittest.TestCase):
+
+    def setUp(self):
+        modulo_auth._verificaciones.clear()
+        self.servidor = ServidorFalso()
+        self.auth = AuthManagerFalso(self.servidor)
+
+    def test_login_exitoso_con_una_conexion(self):
+        resultado = self.auth.authenticate('ana', "secreta123")
+        self.assertTrue(resultado['success'])
+        self.assertEqual(resultado['user_data'],
+                         {'id_usuario': 1, 'username': 'ana', 'nombre_completo': "Ana López", 'rol': 'admin'})
+        self.assertNotIn('password_hash', resultado['user_data'])
+
+        # Una conexión para el login: un SELECT y un UPDATE en una transacción
+        self.assertEqual(self.servidor.conexiones, 1)
+        self.assertEqual(len(self.servidor.de_tipo("SELECT")), 1)
+        self.assertEqual(len(self.servidor.de_tipo("UPDATE")), 1)
+        self.assertIn("intentos_fallidos = 0", self.servidor.de_tipo("UPDATE")[0][0])
+        self.assertEqual(self.servidor.commits, 1)
+
+        # El log solo se encola; lo escribe por lotes registro_accesos
+        self.assertEqual(self.auth.access_log.eventos, [('ana', True, "Login exitoso")])
+        self.assertEqual(self.servidor.de_tipo("INSERT"), [])
+
+    def test_contrasena_incorrecta_incrementa_en_un_update(self):
+        resultado = self.auth.authenticate('ana', "otra")
+        self.assertFalse(resultado['success'])
+        actualizaciones = self.servidor.de_tipo("UPDATE")
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertEqual(actualizaciones[0][1], (3, 15, 3, 'ana'))
+        self.assertEqual(self.auth.access_log.eventos, [('ana', False, "Contraseña incorrecta")])
+
+    def test_usuario_bloqueado_no_verifica_contrasena(self):
+        self.servidor.usuarios['ana']['segundos_bloqueo'] = 600
+        with mock.patch.object(modulo_auth.bcrypt, 'checkpw') as checkpw:
+            resultado = self.auth.authenticate('ana', "secreta123")
+        checkpw.assert_not_called()
+        self.assertTrue(resultado['blocked'])
+        self.assertIn("10 minutos", resultado['message'])
+        self.assertEqual(self.servidor.de_tipo("UPDATE"), [])
+
+    def test_usuario_inexistente_e_inactivo(self):
+        self.assertFalse(self.auth.authenticate('nadie', "x")['success'])
+        self.servidor.usuarios['ana']['activo'] = 0
+        self.assertIn("inactivo", self.auth.authenticate('ana', "secreta123")['message'])
+        self.assertEqual(self.servidor.de_tipo("UPDATE"), [])
+
+
+class TestVerificacionRecordada(unittest.TestCase):
+
+    def setUp(self):
+        modulo_auth._verificaciones.clear()
+        self.auth = AuthManagerFalso(ServidorFalso())
+
+    def test_reautenticar_no_repite_bcrypt(self):
+        with mock.patch.object(modulo_auth.bcrypt, 'checkpw', wraps=bcrypt.checkpw) as checkpw:
+            self.assertTrue(self.auth._verify_password("secreta123", HASH))
+            self.assertTrue(self.auth._verify_password("secreta123", HASH))
+            self.assertEqual(checkpw.call_count, 1)
+
+            # Otra contraseña con el mismo hash sí pasa por bcrypt
+            self.assertFalse(self.auth._verify_password("secreta124", HASH))
+            self.assertEqual(checkpw.call_count, 2)
+
+    def test_hash_nuevo_o_vencido_vuelve_a_verificar(self):
+        otro = bcrypt.hashpw(b"secreta123", bcrypt.gensalt(rounds=4)).decode()
+        self.auth._verify_password("secreta123", HASH)
+        with mock.patch.object(modulo_auth.bcrypt, 'checkpw', wraps=bcrypt.checkpw) as checkpw:
+            self.assertTrue(self.auth._verify_password("secreta123", otro))
+            with mock.patch.object(modulo_auth, 'VERIFICACION_TTL', -1):
+                modulo_auth._verificaciones.clear()
+                self.auth._verify_password("secreta123", HASH)
+            self.auth._verify_password("secreta123", HASH)
+            self.assertEqual(checkpw.call_count, 3)
+
+
+class TestDatabaseManager(unittest.TestCase):
+
+    def test_autentica_una_sola_vez(self):
+        servidor = ServidorFalso()
+        manager = modulo_db.DatabaseManager()
+        manager.auth_manager = AuthManagerFalso(servidor)
+        pool = mock.Mock()
+        with mock.patch.object(modulo_db, 'obtener_pool', return_value=pool):
+            resultado = manager.authenticate_and_connect('ana', "secreta123")
+        self.assertTrue(resultado['success'])
+        self.assertEqual(len(servidor.de_tipo("SELECT")), 1)
+        self.assertIs(manager.current_connection, pool.obtener.return_value)
+
+
+if __name__ == "__main__":
+    unittest.main()
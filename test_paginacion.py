@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+test_paginacion.py
+Pruebas de la paginación por llave (src/database/paginacion.py) sobre SQLite,
+que ordena los NULL igual que MySQL, y del scroll infinito
+(src/ui/scroll_infinito.py) sobre un Treeview falso.
+"""
+
+import sys
+import os
+import random
+import sqlite3
+import unittest
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.database.paginacion import condicion_despues, cortar_pagina
+from src.ui.scroll_infinito import ScrollInfinito
+
+
+class TestPaginacionPorLlave(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("CREATE TABLE pago (id INTEGER PRIMARY KEY, fecha TEXT)")
+        azar = random.Random(3)
+        # Muchas fechas repetidas y algunos NULL, para probar el desempate
+        fechas = [None] + [f"2026-01-{dia:02d}" for dia in range(1, 8)]
+        self.conn.executemany("INSERT INTO pago (id, fecha) VALUES (?, ?)",
+                              [(i, azar.choice(fechas)) for i in range(1, 238)])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def pagina(self, despues, tamano):
+        condicion, params = condicion_despues("fecha", "id", despues, nulos=True)
+        consulta = "SELECT id, fecha FROM pago"
+        if condicion:
+            consulta += " WHERE " + condicion
+        consulta += " ORDER BY fecha DESC, id DESC LIMIT ?"
+        filas = self.conn.execute(consulta.replace("%s", "?"), params + [tamano + 1]).fetchall()
+        return cortar_pagina([dict(fila) for fila in filas], tamano, ("fecha", "id"))
+
+    def test_recorrer_paginas_igual_que_consulta_completa(self):
+        esperado = [fila['id'] for fila in
+                    self.conn.execute("SELECT id FROM pago ORDER BY fecha DESC, id DESC")]
+        for tamano in (1, 10, 50, 237, 500):
+            vistos, despues, paginas = [], None, 0
+            while True:
+                filas, despues = self.pagina(despues, tamano)
+                vistos += [fila['id'] for fila in filas]
+                paginas += 1
+                if despues is None:
+                    break
+            self.assertEqual(vistos, esperado, f"tamano={tamano}")
+            self.assertEqual(paginas, max(1, -(-237 // tamano)))
+
+    def test_primera_pagina_sin_condicion(self):
+        self.assertEqual(condicion_despues("fecha", "id", None), ("", []))
+
+    def test_cortar_pagina(self):
+        filas = [{'fecha': 3, 'id': 9}, {'fecha': 3, 'id': 4}, {'fecha': 1, 'id': 7}]
+        self.assertEqual(cortar_pagina(filas, 3, ('fecha', 'id')), (filas, None))
+        self.assertEqual(cortar_pagina(filas, 2, ('fecha', 'id')), (filas[:2], (3, 4)))
+
+
+class TreeviewFalso:
+    """Lo mínimo de ttk.Treeview que usa ScrollInfinito"""
+
+    def __init__(self):
+        self.items = {}
+        self.orden = []
+        self.opciones = {}
+        self.scroll = 0.5
+
+    def configure(self, **opciones):
+        self.opciones.update(opciones)
+
+    def insert(self, padre, indice, **opciones):
+        iid = f"I{len(self.items) + 1:03X}"
+        self.items[iid] = opciones
+        self.orden.append(iid)
+        return iid
+
+    def get_children(self, item=''):
+        return tuple(self.orden)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.orden.remove(iid)
+
+    def yview_moveto(self, fraccion):
+        self.scroll = fraccion
+
+
+class ScrollbarFalsa:
+    def __init__(self):
+        self.posicion = None
+
+    def set(self, primero, ultimo):
+        self.posicion = (primero, ultimo)
+
+
+class TestScrollInfinito(unittest.TestCase):
+
+    def setUp(self):
+        self.pedidas = []
+        self.datos = [{'id': i} for i in range(25, 0, -1)]
+        self.tree = TreeviewFalso()
+        self.scrollbar = ScrollbarFalsa()
+        self.scroll = ScrollInfinito(self.tree, self.cargar, valores=lambda fila: (fila['id'],),
+                                     scrollbar=self.scrollbar)
+
+    def cargar(self, despues, tamano=10):
+        self.pedidas.append(despues)
+        filas = [fila for fila in self.datos if despues is None or fila['id'] < despues[1]]
+        filas, siguiente = cortar_pagina(filas[:tamano + 1], tamano, ('id', 'id'))
+        return filas, siguiente
+
+    def ids(self):
+        return [self.tree.items[iid]['values'][0] for iid in self.tree.get_children()]
+
+    def test_carga_paginas_al_acercarse_al_final(self):
+        # Antes de reiniciar no hay nada que pedir
+        self.scroll._al_desplazar("0.0", "1.0")
+        self.assertEqual(self.pedidas, [])
+
+        self.scroll.reiniciar()
+        self.assertEqual(self.ids(), list(range(25, 15, -1)))
+        self.assertTrue(self.scroll.hay_mas)
+
+        # Lejos del final solo se mueve la scrollbar
+        self.scroll._al_desplazar("0.1", "0.5")
+        self.assertEqual(self.scrollbar.posicion, ("0.1", "0.5"))
+        self.assertEqual(len(self.pedidas), 1)
+
+        self.scroll._al_desplazar("0.5", "0.95")
+        self.scroll._al_desplazar("0.6", "1.0")
+        self.assertEqual(self.ids(), list(range(25, 0, -1)))
+        self.assertFalse(self.scroll.hay_mas)
+        self.assertEqual(self.pedidas, [None, (16, 16), (6, 6)])
+
+        # Sin más páginas no se vuelve a pedir
+        self.scroll._al_desplazar("0.7", "1.0")
+        self.assertEqual(len(self.pedidas), 3)
+        self.assertEqual(self.scroll.fila(self.tree.get_children()[0]), {'id': 25})
+        self.assertEqual(len(self.scroll), 25)
+
+    def test_reiniciar_vacia_y_cambia_la_consulta(self):
+        self.scroll.reiniciar()
+        self.scroll._al_desplazar("0.5", "1.0")
+        self.scroll.reiniciar(lambda despues: ([{'id': 99}], None))
+        self.assertEqual(self.ids(), [99])
+        self.assertEqual(self.tree.scroll, 0)
+        self.assertEqual(len(self.scroll), 1)
+
+    def test_error_permite_reintentar(self):
+        errores = []
+        self.scroll.al_fallar = errores.append
+        self.scroll.reiniciar(lambda despues: 1 / 0)
+        self.assertEqual(len(errores), 1)
+        self.assertFalse(self.scroll.cargando)
+        self.scroll.cargar_pagina = self.cargar
+        self.scroll._al_desplazar("0.0", "1.0")
+        self.assertEqual(len(self.ids()), 10)
+
+    def test_modo_agregar_sigue_la_llave_de_la_ventana(self):
+        recibidas = []
+        tree = TreeviewFalso()
+        scroll = ScrollInfinito(tree, self.cargar, agregar=recibidas.append)
+        scroll._al_desplazar("0.0", "1.0")
+        self.assertEqual(self.pedidas, [])
+
+        scroll.continuar((20, 20))
+        scroll._al_desplazar("0.0", "1.0")
+        self.assertEqual(self.pedidas, [(20, 20)])
+        self.assertEqual([f['id'] for f in recibidas[0]], list(range(19, 9, -1)))
+        self.assertEqual(tree.get_children(), ())
+
+        scroll.continuar(None)
+        scroll._al_desplazar("0.0", "1.0")
+        self.assertEqual(len(self.pedidas), 1)
+
+    def test_valores_o_agregar(self):
+        with self.assertRaises(ValueError):
+            ScrollInfinito(TreeviewFalso(), self.cargar)
+
+
+if __name__ == "__main__":
+    unittest.main()
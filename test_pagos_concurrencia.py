@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+test_pagos_concurrencia.py
+Pruebas del registro de pagos de DebtManager con varios cajeros a la vez.
+
+Simula la base con bloqueos de fila que duran hasta el commit, igual que
+InnoDB: las filas de deuda y de saldo_cliente se bloquean al escribirlas y
+el abono condicional se evalúa sobre el valor actual. Las filas de la tabla
+pago aparecen al hacer commit. No requiere base de datos.
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from mysql.connector import Error
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.deudas import debt_manager as modulo_deudas
+from src.modules.deudas.debt_manager import DebtManager
+
+HILOS = 12
+PAGOS_POR_HILO = 5
+# Latencia simulada de cada viaje a la base
+LATENCIA = 0.0005
+# Un bloqueo que no llega en este tiempo se trata como deadlock
+ESPERA_BLOQUEO = 5.0
+
+
+class BaseFalsa:
+    """Estado compartido: deudas, saldos por cliente, pagos y bloqueos de fila"""
+
+    def __init__(self, deudas):
+        # id_deuda -> {'id_cliente', 'monto', 'monto_pagado', 'pagado', 'fecha_pago'}
+        self.deudas = deudas
+        self.saldos = {}
+        self.pagos = []
+        self.bloqueos = {}
+        self.estado_lock = threading.Lock()
+        self.sentencias = []
+
+    def bloqueo(self, llave):
+        with self.estado_lock:
+            return self.bloqueos.setdefault(llave, threading.Lock())
+
+
+class CursorFalso:
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.base = conn.base
+        self.rowcount = 0
+        self._filas = []
+
+    def execute(self, query, params=()):
+        time.sleep(LATENCIA)
+        sql = " ".join(query.split())
+        params = list(params)
+        self.base.sentencias.append(" ".join(sql.split()[:3]))
+        self._filas, self.rowcount = [], 0
+        deudas = self.base.deudas
+
+        if sql.startswith("SELECT id_deuda, id_cliente FROM deuda"):
+            self._filas = [{'id_deuda': i, 'id_cliente': deudas[i]['id_cliente']} for i in params if i in deudas]
+        elif sql.startswith("INSERT INTO saldo_cliente (id_cliente) VALUES"):
+            for id_cliente in params:
+                self.conn.bloquear(('saldo', id_cliente))
+        elif sql.startswith("UPDATE deuda"):
+            monto, margen, hoy, metodo, referencia, id_deuda, minimo = params
+            self.conn.bloquear(('deuda', id_deuda))
+            deuda = deudas.get(id_deuda)
+            if deuda and not deuda['pagado'] and deuda['monto'] - deuda['monto_pagado'] >= minimo:
+                self.conn.guardar_original(id_deuda, deuda)
+                deuda['monto_pagado'] += monto
+                deuda['pagado'] = deuda['monto'] - deuda['monto_pagado'] <= margen
+                deuda['fecha_pago'] = hoy if deuda['pagado'] else deuda['fecha_pago']
+                self.rowcount = 1
+        elif sql.startswith("INSERT INTO pago"):
+            columnas = ('id_deuda', 'id_cliente', 'monto', 'metodo_pago', 'referencia_pago', 'usuario', 'fecha_pago')
+            for inicio in range(0, len(params), len(columnas)):
+                self.conn.pagos_pendientes.append(dict(zip(columnas, params[inicio:inicio + len(columnas)])))
+        elif sql.startswith("INSERT INTO saldo_cliente (id_cliente, saldo_pendiente"):
+            for id_cliente in params:
+                propias = [d for d in deudas.values() if d['id_cliente'] == id_cliente]
+                self.conn.saldos_pendientes[id_cliente] = {
+                    'saldo_pendiente': sum(d['monto'] - d['monto_pagado'] for d in propias if not d['pagado']),
+                    'deudas_pendientes': sum(1 for d in propias if not d['pagado']),
+                }
+        elif sql.startswith("SELECT monto - monto_pagado AS saldo_pendiente, pagado FROM deuda"):
+            self.conn.bloquear(('deuda', params[0]))
+            deuda = deudas[params[0]]
+            self._filas = [{'saldo_pendiente': deuda['monto'] - deuda['monto_pagado'], 'pagado': deuda['pagado']}]
+        else:
+            raise AssertionError(f"Consulta inesperada: {sql}")
+
+    def fetchall(self):
+        return self._filas
+
+    def fetchone(self):
+        return self._filas[0] if self._filas else None
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+
+    def __init__(self, base):
+        self.base = base
+        self.bloqueados = []
+        self.originales = {}
+        self.saldos_pendientes = {}
+        self.pagos_pendientes = []
+
+    def bloquear(self, llave):
+        if llave in self.bloqueados:
+            return
+        if not self.base.bloqueo(llave).acquire(timeout=ESPERA_BLOQUEO):
+            raise Error(msg=f"Deadlock esperando {llave}")
+        self.bloqueados.append(llave)
+
+    def guardar_original(self, id_deuda, deuda):
+        self.originales.setdefault(id_deuda, dict(deuda))
+
+    def cursor(self, *args, **kwargs):
+        return CursorFalso(self)
+
+    def _terminar(self, confirmar):
+        if confirmar:
+            self.base.saldos.update(self.saldos_pendientes)
+            self.base.pagos.extend(self.pagos_pendientes)
+        else:
+            for id_deuda, original in self.originales.items():
+                self.base.deudas[id_deuda].update(original)
+        self.originales, self.saldos_pendientes, self.pagos_pendientes = {}, {}, []
+        for llave in reversed(self.bloqueados):
+            self.base.bloqueo(llave).release()
+        self.bloqueados = []
+
+    def commit(self):
+        self._terminar(True)
+
+    def rollback(self):
+        self._terminar(False)
+
+    def close(self):
+        if self.bloqueados:
+            self.rollback()
+
+
+class PoolFalso:
+    def __init__(self, base):
+        self.base = base
+
+    def obtener(self):
+        return ConexionFalsa(self.base)
+
+
+def deuda(id_cliente, monto, pagado=Decimal("0")):
+    return {'id_cliente': id_cliente, 'monto': Decimal(monto), 'monto_pagado': Decimal(pagado),
+            'pagado': False, 'fecha_pago': None}
+
+
+class TestPagosConcurrentes(unittest.TestCase):
+
+    def setUp(self):
+        self.base = BaseFalsa({1: deuda(7, "100.00"), 2: deuda(7, "50.00"), 3: deuda(8, "30.00")})
+        parche = mock.patch.object(modulo_deudas, 'obtener_pool', return_value=PoolFalso(self.base))
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.manager = DebtManager()
+
+    def test_cajeros_simultaneos_no_pierden_ni_exceden_pagos(self):
+        aceptados, rechazados, errores = [], [], []
+        lock = threading.Lock()
+        inicio = threading.Barrier(HILOS)
+
+        def cajero():
+            inicio.wait()
+            for _ in range(PAGOS_POR_HILO):
+                try:
+                    self.manager.registrar_pago(1, Decimal("2.50"), "efectivo", usuario="caja")
+                    destino, valor = aceptados, 1
+                except ValueError as e:
+                    destino, valor = rechazados, e
+                except Exception as e:
+                    destino, valor = errores, e
+                with lock:
+                    destino.append(valor)
+
+        hilos = [threading.Thread(target=cajero) for _ in range(HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        # 60 intentos de 2.50 contra 100.00: exactamente 40 entran, sin pagos perdidos
+        self.assertEqual(len(aceptados), 40)
+        self.assertEqual(len(rechazados), HILOS * PAGOS_POR_HILO - 40)
+        self.assertEqual(self.base.deudas[1]['monto_pagado'], Decimal("100.00"))
+        self.assertTrue(self.base.deudas[1]['pagado'])
+        self.assertEqual(self.base.deudas[1]['fecha_pago'], date.today())
+        self.assertEqual(self.base.saldos[7]['saldo_pendiente'], Decimal("50.00"))
+        # Una fila de pago por abono aceptado, con el operador
+        self.assertEqual(len(self.base.pagos), 40)
+        self.assertEqual(sum(p['monto'] for p in self.base.pagos), Decimal("100.00"))
+        self.assertEqual({p['usuario'] for p in self.base.pagos}, {"caja"})
+
+    def test_rechazo_explica_el_saldo_actual(self):
+        self.manager.registrar_pago(2, Decimal("45"), "efectivo")
+        with self.assertRaisesRegex(ValueError, r"excede el saldo pendiente \(5\.00\)"):
+            self.manager.registrar_pago(2, Decimal("10"), "efectivo")
+        self.manager.registrar_pago(2, Decimal("5"), "efectivo")
+        with self.assertRaisesRegex(ValueError, "ya está pagada"):
+            self.manager.registrar_pago(2, Decimal("1"), "efectivo")
+        with self.assertRaisesRegex(ValueError, "no encontrada"):
+            self.manager.registrar_pago(99, Decimal("1"), "efectivo")
+        with self.assertRaisesRegex(ValueError, "mayor a 0"):
+            self.manager.registrar_pago(1, Decimal("0"), "efectivo")
+
+    def test_lote_en_una_transaccion(self):
+        registrados = self.manager.registrar_pagos([
+            (1, Decimal("60"), "efectivo", None),
+            (3, Decimal("30"), "transferencia", "SPEI-1"),
+            (1, Decimal("40"), "efectivo", None),
+        ], usuario="caja")
+        self.assertEqual(registrados, 3)
+        self.assertTrue(self.base.deudas[1]['pagado'])
+        self.assertTrue(self.base.deudas[3]['pagado'])
+        self.assertEqual(self.base.saldos[7]['deudas_pendientes'], 1)
+        self.assertEqual(self.base.saldos[8]['saldo_pendiente'], 0)
+        # Una lectura, un bloqueo y un recálculo para todo el lote
+        self.assertEqual(self.base.sentencias.count("SELECT id_deuda, id_cliente"), 1)
+        self.assertEqual(self.base.sentencias.count("INSERT INTO saldo_cliente"), 2)
+        self.assertEqual(self.base.sentencias.count("UPDATE deuda SET"), 3)
+        self.assertEqual(self.base.sentencias.count("INSERT INTO pago"), 1)
+        self.assertEqual([(p['id_deuda'], p['monto'], p['referencia_pago']) for p in self.base.pagos],
+                         [(1, Decimal("60"), None), (3, Decimal("30"), "SPEI-1"), (1, Decimal("40"), None)])
+        self.assertEqual(len({p['fecha_pago'] for p in self.base.pagos}), 1)
+
+    def test_lote_con_un_rechazo_no_registra_ninguno(self):
+        with self.assertRaisesRegex(ValueError, "deuda 3"):
+            self.manager.registrar_pagos([
+                (1, Decimal("60"), "efectivo", None),
+                (3, Decimal("31"), "efectivo", None),
+            ])
+        self.assertEqual(self.base.deudas[1]['monto_pagado'], 0)
+        self.assertEqual(self.base.deudas[3]['monto_pagado'], 0)
+        self.assertEqual(self.base.saldos, {})
+        self.assertEqual(self.base.pagos, [])
+        self.assertEqual(self.base.bloqueos[('deuda', 1)].locked(), False)
+
+
+if __name__ == "__main__":
+    unittest.main()
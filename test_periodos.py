@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+test_periodos.py
+Pruebas de las etiquetas y rangos de período de las gráficas temporales
+(src/modules/analytics/periodos.py).
+"""
+
+import sys
+import os
+import unittest
+from datetime import date
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.analytics.periodos import etiqueta_periodo, rango_periodo, rango_analisis
+
+
+class TestEtiquetasPeriodo(unittest.TestCase):
+
+    def test_etiquetas_como_date_format(self):
+        fecha = date(2024, 12, 30)
+        self.assertEqual(etiqueta_periodo("Día", fecha), "2024-12-30")
+        self.assertEqual(etiqueta_periodo("Semana", fecha), "2025-W01")  # %x-W%v
+        self.assertEqual(etiqueta_periodo("Mes", fecha), "2024-12")
+        self.assertEqual(etiqueta_periodo("Trimestre", fecha), "2024-Q4")
+        self.assertEqual(etiqueta_periodo("Año", fecha), "2024")
+
+    def test_rangos(self):
+        self.assertEqual(rango_periodo("Día", "2024-02-29"), (date(2024, 2, 29), date(2024, 3, 1)))
+        self.assertEqual(rango_periodo("Semana", "2025-W01"), (date(2024, 12, 30), date(2025, 1, 6)))
+        self.assertEqual(rango_periodo("Mes", "2024-12"), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(rango_periodo("Trimestre", "2024-Q4"), (date(2024, 10, 1), date(2025, 1, 1)))
+        self.assertEqual(rango_periodo("Año", 2024), (date(2024, 1, 1), date(2025, 1, 1)))
+
+    def test_rango_contiene_su_etiqueta(self):
+        for tipo in ("Día", "Semana", "Mes", "Trimestre", "Año"):
+            etiqueta = etiqueta_periodo(tipo, date(2023, 1, 1))
+            inicio, fin = rango_periodo(tipo, etiqueta)
+            self.assertEqual(etiqueta_periodo(tipo, inicio), etiqueta)
+            self.assertNotEqual(etiqueta_periodo(tipo, fin), etiqueta)
+
+    def test_periodos_del_analisis(self):
+        hoy = date(2025, 1, 15)
+        self.assertEqual(rango_analisis("Todo el historial", hoy), (None, None))
+        self.assertEqual(rango_analisis("Este mes", hoy), (date(2025, 1, 1), date(2025, 2, 1)))
+        self.assertEqual(rango_analisis("Mes anterior", hoy), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(rango_analisis("Este año", hoy), (date(2025, 1, 1), date(2026, 1, 1)))
+        self.assertEqual(rango_analisis("Año anterior", hoy), (date(2024, 1, 1), date(2025, 1, 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
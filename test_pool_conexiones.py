@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+test_pool_conexiones.py
+Pruebas del pool de conexiones compartido (src/database/pool.py).
+
+Usa conexiones simuladas, por lo que no requiere base de datos. También
+abre varios módulos dentro del proceso (launch_module.open_module) contra
+un pool pequeño.
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from mysql.connector.errors import PoolError
+import launch_module
+from src.database import pool as pool_compartido
+from src.database.conexion import conectar
+from src.database.pool import PoolConexiones
+
+
+class ConexionFalsa:
+    """Conexión simulada con la interfaz mínima que usa el pool"""
+
+    def __init__(self):
+        self.abierta = True
+        self.in_transaction = False
+        self.unread_result = False
+        self.autocommit = False
+        self.rollbacks = 0
+        self.pings = 0
+
+    def is_connected(self):
+        self.pings += 1
+        return self.abierta
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def consume_results(self):
+        self.unread_result = False
+
+    def close(self):
+        self.abierta = False
+
+
+def crear_pool(**kwargs):
+    creadas = []
+
+    def fabrica():
+        conn = ConexionFalsa()
+        creadas.append(conn)
+        return conn
+
+    pool = PoolConexiones(db_config={'host': 'test'}, fabrica=fabrica, **kwargs)
+    return pool, creadas
+
+
+class TestPoolConexiones(unittest.TestCase):
+
+    def test_reutiliza_conexion_devuelta(self):
+        pool, creadas = crear_pool(tamano=2)
+
+        with pool.conexion():
+            pass
+        with pool.conexion():
+            pass
+
+        self.assertEqual(len(creadas), 1)
+        metricas = pool.metricas()
+        self.assertEqual(metricas['prestamos'], 2)
+        self.assertEqual(metricas['reutilizadas'], 1)
+        self.assertEqual(metricas['en_uso'], 0)
+        self.assertEqual(metricas['libres'], 1)
+
+    def test_close_devuelve_en_lugar_de_cerrar(self):
+        pool, creadas = crear_pool()
+
+        conn = pool.obtener()
+        conn.close()
+
+        self.assertTrue(creadas[0].abierta)
+        self.assertFalse(conn.is_connected())
+        with self.assertRaises(PoolError):
+            conn.cursor()
+
+    def test_devolver_cierra_transaccion_y_restaura_autocommit(self):
+        pool, creadas = crear_pool()
+
+        with pool.conexion() as conn:
+            conn.autocommit = True
+            creadas[0].in_transaction = True
+
+        self.assertEqual(creadas[0].rollbacks, 1)
+        self.assertFalse(creadas[0].autocommit)
+
+    def test_verifica_salud_al_prestar_conexion_inactiva(self):
+        pool, creadas = crear_pool(verificar_tras=0)
+
+        with pool.conexion():
+            pass
+        creadas[0].abierta = False
+
+        with pool.conexion():
+            pass
+
+        self.assertEqual(len(creadas), 2)
+        self.assertEqual(pool.metricas()['descartadas'], 1)
+
+    def test_no_verifica_conexion_usada_recientemente(self):
+        pool, creadas = crear_pool(verificar_tras=60)
+
+        with pool.conexion():
+            pass
+        with pool.conexion():
+            pass
+
+        self.assertEqual(creadas[0].pings, 0)
+
+    def test_desaloja_conexiones_inactivas(self):
+        pool, creadas = crear_pool(tamano=3, inactividad_maxima=0.05)
+
+        c1, c2 = pool.obtener(), pool.obtener()
+        c1.close()
+        c2.close()
+        time.sleep(0.1)
+
+        self.assertEqual(pool.desalojar_inactivas(), 2)
+        self.assertFalse(any(c.abierta for c in creadas))
+        self.assertEqual(pool.metricas()['abiertas'], 0)
+
+    def test_agotado_lanza_pool_error(self):
+        pool, _ = crear_pool(tamano=1)
+
+        conn = pool.obtener()
+        with self.assertRaises(PoolError):
+            pool.obtener(espera_maxima=0.05)
+        conn.close()
+
+        self.assertEqual(pool.metricas()['agotamientos'], 1)
+
+    def test_espera_hasta_que_se_libere(self):
+        pool, creadas = crear_pool(tamano=1)
+        conn = pool.obtener()
+
+        threading.Timer(0.05, conn.close).start()
+        with pool.conexion(espera_maxima=2):
+            pass
+
+        self.assertEqual(len(creadas), 1)
+        self.assertGreaterEqual(pool.metricas()['esperas'], 1)
+
+    def test_respeta_tamano_con_hilos(self):
+        pool, creadas = crear_pool(tamano=3)
+        errores = []
+
+        def trabajo():
+            try:
+                for _ in range(20):
+                    with pool.conexion(espera_maxima=5):
+                        time.sleep(0.001)
+            except Exception as e:
+                errores.append(e)
+
+        hilos = [threading.Thread(target=trabajo) for _ in range(8)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+        self.assertEqual(errores, [])
+        self.assertLessEqual(len(creadas), 3)
+        self.assertLessEqual(pool.metricas()['pico_en_uso'], 3)
+        self.assertEqual(pool.metricas()['en_uso'], 0)
+
+    def test_reservar_amplia_y_liberar_cierra_sobrantes(self):
+        pool, creadas = crear_pool(tamano=1, tamano_maximo=4)
+        liberar = pool.reservar(2)
+        conexiones = [pool.obtener(espera_maxima=0) for _ in range(3)]
+        with self.assertRaises(PoolError):
+            pool.reservar(2)
+
+        liberar()
+        liberar()  # Liberar dos veces no reduce de más
+        for conn in conexiones:
+            conn.close()
+
+        metricas = pool.metricas()
+        self.assertEqual((metricas['tamano'], metricas['abiertas'], metricas['libres']), (1, 1, 1))
+        self.assertEqual(sum(c.abierta for c in creadas), 1)
+
+
+class VentanaFalsa:
+    """Ventana de módulo que guarda una conexión del pool toda su vida, como self.conn = conectar()"""
+
+    def __init__(self):
+        self.conn = conectar()
+        self.al_destruir = []
+
+    def bind(self, evento, funcion, add=None):
+        self.al_destruir.append(funcion)
+
+    def destroy(self):
+        self.conn.close()
+        for funcion in self.al_destruir:
+            # <Destroy> llega primero por los widgets hijos
+            funcion(SimpleNamespace(widget=object()))
+            funcion(SimpleNamespace(widget=self))
+
+
+class TestVentanasEnProceso(unittest.TestCase):
+
+    def setUp(self):
+        self.pool, self.creadas = crear_pool(tamano=2, espera_maxima=0.05, tamano_maximo=2 + 4 * 6)
+        parches = [
+            mock.patch.object(pool_compartido, '_pool_instance', self.pool),
+            mock.patch.dict(launch_module.MODULE_LAUNCHERS,
+                            {clave: lambda user_data, master=None: VentanaFalsa()
+                             for clave in launch_module.MODULE_LAUNCHERS}),
+        ]
+        for parche in parches:
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def test_cada_ventana_tiene_conexion(self):
+        ventanas = [launch_module.open_module(clave, master="raiz")
+                    for clave in list(launch_module.MODULE_LAUNCHERS)[:6]]
+
+        self.assertTrue(all(v.conn is not None for v in ventanas))
+        self.assertEqual(self.pool.metricas()['agotamientos'], 0)
+
+        for ventana in ventanas:
+            ventana.destroy()
+        metricas = self.pool.metricas()
+        self.assertEqual(metricas['tamano'], 2)
+        self.assertLessEqual(metricas['abiertas'], 2)
+
+    def test_sin_lugar_falla_al_abrir(self):
+        ventanas = [launch_module.open_module("clients", master="raiz") for _ in range(6)]
+        with self.assertRaises(PoolError):
+            launch_module.open_module("clients", master="raiz")
+
+        ventanas[0].destroy()
+        self.assertIsNotNone(launch_module.open_module("clients", master="raiz").conn)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+test_registro_accesos.py
+Pruebas del log de accesos por lotes (src/auth/registro_accesos.py) y de
+los auxiliares de retención (scripts/retencion_log_accesos.py), sin base de
+datos: la escritura de cada lote se reemplaza por una lista.
+"""
+
+import sys
+import os
+import gzip
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'scripts'))
+
+from src.auth.registro_accesos import RegistroAccesos
+from retencion_log_accesos import (COLUMNAS, anexar_filas, fecha_de_corte, meses_entre,
+                                   ruta_archivo, ultimo_id_archivado)
+
+
+class RegistroFalso(RegistroAccesos):
+    """Guarda los lotes en lugar de insertarlos; falla mientras fallar > 0"""
+
+    def __init__(self, **opciones):
+        super().__init__(**opciones)
+        self.lotes = []
+        self.fallar = 0
+        self.escrito = threading.Event()
+
+    def _escribir_lote(self, eventos):
+        if self.fallar:
+            self.fallar -= 1
+            raise ConnectionError("sin base")
+        self.lotes.append([evento[0] for evento in eventos])
+        self.escrito.set()
+
+
+def esperar(condicion, limite=5.0):
+    fin = time.monotonic() + limite
+    while not condicion() and time.monotonic() < fin:
+        time.sleep(0.005)
+    return condicion()
+
+
+class TestRegistroAccesos(unittest.TestCase):
+
+    def test_lote_lleno_se_escribe_sin_esperar_el_intervalo(self):
+        registro = RegistroFalso(lote=3, intervalo=60)
+        for nombre in ("a", "b", "c", "d"):
+            registro.registrar(nombre, True)
+        self.assertTrue(registro.escrito.wait(5))
+        self.assertEqual(registro.lotes[0], ["a", "b", "c"])
+        registro.cerrar()
+        self.assertEqual(registro.lotes, [["a", "b", "c"], ["d"]])
+        self.assertEqual(registro.metricas()['escritos'], 4)
+
+    def test_intervalo_escribe_lo_pendiente(self):
+        registro = RegistroFalso(lote=100, intervalo=0.05)
+        registro.registrar("ana", False, "Contraseña incorrecta")
+        self.assertTrue(registro.escrito.wait(5))
+        self.assertEqual(registro.lotes, [["ana"]])
+        self.assertEqual(registro.metricas()['pendientes'], 0)
+        registro.cerrar()
+
+    def test_cola_llena_descarta_y_cuenta(self):
+        registro = RegistroFalso(capacidad=2, lote=100, intervalo=60)
+        for nombre in ("a", "b", "c"):
+            registro.registrar(nombre, True)
+        metricas = registro.metricas()
+        self.assertEqual((metricas['registrados'], metricas['descartados'], metricas['pendientes']), (3, 1, 2))
+        registro.cerrar()
+        self.assertEqual(registro.lotes, [["a", "b"]])
+
+    def test_lote_fallido_vuelve_al_frente(self):
+        registro = RegistroFalso(lote=2, intervalo=60)
+        registro.fallar = 1
+        registro._pendientes.extend((nombre, True, "", time.monotonic()) for nombre in "abc")
+        self.assertFalse(registro.vaciar())
+        self.assertEqual([e[0] for e in registro._pendientes], ["a", "b", "c"])
+        self.assertTrue(registro.vaciar())
+        self.assertEqual(registro.lotes, [["a", "b"], ["c"]])
+        self.assertEqual(registro.metricas()['errores'], 1)
+
+    def test_reintento_sin_cupo_cuenta_descartados(self):
+        registro = RegistroFalso(capacidad=3, lote=2, intervalo=60)
+        registro.fallar = 1
+        registro._pendientes.extend((nombre, True, "", time.monotonic()) for nombre in "abc")
+        eventos = [registro._pendientes.popleft() for _ in range(2)]
+        registro._pendientes.append(("x", True, "", time.monotonic()))
+        self.assertFalse(registro._escribir(eventos))
+        self.assertEqual(len(registro._pendientes), 3)
+        self.assertEqual(registro.metricas()['descartados'], 1)
+
+    def test_cerrar_escribe_y_no_acepta_mas(self):
+        registro = RegistroFalso(lote=100, intervalo=60)
+        registro.registrar("ana", True)
+        registro.cerrar()
+        self.assertEqual(registro.lotes, [["ana"]])
+        registro.registrar("tarde", True)
+        self.assertEqual(registro.metricas()['descartados'], 1)
+
+    def test_base_caida_reintenta_en_el_ciclo(self):
+        registro = RegistroFalso(lote=100, intervalo=0.02)
+        registro.fallar = 2
+        registro.registrar("ana", True)
+        self.assertTrue(esperar(lambda: registro.lotes == [["ana"]]))
+        self.assertEqual(registro.metricas()['errores'], 2)
+        registro.cerrar()
+
+
+class TestRetencion(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_corte_y_meses(self):
+        self.assertEqual(fecha_de_corte(6, date(2025, 3, 15)), datetime(2024, 9, 1))
+        self.assertEqual(fecha_de_corte(0, date(2025, 3, 15)), datetime(2025, 3, 1))
+        meses = meses_entre(datetime(2024, 11, 20, 8, 30), datetime(2025, 2, 1))
+        self.assertEqual([inicio.strftime("%Y-%m") for inicio, _ in meses], ["2024-11", "2024-12", "2025-01"])
+        self.assertEqual(meses[1], (datetime(2024, 12, 1), datetime(2025, 1, 1)))
+
+    def test_anexar_es_incremental(self):
+        ruta = ruta_archivo(self.directorio, datetime(2024, 5, 1))
+        self.assertTrue(ruta.endswith("log_accesos_2024-05.csv.gz"))
+        self.assertEqual(ultimo_id_archivado(ruta), 0)
+
+        fila = (None, 'ana', 'localhost', 1, datetime(2024, 5, 3, 9, 0), "Login exitoso")
+        self.assertEqual(anexar_filas(ruta, [(1,) + fila, (2,) + fila]), 2)
+        self.assertEqual(anexar_filas(ruta, [(7,) + fila]), 1)
+        self.assertEqual(anexar_filas(ruta, []), 0)
+        self.assertEqual(ultimo_id_archivado(ruta), 7)
+
+        with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+            lineas = archivo.read().splitlines()
+        self.assertEqual(lineas[0], ",".join(COLUMNAS))
+        self.assertEqual(len(lineas), 4)
+        self.assertFalse(os.path.exists(ruta + ".tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
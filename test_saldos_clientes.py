@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+test_saldos_clientes.py
+Pruebas de la tabla saldo_cliente (src/modules/deudas/saldos_clientes.py).
+
+Ejecuta el cálculo de saldos y vista_estado_cuenta_cliente real
+(data/sql/disfruleg_views.sql) sobre una base SQLite en memoria con deudas
+aleatorias, y comprueba que coinciden cliente por cliente. También prueba el
+verificador que compara la tabla guardada con deuda.
+"""
+
+import sys
+import os
+import re
+import random
+import sqlite3
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.deudas import saldos_clientes
+from src.modules.deudas.saldos_clientes import (COLUMNAS, _SELECT_SALDOS, calcular_saldos,
+                                                comparar_saldos, verificar_saldos)
+
+VISTAS_SQL = os.path.join(project_root, 'data', 'sql', 'disfruleg_views.sql')
+
+ESQUEMA = """
+    CREATE TABLE tipo_cliente (id_tipo_cliente INTEGER PRIMARY KEY, nombre_tipo TEXT);
+    CREATE TABLE grupo (id_grupo INTEGER PRIMARY KEY, clave_grupo TEXT, id_tipo_cliente INTEGER);
+    CREATE TABLE cliente (id_cliente INTEGER PRIMARY KEY, nombre_cliente TEXT, id_grupo INTEGER);
+    CREATE TABLE deuda (id_deuda INTEGER PRIMARY KEY, id_cliente INTEGER, monto REAL,
+                        monto_pagado REAL, fecha_generada TEXT, pagado BOOLEAN, fecha_pago TEXT);
+    CREATE TABLE saldo_cliente (id_cliente INTEGER PRIMARY KEY, saldo_pendiente REAL,
+                                total_deuda_pendiente REAL, total_deuda_pagada REAL,
+                                deudas_pendientes INTEGER, deudas_pagadas INTEGER,
+                                ultima_deuda_generada TEXT, ultimo_pago TEXT);
+"""
+
+
+def extraer_vista(sql, nombre):
+    """Retorna la definición CREATE VIEW de una vista del archivo de vistas"""
+    match = re.search(rf"CREATE OR REPLACE VIEW {nombre} AS(.*?);", sql, re.DOTALL)
+    return f"CREATE VIEW {nombre} AS{match.group(1)}"
+
+
+def crear_base(semilla=5, clientes=40, deudas=400):
+    azar = random.Random(semilla)
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(ESQUEMA)
+    conn.execute("INSERT INTO tipo_cliente VALUES (1, 'Mayoreo')")
+    conn.execute("INSERT INTO grupo VALUES (1, 'G1', 1)")
+    conn.executemany("INSERT INTO cliente VALUES (?, ?, 1)",
+                     [(i, f"Cliente {i}") for i in range(1, clientes + 1)])
+    inicio = date(2024, 1, 1)
+    filas = []
+    for id_deuda in range(1, deudas + 1):
+        # Los últimos clientes quedan sin deudas
+        id_cliente = azar.randint(1, clientes - 5)
+        monto = azar.randint(100, 50000) / 100
+        pagado = azar.random() < 0.5
+        abonado = monto if pagado else azar.choice([0, round(monto / 3, 2)])
+        generada = inicio + timedelta(days=azar.randint(0, 300))
+        fecha_pago = (generada + timedelta(days=azar.randint(0, 30))).isoformat() if pagado else None
+        filas.append((id_deuda, id_cliente, monto, abonado, generada.isoformat(), pagado, fecha_pago))
+    conn.executemany("INSERT INTO deuda VALUES (?, ?, ?, ?, ?, ?, ?)", filas)
+    return conn
+
+
+def guardar(conn, saldos):
+    conn.executemany(f"INSERT OR REPLACE INTO saldo_cliente VALUES ({', '.join('?' * len(COLUMNAS))})",
+                     list(saldos.values()))
+
+
+class TestCalculoIgualQueLaVista(unittest.TestCase):
+
+    def test_cada_cliente_coincide_con_la_vista(self):
+        conn = crear_base()
+        with open(VISTAS_SQL, encoding='utf-8') as archivo:
+            conn.execute(extraer_vista(archivo.read(), 'vista_estado_cuenta_cliente'))
+
+        calculados = calcular_saldos(conn.cursor())
+        vista = conn.execute(f"SELECT {', '.join(COLUMNAS)} FROM vista_estado_cuenta_cliente").fetchall()
+        self.assertEqual(len(calculados), len(vista))
+        self.assertEqual(comparar_saldos(calculados, {fila[0]: fila for fila in vista}), [])
+
+    def test_filtro_por_cliente(self):
+        conn = crear_base()
+        fila = conn.execute(_SELECT_SALDOS.format(filtro="c.id_cliente = ?"), (3,)).fetchall()
+        self.assertEqual(fila, [calcular_saldos(conn.cursor())[3]])
+        # Un cliente sin deudas tiene saldo en cero, no desaparece
+        self.assertEqual(conn.execute(_SELECT_SALDOS.format(filtro="c.id_cliente = ?"), (40,)).fetchall(),
+                         [(40, 0, 0, 0, 0, 0, None, None)])
+
+
+class TestVerificarSaldos(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = crear_base()
+        self.esperados = calcular_saldos(self.conn.cursor())
+
+    def test_consistente_sin_filas_de_clientes_sin_deuda(self):
+        guardar(self.conn, {i: fila for i, fila in self.esperados.items() if fila[4] or fila[5]})
+        self.assertEqual(verificar_saldos(self.conn), [])
+
+    def test_detecta_y_corrige_diferencias(self):
+        guardar(self.conn, self.esperados)
+        self.conn.execute("UPDATE saldo_cliente SET saldo_pendiente = saldo_pendiente + 10 WHERE id_cliente = 2")
+        self.conn.execute("DELETE FROM saldo_cliente WHERE id_cliente = 7")
+        with mock.patch.object(saldos_clientes, 'bloquear_saldo_cliente') as bloquear, \
+                mock.patch.object(saldos_clientes, 'actualizar_saldo_cliente') as actualizar:
+            diferencias = verificar_saldos(self.conn, corregir=True)
+        self.assertEqual([d['id_cliente'] for d in diferencias], [2, 7])
+        self.assertEqual(diferencias[0]['guardado']['saldo_pendiente'] - diferencias[0]['esperado']['saldo_pendiente'], 10)
+        self.assertEqual([c.args[1] for c in actualizar.call_args_list], [2, 7])
+        self.assertEqual([c.args[1] for c in bloquear.call_args_list], [2, 7])
+
+    def test_centavos_y_tipos_no_cuentan_como_diferencia(self):
+        esperado = {1: (1, 10.1, 10.1, 0, 1, 0, None, None)}
+        guardado = {1: (1, "10.10", 10.1000001, "0.00", 1, 0, None, None)}
+        self.assertEqual(comparar_saldos(esperado, guardado), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+test_tiempo_arranque.py
+Presupuesto de arranque: lo que main.py importa hasta mostrar el login debe
+tardar menos de PRESUPUESTO_LOGIN_S y no cargar bibliotecas pesadas ni
+conectarse a la base (scripts/perfil_importacion.py).
+"""
+
+import sys
+import os
+import subprocess
+import unittest
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'scripts'))
+
+from perfil_importacion import (CODIGO_LOGIN, PRESUPUESTO_LOGIN_S, mejor_de,
+                                parsear_importtime, pesados_importados)
+
+SALIDA = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _tkinter
+import time:      4393 |       4513 |   tkinter
+import time:        80 |         80 |     mysql.connector.errors
+import time:       900 |        980 |   mysql.connector
+import time:       321 |       5814 | main
+"""
+
+
+class TestParsearImporttime(unittest.TestCase):
+
+    def test_entradas_y_niveles(self):
+        entradas = parsear_importtime(SALIDA)
+        self.assertEqual([e['modulo'] for e in entradas],
+                         ["_tkinter", "tkinter", "mysql.connector.errors", "mysql.connector", "main"])
+        self.assertEqual([e['nivel'] for e in entradas], [2, 1, 2, 1, 0])
+        self.assertEqual(entradas[-1]['acumulado_us'], 5814)
+        self.assertEqual(pesados_importados(entradas), ["mysql"])
+
+
+class TestPresupuestoArranque(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.segundos, cls.entradas = mejor_de(3)
+
+    def test_login_sin_bibliotecas_pesadas(self):
+        self.assertEqual(pesados_importados(self.entradas), [],
+                         "Importar al primer uso, no en el camino al login")
+
+    def test_login_dentro_del_presupuesto(self):
+        self.assertLess(self.segundos, PRESUPUESTO_LOGIN_S,
+                        f"{CODIGO_LOGIN!r} tardó {self.segundos:.2f} s")
+
+    def test_importar_conexion_no_consulta_la_base(self):
+        resultado = subprocess.run(
+            [sys.executable, "-c", "import src.database.conexion as c; print(c.db_available)"],
+            cwd=project_root, capture_output=True, text=True)
+        if "No module named 'mysql'" in resultado.stderr:
+            self.skipTest("mysql-connector no instalado")
+        self.assertEqual(resultado.stdout.strip().splitlines()[-1], "None", resultado.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+test_ventas_diarias.py
+Pruebas del recálculo parcial del resumen ventas_diarias
+(src/modules/receipts/components/database.py).
+
+Ejecuta las consultas reales sobre una base SQLite en memoria: tras borrar
+las facturas de un cliente, recalcular solo sus fechas (o tras cambiar un
+precio, solo ese producto y grupo) debe dejar el resumen igual que
+reconstruirlo completo.
+"""
+
+import sys
+import os
+import random
+import sqlite3
+import unittest
+from datetime import date, timedelta
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.modules.receipts.components.database import (recalcular_ventas_diarias_fechas,
+                                                      recalcular_ventas_diarias_producto)
+
+ESQUEMA = """
+    CREATE TABLE tipo_cliente (id_tipo_cliente INTEGER PRIMARY KEY, descuento REAL);
+    CREATE TABLE grupo (id_grupo INTEGER PRIMARY KEY, id_tipo_cliente INTEGER);
+    CREATE TABLE cliente (id_cliente INTEGER PRIMARY KEY, id_grupo INTEGER);
+    CREATE TABLE precio_por_grupo (id_grupo INTEGER, id_producto INTEGER, precio_base REAL);
+    CREATE TABLE factura (id_factura INTEGER PRIMARY KEY, id_cliente INTEGER, fecha_factura TEXT);
+    CREATE TABLE detalle_factura (id_detalle INTEGER PRIMARY KEY, id_factura INTEGER,
+                                  id_producto INTEGER, cantidad_factura REAL,
+                                  precio_unitario_venta REAL);
+    CREATE TABLE ventas_diarias (fecha TEXT, id_producto INTEGER, id_grupo INTEGER,
+                                 cantidad_vendida REAL, ingresos REAL, ingresos_registrados REAL,
+                                 lineas INTEGER, facturas INTEGER,
+                                 PRIMARY KEY (fecha, id_producto, id_grupo));
+"""
+
+
+class CursorSQLite:
+    """Cursor de sqlite3 que acepta los marcadores %s de mysql.connector"""
+
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+
+    def execute(self, consulta, parametros=()):
+        self.cursor.execute(consulta.replace("%s", "?"), [str(p) for p in parametros])
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+
+def crear_base(semilla=4):
+    azar = random.Random(semilla)
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(ESQUEMA)
+    conn.executemany("INSERT INTO tipo_cliente VALUES (?, ?)", [(1, 20.0), (2, 0.0)])
+    conn.executemany("INSERT INTO grupo VALUES (?, ?)", [(1, 1), (2, 2)])
+    conn.executemany("INSERT INTO cliente VALUES (?, ?)", [(i, azar.randint(1, 2)) for i in range(1, 11)])
+    conn.executemany("INSERT INTO precio_por_grupo VALUES (?, ?, ?)",
+                     [(g, p, float(azar.randint(5, 50))) for g in (1, 2) for p in range(1, 16)])
+    inicio = date(2024, 3, 1)
+    conn.executemany("INSERT INTO factura VALUES (?, ?, ?)",
+                     [(i, azar.randint(1, 10), (inicio + timedelta(days=azar.randint(0, 20))).isoformat())
+                      for i in range(1, 121)])
+    conn.executemany("INSERT INTO detalle_factura VALUES (?, ?, ?, ?, ?)",
+                     [(i, azar.randint(1, 120), azar.randint(1, 15), float(azar.randint(1, 9)), 10.0)
+                      for i in range(1, 601)])
+    return conn
+
+
+def todas_las_fechas(conn):
+    return [fila[0] for fila in conn.execute("SELECT DISTINCT fecha_factura FROM factura")]
+
+
+def resumen(conn):
+    return conn.execute("SELECT * FROM ventas_diarias ORDER BY fecha, id_producto, id_grupo").fetchall()
+
+
+class TestRecalcularFechas(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = crear_base()
+        recalcular_ventas_diarias_fechas(CursorSQLite(self.conn), todas_las_fechas(self.conn))
+
+    def test_borrar_facturas_de_un_cliente(self):
+        id_cliente = 3
+        fechas = [fila[0] for fila in self.conn.execute(
+            "SELECT DISTINCT fecha_factura FROM factura WHERE id_cliente = ?", (id_cliente,))]
+        ingresos_antes = self.conn.execute("SELECT SUM(ingresos) FROM ventas_diarias").fetchone()[0]
+        self.conn.execute("DELETE FROM detalle_factura WHERE id_factura IN "
+                          "(SELECT id_factura FROM factura WHERE id_cliente = ?)", (id_cliente,))
+        self.conn.execute("DELETE FROM factura WHERE id_cliente = ?", (id_cliente,))
+
+        recalcular_ventas_diarias_fechas(CursorSQLite(self.conn), fechas)
+        parcial = resumen(self.conn)
+
+        self.conn.execute("DELETE FROM ventas_diarias")
+        recalcular_ventas_diarias_fechas(CursorSQLite(self.conn), todas_las_fechas(self.conn))
+        self.assertEqual(parcial, resumen(self.conn))
+        self.assertLess(sum(fila[4] for fila in parcial), ingresos_antes)
+
+    def test_cambio_de_precio_de_un_grupo(self):
+        id_producto, id_grupo = 7, 1
+        self.conn.execute("UPDATE precio_por_grupo SET precio_base = precio_base * 2 "
+                          "WHERE id_producto = ? AND id_grupo = ?", (id_producto, id_grupo))
+
+        recalcular_ventas_diarias_producto(CursorSQLite(self.conn), id_producto, id_grupo)
+        parcial = resumen(self.conn)
+
+        self.conn.execute("DELETE FROM ventas_diarias")
+        recalcular_ventas_diarias_fechas(CursorSQLite(self.conn), todas_las_fechas(self.conn))
+        self.assertEqual(parcial, resumen(self.conn))
+
+    def test_sin_fechas_no_consulta(self):
+        self.assertEqual(recalcular_ventas_diarias_fechas(None, []), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
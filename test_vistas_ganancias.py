@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+test_vistas_ganancias.py
+Regresión de las vistas de ganancias (data/sql/disfruleg_views.sql).
+
+Ejecuta las definiciones reales de las vistas sobre una base SQLite en memoria
+con datos aleatorios y compara sus totales contra una agregación directa en
+Python. Detecta el duplicado ventas × compras que inflaba los SUM. La
+ganancia es contra el costo de lo vendido (costo_venta), no contra las compras.
+"""
+
+import sys
+import os
+import re
+import random
+import sqlite3
+import unittest
+from collections import defaultdict
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+VISTAS_SQL = os.path.join(project_root, 'data', 'sql', 'disfruleg_views.sql')
+
+VISTAS = [
+    'vista_ventas_por_producto_grupo',
+    'vista_compras_por_producto',
+    'vista_costo_ventas_por_producto_grupo',
+    'vista_ganancias_por_producto_grupo',
+    'vista_ganancias_por_producto',
+]
+
+ESQUEMA = """
+    CREATE TABLE tipo_cliente (id_tipo_cliente INTEGER PRIMARY KEY, nombre_tipo TEXT, descuento REAL);
+    CREATE TABLE grupo (id_grupo INTEGER PRIMARY KEY, clave_grupo TEXT, id_tipo_cliente INTEGER);
+    CREATE TABLE cliente (id_cliente INTEGER PRIMARY KEY, id_grupo INTEGER);
+    CREATE TABLE producto (id_producto INTEGER PRIMARY KEY, nombre_producto TEXT,
+                           unidad_producto TEXT, stock REAL);
+    CREATE TABLE precio_por_grupo (id_grupo INTEGER, id_producto INTEGER, precio_base REAL);
+    CREATE TABLE factura (id_factura INTEGER PRIMARY KEY, id_cliente INTEGER);
+    CREATE TABLE detalle_factura (id_detalle INTEGER PRIMARY KEY, id_factura INTEGER,
+                                  id_producto INTEGER, cantidad_factura REAL,
+                                  precio_unitario_venta REAL);
+    CREATE TABLE compra (id_compra INTEGER PRIMARY KEY, id_producto INTEGER,
+                         cantidad_compra REAL, precio_unitario_compra REAL);
+    CREATE TABLE costo_venta (id_detalle INTEGER PRIMARY KEY, id_factura INTEGER, id_producto INTEGER,
+                              fecha TEXT, cantidad REAL, costo REAL, cantidad_sin_costo REAL);
+"""
+
+
+def extraer_vista(sql, nombre):
+    """Retorna la definición CREATE VIEW de una vista del archivo de vistas"""
+    match = re.search(rf"CREATE OR REPLACE VIEW {nombre} AS(.*?);", sql, re.DOTALL)
+    return f"CREATE VIEW {nombre} AS{match.group(1)}"
+
+
+def generar_datos(semilla=11):
+    azar = random.Random(semilla)
+    datos = {
+        # Con 20% de descuento ningún subtotal cae a medio centavo, así el
+        # redondeo de SQL y el de Python coinciden
+        'tipo_cliente': [(1, 'Mayoreo', 20.0), (2, 'Menudeo', 0.0)],
+        'grupo': [(1, 'G1', 1), (2, 'G2', 2), (3, 'G3', 1)],
+        'cliente': [(i, azar.randint(1, 3)) for i in range(1, 21)],
+        # El producto 30 nunca se vende ni se compra
+        'producto': [(i, f'Producto {i}', 'kg', float(azar.randint(0, 500))) for i in range(1, 31)],
+    }
+    # Algunos productos quedan sin precio en algún grupo
+    datos['precio_por_grupo'] = [
+        (g, p, round(azar.uniform(5, 50), 2))
+        for g in (1, 2, 3) for p in range(1, 31) if azar.random() > 0.1
+    ]
+    datos['factura'] = [(i, azar.randint(1, 20)) for i in range(1, 201)]
+    datos['detalle_factura'] = [
+        (i, azar.randint(1, 200), azar.randint(1, 29), float(azar.randint(1, 20)), 0.0)
+        for i in range(1, 1501)
+    ]
+    datos['compra'] = [
+        (i, azar.randint(1, 25), float(azar.randint(1, 100)), round(azar.uniform(2, 40), 2))
+        for i in range(1, 301)
+    ]
+    # Líneas ya costeadas; el resto aún no pasa por actualizar_costos
+    datos['costo_venta'] = [
+        (id_detalle, id_factura, id_producto, '2024-01-01', cantidad,
+         round(cantidad * azar.uniform(2, 40), 2), float(azar.random() < 0.05))
+        for id_detalle, id_factura, id_producto, cantidad, _ in datos['detalle_factura']
+        if azar.random() > 0.1
+    ]
+    return datos
+
+
+def agregar_en_python(datos):
+    """Totales esperados por producto y por (producto, grupo), línea por línea"""
+    descuento_grupo = {g: dict((t, d) for t, _, d in datos['tipo_cliente'])[t]
+                       for g, _, t in datos['grupo']}
+    grupo_cliente = dict(datos['cliente'])
+    cliente_factura = dict(datos['factura'])
+    precios = {(g, p): precio for g, p, precio in datos['precio_por_grupo']}
+
+    ventas = defaultdict(lambda: {'cantidad': 0.0, 'ingresos': None})
+    for _, id_factura, id_producto, cantidad, _ in datos['detalle_factura']:
+        id_grupo = grupo_cliente[cliente_factura[id_factura]]
+        for clave in ((id_producto, None), (id_producto, id_grupo)):
+            ventas[clave]['cantidad'] += cantidad
+            precio = precios.get((id_grupo, id_producto))
+            if precio is not None:
+                subtotal = round(cantidad * precio * (1 - descuento_grupo[id_grupo] / 100), 2)
+                ventas[clave]['ingresos'] = (ventas[clave]['ingresos'] or 0) + subtotal
+
+    costos = defaultdict(float)
+    for _, id_producto, cantidad, precio in datos['compra']:
+        costos[id_producto] += cantidad * precio
+
+    costo_ventas = defaultdict(float)
+    for _, id_factura, id_producto, _, _, costo, _ in datos['costo_venta']:
+        id_grupo = grupo_cliente[cliente_factura[id_factura]]
+        costo_ventas[(id_producto, None)] += costo
+        costo_ventas[(id_producto, id_grupo)] += costo
+    return ventas, costos, costo_ventas
+
+
+class TestVistasGanancias(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.datos = generar_datos()
+        cls.ventas, cls.costos, cls.costo_ventas = agregar_en_python(cls.datos)
+
+        cls.db = sqlite3.connect(':memory:')
+        cls.db.row_factory = sqlite3.Row
+        cls.db.executescript(ESQUEMA)
+        for tabla, filas in cls.datos.items():
+            marcadores = ", ".join("?" * len(filas[0]))
+            cls.db.executemany(f"INSERT INTO {tabla} VALUES ({marcadores})", filas)
+
+        with open(VISTAS_SQL, encoding='utf-8') as f:
+            sql = f.read()
+        for vista in VISTAS:
+            cls.db.execute(extraer_vista(sql, vista))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+
+    def test_ganancias_por_producto(self):
+        filas = self.db.execute("SELECT * FROM vista_ganancias_por_producto").fetchall()
+        self.assertEqual(len(filas), len(self.datos['producto']))
+
+        for fila in filas:
+            id_producto = fila['id_producto']
+            esperado = self.ventas.get((id_producto, None))
+            costo = self.costos.get(id_producto, 0.0)
+            costo_ventas = self.costo_ventas.get((id_producto, None), 0.0)
+            with self.subTest(producto=id_producto):
+                self.assertAlmostEqual(fila['costos_totales'], costo, places=2)
+                self.assertAlmostEqual(fila['costo_ventas'], costo_ventas, places=2)
+                if esperado is None:
+                    self.assertIsNone(fila['cantidad_vendida'])
+                    self.assertIsNone(fila['ganancia_total'])
+                    continue
+                self.assertAlmostEqual(fila['cantidad_vendida'], esperado['cantidad'], places=2)
+                if esperado['ingresos'] is None:
+                    self.assertIsNone(fila['ingresos_totales'])
+                else:
+                    self.assertAlmostEqual(fila['ingresos_totales'], esperado['ingresos'], places=2)
+                    self.assertAlmostEqual(fila['ganancia_total'], esperado['ingresos'] - costo_ventas, places=2)
+                    self.assertAlmostEqual(fila['margen_ganancia_porcentaje'],
+                                           (esperado['ingresos'] - costo_ventas) / esperado['ingresos'] * 100,
+                                           places=1)
+
+    def test_ganancias_por_producto_grupo(self):
+        filas = self.db.execute(
+            "SELECT * FROM vista_ganancias_por_producto_grupo WHERE id_grupo IS NOT NULL"
+        ).fetchall()
+        esperadas = {clave: v for clave, v in self.ventas.items() if clave[1] is not None}
+        self.assertEqual(len(filas), len(esperadas))
+
+        for fila in filas:
+            esperado = esperadas[(fila['id_producto'], fila['id_grupo'])]
+            with self.subTest(producto=fila['id_producto'], grupo=fila['id_grupo']):
+                self.assertAlmostEqual(fila['cantidad_vendida'], esperado['cantidad'], places=2)
+                self.assertAlmostEqual(fila['costos_totales'],
+                                       self.costos.get(fila['id_producto'], 0.0), places=2)
+                costo_ventas = self.costo_ventas.get((fila['id_producto'], fila['id_grupo']), 0.0)
+                self.assertAlmostEqual(fila['costo_ventas'], costo_ventas, places=2)
+                if esperado['ingresos'] is not None:
+                    self.assertAlmostEqual(fila['ingresos_totales'], esperado['ingresos'], places=2)
+                    self.assertAlmostEqual(fila['ganancia_total'], esperado['ingresos'] - costo_ventas, places=2)
+
+    def test_totales_generales(self):
+        fila = self.db.execute("""
+            SELECT SUM(cantidad_vendida) AS cantidad, SUM(costos_totales) AS costos
+            FROM vista_ganancias_por_producto
+        """).fetchone()
+        self.assertAlmostEqual(fila['cantidad'], sum(d[3] for d in self.datos['detalle_factura']), places=2)
+        self.assertAlmostEqual(fila['costos'], sum(c[2] * c[3] for c in self.datos['compra']), places=2)
+
+    def test_producto_sin_movimientos(self):
+        fila = self.db.execute(
+            "SELECT * FROM vista_ganancias_por_producto WHERE id_producto = 30"
+        ).fetchone()
+        self.assertIsNone(fila['ingresos_totales'])
+        self.assertEqual(fila['costos_totales'], 0)
+        self.assertEqual(fila['costo_ventas'], 0)
+        self.assertEqual(fila['margen_ganancia_porcentaje'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Script para actualizar la vista vista_historial_pagos con el campo folio_numero
+Script para actualizar la vista vista_historial_pagos (un registro por pago de la tabla pago, migración 010)
 """
 
 import mysql.connector
@@ -14,7 +14,7 @@ try:
     from src.database.conexion import conectar
 
     def actualizar_vista():
-        """Actualiza la vista vista_historial_pagos para incluir folio_numero"""
+        """Actualiza la vista vista_historial_pagos sobre la tabla pago"""
         conn = conectar()
         if not conn:
             print("❌ No se pudo conectar a la base de datos")
@@ -22,31 +22,31 @@ try:
 
         cursor = conn.cursor()
         try:
-            # Recrear la vista con el campo folio_numero
+            # Recrear la vista sobre el registro de pagos
             vista_sql = """
             CREATE OR REPLACE VIEW vista_historial_pagos AS
             SELECT
-                d.id_deuda,
-                c.id_cliente,
+                p.id_pago,
+                p.id_deuda,
+                p.id_cliente,
                 c.nombre_cliente,
                 f.id_factura,
                 f.folio_numero,
                 d.monto AS monto_total,
-                d.monto_pagado,
-                d.fecha_pago,
-                d.metodo_pago,
-                d.referencia_pago,
+                p.monto AS monto_pagado,
+                p.fecha_pago,
+                p.metodo_pago,
+                p.referencia_pago,
                 u.username AS registrado_por,
-                d.descripcion,
                 g.clave_grupo,
                 tc.nombre_tipo AS tipo_cliente
-            FROM deuda d
-            JOIN cliente c ON d.id_cliente = c.id_cliente
+            FROM pago p
+            JOIN deuda d ON p.id_deuda = d.id_deuda
+            JOIN cliente c ON p.id_cliente = c.id_cliente
             JOIN factura f ON d.id_factura = f.id_factura
             JOIN grupo g ON c.id_grupo = g.id_grupo
             JOIN tipo_cliente tc ON g.id_tipo_cliente = tc.id_tipo_cliente
-            LEFT JOIN usuarios_sistema u ON d.descripcion LIKE CONCAT('%Operador:%', u.username, '%')
-            WHERE d.pagado = TRUE;
+            LEFT JOIN usuarios_sistema u ON p.id_usuario = u.id_usuario;
             """
 
             cursor.execute(vista_sql)